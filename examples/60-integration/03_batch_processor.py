@@ -1,18 +1,17 @@
 """
-Batch processing with concurrent.futures
+Batch processing with Command.map
 
 Run:
   python examples/60-integration/03_batch_processor.py
 
 Notes:
   - Demonstrates parallel processing of inputs with commands
-  - Uses ThreadPool for portability across environments
+  - Command.map bounds concurrency and returns per-item errors in place
   - Offline: export ALLOY_BACKEND=fake
 """
 
 from __future__ import annotations
 
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 from alloy import command, configure
 from dotenv import load_dotenv
@@ -38,13 +37,11 @@ def review_ticket(ticket_id: int, description: str) -> str:
 
 def process_batch(tickets: list[tuple[int, str]], max_workers: int = 4) -> list[Summary]:
     results: list[Summary] = []
-    with ThreadPoolExecutor(max_workers=max_workers) as ex:
-        futs = {ex.submit(review_ticket, tid, desc): tid for (tid, desc) in tickets}
-        for f in as_completed(futs):
-            try:
-                results.append(f.result())
-            except Exception as e:
-                print("Error:", e)
+    for r in review_ticket.map(tickets, concurrency=max_workers, unpack=True):
+        if isinstance(r, Exception):
+            print("Error:", r)
+        else:
+            results.append(r)
     return results
 
 
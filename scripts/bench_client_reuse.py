@@ -0,0 +1,124 @@
+"""
+Benchmark backend/client reuse against a local stub OpenAI server.
+
+Usage:
+  python scripts/bench_client_reuse.py [--calls 300]
+
+Starts an in-process HTTP server that mimics the Responses API, then runs a
+text command repeatedly in two modes:
+
+- fresh:  ``alloy.shutdown()`` after every call, so each call builds a new
+          backend, SDK client and connection pool (pre-registry behavior).
+- shared: the process-wide registry reuses one backend and its keep-alive
+          connections across calls.
+
+No provider keys or network access are required.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+_RESPONSE = json.dumps(
+    {
+        "id": "resp_stub",
+        "object": "response",
+        "created_at": 0,
+        "model": "gpt-5-mini",
+        "status": "completed",
+        "parallel_tool_calls": True,
+        "tool_choice": "auto",
+        "tools": [],
+        "output": [
+            {
+                "type": "message",
+                "id": "msg_stub",
+                "role": "assistant",
+                "status": "completed",
+                "content": [{"type": "output_text", "text": "ok", "annotations": []}],
+            }
+        ],
+    }
+).encode()
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self) -> None:
+        super().setup()
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def do_POST(self) -> None:  # noqa: N802 - http.server API
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(_RESPONSE)))
+        self.end_headers()
+        self.wfile.write(_RESPONSE)
+
+    def log_message(self, format: str, *args: object) -> None:
+        return
+
+
+def _start_server() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _run(calls: int, *, fresh: bool) -> float:
+    import alloy
+
+    @alloy.command(model="gpt-5-mini")
+    def greet() -> str:
+        return "Say ok."
+
+    greet()
+    alloy.shutdown()
+    t0 = time.perf_counter()
+    for _ in range(calls):
+        greet()
+        if fresh:
+            alloy.shutdown()
+    dt = time.perf_counter() - t0
+    alloy.shutdown()
+    return calls / dt
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=300)
+    args = parser.parse_args()
+
+    server = _start_server()
+    host, port = server.server_address[:2]
+    if isinstance(host, bytes):
+        host = host.decode()
+    os.environ["OPENAI_BASE_URL"] = f"http://{host}:{port}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "sk-stub")
+    os.environ.pop("ALLOY_BACKEND", None)
+    try:
+        fresh = _run(args.calls, fresh=True)
+        shared = _run(args.calls, fresh=False)
+    finally:
+        server.shutdown()
+    print(f"fresh backend per call : {fresh:8.1f} calls/s")
+    print(f"shared registry backend: {shared:8.1f} calls/s  ({shared / fresh:.2f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,58 @@
+"""
+Micro-benchmark config resolution cost per call.
+
+Usage:
+  python scripts/bench_config.py [--iterations 200000]
+
+Compares the memoized fast path of ``get_config`` against a forced full
+merge (generation bumped before every call, equivalent to resolving all
+layers from scratch), with and without per-call overrides.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=200_000)
+    args = parser.parse_args()
+    n = args.iterations
+
+    from alloy import config as cfg_mod
+
+    cfg_mod.configure(model="gpt-5-mini", temperature=0.2)
+    overrides = {"model": "gpt-5-mini", "max_tokens": 256, "system": "terse"}
+    plan = cfg_mod.compile_overrides(overrides)
+
+    def full_merge() -> None:
+        cfg_mod._bump_generation()
+        cfg_mod.get_config()
+
+    def full_merge_overrides() -> None:
+        cfg_mod._bump_generation()
+        cfg_mod.get_config(overrides)
+
+    cases = [
+        ("get_config() full merge", full_merge),
+        ("get_config() memoized", lambda: cfg_mod.get_config()),
+        ("get_config(dict) full merge", full_merge_overrides),
+        ("get_config(dict) memoized layers", lambda: cfg_mod.get_config(overrides)),
+        ("get_config(OverridePlan)", lambda: cfg_mod.get_config(plan)),
+    ]
+    for name, fn in cases:
+        fn()
+        dt = min(timeit.repeat(fn, number=n, repeat=3))
+        print(f"{name:34s} {dt / n * 1e6:8.3f} us/call")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,132 @@
+"""
+Benchmark ``parse_output`` on large list-of-dataclass outputs.
+
+Usage:
+  python scripts/bench_parse_output.py [--items 10000] [--repeat 5]
+
+Compares the compiled decoder path used by ``parse_output`` against the
+previous implementation, which re-derived the schema on every parse and
+re-dispatched on the type (origin/args, dataclass/TypedDict checks) for
+every element.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import timeit
+from dataclasses import dataclass, fields
+from pathlib import Path
+from typing import Any, Optional, Union, get_args, get_origin
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+
+@dataclass
+class Address:
+    city: str
+    zip: str
+
+
+@dataclass
+class Person:
+    name: str
+    age: int
+    score: float
+    active: bool
+    tags: list[str]
+    address: Address
+    nickname: Optional[str] = None
+
+
+def legacy_is_typeddict(tp: Any) -> bool:
+    try:
+        from typing_extensions import is_typeddict
+
+        return bool(is_typeddict(tp))
+    except Exception:
+        return False
+
+
+def legacy_coerce(tp: Any, value: Any) -> Any:
+    """The per-call dispatching coercion ``parse_output`` used before compilation."""
+    from alloy.types import _get_type_hints, is_dataclass_type
+
+    origin = get_origin(tp)
+    args = get_args(tp)
+    if tp is Any:
+        return value
+    if tp in (str, int, float):
+        return tp(value)
+    if tp is bool:
+        return value if isinstance(value, bool) else str(value).strip().lower() == "true"
+    if origin is Union:
+        if value is None:
+            return None
+        return legacy_coerce(next(a for a in args if a is not type(None)), value)
+    if origin is list:
+        return [legacy_coerce(args[0], v) for v in value] if isinstance(value, list) else value
+    if is_dataclass_type(tp) and isinstance(value, dict):
+        hints = _get_type_hints(tp)
+        return tp(
+            **{
+                f.name: legacy_coerce(hints.get(f.name, f.type), value[f.name])
+                for f in fields(tp)
+                if f.name in value
+            }
+        )
+    if legacy_is_typeddict(tp) and isinstance(value, dict):
+        hints = _get_type_hints(tp)
+        return {k: legacy_coerce(t, value[k]) for k, t in hints.items() if k in value}
+    return value
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    from alloy import types as types_mod
+
+    tp = list[Person]
+    payload = json.dumps(
+        {
+            "value": [
+                {
+                    "name": f"user{i}",
+                    "age": i % 90,
+                    "score": i / 7,
+                    "active": i % 2 == 0,
+                    "tags": ["a", "b"],
+                    "address": {"city": "Athens", "zip": f"{i:05d}"},
+                    "nickname": None,
+                }
+                for i in range(args.items)
+            ]
+        }
+    )
+
+    def legacy() -> None:
+        data = json.loads(payload)
+        schema = types_mod.to_json_schema(tp)
+        if schema and schema.get("type") != "object":
+            data = data["value"]
+        legacy_coerce(tp, data)
+
+    def compiled() -> None:
+        types_mod.parse_output(tp, payload)
+
+    json_only = min(timeit.repeat(lambda: json.loads(payload), number=1, repeat=args.repeat))
+    print(f"items={args.items}  json.loads alone: {json_only * 1e3:8.2f} ms")
+    for name, fn in [("per-call dispatch", legacy), ("compiled decoder", compiled)]:
+        fn()
+        dt = min(timeit.repeat(fn, number=1, repeat=args.repeat))
+        print(f"{name:26s} {dt * 1e3:8.2f} ms  ({(dt - json_only) * 1e3:8.2f} ms decode)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -11,7 +11,15 @@ from .tool import tool
 from .tool import require, ensure
 from .ask import ask
 from .config import configure
-from .errors import CommandError, ToolError, ConfigurationError, ToolLoopLimitExceeded
+from .usage import CommandResult, usage_scope
+from .models.registry import shutdown, aclose
+from .errors import (
+    CommandError,
+    ToolError,
+    ConfigurationError,
+    ToolLoopLimitExceeded,
+    BudgetExceeded,
+)
 
 __all__ = [
     "command",
@@ -20,8 +28,13 @@ __all__ = [
     "ensure",
     "ask",
     "configure",
+    "usage_scope",
+    "CommandResult",
+    "shutdown",
+    "aclose",
     "CommandError",
     "ToolError",
     "ConfigurationError",
     "ToolLoopLimitExceeded",
+    "BudgetExceeded",
 ]
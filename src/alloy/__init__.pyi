@@ -6,25 +6,79 @@ from typing import (
     overload,
     Coroutine,
     Iterable,
+    Iterator,
     AsyncIterable,
+    AsyncIterator,
     Protocol,
     Generic,
 )
 
-from .errors import CommandError, ToolError, ConfigurationError, ToolLoopLimitExceeded
+from .batch import AsyncCommandMap, CommandMap
+from .errors import (
+    CommandError,
+    ToolError,
+    ConfigurationError,
+    ToolLoopLimitExceeded,
+    BudgetExceeded,
+)
+from .usage import CommandResult as CommandResult, usage_scope as usage_scope
 
 P = ParamSpec("P")
 T_co = TypeVar("T_co", covariant=True)
 
 class SyncCommandFn(Protocol, Generic[P, T_co]):
     def __call__(self, *args: P.args, **kwargs: P.kwargs) -> T_co: ...
-    def stream(self, *args: P.args, **kwargs: P.kwargs) -> Iterable[str]: ...
+    def stream(self, *args: P.args, **kwargs: P.kwargs) -> Iterable[Any]: ...
+    def stream_items(self, *args: P.args, **kwargs: P.kwargs) -> Iterator[Any]: ...
+    def astream_items(self, *args: P.args, **kwargs: P.kwargs) -> AsyncIterator[Any]: ...
     def async_(self, *args: P.args, **kwargs: P.kwargs) -> Coroutine[Any, Any, T_co]: ...
+    def with_usage(self, *args: P.args, **kwargs: P.kwargs) -> CommandResult[T_co]: ...
+    def map(
+        self,
+        items: Iterable[Any],
+        *,
+        concurrency: int = ...,
+        ordered: bool = ...,
+        return_exceptions: bool = ...,
+        unpack: bool = ...,
+    ) -> CommandMap: ...
+    def amap(
+        self,
+        items: Iterable[Any] | AsyncIterable[Any],
+        *,
+        concurrency: int = ...,
+        ordered: bool = ...,
+        return_exceptions: bool = ...,
+        unpack: bool = ...,
+    ) -> AsyncCommandMap: ...
 
 class AsyncCommandFn(Protocol, Generic[P, T_co]):
     def __call__(self, *args: P.args, **kwargs: P.kwargs) -> Coroutine[Any, Any, T_co]: ...
-    def stream(self, *args: P.args, **kwargs: P.kwargs) -> AsyncIterable[str]: ...
+    def stream(self, *args: P.args, **kwargs: P.kwargs) -> AsyncIterable[Any]: ...
+    def stream_items(self, *args: P.args, **kwargs: P.kwargs) -> AsyncIterator[Any]: ...
+    def astream_items(self, *args: P.args, **kwargs: P.kwargs) -> AsyncIterator[Any]: ...
     def async_(self, *args: P.args, **kwargs: P.kwargs) -> Coroutine[Any, Any, T_co]: ...
+    def with_usage(
+        self, *args: P.args, **kwargs: P.kwargs
+    ) -> Coroutine[Any, Any, CommandResult[T_co]]: ...
+    def map(
+        self,
+        items: Iterable[Any],
+        *,
+        concurrency: int = ...,
+        ordered: bool = ...,
+        return_exceptions: bool = ...,
+        unpack: bool = ...,
+    ) -> CommandMap: ...
+    def amap(
+        self,
+        items: Iterable[Any] | AsyncIterable[Any],
+        *,
+        concurrency: int = ...,
+        ordered: bool = ...,
+        return_exceptions: bool = ...,
+        unpack: bool = ...,
+    ) -> AsyncCommandMap: ...
 
 class _CommandDecorator(Protocol, Generic[T_co]):
     @overload
@@ -47,6 +101,7 @@ def command(
     system: str | None = ...,
     retry: int | None = ...,
     retry_on: type[BaseException] | None = ...,
+    cache: bool | None = ...,
 ) -> SyncCommandFn[P, T_co]: ...
 @overload
 def command(
@@ -61,6 +116,7 @@ def command(
     system: str | None = ...,
     retry: int | None = ...,
     retry_on: type[BaseException] | None = ...,
+    cache: bool | None = ...,
 ) -> AsyncCommandFn[P, T_co]: ...
 @overload
 def command(
@@ -75,6 +131,7 @@ def command(
     system: str | None = ...,
     retry: int | None = ...,
     retry_on: type[BaseException] | None = ...,
+    cache: bool | None = ...,
 ) -> SyncCommandFn[P, str]: ...
 @overload
 def command(
@@ -89,6 +146,7 @@ def command(
     system: str | None = ...,
     retry: int | None = ...,
     retry_on: type[BaseException] | None = ...,
+    cache: bool | None = ...,
 ) -> AsyncCommandFn[P, str]: ...
 @overload
 def command(
@@ -101,6 +159,7 @@ def command(
     system: str | None = ...,
     retry: int | None = ...,
     retry_on: type[BaseException] | None = ...,
+    cache: bool | None = ...,
 ) -> _CommandDecorator[T_co]: ...
 @overload
 def command(
@@ -113,6 +172,7 @@ def command(
     system: str | None = ...,
     retry: int | None = ...,
     retry_on: type[BaseException] | None = ...,
+    cache: bool | None = ...,
 ) -> _CommandDecorator[str]: ...
 
 class _AskNamespace:
@@ -149,6 +209,8 @@ def ensure(
     predicate: Callable[[Any], bool], message: str
 ) -> Callable[[Callable[..., Any]], Callable[..., Any]]: ...
 def configure(**kwargs: Any) -> None: ...
+def shutdown() -> None: ...
+async def aclose() -> None: ...
 
 ask: _AskNamespace
 
@@ -159,8 +221,13 @@ __all__ = [
     "ensure",
     "ask",
     "configure",
+    "usage_scope",
+    "CommandResult",
+    "shutdown",
+    "aclose",
     "CommandError",
     "ToolError",
     "ConfigurationError",
     "ToolLoopLimitExceeded",
+    "BudgetExceeded",
 ]
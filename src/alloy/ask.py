@@ -3,9 +3,23 @@ from __future__ import annotations
 from collections.abc import Iterable
 from typing import Any
 
+from . import events as _events
+from . import usage as _usage
+from .cache import cache_key, get_response_cache
 from .config import get_config
-from .errors import CommandError
+from .errors import BudgetExceeded, CommandError
 from .models.base import get_backend
+from .streaming import (
+    acoalesce,
+    aguard,
+    ainstrument,
+    coalesce,
+    guard,
+    instrument,
+    recorder_for,
+    recording,
+    with_latency,
+)
 
 
 class _AskNamespace:
@@ -25,15 +39,33 @@ class _AskNamespace:
         backend = get_backend(effective.model)
         if context:
             prompt = f"Context: {context}\n\nTask: {prompt}"
-        try:
-            return backend.complete(
-                prompt,
-                tools=tools or None,
-                output_schema=None,
-                config=effective,
-            )
-        except Exception as e:
-            raise CommandError(str(e)) from e
+        with (
+            _events.command_run("ask", effective),
+            _usage.attribute("ask"),
+            _usage.budget(effective),
+        ):
+            cache = get_response_cache(effective)
+            key = ""
+            if cache is not None:
+                key = cache_key(prompt, config=effective, tools=tools or None)
+                cached = cache.get(key)
+                _events.emit(_events.CACHE_MISS if cached is None else _events.CACHE_HIT)
+                if cached is not None:
+                    return cached
+            try:
+                text = backend.complete(
+                    prompt,
+                    tools=tools or None,
+                    output_schema=None,
+                    config=effective,
+                )
+            except BudgetExceeded:
+                raise
+            except Exception as e:
+                raise CommandError(str(e)) from e
+        if cache is not None and isinstance(text, str) and text.strip():
+            cache.set(key, text)
+        return text
 
     def stream(
         self,
@@ -49,15 +81,19 @@ class _AskNamespace:
             raise CommandError("Streaming with tools is not supported by the configured backend")
         if context:
             prompt = f"Context: {context}\n\nTask: {prompt}"
+        rec = recorder_for(effective)
         try:
-            return backend.stream(
-                prompt,
-                tools=tools or None,
-                output_schema=None,
-                config=effective,
-            )
+            with recording(rec):
+                chunks = backend.stream(
+                    prompt,
+                    tools=tools or None,
+                    output_schema=None,
+                    config=effective,
+                )
         except Exception as e:
             raise CommandError(str(e)) from e
+        chunks = instrument(guard(chunks, effective), rec)
+        return with_latency(coalesce(chunks, effective), rec)
 
     def stream_async(
         self,
@@ -67,27 +103,48 @@ class _AskNamespace:
         context: dict[str, Any] | None = None,
         **overrides,
     ):
-        async def agen():
-            effective = get_config(overrides)
+        effective = get_config(overrides)
+        rec = recorder_for(effective)
+
+        async def open_stream():
             backend = get_backend(effective.model)
             if tools and not getattr(backend, "supports_streaming_tools", False):
                 raise CommandError(
                     "Streaming with tools is not supported by the configured backend"
                 )
             p = f"Context: {context}\n\nTask: {prompt}" if context else prompt
+            if rec is not None:
+                rec.begin()
             try:
-                aiter = await backend.astream(
-                    p,
-                    tools=tools or None,
-                    output_schema=None,
-                    config=effective,
-                )
+                with recording(rec):
+                    chunks = await backend.astream(
+                        p,
+                        tools=tools or None,
+                        output_schema=None,
+                        config=effective,
+                    )
             except Exception as e:
                 raise CommandError(str(e)) from e
-            async for chunk in aiter:
-                yield chunk
+            return aguard(chunks, effective)
+
+        async def open_instrumented():
+            return ainstrument(await open_stream(), rec)
+
+        coalesced = acoalesce(open_instrumented, effective)
+        if coalesced is not None:
+            return with_latency(coalesced, rec)
+
+        async def agen():
+            aiter = await open_stream()
+            try:
+                async for chunk in aiter:
+                    yield chunk
+            finally:
+                aclose = getattr(aiter, "aclose", None)
+                if callable(aclose):
+                    await aclose()
 
-        return agen()
+        return ainstrument(agen(), rec)
 
 
 ask = _AskNamespace()
@@ -0,0 +1,256 @@
+"""Bounded-concurrency batch execution for commands (``Command.map``/``amap``).
+
+Inputs are pulled lazily: at most ``concurrency`` items run at once and only
+a small window of submitted-but-unyielded items is held, so very large (or
+endless) iterables are never materialized. Results stream back as they
+finish; per-item errors are yielded in place of the result by default.
+
+Each input item is passed to the command as a single positional argument,
+or, with ``unpack=True``, tuples are splatted as positional arguments and
+mappings as keyword arguments.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import contextvars
+import time
+from collections import deque
+from collections.abc import (
+    AsyncGenerator,
+    AsyncIterable,
+    AsyncIterator,
+    Generator,
+    Iterable,
+    Iterator,
+    Mapping,
+)
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+DEFAULT_MAP_CONCURRENCY: int = 8
+
+
+@dataclass
+class BatchStats:
+    """Progress and throughput counters for one ``map``/``amap`` run."""
+
+    submitted: int = 0
+    completed: int = 0
+    failed: int = 0
+    started_at: float = field(default_factory=time.perf_counter)
+
+    @property
+    def in_flight(self) -> int:
+        return self.submitted - self.completed
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    @property
+    def throughput(self) -> float:
+        """Completed items per second since the run started."""
+        dt = self.elapsed
+        return self.completed / dt if dt > 0 else 0.0
+
+
+def _split(item: Any, unpack: bool) -> tuple[tuple[Any, ...], dict[str, Any]]:
+    if unpack:
+        if isinstance(item, tuple):
+            return item, {}
+        if isinstance(item, Mapping):
+            return (), dict(item)
+    return (item,), {}
+
+
+def _check_concurrency(concurrency: int) -> int:
+    if not isinstance(concurrency, int) or concurrency <= 0:
+        raise ValueError("concurrency must be a positive integer")
+    return concurrency
+
+
+class CommandMap(Iterator[Any]):
+    """Iterator returned by ``Command.map``; see ``stats`` for progress.
+
+    With ``ordered=True`` results are yielded in input order; otherwise
+    ``(index, result)`` pairs are yielded in completion order. Closing the
+    iterator early cancels queued items. Each item runs in a copy of the
+    caller's context, so ``use_config`` and ``usage_scope`` apply to it.
+    """
+
+    def __init__(
+        self,
+        call: Callable[..., Any],
+        items: Iterable[Any],
+        *,
+        concurrency: int = DEFAULT_MAP_CONCURRENCY,
+        ordered: bool = True,
+        return_exceptions: bool = True,
+        unpack: bool = False,
+    ) -> None:
+        self.stats = BatchStats()
+        self._call = call
+        self._items = iter(items)
+        self._concurrency = _check_concurrency(concurrency)
+        self._ordered = ordered
+        self._return_exceptions = return_exceptions
+        self._unpack = unpack
+        self._gen = self._run()
+
+    def __iter__(self) -> "CommandMap":
+        return self
+
+    def __next__(self) -> Any:
+        return next(self._gen)
+
+    def close(self) -> None:
+        self._gen.close()
+
+    def _outcome(self, fut: concurrent.futures.Future[Any]) -> Any:
+        self.stats.completed += 1
+        err = fut.exception()
+        if err is None:
+            return fut.result()
+        self.stats.failed += 1
+        if not self._return_exceptions:
+            raise err
+        return err
+
+    def _run(self) -> Generator[Any, None, None]:
+        window = self._concurrency * 2 if self._ordered else self._concurrency
+        ex = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self._concurrency, thread_name_prefix="alloy-map"
+        )
+        pending: deque[tuple[int, concurrent.futures.Future[Any]]] = deque()
+        exhausted = False
+        index = 0
+        try:
+            while True:
+                while not exhausted and len(pending) < window:
+                    try:
+                        item = next(self._items)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    args, kwargs = _split(item, self._unpack)
+                    ctx = contextvars.copy_context()
+                    pending.append((index, ex.submit(ctx.run, self._call, *args, **kwargs)))
+                    self.stats.submitted += 1
+                    index += 1
+                if not pending:
+                    return
+                if self._ordered:
+                    _, fut = pending.popleft()
+                    concurrent.futures.wait([fut])
+                    yield self._outcome(fut)
+                else:
+                    done, _ = concurrent.futures.wait(
+                        [f for _, f in pending], return_when=concurrent.futures.FIRST_COMPLETED
+                    )
+                    for entry in [e for e in pending if e[1] in done]:
+                        pending.remove(entry)
+                        yield entry[0], self._outcome(entry[1])
+        finally:
+            for _, fut in pending:
+                fut.cancel()
+            ex.shutdown(wait=False, cancel_futures=True)
+
+
+class AsyncCommandMap(AsyncIterator[Any]):
+    """Async iterator returned by ``Command.amap``; see ``CommandMap``."""
+
+    def __init__(
+        self,
+        acall: Callable[..., Any],
+        items: Iterable[Any] | AsyncIterable[Any],
+        *,
+        concurrency: int = DEFAULT_MAP_CONCURRENCY,
+        ordered: bool = True,
+        return_exceptions: bool = True,
+        unpack: bool = False,
+    ) -> None:
+        self.stats = BatchStats()
+        self._acall = acall
+        self._items = items
+        self._concurrency = _check_concurrency(concurrency)
+        self._ordered = ordered
+        self._return_exceptions = return_exceptions
+        self._unpack = unpack
+        self._gen = self._run()
+
+    def __aiter__(self) -> "AsyncCommandMap":
+        return self
+
+    async def __anext__(self) -> Any:
+        return await self._gen.__anext__()
+
+    async def aclose(self) -> None:
+        await self._gen.aclose()
+
+    def _outcome(self, task: asyncio.Task[Any]) -> Any:
+        self.stats.completed += 1
+        err = task.exception()
+        if err is None:
+            return task.result()
+        self.stats.failed += 1
+        if not self._return_exceptions:
+            raise err
+        return err
+
+    async def _run(self) -> AsyncGenerator[Any, None]:
+        sem = asyncio.Semaphore(self._concurrency)
+        window = self._concurrency * 2 if self._ordered else self._concurrency
+        if isinstance(self._items, AsyncIterable):
+            source = self._items.__aiter__()
+
+            async def pull() -> Any:
+                return await source.__anext__()
+
+        else:
+            sync_source = iter(self._items)
+
+            async def pull() -> Any:
+                try:
+                    return next(sync_source)
+                except StopIteration:
+                    raise StopAsyncIteration from None
+
+        async def run_one(args: tuple[Any, ...], kwargs: dict[str, Any]) -> Any:
+            async with sem:
+                return await self._acall(*args, **kwargs)
+
+        pending: deque[tuple[int, asyncio.Task[Any]]] = deque()
+        exhausted = False
+        index = 0
+        try:
+            while True:
+                while not exhausted and len(pending) < window:
+                    try:
+                        item = await pull()
+                    except StopAsyncIteration:
+                        exhausted = True
+                        break
+                    args, kwargs = _split(item, self._unpack)
+                    pending.append((index, asyncio.ensure_future(run_one(args, kwargs))))
+                    self.stats.submitted += 1
+                    index += 1
+                if not pending:
+                    return
+                if self._ordered:
+                    _, task = pending.popleft()
+                    await asyncio.wait([task])
+                    yield self._outcome(task)
+                else:
+                    done, _ = await asyncio.wait(
+                        [t for _, t in pending], return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for entry in [e for e in pending if e[1] in done]:
+                        pending.remove(entry)
+                        yield entry[0], self._outcome(entry[1])
+        finally:
+            for _, task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*(t for _, t in pending), return_exceptions=True)
@@ -0,0 +1,280 @@
+"""Opt-in response cache for commands and ``ask``.
+
+When ``Config.cache`` is true, the raw model text for a request is cached
+under a stable hash of everything that shapes the response: model, system
+prompt, prompt, output schema, tool schemas, temperature and max_tokens.
+Commands still run cached text through ``_parse_or_return``, so typed
+outputs behave exactly as on a live call.
+
+Two tiers:
+- memory: a process-wide LRU bounded by ``cache_max_entries`` with
+  ``cache_ttl`` expiry;
+- disk: when ``cache_path`` is set, a SQLite database (WAL mode) shared by
+  all processes using that path. Disk hits are promoted to memory.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from .config import Config
+from .models.base import CompiledTools, memoize_on_schema
+
+DEFAULT_CACHE_MAX_ENTRIES: int = 1024
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss counters for the response cache."""
+
+    hits: int = 0
+    misses: int = 0
+    memory_hits: int = 0
+    disk_hits: int = 0
+    stores: int = 0
+    evictions: int = 0
+
+
+class MemoryTier:
+    """Thread-safe LRU with optional per-entry TTL."""
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_CACHE_MAX_ENTRIES,
+        ttl: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = ttl
+        self._clock = clock
+        self._data: OrderedDict[str, tuple[float | None, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires is not None and expires <= self._clock():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        expires = self._clock() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteTier:
+    """Persistent cache in a SQLite file; safe to share across processes.
+
+    Uses one connection per thread. Expiry is stored as wall-clock time so
+    every process agrees on it.
+    """
+
+    def __init__(
+        self, path: str, ttl: float | None = None, clock: Callable[[], float] = time.time
+    ) -> None:
+        self.path = path
+        self.ttl = ttl
+        self._clock = clock
+        self._local = threading.local()
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        self._conn()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL)"
+            )
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> str | None:
+        row = (
+            self._conn()
+            .execute("SELECT value, expires FROM responses WHERE key = ?", (key,))
+            .fetchone()
+        )
+        if row is None:
+            return None
+        value, expires = row
+        if expires is not None and expires <= self._clock():
+            self._conn().execute("DELETE FROM responses WHERE key = ?", (key,))
+            return None
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        expires = self._clock() + self.ttl if self.ttl else None
+        self._conn().execute(
+            "INSERT OR REPLACE INTO responses (key, value, expires) VALUES (?, ?, ?)",
+            (key, value, expires),
+        )
+
+    def clear(self) -> None:
+        self._conn().execute("DELETE FROM responses")
+
+
+class ResponseCache:
+    """Memory tier in front of an optional disk tier, with hit/miss stats."""
+
+    def __init__(self, memory: MemoryTier, disk: SQLiteTier | None = None) -> None:
+        self.memory = memory
+        self.disk = disk
+        self._stats = CacheStats()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> str | None:
+        value = self.memory.get(key)
+        tier = "memory"
+        if value is None and self.disk is not None:
+            value = self.disk.get(key)
+            tier = "disk"
+            if value is not None:
+                self.memory.set(key, value)
+        with self._lock:
+            if value is None:
+                self._stats.misses += 1
+            else:
+                self._stats.hits += 1
+                if tier == "memory":
+                    self._stats.memory_hits += 1
+                else:
+                    self._stats.disk_hits += 1
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+        with self._lock:
+            self._stats.stores += 1
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            snap = CacheStats(**vars(self._stats))
+        snap.evictions = self.memory.evictions
+        return snap
+
+
+_caches: dict[tuple[str | None, float | None, int], ResponseCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_response_cache(config: Config) -> ResponseCache | None:
+    """Return the shared cache for ``config``, or None when caching is off."""
+    if not config.cache:
+        return None
+    ident = (config.cache_path, config.cache_ttl, config.cache_max_entries or 0)
+    cache = _caches.get(ident)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.get(ident)
+            if cache is None:
+                memory = MemoryTier(
+                    config.cache_max_entries or DEFAULT_CACHE_MAX_ENTRIES, config.cache_ttl
+                )
+                disk = (
+                    SQLiteTier(config.cache_path, config.cache_ttl) if config.cache_path else None
+                )
+                cache = _caches[ident] = ResponseCache(memory, disk)
+    return cache
+
+
+def cache_stats() -> CacheStats:
+    """Return hit/miss statistics summed over all response caches."""
+    total = CacheStats()
+    for cache in list(_caches.values()):
+        s = cache.stats()
+        for k, v in vars(s).items():
+            setattr(total, k, getattr(total, k) + v)
+    return total
+
+
+def clear_cache() -> None:
+    """Empty every response cache (including disk tiers) and reset stats."""
+    with _caches_lock:
+        for cache in _caches.values():
+            cache.clear()
+        _caches.clear()
+
+
+@memoize_on_schema
+def _schema_digest(schema: Any) -> str:
+    return json.dumps(schema, sort_keys=True, default=str)
+
+
+def _tools_digest(tools: list | None) -> list[Any] | None:
+    if not tools:
+        return None
+    if isinstance(tools, CompiledTools) and tools.cache_digest is not None:
+        return tools.cache_digest
+    out = []
+    for t in tools:
+        spec = getattr(t, "spec", None)
+        if spec is not None:
+            out.append([spec.name, spec.description, spec.as_schema()])
+        else:
+            out.append([getattr(t, "__qualname__", repr(t))])
+    if isinstance(tools, CompiledTools):
+        tools.cache_digest = out
+    return out
+
+
+def cache_key(
+    prompt: str,
+    *,
+    config: Config,
+    output_schema: dict | None = None,
+    tools: list | None = None,
+) -> str:
+    """Return a stable hash of every input that shapes the model's response."""
+    payload = json.dumps(
+        [
+            config.model,
+            config.default_system,
+            prompt,
+            _schema_digest(output_schema) if output_schema is not None else None,
+            _tools_digest(tools),
+            config.temperature,
+            config.max_tokens,
+            config.extra or None,
+        ],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
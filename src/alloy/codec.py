@@ -0,0 +1,175 @@
+"""JSON codec used for tool payloads, structured outputs and tool arguments.
+
+Uses ``orjson`` when installed, else ``msgspec``, else the stdlib ``json``
+module (``pip install alloy-ai[fast]`` pulls in orjson). Every backend
+encodes dataclasses natively, without the deep ``dataclasses.asdict`` copy,
+and ``register_encoder`` teaches the codec how to serialize domain types
+returned by tools. Set ``ALLOY_JSON_CODEC=json|orjson|msgspec`` to force a
+backend.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import datetime
+import json
+import os
+import threading
+from typing import Any, Callable
+
+_encoders: dict[type, Callable[[Any], Any]] = {}
+_overrides: frozenset[str] = frozenset()
+_lock = threading.Lock()
+
+
+def register_encoder(tp: type, fn: Callable[[Any], Any]) -> None:
+    """Serialize instances of ``tp`` (and subclasses) as ``fn(obj)``.
+
+    ``fn`` must return JSON-compatible data (which may itself contain
+    dataclasses or other registered types).
+    """
+    with _lock:
+        _encoders[tp] = fn
+        _refresh_locked()
+
+
+def unregister_encoder(tp: type) -> None:
+    with _lock:
+        _encoders.pop(tp, None)
+        _refresh_locked()
+
+
+_lookup: dict[type, Callable[[Any], Any] | None] = {}
+
+
+def _refresh_locked() -> None:
+    """Record which natively encoded kinds have registered overrides."""
+    global _overrides
+    _lookup.clear()
+    kinds = set()
+    for tp in _encoders:
+        if dataclasses.is_dataclass(tp):
+            kinds.add("dataclass")
+        elif issubclass(tp, (datetime.date, datetime.time)):
+            kinds.add("datetime")
+        elif issubclass(tp, (str, int, float, dict, list)):
+            kinds.add("subclass")
+    _overrides = frozenset(kinds)
+
+
+def _find_encoder(cls: type) -> Callable[[Any], Any] | None:
+    try:
+        return _lookup[cls]
+    except KeyError:
+        pass
+    fn = None
+    for base in cls.__mro__:
+        fn = _encoders.get(base)
+        if fn is not None:
+            break
+    _lookup[cls] = fn
+    return fn
+
+
+def _default(obj: Any) -> Any:
+    """Fallback hook for values the active backend cannot encode natively."""
+    fn = _find_encoder(type(obj))
+    if fn is not None:
+        return fn(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return {f.name: getattr(obj, f.name) for f in dataclasses.fields(obj)}
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _std_dumps(obj: Any) -> str:
+    return json.dumps(obj, default=_default)
+
+
+def _std_loads(data: str | bytes) -> Any:
+    return json.loads(data)
+
+
+def _load_backend(name: str) -> tuple[str, Callable[[Any], str], Callable[[Any], Any]] | None:
+    if name == "orjson":
+        try:
+            import orjson
+        except Exception:
+            return None
+        base_opt = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        passthrough = {
+            "dataclass": orjson.OPT_PASSTHROUGH_DATACLASS,
+            "datetime": orjson.OPT_PASSTHROUGH_DATETIME,
+            "subclass": orjson.OPT_PASSTHROUGH_SUBCLASS,
+        }
+
+        def o_dumps(obj: Any) -> str:
+            # Registered encoders take precedence over orjson's native handling.
+            opt = base_opt
+            for kind in _overrides:
+                opt |= passthrough[kind]
+            try:
+                return orjson.dumps(obj, default=_default, option=opt).decode()
+            except (TypeError, OverflowError):
+                return _std_dumps(obj)
+
+        return "orjson", o_dumps, orjson.loads
+    if name == "msgspec":
+        try:
+            import msgspec
+        except Exception:
+            return None
+        encoder = msgspec.json.Encoder(enc_hook=_default)
+        decoder = msgspec.json.Decoder()
+
+        def m_dumps(obj: Any) -> str:
+            try:
+                return encoder.encode(obj).decode()
+            except (TypeError, OverflowError, msgspec.EncodeError):
+                return _std_dumps(obj)
+
+        def m_loads(data: str | bytes) -> Any:
+            try:
+                return decoder.decode(data)
+            except msgspec.DecodeError as e:
+                raise ValueError(str(e)) from e
+
+        return "msgspec", m_dumps, m_loads
+    if name == "json":
+        return "json", _std_dumps, _std_loads
+    return None
+
+
+def _select(preferred: str | None) -> tuple[str, Callable[[Any], str], Callable[[Any], Any]]:
+    order = [preferred] if preferred else ["orjson", "msgspec", "json"]
+    for name in order:
+        backend = _load_backend(name)
+        if backend is not None:
+            return backend
+    return "json", _std_dumps, _std_loads
+
+
+_name, _dumps, _loads = _select((os.environ.get("ALLOY_JSON_CODEC") or "").lower() or None)
+
+
+def codec_name() -> str:
+    """Return the active backend: ``"orjson"``, ``"msgspec"`` or ``"json"``."""
+    return _name
+
+
+def set_codec(name: str | None) -> str:
+    """Switch backend (None picks the fastest installed); returns the active name."""
+    global _name, _dumps, _loads
+    _name, _dumps, _loads = _select(name.lower() if name else None)
+    return _name
+
+
+def dumps(obj: Any) -> str:
+    """Encode ``obj`` as JSON text."""
+    return _dumps(obj)
+
+
+def loads(data: str | bytes) -> Any:
+    """Decode JSON text; raises ``ValueError`` on malformed input."""
+    return _loads(data)
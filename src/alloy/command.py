@@ -1,13 +1,37 @@
 from __future__ import annotations
 
 import inspect
-from collections.abc import Iterable
-from typing import Any, Callable, NoReturn, get_origin
-from .config import get_config
+import time
+from collections.abc import AsyncIterable, AsyncIterator, Iterable, Iterator
+from dataclasses import dataclass
+from typing import Any, Callable, NoReturn, get_args, get_origin
+from . import events as _events
+from . import retry as _retry
+from . import usage as _usage
+from .batch import DEFAULT_MAP_CONCURRENCY, AsyncCommandMap, CommandMap
+from .cache import ResponseCache, cache_key, get_response_cache
+from .config import Config, compile_overrides, get_config
 from .errors import CommandError, ConfigurationError
-from .models.base import get_backend
+from .models.base import CompiledTools, get_backend, run_coroutine_sync
+from .retry import RetryPolicy
+from .streaming import (
+    AsyncTypedStream,
+    StreamRecorder,
+    TypedStream,
+    acoalesce,
+    aguard,
+    ainstrument,
+    aiter_items,
+    coalesce,
+    guard,
+    instrument,
+    iter_items,
+    recorder_for,
+    recording,
+    with_latency,
+)
 from .tool import ToolCallable, ToolSpec
-from .types import to_json_schema, parse_output, is_dataclass_type, is_typeddict_type
+from .types import _coerce, to_json_schema, parse_output, is_dataclass_type, is_typeddict_type
 
 _MISSING: Any = object()
 
@@ -23,12 +47,14 @@ def command(
     system: str | None = None,
     retry: int | None = None,
     retry_on: type[BaseException] | None = None,
+    cache: bool | None = None,
 ):
     """Decorator to declare an AI-powered command.
 
     The wrapped function returns an English prompt specification. This executes
     the model with optional tools and parses the result into the annotated
     return type. The `retry` parameter represents total attempts (minimum 1).
+    `cache=True` serves repeated identical requests from the response cache.
     """
 
     def wrap(func: Callable[..., Any]):
@@ -59,6 +85,7 @@ def command(
                 "default_system": system,
                 "retry": retry,
                 "retry_on": retry_on,
+                "cache": cache,
             },
         )
 
@@ -67,6 +94,20 @@ def command(
     return wrap
 
 
+@dataclass(frozen=True)
+class CompiledCommand:
+    """Execution plan computed once per command and reused by every call.
+
+    Holds the strict output schema and the tools as ``CompiledTools``, which
+    caches each provider's formatted tool definitions and tool map on first
+    use. Provider hints derived from the schema are memoized on the schema
+    object, so the hot path only formats the prompt and sends it.
+    """
+
+    output_schema: dict[str, Any] | None
+    tools: CompiledTools | None
+
+
 class _CommandHelpers:
     _output_type: type | None
 
@@ -97,8 +138,49 @@ class _CommandHelpers:
             raise CommandError(f"Model output type mismatch; expected {expected}.")
         return value
 
-    def _should_break_retry(self, retry_on: type[BaseException] | None, exc: Exception) -> bool:
-        return bool(retry_on and not isinstance(exc, retry_on))
+    def _parse(self, text: Any):
+        """``_parse_or_return`` reporting parse success/failure events."""
+        if not _events.enabled():
+            return self._parse_or_return(text)
+        tp = str if self._output_type is None else self._output_type
+        expected = getattr(tp, "__name__", str(tp))
+        t0 = time.monotonic()
+        try:
+            value = self._parse_or_return(text)
+        except Exception as e:
+            _events.emit(
+                _events.PARSE_FAILURE,
+                type=expected,
+                error=str(e),
+                elapsed=time.monotonic() - t0,
+            )
+            raise
+        _events.emit(_events.PARSE_SUCCESS, type=expected, elapsed=time.monotonic() - t0)
+        return value
+
+    def _cache_lookup(
+        self, effective: Config, prompt: str, plan: CompiledCommand
+    ) -> tuple[ResponseCache | None, str, str | None]:
+        """Return ``(cache, key, cached_text)``; cache is None when caching is off."""
+        cache = get_response_cache(effective)
+        if cache is None:
+            return None, "", None
+        key = cache_key(
+            prompt, config=effective, output_schema=plan.output_schema, tools=plan.tools
+        )
+        cached = cache.get(key)
+        _events.emit(_events.CACHE_MISS if cached is None else _events.CACHE_HIT)
+        return cache, key, cached
+
+    def _retry_delay(self, policy: RetryPolicy, attempt: int, exc: Exception) -> float | None:
+        """Return the backoff before ``attempt``, or None when the retry budget is spent."""
+        if not policy.acquire_retry():
+            return None
+        delay = policy.delay(attempt - 1, exc)
+        _events.emit(
+            _events.RETRY, attempt=attempt, delay=delay, error=f"{type(exc).__name__}: {exc}"
+        )
+        return delay
 
     def _raise_after_retries(self, last_err: Exception | None, attempts: int) -> NoReturn:
         if isinstance(last_err, CommandError):
@@ -123,9 +205,30 @@ class Command(_CommandHelpers):
             t if isinstance(t, ToolCallable) else ToolCallable(_to_spec(t)) for t in tools
         ]
         self._cfg = {k: v for k, v in per_command_cfg.items() if v is not None}
+        self._overrides = compile_overrides(self._cfg)
         self.__name__ = func.__name__
         self.__doc__ = func.__doc__
         self._is_async = inspect.iscoroutinefunction(func)
+        self._plan: CompiledCommand | None = None
+
+    def _compile(self) -> CompiledCommand:
+        """Return the cached plan, building it on first use.
+
+        Compilation is deferred to the first call so output types may use
+        forward references that resolve after decoration.
+        """
+        plan = self._plan
+        if plan is None:
+            try:
+                schema = to_json_schema(self._output_type) if self._output_type else None
+            except ValueError as e:
+                raise ConfigurationError(str(e)) from e
+            plan = CompiledCommand(
+                output_schema=schema,
+                tools=CompiledTools(self._tools) if self._tools else None,
+            )
+            self._plan = plan
+        return plan
 
     def __call__(self, *args, **kwargs):
         if self._is_async:
@@ -133,78 +236,183 @@ class Command(_CommandHelpers):
         prompt = self._func(*args, **kwargs)
         if not isinstance(prompt, str):
             prompt = str(prompt)
-        effective = get_config(self._cfg)
-        backend = get_backend(effective.model)
-
-        try:
-            output_schema = to_json_schema(self._output_type) if self._output_type else None
-        except ValueError as e:
-            raise ConfigurationError(str(e)) from e
+        effective = get_config(self._overrides)
+        with (
+            _events.command_run(self.__name__, effective),
+            _usage.attribute(self.__name__),
+            _usage.budget(effective),
+        ):
+            backend = get_backend(effective.model)
+            plan = self._compile()
+            cache, key, cached = self._cache_lookup(effective, prompt, plan)
+            if cached is not None:
+                return self._parse(cached)
 
-        attempts = max(int(effective.retry or 1), 1)
-        last_err: Exception | None = None
-        for _ in range(attempts):
-            try:
-                text = backend.complete(
-                    prompt,
-                    tools=self._tools or None,
-                    output_schema=output_schema,
-                    config=effective,
-                )
-                return self._parse_or_return(text)
-            except Exception as e:
-                last_err = e
-                if self._should_break_retry(effective.retry_on, e):
-                    break
-        self._raise_after_retries(last_err, attempts)
+            policy = RetryPolicy.from_config(effective)
+            policy.record_attempt()
+            last_err: Exception | None = None
+            made = 0
+            for attempt in range(policy.attempts):
+                if last_err is not None:
+                    delay = self._retry_delay(policy, attempt, last_err)
+                    if delay is None:
+                        break
+                    _retry._sleep(delay)
+                made += 1
+                try:
+                    text = backend.complete(
+                        prompt,
+                        tools=plan.tools,
+                        output_schema=plan.output_schema,
+                        config=effective,
+                    )
+                    value = self._parse(text)
+                    if cache is not None and isinstance(text, str):
+                        cache.set(key, str(text))
+                    return value
+                except Exception as e:
+                    last_err = e
+                    if not policy.should_retry(e):
+                        break
+            self._raise_after_retries(last_err, made)
 
     def stream(self, *args, **kwargs) -> Iterable[str] | Any:
-        if self._output_type is not None and self._output_type is not str:
-            raise ConfigurationError(
-                "Streaming supports text-only commands; non-string typed outputs are not supported"
+        """Stream the command's output.
+
+        Text commands yield text chunks, coalesced when the config sets
+        ``stream_flush_bytes``/``stream_flush_interval_ms``. Commands with a structured output
+        type send the schema and yield partially filled values as fields
+        arrive, ending with the validated value (see ``alloy.streaming``).
+        With ``stream_stats`` enabled the returned stream carries its latency
+        profile as ``.latency``.
+        """
+        typed = self._output_type is not None and self._output_type is not str
+        source = self._stream_source(typed)
+        output_schema = source[2]
+        rec = recorder_for(source[1])
+        if not self._is_async:
+            chunks = instrument(self._open_stream(source, args, kwargs, rec), rec)
+            if typed:
+                stream = TypedStream(chunks, self._parse_or_return, schema=output_schema)
+                return with_latency(stream, rec)
+            return with_latency(coalesce(chunks, source[1]), rec)
+
+        async def open_stream() -> AsyncIterable[str]:
+            return await self._aopen_stream(source, args, kwargs, rec)
+
+        async def open_instrumented() -> AsyncIterable[str]:
+            return ainstrument(await open_stream(), rec)
+
+        if typed:
+            astream = AsyncTypedStream(
+                open_instrumented, self._parse_or_return, schema=output_schema
             )
+            return with_latency(astream, rec)
+        coalesced = acoalesce(open_instrumented, source[1])
+        if coalesced is not None:
+            return with_latency(coalesced, rec)
+
+        async def agen():
+            aiter = await open_stream()
+            try:
+                async for chunk in aiter:
+                    yield chunk
+            finally:
+                aclose = getattr(aiter, "aclose", None)
+                if callable(aclose):
+                    await aclose()
+
+        return ainstrument(agen(), rec)
+
+    def stream_items(self, *args, **kwargs) -> Iterator[Any] | AsyncIterator[Any]:
+        """Stream a ``list[T]`` output element by element.
+
+        Each element is decoded and coerced to ``T`` as soon as it is
+        complete, and only the element being parsed is held in memory.
+        Async commands return an async iterator (see ``astream_items``).
+        """
+        decode = self._item_decoder()
+        source = self._stream_source(True)
+        if self._is_async:
+            return aiter_items(lambda: self._aopen_stream(source, args, kwargs), decode)
+        return iter_items(self._open_stream(source, args, kwargs), decode)
+
+    def astream_items(self, *args, **kwargs) -> AsyncIterator[Any]:
+        """Async counterpart of ``stream_items`` built on the backend's ``astream``."""
+        decode = self._item_decoder()
+        source = self._stream_source(True)
+        return aiter_items(lambda: self._aopen_stream(source, args, kwargs), decode)
+
+    def _item_decoder(self) -> Callable[[Any], Any]:
+        if get_origin(self._output_type) is not list:
+            raise ConfigurationError("stream_items requires a list[...] output type")
+        args = get_args(self._output_type)
+        elem_t = args[0] if args else Any
+        return lambda value: _coerce(elem_t, value)
 
-        effective = get_config(self._cfg)
+    def _stream_source(self, typed: bool) -> tuple[Any, Config, dict[str, Any] | None, Any]:
+        """Validate streaming options; return ``(backend, config, schema, tools)``."""
+        effective = get_config(self._overrides)
         backend = get_backend(effective.model)
-        if self._tools and not getattr(backend, "supports_streaming_tools", False):
+        plan = self._compile()
+        if typed:
+            if plan.output_schema is None:
+                raise ConfigurationError(
+                    "Streaming supports text and structured outputs; "
+                    "this output type has no JSON schema"
+                )
+            if self._tools:
+                raise ConfigurationError("Typed streaming does not support tools")
+        elif self._tools and not getattr(backend, "supports_streaming_tools", False):
             raise ConfigurationError(
                 "Streaming with tools is not supported by the configured backend"
             )
-        output_schema = None
+        return backend, effective, plan.output_schema if typed else None, plan.tools
 
-        if not self._is_async:
-            prompt = self._func(*args, **kwargs)
-            if not isinstance(prompt, str):
-                prompt = str(prompt)
-            try:
-                return backend.stream(
+    def _open_stream(
+        self, source: tuple, args: tuple, kwargs: dict, rec: StreamRecorder | None = None
+    ) -> Iterable[str]:
+        backend, effective, output_schema, tools = source
+        prompt = self._func(*args, **kwargs)
+        if not isinstance(prompt, str):
+            prompt = str(prompt)
+        try:
+            with recording(rec):
+                chunks = backend.stream(
                     prompt,
-                    tools=self._tools or None,
+                    tools=tools,
                     output_schema=output_schema,
                     config=effective,
                 )
-            except Exception as e:
-                raise CommandError(str(e)) from e
+        except Exception as e:
+            raise CommandError(str(e)) from e
+        return guard(chunks, effective)
 
-        async def agen():
+    async def _aopen_stream(
+        self, source: tuple, args: tuple, kwargs: dict, rec: StreamRecorder | None = None
+    ) -> AsyncIterable[str]:
+        backend, effective, output_schema, tools = source
+        if self._is_async:
             prompt_val = await self._func(*args, **kwargs)
-            if not isinstance(prompt_val, str):
-                prompt_str = str(prompt_val)
-            else:
-                prompt_str = prompt_val
-            try:
-                aiter = await backend.astream(
+        else:
+            prompt_val = self._func(*args, **kwargs)
+        if not isinstance(prompt_val, str):
+            prompt_str = str(prompt_val)
+        else:
+            prompt_str = prompt_val
+        if rec is not None:
+            rec.begin()
+        try:
+            with recording(rec):
+                chunks = await backend.astream(
                     prompt_str,
-                    tools=self._tools or None,
-                    output_schema=None,
+                    tools=tools,
+                    output_schema=output_schema,
                     config=effective,
                 )
-            except Exception as e:
-                raise CommandError(str(e)) from e
-            async for chunk in aiter:
-                yield chunk
-
-        return agen()
+        except Exception as e:
+            raise CommandError(str(e)) from e
+        return aguard(chunks, effective)
 
     async def async_(self, *args, **kwargs):
         if self._is_async:
@@ -215,26 +423,118 @@ class Command(_CommandHelpers):
             prompt = str(prompt_val)
         else:
             prompt = prompt_val
-        effective = get_config(self._cfg)
-        backend = get_backend(effective.model)
-        output_schema = to_json_schema(self._output_type) if self._output_type else None
+        effective = get_config(self._overrides)
+        with (
+            _events.command_run(self.__name__, effective),
+            _usage.attribute(self.__name__),
+            _usage.budget(effective),
+        ):
+            backend = get_backend(effective.model)
+            plan = self._compile()
+            cache, key, cached = self._cache_lookup(effective, prompt, plan)
+            if cached is not None:
+                return self._parse(cached)
 
-        attempts = max(int(effective.retry or 1), 1)
-        last_err: Exception | None = None
-        for _ in range(attempts):
-            try:
-                text = await backend.acomplete(
-                    prompt,
-                    tools=self._tools or None,
-                    output_schema=output_schema,
-                    config=effective,
-                )
-                return self._parse_or_return(text)
-            except Exception as e:
-                last_err = e
-                if self._should_break_retry(effective.retry_on, e):
-                    break
-        self._raise_after_retries(last_err, attempts)
+            policy = RetryPolicy.from_config(effective)
+            policy.record_attempt()
+            last_err: Exception | None = None
+            made = 0
+            for attempt in range(policy.attempts):
+                if last_err is not None:
+                    delay = self._retry_delay(policy, attempt, last_err)
+                    if delay is None:
+                        break
+                    await _retry._asleep(delay)
+                made += 1
+                try:
+                    text = await backend.acomplete(
+                        prompt,
+                        tools=plan.tools,
+                        output_schema=plan.output_schema,
+                        config=effective,
+                    )
+                    value = self._parse(text)
+                    if cache is not None and isinstance(text, str):
+                        cache.set(key, str(text))
+                    return value
+                except Exception as e:
+                    last_err = e
+                    if not policy.should_retry(e):
+                        break
+            self._raise_after_retries(last_err, made)
+
+    def with_usage(self, *args, **kwargs) -> Any:
+        """Run the command and return a ``CommandResult`` with its token usage.
+
+        Usage covers every provider turn of this call, including tool turns,
+        finalize turns, retries and nested commands. Async commands return a
+        coroutine.
+        """
+        if self._is_async:
+            return self._awith_usage(*args, **kwargs)
+        with _usage.usage_scope() as report:
+            value = self(*args, **kwargs)
+        return _usage.CommandResult(value, report)
+
+    async def _awith_usage(self, *args, **kwargs) -> Any:
+        with _usage.usage_scope() as report:
+            value = await self.async_(*args, **kwargs)
+        return _usage.CommandResult(value, report)
+
+    def map(
+        self,
+        items: Iterable[Any],
+        *,
+        concurrency: int = DEFAULT_MAP_CONCURRENCY,
+        ordered: bool = True,
+        return_exceptions: bool = True,
+        unpack: bool = False,
+    ) -> CommandMap:
+        """Run the command over ``items`` on a bounded thread pool.
+
+        Results stream back as they finish: in input order when ``ordered``,
+        else as ``(index, result)`` pairs. Inputs are pulled lazily, and with
+        ``return_exceptions`` a failing item yields its exception instead of
+        aborting the batch. Progress is available on the returned ``stats``.
+        """
+        if self._is_async:
+            # One shared event loop for every item, so loop-bound SDK clients
+            # in the backend registry are reused rather than rebuilt per item.
+            # The coroutine is scheduled from the item's copied context, so
+            # scoped config and usage carry over onto the loop.
+
+            def call(*args, **kwargs):
+                return run_coroutine_sync(self.async_(*args, **kwargs))
+
+        else:
+            call = self.__call__
+        return CommandMap(
+            call,
+            items,
+            concurrency=concurrency,
+            ordered=ordered,
+            return_exceptions=return_exceptions,
+            unpack=unpack,
+        )
+
+    def amap(
+        self,
+        items: Iterable[Any] | AsyncIterable[Any],
+        *,
+        concurrency: int = DEFAULT_MAP_CONCURRENCY,
+        ordered: bool = True,
+        return_exceptions: bool = True,
+        unpack: bool = False,
+    ) -> AsyncCommandMap:
+        """Async counterpart of ``map`` built on ``async_``; accepts async iterables."""
+        return AsyncCommandMap(
+            self.async_,
+            items,
+            concurrency=concurrency,
+            ordered=ordered,
+            return_exceptions=return_exceptions,
+            unpack=unpack,
+        )
 
 
 def _to_spec(func: Callable[..., Any]) -> ToolSpec:
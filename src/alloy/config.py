@@ -3,14 +3,19 @@ from __future__ import annotations
 from dataclasses import dataclass, field, replace, fields
 import os
 import json
-from typing import Any
+from typing import Any, Callable, NamedTuple
 import contextvars
 import functools
+import itertools
 import logging
 
 log = logging.getLogger(__name__)
 
 DEFAULT_PARALLEL_TOOLS_MAX: int = 8
+DEFAULT_TOOL_WORKERS: int = 32
+DEFAULT_RETRY_BASE_DELAY: float = 0.5
+DEFAULT_RETRY_MAX_DELAY: float = 20.0
+DEFAULT_RETRY_BUDGET: float = 0.2
 
 
 @dataclass
@@ -24,6 +29,29 @@ class Config:
     max_tool_turns: int | None = 10
     auto_finalize_missing_output: bool | None = True
     parallel_tools_max: int | None = None
+    eager_tools: bool | None = None
+    tool_workers: int | None = None
+    retry_base_delay: float | None = None
+    retry_max_delay: float | None = None
+    retry_budget: float | None = None
+    rpm: float | None = None
+    tpm: float | None = None
+    rate_limit_dir: str | None = None
+    cache: bool | None = None
+    cache_ttl: float | None = None
+    cache_path: str | None = None
+    cache_max_entries: int | None = None
+    stream_flush_bytes: int | None = None
+    stream_flush_interval_ms: float | None = None
+    stream_boundary: str | None = None
+    stream_max_bytes: int | None = None
+    stream_stop_when: Callable[[str], bool] | None = None
+    stream_stats: bool | None = None
+    hooks: list[Callable[[Any], None]] | None = None
+    max_total_input_tokens: int | None = None
+    max_total_output_tokens: int | None = None
+    max_cost_usd: float | None = None
+    max_wall_time_s: float | None = None
     extra: dict[str, Any] = field(default_factory=dict)
 
     def merged(self, other: "Config" | None) -> "Config":
@@ -42,13 +70,49 @@ class Config:
 
 
 _BUILTIN_DEFAULTS: Config = Config(
-    model="gpt-5-mini", parallel_tools_max=DEFAULT_PARALLEL_TOOLS_MAX
+    model="gpt-5-mini",
+    parallel_tools_max=DEFAULT_PARALLEL_TOOLS_MAX,
+    tool_workers=DEFAULT_TOOL_WORKERS,
+    retry_base_delay=DEFAULT_RETRY_BASE_DELAY,
+    retry_max_delay=DEFAULT_RETRY_MAX_DELAY,
+    retry_budget=DEFAULT_RETRY_BUDGET,
 )
 _global_config: Config = Config()
-_context_config: contextvars.ContextVar[Config | None] = contextvars.ContextVar(
+
+
+class _Layers(NamedTuple):
+    """Memoized merge of defaults > env > global (> context) for one generation."""
+
+    generation: int
+    merged: Config
+    resolved: Config
+
+
+class _Scope:
+    """A ``use_config`` scope: its config plus the memoized layers built on it."""
+
+    __slots__ = ("config", "layers")
+
+    def __init__(self, config: Config) -> None:
+        self.config = config
+        self.layers: _Layers | None = None
+
+
+_context_config: contextvars.ContextVar[_Scope | None] = contextvars.ContextVar(
     "alloy_context_config", default=None
 )
 
+# Bumped whenever a layer below per-call overrides changes (configure, env cache
+# reset); memoized layers from an older generation are rebuilt on next access.
+_generation_counter = itertools.count(1)
+_generation: int = 0
+_base_layers: _Layers | None = None
+
+
+def _bump_generation() -> None:
+    global _generation
+    _generation = next(_generation_counter)
+
 
 def _parse_env_var(name: str, target_type: type) -> Any | None:
     val = os.environ.get(name)
@@ -89,6 +153,27 @@ def _config_from_env() -> Config:
         retry_on=None,
         max_tool_turns=_parse_env_var("ALLOY_MAX_TOOL_TURNS", int),
         parallel_tools_max=_parse_env_var("ALLOY_PARALLEL_TOOLS_MAX", int),
+        eager_tools=_parse_env_var("ALLOY_EAGER_TOOLS", bool),
+        tool_workers=_parse_env_var("ALLOY_TOOL_WORKERS", int),
+        retry_base_delay=_parse_env_var("ALLOY_RETRY_BASE_DELAY", float),
+        retry_max_delay=_parse_env_var("ALLOY_RETRY_MAX_DELAY", float),
+        retry_budget=_parse_env_var("ALLOY_RETRY_BUDGET", float),
+        rpm=_parse_env_var("ALLOY_RPM", float),
+        tpm=_parse_env_var("ALLOY_TPM", float),
+        rate_limit_dir=os.environ.get("ALLOY_RATE_LIMIT_DIR") or None,
+        cache=_parse_env_var("ALLOY_CACHE", bool),
+        cache_ttl=_parse_env_var("ALLOY_CACHE_TTL", float),
+        cache_path=os.environ.get("ALLOY_CACHE_PATH") or None,
+        cache_max_entries=_parse_env_var("ALLOY_CACHE_MAX_ENTRIES", int),
+        stream_flush_bytes=_parse_env_var("ALLOY_STREAM_FLUSH_BYTES", int),
+        stream_flush_interval_ms=_parse_env_var("ALLOY_STREAM_FLUSH_INTERVAL_MS", float),
+        stream_boundary=os.environ.get("ALLOY_STREAM_BOUNDARY") or None,
+        stream_max_bytes=_parse_env_var("ALLOY_STREAM_MAX_BYTES", int),
+        stream_stats=_parse_env_var("ALLOY_STREAM_STATS", bool),
+        max_total_input_tokens=_parse_env_var("ALLOY_MAX_TOTAL_INPUT_TOKENS", int),
+        max_total_output_tokens=_parse_env_var("ALLOY_MAX_TOTAL_OUTPUT_TOKENS", int),
+        max_cost_usd=_parse_env_var("ALLOY_MAX_COST_USD", float),
+        max_wall_time_s=_parse_env_var("ALLOY_MAX_WALL_TIME_S", float),
         auto_finalize_missing_output=_parse_env_var("ALLOY_AUTO_FINALIZE_MISSING_OUTPUT", bool),
         extra=extra,
     )
@@ -103,6 +188,13 @@ def configure(**kwargs: Any) -> None:
     global _global_config
     extra = kwargs.pop("extra", {})
     _global_config = _global_config.merged(Config(extra=extra, **kwargs))
+    _bump_generation()
+
+
+def reload_env() -> None:
+    """Re-read ``ALLOY_*`` environment variables on the next config resolution."""
+    _config_from_env.cache_clear()
+    _bump_generation()
 
 
 def _reset_config_for_tests() -> None:
@@ -110,11 +202,12 @@ def _reset_config_for_tests() -> None:
 
     Not part of the public API. Avoid using outside tests.
     """
-    global _global_config
+    global _global_config, _base_layers
     _global_config = Config()
     _context_config.set(None)
+    _base_layers = None
     try:
-        _config_from_env.cache_clear()
+        reload_env()
     except Exception:
         pass
 
@@ -124,7 +217,7 @@ def use_config(temp_config: Config):
 
     class _Cfg:
         def __enter__(self):
-            self._token = _context_config.set(get_config().merged(temp_config))
+            self._token = _context_config.set(_Scope(get_config().merged(temp_config)))
             return get_config()
 
         def __exit__(self, exc_type, exc, tb):
@@ -133,45 +226,55 @@ def use_config(temp_config: Config):
     return _Cfg()
 
 
-def get_config(overrides: dict[str, Any] | None = None) -> Config:
-    """Return the effective config with precedence:
+class OverridePlan:
+    """Per-call config overrides, normalized once and reusable across calls.
 
-    per-call overrides > context > global (configure) > env > built-in defaults
+    Commands compile their decorator arguments into a plan at decoration time;
+    ``get_config(plan)`` then reuses the last result while the underlying
+    layers are unchanged.
     """
-    cfg = (
-        _BUILTIN_DEFAULTS.merged(_config_from_env())
-        .merged(_global_config)
-        .merged(_context_config.get())
-    )
-    if not overrides:
-        ptm = getattr(cfg, "parallel_tools_max", None)
-        if not isinstance(ptm, int) or ptm <= 0:
-            cfg = replace(
-                cfg,
-                parallel_tools_max=_BUILTIN_DEFAULTS.parallel_tools_max
-                or DEFAULT_PARALLEL_TOOLS_MAX,
-            )
-        try:
-            model_l = (cfg.model or "").lower()
-            if model_l.startswith("ollama:") and "gpt-oss" in model_l:
-                ex = dict(cfg.extra or {})
-                if "ollama_api" not in ex:
-                    ex["ollama_api"] = "openai_chat"
-                    cfg = replace(cfg, extra=ex)
-        except Exception:
-            pass
+
+    __slots__ = ("extra", "values", "_last")
+
+    def __init__(self, overrides: dict[str, Any] | None = None) -> None:
+        ov = dict(overrides or {})
+        if "system" in ov and "default_system" not in ov:
+            ov["default_system"] = ov.pop("system")
+        extra = ov.pop("extra", {})
+        self.extra: dict[str, Any] = dict(extra) if isinstance(extra, dict) else {}
+        self.values: dict[str, Any] = {
+            k: v for k, v in ov.items() if k in _CONFIG_FIELDS and v is not None
+        }
+        self._last: tuple[_Layers, Config] | None = None
+
+    def __bool__(self) -> bool:
+        return bool(self.extra or self.values)
+
+    def apply(self, layers: _Layers) -> Config:
+        last = self._last
+        if last is not None and last[0] is layers:
+            return last[1]
+        cfg = layers.merged
+        if self.extra:
+            cfg = cfg.merged(Config(extra=self.extra))
+        if self.values:
+            cfg = replace(cfg, **self.values)
+        cfg = _apply_fixups(cfg)
+        self._last = (layers, cfg)
         return cfg
-    overrides = dict(overrides)
-    if "system" in overrides and "default_system" not in overrides:
-        overrides["default_system"] = overrides.pop("system")
-    extra = overrides.pop("extra", {})
-    if isinstance(extra, dict) and extra:
-        cfg = cfg.merged(Config(extra=extra))
-    allowed = {f.name for f in fields(Config)}
-    valid = {k: v for k, v in overrides.items() if k in allowed and v is not None}
-    cfg = replace(cfg, **valid)
-    ptm2 = getattr(cfg, "parallel_tools_max", None)
-    if not isinstance(ptm2, int) or ptm2 <= 0:
+
+
+def compile_overrides(overrides: dict[str, Any] | None) -> OverridePlan:
+    """Return an ``OverridePlan`` for ``overrides`` (see ``get_config``)."""
+    return OverridePlan(overrides)
+
+
+_CONFIG_FIELDS = frozenset(f.name for f in fields(Config))
+
+
+def _apply_fixups(cfg: Config) -> Config:
+    ptm = getattr(cfg, "parallel_tools_max", None)
+    if not isinstance(ptm, int) or ptm <= 0:
         cfg = replace(
             cfg,
             parallel_tools_max=_BUILTIN_DEFAULTS.parallel_tools_max or DEFAULT_PARALLEL_TOOLS_MAX,
@@ -186,3 +289,40 @@ def get_config(overrides: dict[str, Any] | None = None) -> Config:
     except Exception:
         pass
     return cfg
+
+
+def _current_layers() -> _Layers:
+    global _base_layers
+    scope = _context_config.get()
+    gen = _generation
+    cached = scope.layers if scope is not None else _base_layers
+    if cached is not None and cached.generation == gen:
+        return cached
+    merged = _BUILTIN_DEFAULTS.merged(_config_from_env()).merged(_global_config)
+    if scope is not None:
+        merged = merged.merged(scope.config)
+    layers = _Layers(gen, merged, _apply_fixups(merged))
+    if scope is not None:
+        scope.layers = layers
+    else:
+        _base_layers = layers
+    return layers
+
+
+def get_config(overrides: dict[str, Any] | OverridePlan | None = None) -> Config:
+    """Return the effective config with precedence:
+
+    per-call overrides > context > global (configure) > env > built-in defaults
+
+    The merged layers are memoized and rebuilt only after ``configure()``,
+    ``reload_env()`` or on entering a ``use_config`` scope, so the returned
+    ``Config`` may be shared between calls and must be treated as read-only.
+    ``overrides`` may be a dict or a precompiled ``OverridePlan``.
+    """
+    layers = _current_layers()
+    if not overrides:
+        return layers.resolved
+    plan = overrides if isinstance(overrides, OverridePlan) else OverridePlan(overrides)
+    if not plan:
+        return layers.resolved
+    return plan.apply(layers)
@@ -47,3 +47,37 @@ def create_tool_loop_exception(
     return ToolLoopLimitExceeded(
         msg, max_turns=max_turns, turns_taken=turns_taken, partial_text=partial_text
     )
+
+
+class BudgetExceeded(CommandError):
+    """Raised when a run exceeds a token, cost or wall-time budget.
+
+    ``budget`` names the exceeded ``Config`` field; ``partial_text`` carries the
+    last assistant text, as with ``ToolLoopLimitExceeded``.
+    """
+
+    def __init__(
+        self,
+        message: str,
+        *,
+        budget: str | None = None,
+        limit: float | None = None,
+        used: float | None = None,
+        partial_text: str | None = None,
+    ) -> None:
+        super().__init__(message)
+        self.budget = budget
+        self.limit = limit
+        self.used = used
+        self.partial_text = partial_text
+
+
+def create_budget_exception(
+    *, budget: str, limit: float, used: float, partial_text: str | None
+) -> BudgetExceeded:
+    """Create a standardized BudgetExceeded with contextual details."""
+    partial = (partial_text or "").strip()
+    msg = f"Exceeded run budget ({budget}={limit}, used={used:g})."
+    if partial:
+        msg += f" Partial response: {partial[:500]}"
+    return BudgetExceeded(msg, budget=budget, limit=limit, used=used, partial_text=partial_text)
@@ -0,0 +1,193 @@
+"""Lifecycle events for commands, provider turns, tools and parsing.
+
+Register a hook globally with ``add_hook`` or for a scope with
+``use_config(Config(hooks=[...]))``; each hook receives an ``Event``. Events
+carry a monotonic timestamp, the ``run_id`` of the command execution they
+belong to, and a ``span_id`` pairing start/end events of the same provider
+turn or tool call. When no hook is registered, instrumentation reduces to a
+context-variable lookup per call site and no events are built.
+
+Events (``Event.name`` and the keys in ``Event.data``):
+
+- ``command.start`` (``model``, ``parent_run_id``) / ``command.end``
+  (``ok``, ``error``, ``elapsed``)
+- ``config.resolved`` (``model``, ``temperature``, ``max_tokens``,
+  ``max_tool_turns``, ``retry``)
+- ``request.sent`` (``provider``, ``model``, ``turn``) / ``response.received``
+  (``provider``, ``model``, ``turn``, ``tool_calls``, ``usage``, ``elapsed``);
+  ``request.failed`` (``provider``, ``model``, ``turn``, ``error``,
+  ``elapsed``) replaces ``response.received`` when the request raises or a
+  streamed turn is abandoned
+- ``tool.start`` (``tool``, ``call_id``, ``args``, ``queue_wait``, ``thread``)
+  / ``tool.end`` (``tool``, ``call_id``, ``ok``, ``error``, ``result_size``,
+  ``elapsed``); ``queue_wait`` is the time spent waiting for a worker thread
+  (None when the call ran inline)
+- ``finalize`` (``provider``, ``model``): a follow-up turn was requested
+  because the structured output was missing or invalid
+- ``parse.success`` (``type``, ``elapsed``) / ``parse.failure`` (``type``,
+  ``error``, ``elapsed``)
+- ``retry`` (``attempt``, ``delay``, ``error``)
+- ``cache.hit`` / ``cache.miss``: response cache lookups
+
+Commands and ``ask`` open a run; events raised outside one (for example
+while iterating a stream, or when calling a backend directly) reach the
+global hooks with an empty ``run_id``.
+"""
+
+from __future__ import annotations
+
+import itertools
+import logging
+import time
+import uuid
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from .config import Config
+
+log = logging.getLogger(__name__)
+
+COMMAND_START = "command.start"
+COMMAND_END = "command.end"
+CONFIG_RESOLVED = "config.resolved"
+REQUEST_SENT = "request.sent"
+RESPONSE_RECEIVED = "response.received"
+REQUEST_FAILED = "request.failed"
+TOOL_START = "tool.start"
+TOOL_END = "tool.end"
+FINALIZE = "finalize"
+PARSE_SUCCESS = "parse.success"
+PARSE_FAILURE = "parse.failure"
+RETRY = "retry"
+CACHE_HIT = "cache.hit"
+CACHE_MISS = "cache.miss"
+
+
+@dataclass(frozen=True)
+class Event:
+    """One lifecycle event; ``ts`` is ``time.monotonic()`` at emission."""
+
+    name: str
+    ts: float
+    run_id: str = ""
+    command: str | None = None
+    span_id: int | None = None
+    data: dict[str, Any] = field(default_factory=dict)
+
+
+Hook = Callable[[Event], None]
+
+_hooks: tuple[Hook, ...] = ()
+_span_ids = itertools.count(1)
+
+
+def add_hook(fn: Hook) -> None:
+    """Call ``fn(event)`` for every lifecycle event."""
+    global _hooks
+    _hooks = (*_hooks, fn)
+
+
+def remove_hook(fn: Hook) -> None:
+    global _hooks
+    _hooks = tuple(h for h in _hooks if h != fn)
+
+
+class _Run:
+    """A command execution that events are correlated to."""
+
+    __slots__ = ("id", "command", "hooks", "config", "_token", "_t0")
+
+    def __init__(self, command: str, hooks: tuple[Hook, ...], config: Config) -> None:
+        self.id = uuid.uuid4().hex
+        self.command = command
+        self.hooks = hooks
+        self.config = config
+        self._token: Any = None
+        self._t0 = 0.0
+
+    def __enter__(self) -> "_Run":
+        parent = _current_run.get()
+        self._token = _current_run.set(self)
+        self._t0 = time.monotonic()
+        cfg = self.config
+        emit(COMMAND_START, model=cfg.model, parent_run_id=parent.id if parent else None)
+        emit(
+            CONFIG_RESOLVED,
+            model=cfg.model,
+            temperature=cfg.temperature,
+            max_tokens=cfg.max_tokens,
+            max_tool_turns=cfg.max_tool_turns,
+            retry=cfg.retry,
+        )
+        return self
+
+    def __exit__(self, exc_type: Any, exc: BaseException | None, tb: Any) -> None:
+        try:
+            emit(
+                COMMAND_END,
+                ok=exc is None,
+                error=None if exc is None else f"{type(exc).__name__}: {exc}",
+                elapsed=time.monotonic() - self._t0,
+            )
+        finally:
+            _current_run.reset(self._token)
+
+
+class _NoRun:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+
+_NO_RUN = _NoRun()
+
+_current_run: ContextVar[_Run | None] = ContextVar("alloy_event_run", default=None)
+
+
+def command_run(command: str, config: Config) -> _Run | _NoRun:
+    """Context manager correlating the events of one command execution.
+
+    Returns a no-op context when neither global nor config hooks are set.
+    """
+    hooks = _hooks
+    if config.hooks:
+        hooks = (*hooks, *config.hooks)
+    if not hooks:
+        return _NO_RUN
+    return _Run(command, hooks, config)
+
+
+def enabled() -> bool:
+    """Return True when an emitted event would reach a hook."""
+    return _current_run.get() is not None or bool(_hooks)
+
+
+def new_span() -> int:
+    """Return an id pairing the start and end events of one turn or tool call."""
+    return next(_span_ids)
+
+
+def emit(name: str, *, span: int | None = None, **data: Any) -> None:
+    """Deliver an event to the hooks of the current run (or the global hooks)."""
+    run = _current_run.get()
+    hooks = run.hooks if run is not None else _hooks
+    if not hooks:
+        return
+    event = Event(
+        name,
+        time.monotonic(),
+        run.id if run is not None else "",
+        run.command if run is not None else None,
+        span,
+        data,
+    )
+    for hook in hooks:
+        try:
+            hook(event)
+        except Exception:
+            log.warning("Event hook %r failed on %s", hook, name, exc_info=True)
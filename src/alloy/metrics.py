@@ -0,0 +1,482 @@
+"""In-process metrics for commands, provider requests and tools.
+
+``enable()`` registers an ``alloy.events`` hook that records:
+
+- commands: executions by outcome, latency, provider turns per execution and
+  in-flight count, labeled by command and model
+- provider requests: count by outcome, latency, in-flight count and token
+  usage, labeled by provider and model
+- tools: calls by outcome, latency, worker queue wait and in-flight count,
+  labeled by tool name
+- retries, finalize turns, parse results and response-cache lookups per
+  command (``rates()`` turns these into finalize, parse-failure and cache-hit
+  rates)
+
+Each thread updates its own shard of a metric, so threads recording at the
+same time never contend on a lock; reads sum the shards. Export with
+``render()`` (Prometheus text format) or ``snapshot()`` (plain dicts).
+Nothing is recorded until ``enable()`` is called.
+"""
+
+from __future__ import annotations
+
+import bisect
+import math
+import threading
+import weakref
+from typing import Any
+
+from . import events
+
+LATENCY_BUCKETS: tuple[float, ...] = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+TOOL_BUCKETS: tuple[float, ...] = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30)
+TURN_BUCKETS: tuple[float, ...] = (1, 2, 3, 5, 8, 13, 21)
+
+
+class _Owner:
+    """Holds a thread's slot; only that thread's ``threading.local`` refers to it."""
+
+    __slots__ = ("slot", "__weakref__")
+
+    def __init__(self, slot: list[float]) -> None:
+        self.slot = slot
+
+
+class _Shards:
+    """Per-thread slots of ``size`` floats; only the owning thread writes its slot.
+
+    When a thread exits its slot is folded into ``_base``, so short-lived
+    threads do not leave slots behind.
+    """
+
+    __slots__ = ("_size", "_local", "_slots", "_base", "_lock")
+
+    def __init__(self, size: int) -> None:
+        self._size = size
+        self._local = threading.local()
+        self._slots: dict[int, list[float]] = {}
+        self._base = [0.0] * size
+        self._lock = threading.Lock()
+
+    def slot(self) -> list[float]:
+        owner = getattr(self._local, "owner", None)
+        if owner is None:
+            owner = _Owner([0.0] * self._size)
+            with self._lock:
+                self._slots[id(owner.slot)] = owner.slot
+            weakref.finalize(owner, self._fold, owner.slot)
+            self._local.owner = owner
+        return owner.slot
+
+    def _fold(self, slot: list[float]) -> None:
+        with self._lock:
+            self._base = [math.fsum(col) for col in zip(self._base, slot)]
+            del self._slots[id(slot)]
+
+    def totals(self) -> list[float]:
+        with self._lock:
+            slots = [self._base, *self._slots.values()]
+        return [math.fsum(col) for col in zip(*slots)]
+
+
+class _Metric:
+    kind = ""
+    _size = 1
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...]) -> None:
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._children: dict[tuple[str, ...], _Shards] = {}
+        self._lock = threading.Lock()
+
+    def _shards(self, values: tuple[str, ...]) -> _Shards:
+        shards = self._children.get(values)
+        if shards is None:
+            with self._lock:
+                shards = self._children.setdefault(values, _Shards(self._size))
+        return shards
+
+    def _items(self) -> list[tuple[tuple[str, ...], list[float]]]:
+        with self._lock:
+            children = list(self._children.items())
+        return [(values, shards.totals()) for values, shards in children]
+
+    def _label_dict(self, values: tuple[str, ...]) -> dict[str, str]:
+        return dict(zip(self.labels, values))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._children = {}
+
+    def samples(self) -> list[dict[str, Any]]:
+        return [
+            {"labels": self._label_dict(values), "value": totals[0]}
+            for values, totals in self._items()
+        ]
+
+    def value(self, *labels: str) -> float:
+        """Current value for one label combination (0 when never recorded)."""
+        shards = self._children.get(labels)
+        return 0.0 if shards is None else shards.totals()[0]
+
+    def render(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self._label_dict(values))} {_format_value(totals[0])}"
+            for values, totals in self._items()
+        ]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._shards(labels).slot()[0] += amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def add(self, *labels: str, amount: float = 1.0) -> None:
+        self._shards(labels).slot()[0] += amount
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, help: str, labels: tuple[str, ...], buckets: tuple[float, ...]
+    ) -> None:
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # One slot per bucket, one for +Inf, one for the sum.
+        self._size = len(self.buckets) + 2
+
+    def observe(self, *labels: str, value: float) -> None:
+        slot = self._shards(labels).slot()
+        slot[bisect.bisect_left(self.buckets, value)] += 1
+        slot[-1] += value
+
+    def value(self, *labels: str) -> float:
+        """Number of observations for one label combination."""
+        shards = self._children.get(labels)
+        return 0.0 if shards is None else math.fsum(shards.totals()[:-1])
+
+    def _cumulative(self, totals: list[float]) -> list[tuple[str, float]]:
+        out: list[tuple[str, float]] = []
+        running = 0.0
+        for bound, n in zip((*self.buckets, math.inf), totals[:-1]):
+            running += n
+            out.append((_format_value(bound), running))
+        return out
+
+    def samples(self) -> list[dict[str, Any]]:
+        return [
+            {
+                "labels": self._label_dict(values),
+                "count": math.fsum(totals[:-1]),
+                "sum": totals[-1],
+                "buckets": dict(self._cumulative(totals)),
+            }
+            for values, totals in self._items()
+        ]
+
+    def render(self) -> list[str]:
+        lines: list[str] = []
+        for values, totals in self._items():
+            labels = self._label_dict(values)
+            cumulative = self._cumulative(totals)
+            for le, n in cumulative:
+                lines.append(
+                    f"{self.name}_bucket{_format_labels({**labels, 'le': le})} {_format_value(n)}"
+                )
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(totals[-1])}")
+            lines.append(
+                f"{self.name}_count{_format_labels(labels)} {_format_value(cumulative[-1][1])}"
+            )
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Registry:
+    """A named set of metrics with Prometheus and snapshot export."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> Any:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if existing.kind != metric.kind or existing.labels != metric.labels:
+                    raise ValueError(f"Metric {metric.name!r} already registered differently")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help: str, labels: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, help, labels))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def get(self, name: str) -> _Metric | None:
+        return self._metrics.get(name)
+
+    def reset(self) -> None:
+        """Drop every recorded value, keeping the metric definitions."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for m in metrics:
+            m.reset()
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        """Return ``{name: {"type", "help", "samples"}}`` with plain, JSON-ready values."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {m.name: {"type": m.kind, "help": m.help, "samples": m.samples()} for m in metrics}
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: list[str] = []
+        for m in metrics:
+            lines.append(f"# HELP {m.name} {m.help}")
+            lines.append(f"# TYPE {m.name} {m.kind}")
+            lines.extend(m.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+_hook: _MetricsHook | None = None
+
+
+def enable(registry: Registry | None = None) -> Registry:
+    """Start recording lifecycle metrics into ``registry`` (default: ``REGISTRY``)."""
+    global _hook
+    disable()
+    registry = REGISTRY if registry is None else registry
+    _hook = _MetricsHook(registry)
+    events.add_hook(_hook)
+    return registry
+
+
+def disable() -> None:
+    """Stop recording metrics; recorded values are kept."""
+    global _hook
+    if _hook is not None:
+        events.remove_hook(_hook)
+        _hook = None
+
+
+def render(registry: Registry | None = None) -> str:
+    """Prometheus text export of ``registry`` (default: ``REGISTRY``)."""
+    return (REGISTRY if registry is None else registry).render()
+
+
+def snapshot(registry: Registry | None = None) -> dict[str, dict[str, Any]]:
+    """Snapshot of ``registry`` (default: ``REGISTRY``); see ``Registry.snapshot``."""
+    return (REGISTRY if registry is None else registry).snapshot()
+
+
+def rates(registry: Registry | None = None) -> dict[str, float | None]:
+    """Finalize-turn, parse-failure and cache-hit rates over everything recorded.
+
+    Each rate is None until its denominator is non-zero.
+    """
+    registry = REGISTRY if registry is None else registry
+
+    def total(name: str, **match: str) -> float:
+        metric = registry.get(name)
+        if metric is None:
+            return 0.0
+        return math.fsum(
+            s["value"]
+            for s in metric.samples()
+            if all(s["labels"].get(k) == v for k, v in match.items())
+        )
+
+    def ratio(num: float, den: float) -> float | None:
+        return num / den if den else None
+
+    parse_failures = total("alloy_parse_total", result="failure")
+    cache_hits = total("alloy_cache_lookups_total", result="hit")
+    return {
+        "finalize": ratio(total("alloy_finalize_total"), total("alloy_commands_total")),
+        "parse_failure": ratio(parse_failures, total("alloy_parse_total")),
+        "cache_hit": ratio(cache_hits, total("alloy_cache_lookups_total")),
+    }
+
+
+def _label(value: Any) -> str:
+    return "" if value is None else str(value)
+
+
+class _MetricsHook:
+    """Maps lifecycle events onto registry metrics; safe to call from any thread."""
+
+    def __init__(self, registry: Registry) -> None:
+        r = registry
+        cmd = ("command", "model")
+        req = ("provider", "model")
+        self.commands = r.counter("alloy_commands_total", "Command executions.", (*cmd, "result"))
+        self.command_seconds = r.histogram(
+            "alloy_command_duration_seconds", "Command execution latency.", cmd
+        )
+        self.command_turns = r.histogram(
+            "alloy_command_turns", "Provider requests per command execution.", cmd, TURN_BUCKETS
+        )
+        self.commands_in_flight = r.gauge(
+            "alloy_commands_in_flight", "Command executions in progress.", ("command",)
+        )
+        self.requests = r.counter("alloy_requests_total", "Provider requests.", (*req, "result"))
+        self.request_seconds = r.histogram(
+            "alloy_request_duration_seconds", "Provider request latency.", req
+        )
+        self.requests_in_flight = r.gauge(
+            "alloy_requests_in_flight", "Provider requests in progress.", req
+        )
+        self.tokens = r.counter("alloy_tokens_total", "Provider-reported tokens.", (*req, "type"))
+        self.tool_calls = r.counter("alloy_tool_calls_total", "Tool calls.", ("tool", "result"))
+        self.tool_seconds = r.histogram(
+            "alloy_tool_duration_seconds", "Tool call latency.", ("tool",), TOOL_BUCKETS
+        )
+        self.tool_queue_seconds = r.histogram(
+            "alloy_tool_queue_wait_seconds",
+            "Time tool calls waited for a worker thread.",
+            ("tool",),
+            TOOL_BUCKETS,
+        )
+        self.tools_in_flight = r.gauge(
+            "alloy_tools_in_flight", "Tool calls in progress.", ("tool",)
+        )
+        self.retries = r.counter("alloy_retries_total", "Command retries.", ("command",))
+        self.finalizes = r.counter(
+            "alloy_finalize_total",
+            "Follow-up turns requested for a missing structured output.",
+            ("command", *req),
+        )
+        self.parses = r.counter(
+            "alloy_parse_total", "Output parse attempts.", ("command", "result")
+        )
+        self.cache = r.counter(
+            "alloy_cache_lookups_total", "Response cache lookups.", ("command", "result")
+        )
+        self._lock = threading.Lock()
+        self._runs: dict[str, list[Any]] = {}
+        self._handlers = {
+            events.COMMAND_START: self._command_start,
+            events.COMMAND_END: self._command_end,
+            events.REQUEST_SENT: self._request_sent,
+            events.RESPONSE_RECEIVED: self._request_done,
+            events.REQUEST_FAILED: self._request_done,
+            events.TOOL_START: self._tool_start,
+            events.TOOL_END: self._tool_end,
+            events.FINALIZE: self._finalize,
+            events.PARSE_SUCCESS: self._parse,
+            events.PARSE_FAILURE: self._parse,
+            events.RETRY: self._retry,
+            events.CACHE_HIT: self._cache,
+            events.CACHE_MISS: self._cache,
+        }
+
+    def __call__(self, event: events.Event) -> None:
+        handler = self._handlers.get(event.name)
+        if handler is not None:
+            handler(event)
+
+    def _command_start(self, event: events.Event) -> None:
+        with self._lock:
+            self._runs[event.run_id] = [_label(event.data.get("model")), 0]
+        self.commands_in_flight.add(_label(event.command))
+
+    def _command_end(self, event: events.Event) -> None:
+        with self._lock:
+            model, turns = self._runs.pop(event.run_id, ("", 0))
+        command = _label(event.command)
+        result = "ok" if event.data.get("ok") else "error"
+        self.commands.inc(command, model, result)
+        self.command_seconds.observe(command, model, value=event.data.get("elapsed") or 0.0)
+        self.command_turns.observe(command, model, value=turns)
+        self.commands_in_flight.add(command, amount=-1.0)
+
+    def _request_sent(self, event: events.Event) -> None:
+        with self._lock:
+            run = self._runs.get(event.run_id)
+            if run is not None:
+                run[1] += 1
+        data = event.data
+        self.requests_in_flight.add(_label(data.get("provider")), _label(data.get("model")))
+
+    def _request_done(self, event: events.Event) -> None:
+        data = event.data
+        provider, model = _label(data.get("provider")), _label(data.get("model"))
+        result = "ok" if event.name == events.RESPONSE_RECEIVED else "error"
+        self.requests.inc(provider, model, result)
+        self.request_seconds.observe(provider, model, value=data.get("elapsed") or 0.0)
+        self.requests_in_flight.add(provider, model, amount=-1.0)
+        usage = data.get("usage")
+        if usage:
+            for kind in ("input", "output", "cached_input"):
+                n = usage.get(f"{kind}_tokens")
+                if n:
+                    self.tokens.inc(provider, model, kind, amount=n)
+
+    def _tool_start(self, event: events.Event) -> None:
+        tool = _label(event.data.get("tool"))
+        self.tools_in_flight.add(tool)
+        wait = event.data.get("queue_wait")
+        if wait is not None:
+            self.tool_queue_seconds.observe(tool, value=wait)
+
+    def _tool_end(self, event: events.Event) -> None:
+        data = event.data
+        tool = _label(data.get("tool"))
+        self.tool_calls.inc(tool, "ok" if data.get("ok") else "error")
+        self.tool_seconds.observe(tool, value=data.get("elapsed") or 0.0)
+        self.tools_in_flight.add(tool, amount=-1.0)
+
+    def _finalize(self, event: events.Event) -> None:
+        data = event.data
+        self.finalizes.inc(
+            _label(event.command), _label(data.get("provider")), _label(data.get("model"))
+        )
+
+    def _parse(self, event: events.Event) -> None:
+        result = "success" if event.name == events.PARSE_SUCCESS else "failure"
+        self.parses.inc(_label(event.command), result)
+
+    def _retry(self, event: events.Event) -> None:
+        self.retries.inc(_label(event.command))
+
+    def _cache(self, event: events.Event) -> None:
+        self.cache.inc(_label(event.command), "hit" if event.name == events.CACHE_HIT else "miss")
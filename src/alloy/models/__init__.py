@@ -10,4 +10,5 @@ __all__ = [
     "anthropic",
     "gemini",
     "ollama",
+    "registry",
 ]
@@ -1,9 +1,19 @@
 from __future__ import annotations
 
-from collections.abc import Iterable, AsyncIterable, Iterator, AsyncIterator
+from collections.abc import (
+    AsyncGenerator,
+    AsyncIterable,
+    AsyncIterator,
+    Generator,
+    Iterable,
+    Iterator,
+)
 from typing import Any
 
+from .. import codec
 from ..config import Config
+from ..streaming import afirst_byte, current_recorder, first_byte
+from ..ratelimit import acquire, aacquire
 from ..errors import (
     ConfigurationError,
 )
@@ -12,10 +22,13 @@ from .base import (
     BaseLoopState,
     ToolCall,
     ToolResult,
+    decode_structured_output,
     should_finalize_structured_output,
     serialize_tool_payload,
     build_tools_common,
     STRICT_JSON_ONLY_MSG,
+    STREAM_SCHEMA_WITH_TOOLS_MSG,
+    memoize_on_schema,
 )
 from ..types import flatten_property_paths
 
@@ -26,7 +39,75 @@ def _build_tools(tools: list | None) -> tuple[list[dict] | None, dict[str, Any]]
     def _fmt(name: str, description: str, params: dict[str, Any]) -> dict[str, Any]:
         return {"name": name, "description": description, "input_schema": params}
 
-    return build_tools_common(tools, _fmt)
+    return build_tools_common(tools, _fmt, cache_key="anthropic")
+
+
+@memoize_on_schema
+def _object_system_hint(output_schema: dict) -> str:
+    try:
+        paths = flatten_property_paths(output_schema)
+        if paths:
+            keys_text = ", ".join(paths)
+        else:
+            props = (
+                output_schema.get("properties", {})
+                if isinstance(output_schema.get("properties"), dict)
+                else {}
+            )
+            keys_text = ", ".join(sorted(props.keys()))
+        return (
+            "Return only a JSON object that exactly matches the required schema. "
+            f"Use exactly these property names (including nested): {keys_text}. "
+            "Use numbers for numeric fields without symbols. No extra text."
+        )
+    except Exception:
+        return (
+            "Return only a JSON object that exactly matches the required schema. "
+            "Use the exact property names. No extra text."
+        )
+
+
+def _field(obj: Any, key: str) -> Any:
+    if isinstance(obj, dict):
+        return obj.get(key)
+    return getattr(obj, key, None)
+
+
+class _ToolUseCollector:
+    """Rebuilds ``tool_use`` blocks from raw stream events for eager tool dispatch."""
+
+    def __init__(self) -> None:
+        self._blocks: dict[Any, dict[str, Any]] = {}
+
+    def feed(self, event: Any) -> ToolCall | None:
+        """Return the completed call when ``event`` closes a ``tool_use`` block."""
+        et = _field(event, "type")
+        index = _field(event, "index")
+        if et == "content_block_start":
+            block = _field(event, "content_block")
+            if _field(block, "type") == "tool_use":
+                self._blocks[index] = {
+                    "id": str(_field(block, "id") or ""),
+                    "name": str(_field(block, "name") or ""),
+                    "json": [],
+                }
+        elif et == "content_block_delta":
+            rec = self._blocks.get(index)
+            delta = _field(event, "delta")
+            piece = _field(delta, "partial_json")
+            if rec is not None and isinstance(piece, str):
+                rec["json"].append(piece)
+        elif et == "content_block_stop":
+            rec = self._blocks.pop(index, None)
+            if rec is not None:
+                try:
+                    args = codec.loads("".join(rec["json"]) or "{}")
+                except Exception:
+                    args = {}
+                if not isinstance(args, dict):
+                    args = {}
+                return ToolCall(id=rec["id"], name=rec["name"], args=args)
+        return None
 
 
 def _extract_text_from_response(resp: Any) -> str:
@@ -58,6 +139,7 @@ def _finalize_json_output(client: Any, state: "AnthropicLoopState") -> str | Non
     kwargs2.pop("tools", None)
     kwargs2.pop("tool_choice", None)
     resp2 = client.messages.create(**kwargs2)
+    state.record_usage(resp2)
     out2 = _extract_text_from_response(resp2)
     if not out2:
         return None
@@ -80,6 +162,7 @@ async def _afinalize_json_output(client: Any, state: "AnthropicLoopState") -> st
     kwargs2.pop("tools", None)
     kwargs2.pop("tool_choice", None)
     resp2 = await client.messages.create(**kwargs2)
+    state.record_usage(resp2)
     out2 = _extract_text_from_response(resp2)
     if not out2:
         return None
@@ -121,6 +204,7 @@ class AnthropicLoopState(BaseLoopState[Any]):
         prefill: str | None,
     ) -> None:
         super().__init__(config, tool_map)
+        self.prompt = prompt
         self.system = system
         self.tool_defs = tool_defs
         self.prefill = prefill
@@ -235,7 +319,10 @@ class AnthropicLoopState(BaseLoopState[Any]):
 class AnthropicBackend(ModelBackend):
     """Anthropic Claude backend."""
 
+    provider_name = "anthropic"
     supports_streaming_tools = True
+    _sync_client_attrs = ("_client_sync",)
+    _async_client_attrs = ("_client_async",)
 
     def __init__(self) -> None:
         self._Anthropic: Any | None = None
@@ -276,6 +363,7 @@ class AnthropicBackend(ModelBackend):
             prefill=prefill,
         )
         out = self.run_tool_loop(client, state)
+        out = decode_structured_output(out, output_schema)
         if isinstance(output_schema, dict) and bool(config.auto_finalize_missing_output):
             top = (output_schema.get("type") or "").lower()
             need_finalize = (
@@ -284,6 +372,8 @@ class AnthropicBackend(ModelBackend):
                 else (not out.strip())
             )
             if need_finalize:
+                self._finalize_triggered(config)
+                acquire(self.provider_name, config, prompt)
                 out2 = _finalize_json_output(client, state)
                 if isinstance(out2, str) and out2:
                     return out2
@@ -297,24 +387,26 @@ class AnthropicBackend(ModelBackend):
         output_schema: dict | None = None,
         config: Config,
     ) -> Iterable[str]:
-        if output_schema is not None:
-            raise ConfigurationError(
-                "Streaming supports text only; structured outputs are not supported"
-            )
+        rec = current_recorder()
+        if output_schema is not None and tools:
+            raise ConfigurationError(STREAM_SCHEMA_WITH_TOOLS_MSG)
         client: Any = self._get_sync_client()
         if not tools:
-            kwargs = self._prepare_stream_kwargs(prompt, config)
+            kwargs, prefill = self._prepare_stream_kwargs(prompt, config, output_schema)
+            acquire(self.provider_name, config, prompt)
             stream_ctx = client.messages.stream(**kwargs)
 
             def gen():
+                if prefill:
+                    yield prefill
                 with stream_ctx as s:
                     text_stream = getattr(s, "text_stream", None)
                     if text_stream is not None:
-                        for delta in text_stream:
+                        for delta in first_byte(text_stream, rec):
                             if isinstance(delta, str) and delta:
                                 yield delta
                         return
-                    for event in s:
+                    for event in first_byte(s, rec):
                         text = self._parse_stream_event(event)
                         if isinstance(text, str) and text:
                             yield text
@@ -342,24 +434,30 @@ class AnthropicBackend(ModelBackend):
                 raise TypeError("stream_step expects AnthropicLoopState")
             calls_holder: dict[str, list[ToolCall]] = {"value": []}
 
-            def iterator() -> Iterator[str]:
+            def iterator() -> Generator[str, None, None]:
                 kwargs = loop_state._base_kwargs()
                 loop_state._apply_tool_choice(kwargs)
                 stream_ctx = client.messages.stream(**kwargs)
+                eager = self.eager_tools(loop_state)
 
                 final_message: Any | None = None
 
                 with stream_ctx as s:
-                    text_stream = getattr(s, "text_stream", None)
+                    text_stream = getattr(s, "text_stream", None) if eager is None else None
                     if text_stream is not None:
-                        for delta in text_stream:
+                        for delta in first_byte(text_stream, rec):
                             if isinstance(delta, str) and delta:
                                 yield delta
                     else:
-                        for event in s:
+                        tool_uses = _ToolUseCollector() if eager is not None else None
+                        for event in first_byte(s, rec):
                             text = self._parse_stream_event(event)
                             if isinstance(text, str) and text:
                                 yield text
+                            elif tool_uses is not None:
+                                call = tool_uses.feed(event)
+                                if call is not None and eager is not None:
+                                    eager.start(call)
 
                     getter = getattr(s, "get_final_message", None)
                     if callable(getter):
@@ -370,6 +468,7 @@ class AnthropicBackend(ModelBackend):
 
                 calls: list[ToolCall] = []
                 if final_message is not None:
+                    loop_state.record_usage(final_message)
                     try:
                         text_val = loop_state.extract_text(final_message)
                         loop_state.last_response_text = text_val
@@ -381,7 +480,7 @@ class AnthropicBackend(ModelBackend):
                 calls_holder["value"] = calls
 
             class _StreamWrapper(Iterator[str]):
-                def __init__(self, gen: Iterator[str]):
+                def __init__(self, gen: Generator[str, None, None]):
                     self._gen = gen
 
                 def __iter__(self) -> Iterator[str]:
@@ -390,6 +489,9 @@ class AnthropicBackend(ModelBackend):
                 def __next__(self) -> str:
                     return next(self._gen)
 
+                def close(self) -> None:
+                    self._gen.close()
+
                 def _alloy_get_tool_calls(self) -> list[ToolCall]:
                     return calls_holder.get("value", [])
 
@@ -422,6 +524,7 @@ class AnthropicBackend(ModelBackend):
             prefill=prefill,
         )
         out = await self.arun_tool_loop(client, state)
+        out = decode_structured_output(out, output_schema)
         if isinstance(output_schema, dict) and bool(config.auto_finalize_missing_output):
             top = (output_schema.get("type") or "").lower()
             need_finalize = (
@@ -430,6 +533,8 @@ class AnthropicBackend(ModelBackend):
                 else (not out.strip())
             )
             if need_finalize:
+                self._finalize_triggered(config)
+                await aacquire(self.provider_name, config, prompt)
                 out2 = await _afinalize_json_output(client, state)
                 if isinstance(out2, str) and out2:
                     return out2
@@ -443,24 +548,26 @@ class AnthropicBackend(ModelBackend):
         output_schema: dict | None = None,
         config: Config,
     ) -> AsyncIterable[str]:
-        if output_schema is not None:
-            raise ConfigurationError(
-                "Streaming supports text only; structured outputs are not supported"
-            )
+        rec = current_recorder()
+        if output_schema is not None and tools:
+            raise ConfigurationError(STREAM_SCHEMA_WITH_TOOLS_MSG)
         client: Any = self._get_async_client()
         if not tools:
-            kwargs = self._prepare_stream_kwargs(prompt, config)
+            kwargs, prefill = self._prepare_stream_kwargs(prompt, config, output_schema)
+            await aacquire(self.provider_name, config, prompt)
             stream_ctx = client.messages.stream(**kwargs)
 
             async def agen():
+                if prefill:
+                    yield prefill
                 async with stream_ctx as s:
                     text_stream = getattr(s, "text_stream", None)
                     if text_stream is not None:
-                        async for delta in text_stream:
+                        async for delta in afirst_byte(text_stream, rec):
                             if isinstance(delta, str) and delta:
                                 yield delta
                         return
-                    async for event in s:
+                    async for event in afirst_byte(s, rec):
                         text = self._parse_stream_event(event)
                         if isinstance(text, str) and text:
                             yield text
@@ -488,24 +595,30 @@ class AnthropicBackend(ModelBackend):
                 raise TypeError("stream_step expects AnthropicLoopState")
             calls_holder: dict[str, list[ToolCall]] = {"value": []}
 
-            async def iterator() -> AsyncIterator[str]:
+            async def iterator() -> AsyncGenerator[str, None]:
                 kwargs = loop_state._base_kwargs()
                 loop_state._apply_tool_choice(kwargs)
                 stream_ctx = client.messages.stream(**kwargs)
+                eager = self.aeager_tools(loop_state)
 
                 final_message: Any | None = None
 
                 async with stream_ctx as s:
-                    text_stream = getattr(s, "text_stream", None)
+                    text_stream = getattr(s, "text_stream", None) if eager is None else None
                     if text_stream is not None:
-                        async for delta in text_stream:
+                        async for delta in afirst_byte(text_stream, rec):
                             if isinstance(delta, str) and delta:
                                 yield delta
                     else:
-                        async for event in s:
+                        tool_uses = _ToolUseCollector() if eager is not None else None
+                        async for event in afirst_byte(s, rec):
                             text = self._parse_stream_event(event)
                             if isinstance(text, str) and text:
                                 yield text
+                            elif tool_uses is not None:
+                                call = tool_uses.feed(event)
+                                if call is not None and eager is not None:
+                                    eager.start(call)
 
                     getter = getattr(s, "get_final_message", None)
                     if callable(getter):
@@ -516,6 +629,7 @@ class AnthropicBackend(ModelBackend):
 
                 calls: list[ToolCall] = []
                 if final_message is not None:
+                    loop_state.record_usage(final_message)
                     try:
                         text_val = loop_state.extract_text(final_message)
                         loop_state.last_response_text = text_val
@@ -527,8 +641,8 @@ class AnthropicBackend(ModelBackend):
                 calls_holder["value"] = calls
 
             class _AsyncStreamWrapper(AsyncIterator[str]):
-                def __init__(self, agen: AsyncIterator[str]):
-                    self._aiter = agen.__aiter__()
+                def __init__(self, agen: AsyncGenerator[str, None]):
+                    self._aiter = agen
 
                 def __aiter__(self) -> AsyncIterator[str]:
                     return self
@@ -536,6 +650,9 @@ class AnthropicBackend(ModelBackend):
                 async def __anext__(self) -> str:
                     return await self._aiter.__anext__()
 
+                async def aclose(self) -> None:
+                    await self._aiter.aclose()
+
                 def _alloy_get_tool_calls(self) -> list[ToolCall]:
                     return calls_holder.get("value", [])
 
@@ -548,18 +665,14 @@ class AnthropicBackend(ModelBackend):
             raise ConfigurationError(
                 "Anthropic SDK not installed. Run `pip install alloy[anthropic]`."
             )
-        if self._client_sync is None:
-            self._client_sync = self._Anthropic()
-        return self._client_sync
+        return self._ensure_client("_client_sync", self._Anthropic)
 
     def _get_async_client(self) -> Any:
         if self._AsyncAnthropic is None:
             raise ConfigurationError(
                 "Anthropic SDK not installed. Run `pip install alloy[anthropic]`."
             )
-        if self._client_async is None:
-            self._client_async = self._AsyncAnthropic()
-        return self._client_async
+        return self._ensure_client("_client_async", self._AsyncAnthropic)
 
     def _prepare_conversation(
         self, tools: list | None, output_schema: dict | None
@@ -571,29 +684,8 @@ class AnthropicBackend(ModelBackend):
         if output_schema and isinstance(output_schema, dict):
             t = (output_schema.get("type") or "").lower()
             if t == "object":
-                try:
-                    paths = flatten_property_paths(output_schema)
-                    prefill = "{"
-                    if paths:
-                        keys_text = ", ".join(paths)
-                    else:
-                        props = (
-                            output_schema.get("properties", {})
-                            if isinstance(output_schema.get("properties"), dict)
-                            else {}
-                        )
-                        keys_text = ", ".join(sorted(props.keys()))
-                    system_hint = (
-                        "Return only a JSON object that exactly matches the required schema. "
-                        f"Use exactly these property names (including nested): {keys_text}. "
-                        "Use numbers for numeric fields without symbols. No extra text."
-                    )
-                except Exception:
-                    prefill = "{"
-                    system_hint = (
-                        "Return only a JSON object that exactly matches the required schema. "
-                        "Use the exact property names. No extra text."
-                    )
+                prefill = "{"
+                system_hint = _object_system_hint(output_schema)
             elif t in ("number", "integer", "boolean", "string", "array"):
                 tools_present = tool_defs is not None
                 if not tools_present:
@@ -610,7 +702,11 @@ class AnthropicBackend(ModelBackend):
                 system_hint = None
         return tool_defs, tool_map, prefill, system_hint
 
-    def _prepare_stream_kwargs(self, prompt: str, config: Config) -> dict[str, Any]:
+    def _prepare_stream_kwargs(
+        self, prompt: str, config: Config, output_schema: dict | None = None
+    ) -> tuple[dict[str, Any], str | None]:
+        """Return stream request kwargs and the assistant prefill (structured outputs)."""
+        _, _, prefill, system_hint = self._prepare_conversation(None, output_schema)
         kwargs: dict[str, Any] = {
             "model": config.model,
             "messages": [{"role": "user", "content": [{"type": "text", "text": prompt}]}],
@@ -620,11 +716,18 @@ class AnthropicBackend(ModelBackend):
                 else _ANTHROPIC_REQUIRED_MAX_TOKENS
             ),
         }
-        if config.default_system:
-            kwargs["system"] = str(config.default_system)
+        system = str(config.default_system) if config.default_system else ""
+        if system_hint:
+            system = f"{system}\n\n{system_hint}" if system else system_hint
+        if system:
+            kwargs["system"] = system
+        if prefill:
+            kwargs["messages"].append(
+                {"role": "assistant", "content": [{"type": "text", "text": prefill}]}
+            )
         if config.temperature is not None:
             kwargs["temperature"] = config.temperature
-        return kwargs
+        return kwargs, prefill
 
     def _parse_stream_event(self, event: Any) -> str | None:
         et = getattr(event, "type", None) or (event.get("type") if isinstance(event, dict) else "")
@@ -1,18 +1,33 @@
 from __future__ import annotations
 
-from collections.abc import Iterable, AsyncIterable, Iterator
+from collections.abc import (
+    AsyncGenerator,
+    AsyncIterable,
+    AsyncIterator,
+    Generator,
+    Iterable,
+    Iterator,
+)
 from dataclasses import dataclass
 from typing import Any, Callable, Generic, TypeVar
 import inspect
 import abc
 import concurrent.futures
+import contextvars
 import asyncio
+import threading
+import time
 
 from ..config import Config, DEFAULT_PARALLEL_TOOLS_MAX
-from ..types import to_jsonable
-from ..errors import ConfigurationError, ToolError, create_tool_loop_exception
+from ..ratelimit import acquire, aacquire
+from ..tool_executor import Lane, get_tool_executor, in_tool_worker
+from ..streaming import _aclose, _close, current_recorder
+from .. import codec, events, usage as _usage
+from ..types import StructuredOutput
+from ..errors import BudgetExceeded, ConfigurationError, ToolError, create_tool_loop_exception
 import os
 import json
+import sys
 
 T = TypeVar("T")
 
@@ -38,6 +53,19 @@ class BaseLoopState(Generic[T], abc.ABC):
         self.tool_map = tool_map
         self.turns = 0
         self.last_response_text: str = ""
+        self.eager: EagerToolDispatch | AsyncEagerToolDispatch | None = None
+        self.usage = _usage.Usage()
+        self.budgets = _usage.budgets_for(config)
+
+    def record_usage(self, response: Any) -> _usage.Usage | None:
+        """Add the usage reported on ``response`` to this run, its budgets and usage scopes."""
+        u = _usage.usage_from_response(response)
+        if u is not None:
+            self.usage.add(u)
+            for b in self.budgets:
+                b.charge(self.config.model, u)
+            _usage.record(self.config.model, u)
+        return u
 
     @abc.abstractmethod
     def make_request(self, client: Any) -> T: ...
@@ -62,6 +90,9 @@ class ModelBackend:
     """
 
     supports_streaming_tools: bool = False
+    provider_name: str = ""
+    _sync_client_attrs: tuple[str, ...] = ()
+    _async_client_attrs: tuple[str, ...] = ()
 
     def complete(
         self,
@@ -103,50 +134,117 @@ class ModelBackend:
     ) -> AsyncIterable[str]:
         raise NotImplementedError
 
+    def _ensure_client(self, attr: str, factory: Callable[[], Any]) -> Any:
+        """Return the client stored on ``attr``, creating it once under a lock.
+
+        Backends are shared across threads by the registry, so lazy client
+        construction must not race and leak duplicate connection pools.
+        """
+        client = getattr(self, attr, None)
+        if client is None:
+            with _CLIENT_INIT_LOCK:
+                client = getattr(self, attr, None)
+                if client is None:
+                    client = factory()
+                    setattr(self, attr, client)
+        return client
+
+    def close(self) -> None:
+        """Close sync SDK clients and drop references to async ones.
+
+        Async clients cannot be awaited here; use ``aclose()`` from the event
+        loop that created them to release their connections gracefully.
+        """
+        for attr in self._sync_client_attrs:
+            client = getattr(self, attr, None)
+            setattr(self, attr, None)
+            if client is not None:
+                _close_client(client)
+        for attr in self._async_client_attrs:
+            setattr(self, attr, None)
+
+    async def aclose(self) -> None:
+        """Close all SDK clients held by this backend."""
+        for attr in self._async_client_attrs:
+            client = getattr(self, attr, None)
+            setattr(self, attr, None)
+            if client is not None:
+                await _aclose_client(client)
+        self.close()
+
+    def _prepare_tool_args(self, fn: Callable[..., Any], args: Any) -> Any:
+        spec = getattr(fn, "spec", None)
+        if spec is None or not isinstance(args, dict):
+            return args
+        try:
+            return spec.invoker.coerce(args)
+        except Exception:
+            return args
+
     def _execute_single_tool(
-        self, call: ToolCall, tool_map: dict[str, Callable[..., Any]]
+        self,
+        call: ToolCall,
+        tool_map: dict[str, Callable[..., Any]],
+        queued_at: float | None = None,
     ) -> ToolResult:
+        """Run one tool call; ``queued_at`` (monotonic) is when it was handed to a pool."""
+        if not events.enabled():
+            return self._call_tool(call, tool_map)
+        span, t0 = _tool_started(call, queued_at)
+        result = self._call_tool(call, tool_map)
+        _tool_finished(call, result, span, t0)
+        return result
+
+    def _call_tool(self, call: ToolCall, tool_map: dict[str, Callable[..., Any]]) -> ToolResult:
         fn = tool_map.get(call.name)
         if not fn:
             return ToolResult(call.id, ok=False, error=f"Tool '{call.name}' not available")
         try:
-            args = call.args
-            try:
-                target_fn = getattr(getattr(fn, "spec", None), "func", None)
-                if target_fn and isinstance(args, dict):
-                    sig = inspect.signature(target_fn)
-                    coerced: dict[str, Any] = {}
-                    for name, value in args.items():
-                        param = sig.parameters.get(name)
-                        ann = param.annotation if param is not None else inspect._empty
-                        coerced[name] = self._coerce_value(value, ann)
-                    args = coerced
-            except Exception:
-                pass
+            args = self._prepare_tool_args(fn, call.args)
             out = fn(**args) if isinstance(args, dict) else fn(args)
+            if inspect.isawaitable(out):
+                out = run_coroutine_sync(out)
             return ToolResult(call.id, ok=True, value=out)
         except ToolError as e:
             return ToolResult(call.id, ok=False, error=str(e))
         except Exception as e:
             return ToolResult(call.id, ok=False, error=f"{type(e).__name__}: {e}")
 
-    @staticmethod
-    def _coerce_value(value: Any, annotation: Any) -> Any:
+    async def _aexecute_single_tool(
+        self,
+        call: ToolCall,
+        tool_map: dict[str, Callable[..., Any]],
+        lane: Lane | None = None,
+    ) -> ToolResult:
+        """Await coroutine tools on the running loop; run sync tools on the tool executor."""
+        fn = tool_map.get(call.name)
+        if not fn or not _is_async_tool(fn):
+            if lane is None or in_tool_worker():
+                return await asyncio.to_thread(
+                    self._execute_single_tool, call, tool_map, time.monotonic()
+                )
+            executor = get_tool_executor()
+            return await asyncio.wrap_future(
+                executor.submit(lane, self._execute_single_tool, call, tool_map, time.monotonic())
+            )
+        if not events.enabled():
+            return await self._acall_tool(fn, call)
+        span, t0 = _tool_started(call)
+        result = await self._acall_tool(fn, call)
+        _tool_finished(call, result, span, t0)
+        return result
+
+    async def _acall_tool(self, fn: Callable[..., Any], call: ToolCall) -> ToolResult:
         try:
-            if annotation is int:
-                return int(value)
-            if annotation is float:
-                return float(value)
-            if annotation is bool:
-                if isinstance(value, bool):
-                    return value
-                s = str(value).strip().lower()
-                return s in ("true", "1", "yes", "y", "t", "on")
-            if annotation is str:
-                return str(value)
-        except Exception:
-            return value
-        return value
+            args = self._prepare_tool_args(fn, call.args)
+            out = fn(**args) if isinstance(args, dict) else fn(args)
+            if inspect.isawaitable(out):
+                out = await out
+            return ToolResult(call.id, ok=True, value=out)
+        except ToolError as e:
+            return ToolResult(call.id, ok=False, error=str(e))
+        except Exception as e:
+            return ToolResult(call.id, ok=False, error=f"{type(e).__name__}: {e}")
 
     def execute_tools(
         self,
@@ -160,9 +258,34 @@ class ModelBackend:
         if len(calls) == 1:
             return [self._execute_single_tool(calls[0], tool_map)]
         max_workers = max(1, min(len(calls), parallel_tools_max))
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as ex:
-            futs = [ex.submit(self._execute_single_tool, c, tool_map) for c in calls]
+        if in_tool_worker():
+            # Nested tool turn inside a shared-pool worker: waiting on the same
+            # pool could deadlock it, so use a private pool for this turn.
+            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as ex:
+                futs = [
+                    ex.submit(
+                        contextvars.copy_context().run,
+                        self._execute_single_tool,
+                        c,
+                        tool_map,
+                        time.monotonic(),
+                    )
+                    for c in calls
+                ]
+                return [f.result() for f in futs]
+        executor = get_tool_executor()
+        lane = executor.lane(max_workers)
+        futs = [
+            executor.submit(lane, self._execute_single_tool, c, tool_map, time.monotonic())
+            for c in calls
+        ]
+        try:
             return [f.result() for f in futs]
+        except BaseException:
+            # Interrupted while waiting: drop calls that have not started yet.
+            for f in futs:
+                f.cancel()
+            raise
 
     async def aexecute_tools(
         self,
@@ -174,35 +297,60 @@ class ModelBackend:
         if not calls:
             return []
         sem = asyncio.Semaphore(max(1, parallel_tools_max))
+        lane = get_tool_executor().lane(parallel_tools_max)
 
         async def run(c: ToolCall) -> ToolResult:
             async with sem:
-                return await asyncio.to_thread(self._execute_single_tool, c, tool_map)
+                return await self._aexecute_single_tool(c, tool_map, lane)
 
         return await asyncio.gather(*(run(c) for c in calls))
 
     def run_tool_loop(self, client: Any, state: BaseLoopState[T]) -> str:
         while True:
-            resp = state.make_request(client)
+            _check_budgets(state)
+            acquire(self.provider_name, state.config, getattr(state, "prompt", None))
+            sent = self._request_sent(state) if events.enabled() else None
+            try:
+                resp = state.make_request(client)
+            except BaseException as e:
+                if sent is not None:
+                    self._request_failed(state, *sent, e)
+                raise
+            used = state.record_usage(resp)
             text = state.extract_text(resp)
             state.last_response_text = text
 
             calls = state.extract_tool_calls(resp) or []
+            if sent is not None:
+                self._response_received(state, *sent, len(calls), used)
             if not calls:
                 return text
 
+            _check_budgets(state)
             self._handle_tool_turn(state, calls)
 
     async def arun_tool_loop(self, client: Any, state: BaseLoopState[T]) -> str:
         while True:
-            resp = await state.amake_request(client)
+            _check_budgets(state)
+            await aacquire(self.provider_name, state.config, getattr(state, "prompt", None))
+            sent = self._request_sent(state) if events.enabled() else None
+            try:
+                resp = await state.amake_request(client)
+            except BaseException as e:
+                if sent is not None:
+                    self._request_failed(state, *sent, e)
+                raise
+            used = state.record_usage(resp)
             text = state.extract_text(resp)
             state.last_response_text = text
 
             calls = state.extract_tool_calls(resp) or []
+            if sent is not None:
+                self._response_received(state, *sent, len(calls), used)
             if not calls:
                 return text
 
+            _check_budgets(state)
             await self._ahandle_tool_turn(state, calls)
 
     def run_stream_loop(
@@ -218,29 +366,48 @@ class ModelBackend:
         turn (or ``None``/``[]`` if no calls). When no tool calls are returned,
         iteration stops. Otherwise tool results are executed and appended via
         the state before the next turn.
+
+        Closing the returned generator closes the current turn's provider
+        stream and schedules no further tool turns.
         """
 
+        rec = current_recorder()
+
         def gen() -> Iterator[str]:
             while True:
+                _check_budgets(state)
+                acquire(self.provider_name, state.config, getattr(state, "prompt", None))
+                sent = self._request_sent(state) if events.enabled() else None
                 iterator = stream_step(state)
                 getter = getattr(iterator, "_alloy_get_tool_calls", None)
                 calls_holder: list[ToolCall] | None = None
+                finished = False
                 try:
                     while True:
                         chunk = next(iterator)
                         yield chunk
                 except StopIteration:
+                    finished = True
                     if callable(getter):
                         calls_holder = list(getter() or [])
-                except Exception:
-                    raise
-                else:
-                    if callable(getter):
-                        calls_holder = list(getter() or [])
+                finally:
+                    try:
+                        _close(iterator)
+                    finally:
+                        if not finished:
+                            _drop_eager(state)
+                            if sent is not None:
+                                self._request_failed(state, *sent, sys.exc_info()[1])
                 raw_calls = calls_holder or []
                 calls_list = list(raw_calls or [])
+                if sent is not None:
+                    self._response_received(state, *sent, len(calls_list))
                 if not calls_list:
+                    _drop_eager(state)
                     return
+                _check_budgets(state)
+                if rec is not None:
+                    rec.tool_turn()
                 self._handle_tool_turn(state, calls_list)
 
         return gen()
@@ -250,42 +417,141 @@ class ModelBackend:
         state: BaseLoopState[T],
         stream_step: Callable[[BaseLoopState[T]], AsyncIterable[str]],
     ) -> AsyncIterable[str]:
+        rec = current_recorder()
+
         async def agen() -> AsyncIterable[str]:
             while True:
+                _check_budgets(state)
+                await aacquire(self.provider_name, state.config, getattr(state, "prompt", None))
+                sent = self._request_sent(state) if events.enabled() else None
                 agen_iterable = stream_step(state)
                 agen_step = agen_iterable.__aiter__()
                 getter = getattr(agen_iterable, "_alloy_get_tool_calls", None)
                 calls: list[ToolCall] | None = None
+                finished = False
                 try:
                     while True:
                         chunk = await agen_step.__anext__()
                         yield chunk
                 except StopAsyncIteration:
-                    pass
+                    finished = True
+                finally:
+                    try:
+                        await _aclose(agen_step)
+                    finally:
+                        if not finished:
+                            _drop_eager(state)
+                            if sent is not None:
+                                self._request_failed(state, *sent, sys.exc_info()[1])
                 if callable(getter):
                     calls = list(getter() or [])
+                if sent is not None:
+                    self._response_received(state, *sent, len(calls or []))
                 if not calls:
+                    _drop_eager(state)
                     return
+                _check_budgets(state)
+                if rec is not None:
+                    rec.tool_turn()
                 await self._ahandle_tool_turn(state, calls)
 
         return agen()
 
     def _handle_tool_turn(self, state: BaseLoopState[T], calls: list[ToolCall]) -> None:
+        eager = _take_eager(state)
         if not calls:
+            if eager is not None:
+                eager.cancel()
             return
-        self._increment_turn_or_raise(state)
-        ptm = self._resolve_parallel_tools_max(state)
-        results = self.execute_tools(calls, parallel_tools_max=ptm, tool_map=state.tool_map)
+        if isinstance(eager, EagerToolDispatch) and eager.started:
+            results = eager.collect(calls)
+        else:
+            self._increment_turn_or_raise(state)
+            ptm = self._resolve_parallel_tools_max(state)
+            results = self.execute_tools(calls, parallel_tools_max=ptm, tool_map=state.tool_map)
         state.add_tool_results(calls, results)
 
     async def _ahandle_tool_turn(self, state: BaseLoopState[T], calls: list[ToolCall]) -> None:
+        eager = _take_eager(state)
         if not calls:
+            if eager is not None:
+                eager.cancel()
             return
-        self._increment_turn_or_raise(state)
-        ptm = self._resolve_parallel_tools_max(state)
-        results = await self.aexecute_tools(calls, parallel_tools_max=ptm, tool_map=state.tool_map)
+        if isinstance(eager, AsyncEagerToolDispatch) and eager.started:
+            results = await eager.collect(calls)
+        else:
+            self._increment_turn_or_raise(state)
+            ptm = self._resolve_parallel_tools_max(state)
+            results = await self.aexecute_tools(
+                calls, parallel_tools_max=ptm, tool_map=state.tool_map
+            )
         state.add_tool_results(calls, results)
 
+    def eager_tools(self, state: BaseLoopState[T]) -> EagerToolDispatch | None:
+        """Return a dispatcher for this streaming turn when ``Config.eager_tools`` is on.
+
+        Streaming tool loops call ``start(call)`` as soon as a call's arguments
+        are complete; ``_handle_tool_turn`` then collects the results.
+        """
+        if not state.config.eager_tools or in_tool_worker():
+            return None
+        state.eager = EagerToolDispatch(self, state)
+        return state.eager
+
+    def aeager_tools(self, state: BaseLoopState[T]) -> AsyncEagerToolDispatch | None:
+        """Async counterpart of ``eager_tools``."""
+        if not state.config.eager_tools:
+            return None
+        state.eager = AsyncEagerToolDispatch(self, state)
+        return state.eager
+
+    def _finalize_triggered(self, config: Config) -> None:
+        """Report a follow-up turn requested for a missing or invalid structured output."""
+        events.emit(events.FINALIZE, provider=self.provider_name, model=config.model)
+
+    def _request_sent(self, state: BaseLoopState[T]) -> tuple[int, float]:
+        span = events.new_span()
+        events.emit(
+            events.REQUEST_SENT,
+            span=span,
+            provider=self.provider_name,
+            model=state.config.model,
+            turn=state.turns,
+        )
+        return span, time.monotonic()
+
+    def _response_received(
+        self,
+        state: BaseLoopState[T],
+        span: int,
+        t0: float,
+        n_calls: int,
+        used: _usage.Usage | None = None,
+    ) -> None:
+        events.emit(
+            events.RESPONSE_RECEIVED,
+            span=span,
+            provider=self.provider_name,
+            model=state.config.model,
+            turn=state.turns,
+            tool_calls=n_calls,
+            usage=None if used is None else vars(used),
+            elapsed=time.monotonic() - t0,
+        )
+
+    def _request_failed(
+        self, state: BaseLoopState[T], span: int, t0: float, exc: BaseException | None
+    ) -> None:
+        events.emit(
+            events.REQUEST_FAILED,
+            span=span,
+            provider=self.provider_name,
+            model=state.config.model,
+            turn=state.turns,
+            error=None if exc is None else f"{type(exc).__name__}: {exc}",
+            elapsed=time.monotonic() - t0,
+        )
+
     def _increment_turn_or_raise(self, state: BaseLoopState[T]) -> None:
         state.turns += 1
         lim = state.config.max_tool_turns
@@ -300,104 +566,497 @@ class ModelBackend:
         return ptm_raw if isinstance(ptm_raw, int) and ptm_raw > 0 else DEFAULT_PARALLEL_TOOLS_MAX
 
 
-def should_finalize_structured_output(text: str, schema: dict | None) -> bool:
-    """Return True if a finalize turn should be attempted for typed outputs.
+def _tool_started(call: ToolCall, queued_at: float | None = None) -> tuple[int, float]:
+    span = events.new_span()
+    now = time.monotonic()
+    events.emit(
+        events.TOOL_START,
+        span=span,
+        tool=call.name,
+        call_id=call.id,
+        args=call.args,
+        queue_wait=None if queued_at is None else now - queued_at,
+        thread=threading.current_thread().name,
+    )
+    return span, now
+
+
+def _tool_finished(call: ToolCall, result: ToolResult, span: int, t0: float) -> None:
+    elapsed = time.monotonic() - t0
+    size = 0
+    if result.ok:
+        try:
+            size = len(serialize_tool_payload(result.value))
+        except Exception:
+            size = 0
+    events.emit(
+        events.TOOL_END,
+        span=span,
+        tool=call.name,
+        call_id=call.id,
+        ok=result.ok,
+        error=result.error,
+        result_size=size,
+        elapsed=elapsed,
+    )
+
+
+def _check_budgets(state: Any) -> None:
+    """Stop the loop before a request or tool turn once a run budget is exceeded."""
+    budgets = getattr(state, "budgets", ())
+    if budgets:
+        try:
+            _usage.check_budgets(budgets, getattr(state, "last_response_text", None))
+        except BudgetExceeded:
+            _drop_eager(state)
+            raise
 
-    Rules:
-    - If no schema, do not finalize.
-    - If schema (or its wrapped form) represents a string, finalize only if the
-      current text is empty. Non-empty text is considered final for strings.
-    - For object schemas, attempt to parse JSON and ensure required keys exist;
-      if parsing fails or required keys are missing, request a finalize turn.
-    - Otherwise, finalize when the current text is empty or not valid JSON
-      (after stripping optional code fences).
+
+def _drop_eager(state: Any) -> None:
+    eager = _take_eager(state)
+    if eager is not None:
+        eager.cancel()
+
+
+def _take_eager(state: Any) -> Any:
+    eager = getattr(state, "eager", None)
+    if eager is not None:
+        state.eager = None
+    return eager
+
+
+def _call_key(call: ToolCall) -> tuple[str, str]:
+    try:
+        return call.name, codec.dumps(call.args)
+    except Exception:
+        return call.name, repr(call.args)
+
+
+def _with_id(result: ToolResult, call: ToolCall) -> ToolResult:
+    if result.id == call.id:
+        return result
+    return ToolResult(call.id, ok=result.ok, value=result.value, error=result.error)
+
+
+class EagerToolDispatch:
+    """Runs a streaming turn's tool calls while the model is still streaming.
+
+    Each call started with ``start`` goes to the shared tool executor right
+    away, on one lane capped by ``parallel_tools_max``. ``collect`` matches
+    the turn's final calls to started ones by name and arguments, runs any
+    that were not started, and returns results in call order.
     """
-    if not isinstance(schema, dict):
-        return False
 
-    def _is_string_schema_or_wrapper(s: dict[str, Any]) -> bool:
-        t = (s.get("type") or "").lower()
-        if t == "string":
-            return True
-        if t == "object":
-            props = s.get("properties") if isinstance(s.get("properties"), dict) else None
-            if isinstance(props, dict):
-                vs = props.get("value")
-                if isinstance(vs, dict) and (vs.get("type") or "").lower() == "string":
-                    return True
-        return False
+    def __init__(self, backend: ModelBackend, state: BaseLoopState[Any]) -> None:
+        self._backend = backend
+        self._state = state
+        self._lane: Lane | None = None
+        self._futures: dict[tuple[str, str], list[concurrent.futures.Future]] = {}
+        self.started = 0
+
+    def start(self, call: ToolCall) -> None:
+        state = self._state
+        if self._lane is None:
+            lim = state.config.max_tool_turns
+            if isinstance(lim, int) and lim >= 0 and state.turns + 1 > lim:
+                return  # leave it to _handle_tool_turn to raise the limit error
+            self._backend._increment_turn_or_raise(state)
+            ptm = self._backend._resolve_parallel_tools_max(state)
+            self._lane = get_tool_executor().lane(ptm)
+        fut = get_tool_executor().submit(
+            self._lane, self._backend._execute_single_tool, call, state.tool_map, time.monotonic()
+        )
+        self._futures.setdefault(_call_key(call), []).append(fut)
+        self.started += 1
+
+    def collect(self, calls: list[ToolCall]) -> list[ToolResult]:
+        futs: list[concurrent.futures.Future | None] = []
+        for c in calls:
+            pending = self._futures.get(_call_key(c))
+            futs.append(pending.pop(0) if pending else None)
+        self.cancel()
+        results: list[ToolResult] = []
+        for c, f in zip(calls, futs):
+            if f is None:
+                results.append(self._backend._execute_single_tool(c, self._state.tool_map))
+            else:
+                results.append(_with_id(f.result(), c))
+        return results
+
+    def cancel(self) -> None:
+        """Cancel started calls that were not collected (or have not run yet)."""
+        for pending in self._futures.values():
+            for f in pending:
+                f.cancel()
+        self._futures.clear()
+
+
+class AsyncEagerToolDispatch:
+    """Async counterpart of ``EagerToolDispatch`` built on ``asyncio`` tasks."""
+
+    def __init__(self, backend: ModelBackend, state: BaseLoopState[Any]) -> None:
+        self._backend = backend
+        self._state = state
+        self._lane: Lane | None = None
+        self._sem: asyncio.Semaphore | None = None
+        self._tasks: dict[tuple[str, str], list[asyncio.Task]] = {}
+        self.started = 0
+
+    def start(self, call: ToolCall) -> None:
+        state = self._state
+        if self._lane is None:
+            lim = state.config.max_tool_turns
+            if isinstance(lim, int) and lim >= 0 and state.turns + 1 > lim:
+                return
+            self._backend._increment_turn_or_raise(state)
+            ptm = self._backend._resolve_parallel_tools_max(state)
+            self._lane = get_tool_executor().lane(ptm)
+            self._sem = asyncio.Semaphore(ptm)
+        task = asyncio.ensure_future(self._run(call))
+        self._tasks.setdefault(_call_key(call), []).append(task)
+        self.started += 1
+
+    async def _run(self, call: ToolCall) -> ToolResult:
+        assert self._sem is not None
+        async with self._sem:
+            return await self._backend._aexecute_single_tool(call, self._state.tool_map, self._lane)
+
+    async def collect(self, calls: list[ToolCall]) -> list[ToolResult]:
+        tasks: list[asyncio.Task | None] = []
+        for c in calls:
+            pending = self._tasks.get(_call_key(c))
+            tasks.append(pending.pop(0) if pending else None)
+        self.cancel()
+
+        async def one(c: ToolCall, t: asyncio.Task | None) -> ToolResult:
+            if t is None:
+                return await self._backend._aexecute_single_tool(
+                    c, self._state.tool_map, self._lane
+                )
+            return _with_id(await t, c)
 
-    s = (text or "").strip()
-    if _is_string_schema_or_wrapper(schema):
-        return not bool(s)
+        return list(await asyncio.gather(*(one(c, t) for c, t in zip(calls, tasks))))
 
-    if not s:
-        return True
-    if s.startswith("```"):
-        nl = s.find("\n")
-        if nl != -1:
-            s = s[nl + 1 :]
-        if s.endswith("```"):
-            s = s[:-3]
-        s = s.strip()
+    def cancel(self) -> None:
+        for pending in self._tasks.values():
+            for t in pending:
+                t.cancel()
+        self._tasks.clear()
+
+
+_CLIENT_INIT_LOCK = threading.Lock()
+
+
+def _is_async_tool(fn: Callable[..., Any]) -> bool:
+    spec = getattr(fn, "spec", None)
+    if spec is not None and hasattr(spec, "is_async"):
+        return bool(spec.is_async)
+    return inspect.iscoroutinefunction(fn)
+
+
+class _BackgroundLoop:
+    """A daemon thread running one event loop, started on first use.
+
+    Sync tool loops submit coroutine tools here instead of creating an event
+    loop per call.
+    """
+
+    def __init__(self) -> None:
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def _ensure(self) -> asyncio.AbstractEventLoop:
+        loop = self._loop
+        if loop is None:
+            with self._lock:
+                loop = self._loop
+                if loop is None:
+                    loop = asyncio.new_event_loop()
+                    self._thread = threading.Thread(
+                        target=loop.run_forever, name="alloy-tool-loop", daemon=True
+                    )
+                    self._thread.start()
+                    self._loop = loop
+        return loop
+
+    def run(self, coro: Any) -> Any:
+        loop = self._ensure()
+        if threading.current_thread() is self._thread:
+            # Re-entrant call from a tool running on this loop: blocking here
+            # would deadlock, so use a private loop on a helper thread.
+            with concurrent.futures.ThreadPoolExecutor(max_workers=1) as ex:
+                return ex.submit(asyncio.run, coro).result()
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+_background_loop = _BackgroundLoop()
+
+
+def run_coroutine_sync(coro: Any) -> Any:
+    """Run an awaitable from synchronous code on the shared background loop."""
+    if not asyncio.iscoroutine(coro):
+        awaitable = coro
+
+        async def _await() -> Any:
+            return await awaitable
+
+        coro = _await()
+    return _background_loop.run(coro)
+
+
+def _close_client(client: Any) -> None:
+    close = getattr(client, "close", None)
+    if not callable(close):
+        return
     try:
-        data = json.loads(s)
+        res = close()
+        if inspect.iscoroutine(res):
+            res.close()
     except Exception:
-        return True
+        pass
+
 
-    if (schema.get("type") or "").lower() == "object":
+async def _aclose_client(client: Any) -> None:
+    for name in ("aclose", "close"):
+        fn = getattr(client, name, None)
+        if not callable(fn):
+            continue
+        try:
+            res = fn()
+            if inspect.isawaitable(res):
+                await res
+        except Exception:
+            pass
+        return
+
+
+class ClosingStream(Iterator[str]):
+    """Provider text generator that also releases its SDK stream on ``close()``.
+
+    Backends open some SDK streams before the generator first runs; closing
+    an unstarted generator skips its ``finally``, so ``close()`` releases
+    ``resource`` explicitly.
+    """
+
+    def __init__(self, gen: Generator[str, None, None], resource: Any) -> None:
+        self._gen = gen
+        self._resource = resource
+
+    def __iter__(self) -> "ClosingStream":
+        return self
+
+    def __next__(self) -> str:
+        return next(self._gen)
+
+    def close(self) -> None:
+        try:
+            self._gen.close()
+        finally:
+            _close_client(self._resource)
+
+
+class AsyncClosingStream(AsyncIterator[str]):
+    """Async counterpart of ``ClosingStream``."""
+
+    def __init__(self, gen: AsyncGenerator[str, None], resource: Any) -> None:
+        self._gen = gen
+        self._resource = resource
+
+    def __aiter__(self) -> "AsyncClosingStream":
+        return self
+
+    async def __anext__(self) -> str:
+        return await self._gen.__anext__()
+
+    async def aclose(self) -> None:
+        try:
+            await self._gen.aclose()
+        finally:
+            await _aclose_client(self._resource)
+
+
+def memoize_on_schema(fn: Callable[[Any], T]) -> Callable[[Any], T]:
+    """Cache a pure function of an output schema by object identity.
+
+    Commands pass the same compiled schema object on every call, so derived
+    artifacts (text formats, finalize hints) are computed once. The schema is
+    kept alive alongside its result, so identities cannot be recycled.
+    """
+    cache: dict[int, tuple[Any, T]] = {}
+    lock = threading.Lock()
+
+    def wrapper(schema: Any) -> T:
+        hit = cache.get(id(schema))
+        if hit is not None and hit[0] is schema:
+            return hit[1]
+        out = fn(schema)
+        with lock:
+            if len(cache) >= _SCHEMA_MEMO_MAX:
+                cache.clear()
+            cache[id(schema)] = (schema, out)
+        return out
 
-        def _has_required(s: dict[str, Any], v: Any) -> bool:
-            if (s.get("type") or "").lower() != "object":
+    wrapper.__doc__ = fn.__doc__
+    wrapper.__name__ = getattr(fn, "__name__", "wrapper")
+    return wrapper
+
+
+_SCHEMA_MEMO_MAX = 256
+
+
+def _is_string_schema_or_wrapper(s: dict[str, Any]) -> bool:
+    t = (s.get("type") or "").lower()
+    if t == "string":
+        return True
+    if t == "object":
+        props = s.get("properties") if isinstance(s.get("properties"), dict) else None
+        if isinstance(props, dict):
+            vs = props.get("value")
+            if isinstance(vs, dict) and (vs.get("type") or "").lower() == "string":
                 return True
+    return False
+
+
+def _accept(value: Any) -> bool:
+    return True
+
+
+def _is_integer(value: Any) -> bool:
+    if isinstance(value, bool):
+        return False
+    return isinstance(value, int) or (isinstance(value, float) and value.is_integer())
+
+
+_PRIMITIVE_CHECKS: dict[str, Callable[[Any], bool]] = {
+    "string": lambda v: isinstance(v, str),
+    "integer": _is_integer,
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "boolean": lambda v: isinstance(v, bool),
+    "null": lambda v: v is None,
+}
+
+
+def _build_validator(s: Any) -> Callable[[Any], bool]:
+    if not isinstance(s, dict):
+        return _accept
+    any_of = s.get("anyOf")
+    if isinstance(any_of, list) and any_of:
+        options = [_build_validator(o) for o in any_of]
+        return lambda v: any(check(v) for check in options)
+    t = s.get("type")
+    names = [str(x).lower() for x in t] if isinstance(t, list) else [str(t or "").lower()]
+    checks = [_build_typed_validator(s, n) for n in names]
+    if len(checks) == 1:
+        return checks[0]
+    return lambda v: any(check(v) for check in checks)
+
+
+def _build_typed_validator(s: dict[str, Any], t: str) -> Callable[[Any], bool]:
+    if t == "object":
+        req_node = s.get("required")
+        required = tuple(req_node) if isinstance(req_node, list) else ()
+        props_node = s.get("properties")
+        props = props_node if isinstance(props_node, dict) else {}
+        children = tuple(
+            (name, check)
+            for name, check in ((n, _build_validator(c)) for n, c in props.items())
+            if check is not _accept
+        )
+
+        def check_object(v: Any) -> bool:
             if not isinstance(v, dict):
                 return False
-            req_node = s.get("required")
-            req = req_node if isinstance(req_node, list) else []
-            for k in req:
+            for k in required:
                 if k not in v:
                     return False
-            props_node = s.get("properties")
-            props = props_node if isinstance(props_node, dict) else {}
-            for name, child_schema in props.items():
-                if not isinstance(child_schema, dict):
-                    continue
-                if name in v:
-                    ct = (child_schema.get("type") or "").lower()
-                    if ct == "object":
-                        if not _has_required(child_schema, v[name]):
-                            return False
-                    elif ct == "array":
-                        items_node = child_schema.get("items")
-                        items = items_node if isinstance(items_node, dict) else None
-                        if items and isinstance(v[name], list):
-                            it = (items.get("type") or "").lower()
-                            if it == "object":
-                                for elem in v[name]:
-                                    if not _has_required(items, elem):
-                                        return False
+            for name, check in children:
+                if name in v and not check(v[name]):
+                    return False
             return True
 
-        if not _has_required(schema, data):
-            return True
-    return False
+        return check_object
+    if t == "array":
+        item = _build_validator(s.get("items"))
+        if item is _accept:
+            return lambda v: isinstance(v, list)
+        return lambda v: isinstance(v, list) and all(item(e) for e in v)
+    return _PRIMITIVE_CHECKS.get(t, _accept)
+
+
+@memoize_on_schema
+def compile_output_validator(schema: Any) -> Callable[[Any], bool]:
+    """Return a predicate checking decoded output against ``schema``.
+
+    The schema is walked once; the returned closure tree checks required
+    keys, nested objects, array items and primitive types.
+    """
+    return _build_validator(schema)
+
+
+def decode_structured_output(text: str, schema: dict | None) -> str:
+    """Decode and validate model output once for typed commands.
+
+    Returns a ``StructuredOutput`` (a ``str``) holding the decoded value and
+    whether it matches ``schema``. ``should_finalize_structured_output`` and
+    ``parse_output`` both reuse it instead of decoding the text again. Text
+    for string outputs (or without a schema) is returned unchanged.
+    """
+    if not isinstance(schema, dict) or not isinstance(text, str):
+        return text
+    if isinstance(text, StructuredOutput):
+        if text.schema is schema:
+            return text
+        out = text
+    elif _is_string_schema_or_wrapper(schema):
+        return text
+    else:
+        out = StructuredOutput.decode(text)
+    out.schema = schema
+    out.valid = out.decoded and compile_output_validator(schema)(out.data)
+    return out
+
+
+def should_finalize_structured_output(text: str, schema: dict | None) -> bool:
+    """Return True if a finalize turn should be attempted for typed outputs.
+
+    Rules:
+    - If no schema, do not finalize.
+    - If schema (or its wrapped form) represents a string, finalize only if the
+      current text is empty. Non-empty text is considered final for strings.
+    - Otherwise decode the text once (ignoring optional code fences; see
+      ``decode_structured_output``) and finalize when it is empty, not valid
+      JSON, or does not match the schema (missing required keys at any
+      depth, or wrongly typed values).
+    """
+    if not isinstance(schema, dict):
+        return False
+    if _is_string_schema_or_wrapper(schema):
+        return not (text or "").strip()
+    if not (text or "").strip():
+        return True
+    out = decode_structured_output(text, schema)
+    return not (isinstance(out, StructuredOutput) and out.valid)
 
 
 def serialize_tool_payload(payload: object) -> str:
     """Serialize a tool's return value into a JSON string (or pass through string).
 
-    Uses ``to_jsonable`` to normalize complex types before encoding.
-    Falls back to ``str(payload)`` if encoding fails.
+    Encodes with ``alloy.codec``, which handles dataclasses (and registered
+    domain types) without an intermediate ``to_jsonable`` copy. Falls back to
+    ``str(payload)`` if encoding fails.
     """
 
     if isinstance(payload, str):
         return payload
     try:
-        return json.dumps(to_jsonable(payload))
+        return codec.dumps(payload)
     except Exception:
         return str(payload)
 
 
+STREAM_SCHEMA_WITH_TOOLS_MSG = "Streaming structured outputs with tools is not supported"
+
 STRICT_JSON_ONLY_MSG = (
     "Respond ONLY with the JSON object matching the required schema. No extra text, no backticks."
 )
@@ -416,12 +1075,49 @@ def ensure_object_schema(schema: dict | None) -> dict | None:
     return {"type": "object", "properties": {"value": schema}, "required": ["value"]}
 
 
+class CompiledTools(list):
+    """A command's tools, with provider-specific definitions cached.
+
+    ``build_tools_common`` stores the formatted definitions and tool map per
+    provider on first use, so repeated calls skip signature inspection and
+    schema generation. ``cache_digest`` holds the response-cache key fragment
+    for the tools once computed. Behaves as a plain list of tools otherwise.
+    """
+
+    def __init__(self, tools: Iterable[Any] = ()) -> None:
+        super().__init__(tools)
+        self.cache_digest: list[Any] | None = None
+        self._built: dict[str, tuple[list[Any] | None, dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def cached(
+        self, key: str, build: Callable[[], tuple[list[Any] | None, dict[str, Any]]]
+    ) -> tuple[list[Any] | None, dict[str, Any]]:
+        out = self._built.get(key)
+        if out is None:
+            with self._lock:
+                out = self._built.get(key)
+                if out is None:
+                    out = build()
+                    self._built[key] = out
+        return out
+
+
 def build_tools_common(
     tools: list | None,
     formatter: Callable[[str, str, dict[str, Any]], Any],
+    *,
+    cache_key: str | None = None,
 ) -> tuple[list[Any] | None, dict[str, Any]]:
+    """Format tool definitions and build the name → tool map.
+
+    When ``tools`` is a ``CompiledTools`` and ``cache_key`` names the provider,
+    the result is computed once and shared; callers must not mutate it.
+    """
     if not tools:
         return None, {}
+    if cache_key is not None and isinstance(tools, CompiledTools):
+        return tools.cached(cache_key, lambda: build_tools_common(tools, formatter))
     defs: list[Any] = []
     tool_map: dict[str, Any] = {}
     for t in tools:
@@ -435,6 +1131,11 @@ def build_tools_common(
 
 
 def get_backend(model: str | None) -> ModelBackend:
+    """Return the shared backend for ``model``'s provider.
+
+    Backends (and their SDK clients) are cached process-wide by the registry
+    in ``alloy.models.registry``; see ``alloy.shutdown()``/``alloy.aclose()``.
+    """
     if not model:
         raise ConfigurationError("No model configured. Call alloy.configure(model=...) first.")
     if os.environ.get("ALLOY_BACKEND", "").lower() == "fake":
@@ -479,8 +1180,15 @@ def get_backend(model: str | None) -> ModelBackend:
                     return json.dumps(self._fake_from_schema(output_schema))
                 return "42"
 
+            def _fake_stream_text(self, output_schema: object) -> list[str]:
+                if not isinstance(output_schema, dict):
+                    return ["demo"]
+                obj = ensure_object_schema(output_schema)
+                text = json.dumps(self._fake_from_schema(obj))
+                return [text[i : i + 8] for i in range(0, len(text), 8)]
+
             def stream(self, prompt: str, *, tools=None, output_schema=None, config: Config):
-                yield "demo"
+                yield from self._fake_stream_text(output_schema)
 
             async def acomplete(
                 self, prompt: str, *, tools=None, output_schema=None, config: Config
@@ -491,24 +1199,28 @@ def get_backend(model: str | None) -> ModelBackend:
 
             async def astream(self, prompt: str, *, tools=None, output_schema=None, config: Config):
                 async def agen():
-                    yield "demo"
+                    for chunk in self._fake_stream_text(output_schema):
+                        yield chunk
 
                 return agen()
 
         return _Fake()
+    provider = _provider_for_model(model)
+    if provider is None:
+        raise ConfigurationError(f"No backend available for model '{model}'.")
+    from .registry import backend_for
+
+    return backend_for(provider, _BACKEND_FACTORIES[provider])
+
+
+def _provider_for_model(model: str) -> str | None:
     name = model.lower()
     if name.startswith("ollama:") or name.startswith("local:"):
-        from .ollama import OllamaBackend
-
-        return OllamaBackend()
+        return "ollama"
     if name.startswith("claude") or name.startswith("anthropic"):
-        from .anthropic import AnthropicBackend
-
-        return AnthropicBackend()
+        return "anthropic"
     if name.startswith("gemini") or name.startswith("google"):
-        from .gemini import GeminiBackend
-
-        return GeminiBackend()
+        return "gemini"
     if (
         name.startswith("gpt")
         or name.startswith("openai")
@@ -517,8 +1229,37 @@ def get_backend(model: str | None) -> ModelBackend:
         or name.startswith("o3")
         or name.startswith("o4")
     ):
-        from .openai import OpenAIBackend
+        return "openai"
+    return None
+
+
+def _new_openai_backend() -> ModelBackend:
+    from .openai import OpenAIBackend
+
+    return OpenAIBackend()
+
+
+def _new_anthropic_backend() -> ModelBackend:
+    from .anthropic import AnthropicBackend
+
+    return AnthropicBackend()
+
+
+def _new_gemini_backend() -> ModelBackend:
+    from .gemini import GeminiBackend
+
+    return GeminiBackend()
+
+
+def _new_ollama_backend() -> ModelBackend:
+    from .ollama import OllamaBackend
+
+    return OllamaBackend()
 
-        return OpenAIBackend()
 
-    raise ConfigurationError(f"No backend available for model '{model}'.")
+_BACKEND_FACTORIES: dict[str, Callable[[], ModelBackend]] = {
+    "openai": _new_openai_backend,
+    "anthropic": _new_anthropic_backend,
+    "gemini": _new_gemini_backend,
+    "ollama": _new_ollama_backend,
+}
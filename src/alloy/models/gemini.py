@@ -1,22 +1,35 @@
 from __future__ import annotations
 
-from collections.abc import Iterable, AsyncIterable, Iterator, AsyncIterator
+from collections.abc import (
+    AsyncGenerator,
+    AsyncIterable,
+    AsyncIterator,
+    Generator,
+    Iterable,
+    Iterator,
+)
 from typing import Any, cast
-import json
 
+from .. import codec
 from ..config import Config
+from ..streaming import afirst_byte, current_recorder, first_byte
+from ..ratelimit import acquire, aacquire
 from ..errors import (
     ConfigurationError,
 )
 from .base import (
+    AsyncClosingStream,
+    ClosingStream,
     ModelBackend,
     BaseLoopState,
     ToolCall,
     ToolResult,
+    decode_structured_output,
     should_finalize_structured_output,
     build_tools_common,
     ensure_object_schema,
     STRICT_JSON_ONLY_MSG,
+    STREAM_SCHEMA_WITH_TOOLS_MSG,
 )
 from ..types import to_jsonable
 
@@ -60,7 +73,12 @@ def _schema_to_gemini(T: Any, s: dict[str, Any]) -> Any:
 
 
 def _finalize_json_output(
-    T: Any, client: Any, model_name: str, messages: list[Any], cfg: dict[str, object]
+    T: Any,
+    client: Any,
+    model_name: str,
+    messages: list[Any],
+    cfg: dict[str, object],
+    state: GeminiLoopState | None = None,
 ) -> str:
     if T is None:
         raise ConfigurationError("Google GenAI SDK types not available")
@@ -74,11 +92,18 @@ def _finalize_json_output(
     res = client.models.generate_content(
         model=model_name, contents=messages + [strict_msg], config=cfg2 or None
     )
+    if state is not None:
+        state.record_usage(res)
     return _extract_text_from_response(res)
 
 
 async def _afinalize_json_output(
-    T: Any, client: Any, model_name: str, messages: list[Any], cfg: dict[str, object]
+    T: Any,
+    client: Any,
+    model_name: str,
+    messages: list[Any],
+    cfg: dict[str, object],
+    state: GeminiLoopState | None = None,
 ) -> str:
     if T is None:
         raise ConfigurationError("Google GenAI SDK types not available")
@@ -92,6 +117,8 @@ async def _afinalize_json_output(
     res = await client.aio.models.generate_content(
         model=model_name, contents=messages + [strict_msg], config=cfg2 or None
     )
+    if state is not None:
+        state.record_usage(res)
     return _extract_text_from_response(res)
 
 
@@ -106,6 +133,7 @@ class GeminiLoopState(BaseLoopState[Any]):
         prompt: str,
     ) -> None:
         super().__init__(config, {})
+        self.prompt = prompt
         self.T = types_mod
         self.cfg = dict(cfg)
         decls, self.tool_map = _build_tools(tools, self.T)
@@ -206,7 +234,9 @@ class GeminiLoopState(BaseLoopState[Any]):
 class GeminiBackend(ModelBackend):
     """Google Gemini backend (minimal implementation)."""
 
+    provider_name = "gemini"
     supports_streaming_tools = True
+    _sync_client_attrs = ("_client_sync",)
 
     def __init__(self) -> None:
         self._GenAIClient: Any | None = None
@@ -253,12 +283,17 @@ class GeminiBackend(ModelBackend):
             prompt=prompt,
         )
         out = self.run_tool_loop(client, state)
+        out = decode_structured_output(out, output_schema)
         if (
             isinstance(output_schema, dict)
             and bool(config.auto_finalize_missing_output)
             and should_finalize_structured_output(out, output_schema)
         ):
-            text2 = _finalize_json_output(self._Types, client, model_name, state.messages, cfg)
+            self._finalize_triggered(config)
+            acquire(self.provider_name, config, prompt)
+            text2 = _finalize_json_output(
+                self._Types, client, model_name, state.messages, cfg, state
+            )
             return text2
         return out
 
@@ -270,11 +305,10 @@ class GeminiBackend(ModelBackend):
         output_schema: dict | None = None,
         config: Config,
     ) -> Iterable[str]:
+        rec = current_recorder()
         _ = self._get_sync_client()
-        if output_schema is not None:
-            raise ConfigurationError(
-                "Streaming supports text only; structured outputs are not supported"
-            )
+        if output_schema is not None and tools:
+            raise ConfigurationError(STREAM_SCHEMA_WITH_TOOLS_MSG)
         client: Any = self._client_sync
         model_name = config.model
         if not model_name:
@@ -282,8 +316,9 @@ class GeminiBackend(ModelBackend):
                 "A model name must be specified in the configuration for the Gemini backend."
             )
         if not tools:
-            cfg = _prepare_config(config, None)
+            cfg = _prepare_config(config, output_schema)
 
+            acquire(self.provider_name, config, prompt)
             try:
                 stream = client.models.generate_content_stream(
                     model=model_name, contents=prompt, config=cfg or None
@@ -293,7 +328,7 @@ class GeminiBackend(ModelBackend):
 
             def gen():
                 try:
-                    for chunk in stream:
+                    for chunk in first_byte(stream, rec):
                         txt = getattr(chunk, "text", "") or ""
                         if txt:
                             yield txt
@@ -305,7 +340,7 @@ class GeminiBackend(ModelBackend):
                     except Exception:
                         pass
 
-            return gen()
+            return ClosingStream(gen(), stream)
 
         T = self._Types
         if T is None:
@@ -330,7 +365,7 @@ class GeminiBackend(ModelBackend):
 
             calls_holder: dict[str, list[ToolCall]] = {"value": []}
 
-            def iterator() -> Iterator[str]:
+            def iterator() -> Generator[str, None, None]:
                 loop_state._apply_tool_choice()
                 stream = client.models.generate_content_stream(
                     model=model_name,
@@ -341,7 +376,7 @@ class GeminiBackend(ModelBackend):
                 collected_chunks: list[str] = []
                 calls: list[ToolCall] = []
                 try:
-                    for chunk in stream:
+                    for chunk in first_byte(stream, rec):
                         final_resp = chunk
                         txt = getattr(chunk, "text", "") or ""
                         if txt:
@@ -363,6 +398,8 @@ class GeminiBackend(ModelBackend):
                         except Exception:
                             pass
 
+                if final_resp is not None:
+                    loop_state.record_usage(final_resp)
                 if not calls and final_resp is not None:
                     try:
                         text_val = loop_state.extract_text(final_resp)
@@ -380,7 +417,7 @@ class GeminiBackend(ModelBackend):
                 calls_holder["value"] = calls
 
             class _StreamWrapper(Iterator[str]):
-                def __init__(self, gen: Iterator[str]):
+                def __init__(self, gen: Generator[str, None, None]):
                     self._gen = gen
 
                 def __iter__(self) -> Iterator[str]:
@@ -389,6 +426,9 @@ class GeminiBackend(ModelBackend):
                 def __next__(self) -> str:
                     return next(self._gen)
 
+                def close(self) -> None:
+                    self._gen.close()
+
                 def _alloy_get_tool_calls(self) -> list[ToolCall]:
                     return calls_holder.get("value", [])
 
@@ -427,13 +467,16 @@ class GeminiBackend(ModelBackend):
             prompt=prompt,
         )
         out = await self.arun_tool_loop(client, state)
+        out = decode_structured_output(out, output_schema)
         if (
             isinstance(output_schema, dict)
             and bool(config.auto_finalize_missing_output)
             and should_finalize_structured_output(out, output_schema)
         ):
+            self._finalize_triggered(config)
+            await aacquire(self.provider_name, config, prompt)
             text2 = await _afinalize_json_output(
-                self._Types, client, model_name, state.messages, cfg
+                self._Types, client, model_name, state.messages, cfg, state
             )
             return text2
         return out
@@ -446,11 +489,10 @@ class GeminiBackend(ModelBackend):
         output_schema: dict | None = None,
         config: Config,
     ) -> AsyncIterable[str]:
+        rec = current_recorder()
         _ = self._get_sync_client()
-        if output_schema is not None:
-            raise ConfigurationError(
-                "Streaming supports text only; structured outputs are not supported"
-            )
+        if output_schema is not None and tools:
+            raise ConfigurationError(STREAM_SCHEMA_WITH_TOOLS_MSG)
         client: Any = self._client_sync
         model_name = config.model
         if not model_name:
@@ -458,15 +500,16 @@ class GeminiBackend(ModelBackend):
                 "A model name must be specified in the configuration for the Gemini backend."
             )
         if not tools:
-            cfg = _prepare_config(config, None)
+            cfg = _prepare_config(config, output_schema)
 
+            await aacquire(self.provider_name, config, prompt)
             stream_ctx = await client.aio.models.generate_content_stream(
                 model=model_name, contents=prompt, config=cfg or None
             )
 
             async def agen():
                 try:
-                    async for chunk in stream_ctx:
+                    async for chunk in afirst_byte(stream_ctx, rec):
                         txt = getattr(chunk, "text", "") or ""
                         if txt:
                             yield txt
@@ -478,7 +521,7 @@ class GeminiBackend(ModelBackend):
                     except Exception:
                         pass
 
-            return agen()
+            return AsyncClosingStream(agen(), stream_ctx)
 
         T = self._Types
         if T is None:
@@ -503,7 +546,7 @@ class GeminiBackend(ModelBackend):
 
             calls_holder: dict[str, list[ToolCall]] = {"value": []}
 
-            async def iterator() -> AsyncIterator[str]:
+            async def iterator() -> AsyncGenerator[str, None]:
                 loop_state._apply_tool_choice()
                 stream_ctx = await client.aio.models.generate_content_stream(
                     model=model_name,
@@ -514,7 +557,7 @@ class GeminiBackend(ModelBackend):
                 collected_chunks: list[str] = []
                 calls: list[ToolCall] = []
                 try:
-                    async for chunk in stream_ctx:
+                    async for chunk in afirst_byte(stream_ctx, rec):
                         final_resp = chunk
                         txt = getattr(chunk, "text", "") or ""
                         if txt:
@@ -536,6 +579,8 @@ class GeminiBackend(ModelBackend):
                         except Exception:
                             pass
 
+                if final_resp is not None:
+                    loop_state.record_usage(final_resp)
                 if not calls and final_resp is not None:
                     try:
                         text_val = loop_state.extract_text(final_resp)
@@ -553,8 +598,8 @@ class GeminiBackend(ModelBackend):
                 calls_holder["value"] = calls
 
             class _AsyncStreamWrapper(AsyncIterator[str]):
-                def __init__(self, agen: AsyncIterator[str]):
-                    self._aiter = agen.__aiter__()
+                def __init__(self, agen: AsyncGenerator[str, None]):
+                    self._aiter = agen
 
                 def __aiter__(self) -> AsyncIterator[str]:
                     return self
@@ -562,6 +607,9 @@ class GeminiBackend(ModelBackend):
                 async def __anext__(self) -> str:
                     return await self._aiter.__anext__()
 
+                async def aclose(self) -> None:
+                    await self._aiter.aclose()
+
                 def _alloy_get_tool_calls(self) -> list[ToolCall]:
                     return calls_holder.get("value", [])
 
@@ -572,13 +620,23 @@ class GeminiBackend(ModelBackend):
     def _get_sync_client(self) -> Any:
         if self._GenAIClient is None:
             raise ConfigurationError("Google GenAI SDK not installed. Install `alloy[gemini]`.")
-        if self._client_sync is None:
-            self._client_sync = self._GenAIClient()
-        return self._client_sync
+        return self._ensure_client("_client_sync", self._GenAIClient)
 
     def _get_async_client(self) -> Any:
         return self._get_sync_client()
 
+    async def aclose(self) -> None:
+        # One genai Client serves both paths; its async transport lives on `.aio`.
+        client = self._client_sync
+        aio = getattr(client, "aio", None) if client is not None else None
+        aclose = getattr(aio, "aclose", None)
+        if callable(aclose):
+            try:
+                await aclose()
+            except Exception:
+                pass
+        await super().aclose()
+
 
 def _response_text(res: Any) -> str:
     candidates = getattr(res, "candidates", None)
@@ -600,7 +658,7 @@ def _extract_text_from_response(res: Any) -> str:
     parsed = getattr(res, "parsed", None)
     if parsed is not None:
         try:
-            return json.dumps(parsed)
+            return codec.dumps(parsed)
         except Exception:
             return str(parsed)
     return _response_text(res)
@@ -612,4 +670,4 @@ def _build_tools(tools: list | None, T: Any) -> tuple[list[Any] | None, dict[str
             name=name, description=description, parameters=_schema_to_gemini(T, params)
         )
 
-    return build_tools_common(tools, _fmt)
+    return build_tools_common(tools, _fmt, cache_key="gemini")
@@ -1,17 +1,23 @@
 from __future__ import annotations
 
-from collections.abc import Iterable, AsyncIterable
+from collections.abc import AsyncGenerator, AsyncIterable, Generator, Iterable
+import inspect
 from typing import Any
-import json
 
+from .. import codec
 from ..config import Config
+from ..streaming import afirst_byte, current_recorder, first_byte
+from ..ratelimit import acquire, aacquire
 from ..errors import ConfigurationError
-from ..types import flatten_property_paths
+from ..types import flatten_property_paths, strip_code_fences
 from .base import (
+    AsyncClosingStream,
+    ClosingStream,
     ModelBackend,
     BaseLoopState,
     ToolCall,
     ToolResult,
+    decode_structured_output,
     should_finalize_structured_output,
     serialize_tool_payload,
     build_tools_common,
@@ -41,20 +47,20 @@ def _build_tools(tools: list | None) -> tuple[list[dict] | None, dict[str, Any]]
             },
         }
 
-    return build_tools_common(tools, _fmt)
+    return build_tools_common(tools, _fmt, cache_key="ollama")
 
 
 def _strip_code_fences(text: str) -> str:
     if not isinstance(text, str):
         return text
-    s = text.strip()
-    if s.startswith("```"):
-        nl = s.find("\n")
-        if nl != -1:
-            s = s[nl + 1 :]
-        if s.endswith("```"):
-            s = s[:-3]
-    return s.strip()
+    return strip_code_fences(text)
+
+
+def _response_format_kwargs(schema: dict | None) -> dict[str, Any]:
+    if schema is None:
+        return {}
+    fmt = {"name": "alloy_output", "schema": schema}
+    return {"response_format": {"type": "json_schema", "json_schema": fmt}}
 
 
 class OllamaLoopState(BaseLoopState[Any]):
@@ -69,6 +75,7 @@ class OllamaLoopState(BaseLoopState[Any]):
         output_schema: dict | None,
     ) -> None:
         super().__init__(config, tool_map=tool_map)
+        self.prompt = prompt
         self.model_name = model_name
         self.tool_defs = tool_defs
         self.output_schema = output_schema
@@ -119,7 +126,7 @@ class OllamaLoopState(BaseLoopState[Any]):
                         args = raw_args
                     elif isinstance(raw_args, str):
                         try:
-                            parsed = json.loads(raw_args)
+                            parsed = codec.loads(raw_args)
                             args = parsed if isinstance(parsed, dict) else {}
                         except Exception:
                             args = {}
@@ -178,6 +185,7 @@ class OllamaOpenAIChatLoopState(BaseLoopState[Any]):
         output_schema: dict | None,
     ) -> None:
         super().__init__(config, tool_map=tool_map)
+        self.prompt = prompt
         self.model_name = model_name
         self.tool_defs = tool_defs
         self.output_schema = output_schema
@@ -262,7 +270,7 @@ class OllamaOpenAIChatLoopState(BaseLoopState[Any]):
                 name = str(fn.get("name") or "")
                 raw = fn.get("arguments") or "{}"
                 try:
-                    args = json.loads(raw)
+                    args = codec.loads(raw)
                     if not isinstance(args, dict):
                         args = {}
                 except Exception:
@@ -298,6 +306,10 @@ class OllamaBackend(ModelBackend):
     parameter on /api/chat, aligned with the shared tool loop semantics.
     """
 
+    provider_name = "ollama"
+    _sync_client_attrs = ("_openai_client",)
+    _async_client_attrs = ("_async_client", "_openai_client_async")
+
     def __init__(self) -> None:
         self._ollama_module: Any | None = None
         self._async_client: Any | None = None
@@ -334,7 +346,7 @@ class OllamaBackend(ModelBackend):
             oai_client = self._get_openai_client()
             out = self.run_tool_loop(oai_client, state_oai)
             if isinstance(output_schema, dict):
-                out = _strip_code_fences(out)
+                out = decode_structured_output(_strip_code_fences(out), output_schema)
             if (
                 isinstance(output_schema, dict)
                 and bool(config.auto_finalize_missing_output)
@@ -357,6 +369,7 @@ class OllamaBackend(ModelBackend):
                     )
                 except Exception:
                     strict_msg = "Respond ONLY with the JSON object matching the required schema. No extra text, no backticks."
+                self._finalize_triggered(config)
                 state_oai.messages.append({"role": "user", "content": strict_msg})
                 out2 = self.run_tool_loop(oai_client, state_oai)
                 out2 = _strip_code_fences(out2)
@@ -373,8 +386,11 @@ class OllamaBackend(ModelBackend):
                 output_schema=output_schema if isinstance(output_schema, dict) else None,
             )
             out = self.run_tool_loop(client, state_native)
+            out = decode_structured_output(out, output_schema)
             if isinstance(output_schema, dict) and bool(config.auto_finalize_missing_output):
                 if should_finalize_structured_output(out, output_schema):
+                    self._finalize_triggered(config)
+                    acquire(self.provider_name, config, prompt)
                     return self._finalize_json_output(client, state_native)
             return out
 
@@ -386,10 +402,9 @@ class OllamaBackend(ModelBackend):
         output_schema: dict | None = None,
         config: Config,
     ) -> Iterable[str]:
-        if tools or output_schema:
-            raise ConfigurationError(
-                "Streaming supports text only; tools and structured outputs are not supported"
-            )
+        rec = current_recorder()
+        if tools:
+            raise ConfigurationError("Streaming with tools is not supported by the Ollama backend")
         model_name = _extract_model_name(config.model)
         if not model_name:
             raise ConfigurationError("Ollama model not specified (use model='ollama:<name>')")
@@ -401,14 +416,21 @@ class OllamaBackend(ModelBackend):
         if config.default_system:
             messages.append({"role": "system", "content": str(config.default_system)})
         messages.append({"role": "user", "content": prompt})
+        schema = ensure_object_schema(output_schema)
 
         if use_openai_chat:
             cli = self._get_openai_client()
-            stream = cli.chat.completions.create(model=model_name, messages=messages, stream=True)
+            acquire(self.provider_name, config, prompt)
+            stream = cli.chat.completions.create(
+                model=model_name,
+                messages=messages,
+                stream=True,
+                **_response_format_kwargs(schema),
+            )
 
-            def gen() -> Iterable[str]:
+            def gen() -> Generator[str, None, None]:
                 try:
-                    for event in stream:
+                    for event in first_byte(stream, rec):
                         try:
                             delta = event.choices[0].delta
                             piece = getattr(delta, "content", None)
@@ -422,7 +444,7 @@ class OllamaBackend(ModelBackend):
                     except Exception:
                         pass
 
-            return gen()
+            return ClosingStream(gen(), stream)
         else:
             client = self._get_sync_client()
             kwargs: dict[str, Any] = {
@@ -437,11 +459,14 @@ class OllamaBackend(ModelBackend):
                 opts["num_predict"] = int(config.max_tokens)
             if opts:
                 kwargs["options"] = opts
+            if schema is not None:
+                kwargs["format"] = schema
+            acquire(self.provider_name, config, prompt)
             it = client.chat(**kwargs)
 
-            def gen() -> Iterable[str]:
+            def gen() -> Generator[str, None, None]:
                 try:
-                    for chunk in it:
+                    for chunk in first_byte(it, rec):
                         try:
                             msg = getattr(chunk, "message", None)
                             piece = getattr(msg, "content", None)
@@ -457,7 +482,7 @@ class OllamaBackend(ModelBackend):
                     except Exception:
                         pass
 
-            return gen()
+            return ClosingStream(gen(), it)
 
     async def acomplete(
         self,
@@ -487,7 +512,7 @@ class OllamaBackend(ModelBackend):
             oai_client = self._get_async_openai_client()
             out = await self.arun_tool_loop(oai_client, state_oai)
             if isinstance(output_schema, dict):
-                out = _strip_code_fences(out)
+                out = decode_structured_output(_strip_code_fences(out), output_schema)
             if (
                 isinstance(output_schema, dict)
                 and bool(config.auto_finalize_missing_output)
@@ -510,6 +535,7 @@ class OllamaBackend(ModelBackend):
                     )
                 except Exception:
                     strict_msg = "Respond ONLY with the JSON object matching the required schema. No extra text, no backticks."
+                self._finalize_triggered(config)
                 state_oai.messages.append({"role": "user", "content": strict_msg})
                 out2 = await self.arun_tool_loop(oai_client, state_oai)
                 out2 = _strip_code_fences(out2)
@@ -526,11 +552,14 @@ class OllamaBackend(ModelBackend):
                 output_schema=output_schema if isinstance(output_schema, dict) else None,
             )
             out = await self.arun_tool_loop(client, state_native)
+            out = decode_structured_output(out, output_schema)
             if (
                 isinstance(output_schema, dict)
                 and bool(config.auto_finalize_missing_output)
                 and should_finalize_structured_output(out, output_schema)
             ):
+                self._finalize_triggered(config)
+                await aacquire(self.provider_name, config, prompt)
                 return await self._afinalize_json_output(client, state_native)
             return out
 
@@ -542,10 +571,9 @@ class OllamaBackend(ModelBackend):
         output_schema: dict | None = None,
         config: Config,
     ) -> AsyncIterable[str]:
-        if tools or output_schema:
-            raise ConfigurationError(
-                "Streaming supports text only; tools and structured outputs are not supported"
-            )
+        rec = current_recorder()
+        if tools:
+            raise ConfigurationError("Streaming with tools is not supported by the Ollama backend")
         model_name = _extract_model_name(config.model)
         if not model_name:
             raise ConfigurationError("Ollama model not specified (use model='ollama:<name>')")
@@ -557,24 +585,37 @@ class OllamaBackend(ModelBackend):
         if config.default_system:
             messages.append({"role": "system", "content": str(config.default_system)})
         messages.append({"role": "user", "content": prompt})
+        schema = ensure_object_schema(output_schema)
 
         if use_openai_chat:
             cli = self._get_async_openai_client()
+            await aacquire(self.provider_name, config, prompt)
             stream = await cli.chat.completions.create(
-                model=model_name, messages=messages, stream=True
+                model=model_name,
+                messages=messages,
+                stream=True,
+                **_response_format_kwargs(schema),
             )
 
-            async def agen() -> AsyncIterable[str]:
-                async for event in stream:
+            async def agen() -> AsyncGenerator[str, None]:
+                try:
+                    async for event in afirst_byte(stream, rec):
+                        try:
+                            delta = event.choices[0].delta
+                            piece = getattr(delta, "content", None)
+                        except Exception:
+                            piece = None
+                        if isinstance(piece, str) and piece:
+                            yield piece
+                finally:
                     try:
-                        delta = event.choices[0].delta
-                        piece = getattr(delta, "content", None)
+                        res = stream.close()
+                        if inspect.isawaitable(res):
+                            await res
                     except Exception:
-                        piece = None
-                    if isinstance(piece, str) and piece:
-                        yield piece
+                        pass
 
-            return agen()
+            return AsyncClosingStream(agen(), stream)
         else:
             client = await self._get_async_client()
             kwargs: dict[str, Any] = {"model": model_name, "messages": messages, "stream": True}
@@ -585,11 +626,14 @@ class OllamaBackend(ModelBackend):
                 opts["num_predict"] = int(config.max_tokens)
             if opts:
                 kwargs["options"] = opts
+            if schema is not None:
+                kwargs["format"] = schema
+            await aacquire(self.provider_name, config, prompt)
             stream = await client.chat(**kwargs)
 
-            async def agen() -> AsyncIterable[str]:
+            async def agen() -> AsyncGenerator[str, None]:
                 try:
-                    async for chunk in stream:
+                    async for chunk in afirst_byte(stream, rec):
                         try:
                             msg = getattr(chunk, "message", None)
                             piece = getattr(msg, "content", None)
@@ -605,7 +649,7 @@ class OllamaBackend(ModelBackend):
                     except Exception:
                         pass
 
-            return agen()
+            return AsyncClosingStream(agen(), stream)
 
     def _get_sync_client(self) -> Any:
         if self._ollama_module is None:
@@ -623,12 +667,11 @@ class OllamaBackend(ModelBackend):
         if self._async_client is None:
             try:
                 from ollama import AsyncClient
-
-                self._async_client = AsyncClient()
             except Exception as e:
                 raise ConfigurationError(
                     "Ollama SDK not installed. Run `pip install alloy[ollama]`."
                 ) from e
+            return self._ensure_client("_async_client", AsyncClient)
         return self._async_client
 
     def _get_openai_client(self) -> Any:
@@ -641,11 +684,11 @@ class OllamaBackend(ModelBackend):
                 raise ConfigurationError(
                     "OpenAI SDK not available for Ollama Chat Completions path"
                 ) from e
-        if self._openai_client is None:
-            self._openai_client = self._OpenAI(
-                base_url="http://localhost:11434/v1", api_key="ollama"
-            )
-        return self._openai_client
+        factory = self._OpenAI
+        return self._ensure_client(
+            "_openai_client",
+            lambda: factory(base_url="http://localhost:11434/v1", api_key="ollama"),
+        )
 
     def _get_async_openai_client(self) -> Any:
         if self._AsyncOpenAI is None:
@@ -657,16 +700,17 @@ class OllamaBackend(ModelBackend):
                 raise ConfigurationError(
                     "OpenAI SDK not available for Ollama Chat Completions path"
                 ) from e
-        if self._openai_client_async is None:
-            self._openai_client_async = self._AsyncOpenAI(
-                base_url="http://localhost:11434/v1", api_key="ollama"
-            )
-        return self._openai_client_async
+        factory = self._AsyncOpenAI
+        return self._ensure_client(
+            "_openai_client_async",
+            lambda: factory(base_url="http://localhost:11434/v1", api_key="ollama"),
+        )
 
     def _finalize_json_output(self, client: Any, state: "OllamaLoopState") -> str:
         kwargs = state._build_chat_kwargs(use_format=True, stream=False)
         kwargs.pop("tools", None)
         res = client.chat(**kwargs)
+        state.record_usage(res)
         msg = res.get("message", {}) if isinstance(res, dict) else getattr(res, "message", {})
         content = msg.get("content", "") if isinstance(msg, dict) else getattr(msg, "content", "")
         return content or ""
@@ -675,6 +719,7 @@ class OllamaBackend(ModelBackend):
         kwargs = state._build_chat_kwargs(use_format=True, stream=False)
         kwargs.pop("tools", None)
         res = await aclient.chat(**kwargs)
+        state.record_usage(res)
         msg = res.get("message", {}) if isinstance(res, dict) else getattr(res, "message", {})
         content = msg.get("content", "") if isinstance(msg, dict) else getattr(msg, "content", "")
         return content or ""
@@ -1,10 +1,19 @@
 from __future__ import annotations
 
-from collections.abc import Iterable, AsyncIterable, Iterator, AsyncIterator
+from collections.abc import (
+    AsyncGenerator,
+    AsyncIterable,
+    AsyncIterator,
+    Generator,
+    Iterable,
+    Iterator,
+)
 from typing import Any
-import json
 
+from .. import codec
 from ..config import Config
+from ..streaming import afirst_byte, current_recorder, first_byte
+from ..ratelimit import acquire, aacquire
 from ..errors import (
     ConfigurationError,
 )
@@ -13,14 +22,18 @@ from .base import (
     BaseLoopState,
     ToolCall,
     ToolResult,
+    decode_structured_output,
     should_finalize_structured_output,
     serialize_tool_payload,
     build_tools_common,
     ensure_object_schema,
     STRICT_JSON_ONLY_MSG,
+    STREAM_SCHEMA_WITH_TOOLS_MSG,
+    memoize_on_schema,
 )
 
 
+@memoize_on_schema
 def _build_text_format(output_schema: dict | None) -> dict | None:
     if not output_schema or not isinstance(output_schema, dict):
         return None
@@ -42,7 +55,7 @@ def _build_tools(tools: list | None) -> tuple[list[dict] | None, dict[str, Any]]
             "parameters": params,
         }
 
-    return build_tools_common(tools, _fmt)
+    return build_tools_common(tools, _fmt, cache_key="openai")
 
 
 def _get(obj: Any, key: str, default: Any = None) -> Any:
@@ -66,11 +79,23 @@ def _extract_tool_calls(resp: Any) -> list[dict[str, str]]:
     return calls
 
 
+def _parse_call_args(raw: Any) -> dict[str, Any]:
+    try:
+        args = codec.loads(raw or "{}")
+    except Exception:
+        return {}
+    return args if isinstance(args, dict) else {}
+
+
+def _event_item_id(event: Any) -> str:
+    return str(_get(event, "item_id") or _get(event, "id") or _get(event, "call_id") or "")
+
+
 def _extract_text_from_response(resp: Any) -> str:
     parsed = _get(resp, "output_parsed", None)
     if parsed is not None:
         try:
-            return json.dumps(parsed)
+            return codec.dumps(parsed)
         except (TypeError, ValueError):
             return str(parsed)
     txt = _get(resp, "output_text", None)
@@ -156,13 +181,7 @@ class OpenAILoopState(BaseLoopState[Any]):
         raw_calls = _extract_tool_calls(response)
         out: list[ToolCall] = []
         for c in raw_calls:
-            raw = c.get("arguments") or "{}"
-            try:
-                args = json.loads(raw)
-                if not isinstance(args, dict):
-                    args = {}
-            except Exception:
-                args = {}
+            args = _parse_call_args(c.get("arguments"))
             out.append(ToolCall(id=c.get("call_id"), name=c.get("name", ""), args=args))
         return out
 
@@ -222,6 +241,7 @@ def _finalize_json_output(client: Any, state: OpenAILoopState) -> str:
         prev_id=state.prev_id,
     )
     resp2 = client.responses.create(**kwargs2)
+    state.record_usage(resp2)
     return _extract_text_from_response(resp2)
 
 
@@ -236,6 +256,7 @@ async def _afinalize_json_output(client: Any, state: OpenAILoopState) -> str:
         prev_id=state.prev_id,
     )
     resp2 = await client.responses.create(**kwargs2)
+    state.record_usage(resp2)
     return _extract_text_from_response(resp2)
 
 
@@ -249,7 +270,10 @@ class OpenAIBackend(ModelBackend):
     unavailable.
     """
 
+    provider_name = "openai"
     supports_streaming_tools = True
+    _sync_client_attrs = ("_client_sync",)
+    _async_client_attrs = ("_client_async",)
 
     def __init__(self) -> None:
         self._OpenAI: Any | None = None
@@ -288,12 +312,15 @@ class OpenAIBackend(ModelBackend):
             tool_map=tool_map,
         )
         out = self.run_tool_loop(client, state)
+        out = decode_structured_output(out, output_schema)
         if (
             text_format
             and isinstance(output_schema, dict)
             and bool(config.auto_finalize_missing_output)
             and should_finalize_structured_output(out, output_schema)
         ):
+            self._finalize_triggered(config)
+            acquire(self.provider_name, config, prompt)
             return _finalize_json_output(client, state)
         return out
 
@@ -305,11 +332,10 @@ class OpenAIBackend(ModelBackend):
         output_schema: dict | None = None,
         config: Config,
     ) -> Iterable[str]:
+        rec = current_recorder()
         _ = self._get_sync_client()
-        if output_schema is not None:
-            raise ConfigurationError(
-                "Streaming supports text only; structured outputs are not supported"
-            )
+        if output_schema is not None and tools:
+            raise ConfigurationError(STREAM_SCHEMA_WITH_TOOLS_MSG)
 
         client: Any = self._client_sync
 
@@ -318,16 +344,17 @@ class OpenAIBackend(ModelBackend):
             kwargs = _prepare_request_kwargs(
                 prompt,
                 config=config,
-                text_format=None,
+                text_format=_build_text_format(output_schema),
                 tool_defs=None,
                 pending=None,
                 prev_id=None,
             )
+            acquire(self.provider_name, config, prompt)
             stream = client.responses.stream(**kwargs)
 
             def gen_plain():
                 with stream as s:
-                    for event in s:
+                    for event in first_byte(s, rec):
                         et = _get(event, "type", "")
                         if et == "response.output_text.delta":
                             delta = _get(event, "delta", "") or ""
@@ -352,7 +379,7 @@ class OpenAIBackend(ModelBackend):
                 raise TypeError("stream_step expects OpenAILoopState")
             calls_holder: dict[str, list[ToolCall]] = {"value": []}
 
-            def iterator() -> Iterator[str]:
+            def iterator() -> Generator[str, None, None]:
                 pending_payload = loop_state.pending
                 loop_state.pending = None
                 kwargs = _prepare_request_kwargs(
@@ -365,12 +392,13 @@ class OpenAIBackend(ModelBackend):
                 )
                 loop_state._apply_tool_choice(kwargs)
                 stream_ctx = client.responses.stream(**kwargs)
+                eager = self.eager_tools(loop_state)
 
                 by_id: dict[str, dict[str, str]] = {}
                 final_resp_obj: Any | None = None
 
                 with stream_ctx as s:
-                    for event in s:
+                    for event in first_byte(s, rec):
                         et = _get(event, "type", "")
                         if et == "response.created":
                             rid = _get(event, "response")
@@ -386,15 +414,31 @@ class OpenAIBackend(ModelBackend):
                             if _get(item, "type") == "function_call":
                                 cid = str(_get(item, "id") or _get(item, "call_id") or "")
                                 name = str(_get(item, "name") or "")
+                                call_id = str(_get(item, "call_id") or cid)
                                 if cid and cid not in by_id:
-                                    by_id[cid] = {"name": name, "args": ""}
+                                    by_id[cid] = {"name": name, "args": "", "call_id": call_id}
                         elif et == "response.function_call_arguments.delta":
-                            cid = str(_get(event, "id") or _get(event, "call_id") or "")
+                            cid = _event_item_id(event)
                             if cid:
                                 piece = _get(event, "delta", "") or ""
-                                rec = by_id.setdefault(cid, {"name": "", "args": ""})
+                                entry = by_id.setdefault(cid, {"name": "", "args": ""})
                                 if isinstance(piece, str):
-                                    rec["args"] += piece
+                                    entry["args"] += piece
+                        elif et == "response.function_call_arguments.done" and eager:
+                            # Arguments are complete: start the tool while the
+                            # model keeps streaming.
+                            done = by_id.get(_event_item_id(event))
+                            if done is not None:
+                                full = _get(event, "arguments", None)
+                                if isinstance(full, str) and full:
+                                    done["args"] = full
+                                eager.start(
+                                    ToolCall(
+                                        id=done.get("call_id") or None,
+                                        name=str(_get(event, "name", None) or done["name"]),
+                                        args=_parse_call_args(done["args"]),
+                                    )
+                                )
                         elif et in ("error", "response.error"):
                             break
 
@@ -407,6 +451,7 @@ class OpenAIBackend(ModelBackend):
 
                 calls: list[ToolCall] = []
                 if final_resp_obj is not None:
+                    loop_state.record_usage(final_resp_obj)
                     try:
                         text_val = loop_state.extract_text(final_resp_obj)
                         loop_state.last_response_text = text_val
@@ -417,20 +462,16 @@ class OpenAIBackend(ModelBackend):
                         calls = []
 
                 if not calls and by_id:
-                    for cid, rec in by_id.items():
-                        raw = rec.get("args") or "{}"
-                        try:
-                            args = json.loads(raw)
-                            if not isinstance(args, dict):
-                                args = {}
-                        except Exception:
-                            args = {}
-                        calls.append(ToolCall(id=cid or None, name=rec.get("name", ""), args=args))
+                    for cid, entry in by_id.items():
+                        args = _parse_call_args(entry.get("args"))
+                        calls.append(
+                            ToolCall(id=cid or None, name=entry.get("name", ""), args=args)
+                        )
 
                 calls_holder["value"] = calls
 
             class _StreamWrapper(Iterator[str]):
-                def __init__(self, gen: Iterator[str]):
+                def __init__(self, gen: Generator[str, None, None]):
                     self._gen = gen
 
                 def __iter__(self) -> Iterator[str]:
@@ -439,6 +480,9 @@ class OpenAIBackend(ModelBackend):
                 def __next__(self) -> str:
                     return next(self._gen)
 
+                def close(self) -> None:
+                    self._gen.close()
+
                 def _alloy_get_tool_calls(self) -> list[ToolCall]:
                     return calls_holder.get("value", [])
 
@@ -465,12 +509,15 @@ class OpenAIBackend(ModelBackend):
             tool_map=tool_map,
         )
         out = await self.arun_tool_loop(client, state)
+        out = decode_structured_output(out, output_schema)
         if (
             text_format
             and isinstance(output_schema, dict)
             and bool(config.auto_finalize_missing_output)
             and should_finalize_structured_output(out, output_schema)
         ):
+            self._finalize_triggered(config)
+            await aacquire(self.provider_name, config, prompt)
             return await _afinalize_json_output(client, state)
         return out
 
@@ -482,11 +529,10 @@ class OpenAIBackend(ModelBackend):
         output_schema: dict | None = None,
         config: Config,
     ) -> AsyncIterable[str]:
+        rec = current_recorder()
         _ = self._get_async_client()
-        if output_schema is not None:
-            raise ConfigurationError(
-                "Streaming supports text only; structured outputs are not supported"
-            )
+        if output_schema is not None and tools:
+            raise ConfigurationError(STREAM_SCHEMA_WITH_TOOLS_MSG)
 
         client: Any = self._client_async
 
@@ -494,16 +540,17 @@ class OpenAIBackend(ModelBackend):
             kwargs = _prepare_request_kwargs(
                 prompt,
                 config=config,
-                text_format=None,
+                text_format=_build_text_format(output_schema),
                 tool_defs=None,
                 pending=None,
                 prev_id=None,
             )
+            await aacquire(self.provider_name, config, prompt)
             stream_ctx = client.responses.stream(**kwargs)
 
             async def agen_plain():
                 async with stream_ctx as s:
-                    async for event in s:
+                    async for event in afirst_byte(s, rec):
                         et = _get(event, "type", "")
                         if et == "response.output_text.delta":
                             delta = _get(event, "delta", "") or ""
@@ -528,7 +575,7 @@ class OpenAIBackend(ModelBackend):
                 raise TypeError("stream_step expects OpenAILoopState")
             calls_holder: dict[str, list[ToolCall]] = {"value": []}
 
-            async def iterator() -> AsyncIterator[str]:
+            async def iterator() -> AsyncGenerator[str, None]:
                 pending_payload = loop_state.pending
                 loop_state.pending = None
                 kwargs = _prepare_request_kwargs(
@@ -541,12 +588,13 @@ class OpenAIBackend(ModelBackend):
                 )
                 loop_state._apply_tool_choice(kwargs)
                 stream_ctx = client.responses.stream(**kwargs)
+                eager = self.aeager_tools(loop_state)
 
                 by_id: dict[str, dict[str, str]] = {}
                 final_resp_obj: Any | None = None
 
                 async with stream_ctx as s:
-                    async for event in s:
+                    async for event in afirst_byte(s, rec):
                         et = _get(event, "type", "")
                         if et == "response.created":
                             rid = _get(event, "response")
@@ -562,15 +610,31 @@ class OpenAIBackend(ModelBackend):
                             if _get(item, "type") == "function_call":
                                 cid = str(_get(item, "id") or _get(item, "call_id") or "")
                                 name = str(_get(item, "name") or "")
+                                call_id = str(_get(item, "call_id") or cid)
                                 if cid and cid not in by_id:
-                                    by_id[cid] = {"name": name, "args": ""}
+                                    by_id[cid] = {"name": name, "args": "", "call_id": call_id}
                         elif et == "response.function_call_arguments.delta":
-                            cid = str(_get(event, "id") or _get(event, "call_id") or "")
+                            cid = _event_item_id(event)
                             if cid:
                                 piece = _get(event, "delta", "") or ""
-                                rec = by_id.setdefault(cid, {"name": "", "args": ""})
+                                entry = by_id.setdefault(cid, {"name": "", "args": ""})
                                 if isinstance(piece, str):
-                                    rec["args"] += piece
+                                    entry["args"] += piece
+                        elif et == "response.function_call_arguments.done" and eager:
+                            # Arguments are complete: start the tool while the
+                            # model keeps streaming.
+                            done = by_id.get(_event_item_id(event))
+                            if done is not None:
+                                full = _get(event, "arguments", None)
+                                if isinstance(full, str) and full:
+                                    done["args"] = full
+                                eager.start(
+                                    ToolCall(
+                                        id=done.get("call_id") or None,
+                                        name=str(_get(event, "name", None) or done["name"]),
+                                        args=_parse_call_args(done["args"]),
+                                    )
+                                )
                         elif et in ("error", "response.error"):
                             break
 
@@ -583,6 +647,7 @@ class OpenAIBackend(ModelBackend):
 
                 calls: list[ToolCall] = []
                 if final_resp_obj is not None:
+                    loop_state.record_usage(final_resp_obj)
                     try:
                         text_val = loop_state.extract_text(final_resp_obj)
                         loop_state.last_response_text = text_val
@@ -593,20 +658,16 @@ class OpenAIBackend(ModelBackend):
                         calls = []
 
                 if not calls and by_id:
-                    for cid, rec in by_id.items():
-                        raw = rec.get("args") or "{}"
-                        try:
-                            args = json.loads(raw)
-                            if not isinstance(args, dict):
-                                args = {}
-                        except Exception:
-                            args = {}
-                        calls.append(ToolCall(id=cid or None, name=rec.get("name", ""), args=args))
+                    for cid, entry in by_id.items():
+                        args = _parse_call_args(entry.get("args"))
+                        calls.append(
+                            ToolCall(id=cid or None, name=entry.get("name", ""), args=args)
+                        )
 
                 calls_holder["value"] = calls
 
             class _AsyncStreamWrapper(AsyncIterator[str]):
-                def __init__(self, agen: AsyncIterator[str]):
+                def __init__(self, agen: AsyncGenerator[str, None]):
                     self._aiter = agen
 
                 def __aiter__(self) -> AsyncIterator[str]:
@@ -615,6 +676,9 @@ class OpenAIBackend(ModelBackend):
                 async def __anext__(self) -> str:
                     return await self._aiter.__anext__()
 
+                async def aclose(self) -> None:
+                    await self._aiter.aclose()
+
                 def _alloy_get_tool_calls(self) -> list[ToolCall]:
                     return calls_holder.get("value", [])
 
@@ -625,13 +689,9 @@ class OpenAIBackend(ModelBackend):
     def _get_sync_client(self) -> Any:
         if self._OpenAI is None:
             raise ConfigurationError("OpenAI SDK not installed. Run `pip install openai>=1.99.6`.")
-        if self._client_sync is None:
-            self._client_sync = self._OpenAI()
-        return self._client_sync
+        return self._ensure_client("_client_sync", self._OpenAI)
 
     def _get_async_client(self) -> Any:
         if self._AsyncOpenAI is None:
             raise ConfigurationError("OpenAI SDK not installed. Run `pip install openai>=1.99.6`.")
-        if self._client_async is None:
-            self._client_async = self._AsyncOpenAI()
-        return self._client_async
+        return self._ensure_client("_client_async", self._AsyncOpenAI)
@@ -0,0 +1,158 @@
+"""Process-wide registry of provider backends.
+
+Backends own their SDK clients (and therefore HTTP connection pools), so
+reusing a backend across calls reuses its connections. Entries are keyed by
+provider, a fingerprint of the credentials/base URL the SDK reads from the
+environment, and the running event loop (async SDK clients must not be shared
+across loops). Entries for closed loops are pruned on access.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable
+
+if TYPE_CHECKING:
+    from .base import ModelBackend
+
+log = logging.getLogger(__name__)
+
+# Environment variables each provider SDK reads when constructing a client.
+_PROVIDER_ENV: dict[str, tuple[str, ...]] = {
+    "openai": ("OPENAI_API_KEY", "OPENAI_BASE_URL", "OPENAI_ORG_ID", "OPENAI_PROJECT_ID"),
+    "anthropic": ("ANTHROPIC_API_KEY", "ANTHROPIC_AUTH_TOKEN", "ANTHROPIC_BASE_URL"),
+    "gemini": (
+        "GEMINI_API_KEY",
+        "GOOGLE_API_KEY",
+        "GOOGLE_GENAI_USE_VERTEXAI",
+        "GOOGLE_CLOUD_PROJECT",
+        "GOOGLE_CLOUD_LOCATION",
+    ),
+    "ollama": ("OLLAMA_HOST",),
+}
+
+
+@dataclass
+class _Entry:
+    backend: "ModelBackend"
+    loop_ref: "weakref.ReferenceType[asyncio.AbstractEventLoop] | None"
+
+    def loop(self) -> asyncio.AbstractEventLoop | None:
+        return self.loop_ref() if self.loop_ref is not None else None
+
+    def is_stale(self) -> bool:
+        if self.loop_ref is None:
+            return False
+        loop = self.loop_ref()
+        return loop is None or loop.is_closed()
+
+
+_lock = threading.Lock()
+_entries: dict[tuple[str, str, int | None], _Entry] = {}
+
+
+def _credentials_key(provider: str) -> str:
+    """Return a stable fingerprint of the provider's client settings.
+
+    Values are hashed so keys (which may be logged or inspected) never hold
+    secrets in plain text.
+    """
+    h = hashlib.sha256()
+    for name in _PROVIDER_ENV.get(provider, ()):
+        h.update(name.encode())
+        h.update(b"=")
+        h.update((os.environ.get(name) or "").encode())
+        h.update(b"\0")
+    return h.hexdigest()[:16]
+
+
+def _running_loop() -> asyncio.AbstractEventLoop | None:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def _prune_locked() -> list[_Entry]:
+    stale = [k for k, e in _entries.items() if e.is_stale()]
+    return [_entries.pop(k) for k in stale]
+
+
+def backend_for(provider: str, factory: Callable[[], "ModelBackend"]) -> "ModelBackend":
+    """Return the shared backend for ``provider`` in the current context.
+
+    Creates it with ``factory`` on first use. Safe to call from any thread.
+    """
+    loop = _running_loop()
+    key = (provider, _credentials_key(provider), id(loop) if loop is not None else None)
+    entry = _entries.get(key)
+    if entry is not None and not entry.is_stale():
+        return entry.backend
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and not entry.is_stale():
+            return entry.backend
+        stale = _prune_locked()
+        backend = factory()
+        _entries[key] = _Entry(backend, weakref.ref(loop) if loop is not None else None)
+    for e in stale:
+        e.backend.close()
+    return backend
+
+
+def _drain() -> list[_Entry]:
+    with _lock:
+        entries = list(_entries.values())
+        _entries.clear()
+    return entries
+
+
+def shutdown() -> None:
+    """Close all cached backends and their SDK clients.
+
+    Async clients are closed on their event loop when that loop is idle;
+    clients bound to a running loop in another thread are dropped. Prefer
+    ``aclose()`` from async code. Subsequent calls create fresh backends.
+    """
+    for entry in _drain():
+        loop = entry.loop()
+        if loop is not None and not loop.is_closed() and not loop.is_running():
+            try:
+                loop.run_until_complete(entry.backend.aclose())
+                continue
+            except Exception:
+                log.debug("Failed to close async clients on their loop", exc_info=True)
+        entry.backend.close()
+
+
+async def aclose() -> None:
+    """Close all cached backends, awaiting async clients of the current loop.
+
+    Backends bound to other event loops have their sync clients closed and
+    async clients dropped.
+    """
+    current = _running_loop()
+    for entry in _drain():
+        loop = entry.loop()
+        if loop is None or loop is current:
+            await entry.backend.aclose()
+        else:
+            entry.backend.close()
+
+
+def _cached_backends() -> list["ModelBackend"]:
+    """Internal: return currently cached backends (tests and diagnostics)."""
+    with _lock:
+        return [e.backend for e in _entries.values() if not e.is_stale()]
+
+
+def _clear_for_tests() -> None:
+    """Internal: drop cached backends without closing clients."""
+    with _lock:
+        _entries.clear()
@@ -0,0 +1,304 @@
+"""OpenTelemetry tracing for commands, provider turns and tools.
+
+``instrument()`` registers an ``alloy.events`` hook that turns lifecycle
+events into a span tree per command execution::
+
+    command <name>
+    ├── resolve config
+    ├── chat <model>            (one per provider turn)
+    ├── execute_tool <tool>     (one per tool call)
+    ├── finalize                (follow-up turn for a missing structured output)
+    │   └── chat <model>
+    └── parse
+
+Provider turns and tools use the GenAI semantic-convention attributes
+(``gen_ai.operation.name``, ``gen_ai.system``, ``gen_ai.request.model``,
+``gen_ai.usage.*``, ``gen_ai.tool.name``, ``gen_ai.tool.call.id``). Tool spans
+record the time spent waiting for a worker (``alloy.tool.queue_wait``) and
+are the current span while the tool runs, so spans created by tool code nest
+under them, on tool threads and in ``asyncio.to_thread`` alike.
+
+Install with ``pip install alloy-ai[otel]``. Nothing imports this module
+implicitly, and OpenTelemetry itself is imported only by ``instrument()``.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any
+
+from . import events
+from .errors import ConfigurationError
+
+_hook: _SpanHook | None = None
+
+
+def instrument(tracer_provider: Any = None) -> None:
+    """Emit spans for every command through ``tracer_provider`` (default: the global one)."""
+    global _hook
+    try:
+        from opentelemetry import trace
+    except ImportError as e:
+        raise ConfigurationError(
+            "OpenTelemetry is not installed. Run `pip install alloy-ai[otel]`."
+        ) from e
+    uninstrument()
+    _hook = _SpanHook(trace.get_tracer("alloy", tracer_provider=tracer_provider))
+    events.add_hook(_hook)
+
+
+def uninstrument() -> None:
+    """Stop emitting spans."""
+    global _hook
+    if _hook is not None:
+        events.remove_hook(_hook)
+        _hook = None
+
+
+def _ns(ts: float) -> int:
+    """Convert a ``time.monotonic()`` timestamp to epoch nanoseconds."""
+    return time.time_ns() - int((time.monotonic() - ts) * 1e9)
+
+
+def _attrs(**values: Any) -> dict[str, Any]:
+    return {k.replace("__", "."): v for k, v in values.items() if v is not None}
+
+
+class _RunSpans:
+    __slots__ = ("span", "token", "start", "config", "finalize")
+
+    def __init__(self, span: Any, token: Any, start: float) -> None:
+        self.span = span
+        self.token = token
+        self.start = start
+        self.config: dict[str, Any] = {}
+        self.finalize: Any = None
+
+
+class _SpanHook:
+    """Maps lifecycle events onto spans; safe to call from any thread."""
+
+    def __init__(self, tracer: Any) -> None:
+        from opentelemetry import context, trace
+
+        self._tracer = tracer
+        self._context = context
+        self._trace = trace
+        self._lock = threading.Lock()
+        self._runs: dict[str, _RunSpans] = {}
+        self._spans: dict[int, tuple[Any, Any]] = {}
+        self._handlers = {
+            events.COMMAND_START: self._command_start,
+            events.CONFIG_RESOLVED: self._config_resolved,
+            events.REQUEST_SENT: self._request_sent,
+            events.RESPONSE_RECEIVED: self._response_received,
+            events.REQUEST_FAILED: self._request_failed,
+            events.TOOL_START: self._tool_start,
+            events.TOOL_END: self._tool_end,
+            events.FINALIZE: self._finalize,
+            events.PARSE_SUCCESS: self._parse,
+            events.PARSE_FAILURE: self._parse,
+            events.RETRY: self._retry,
+            events.COMMAND_END: self._command_end,
+        }
+
+    def __call__(self, event: events.Event) -> None:
+        handler = self._handlers.get(event.name)
+        if handler is not None:
+            handler(event)
+
+    def _run(self, event: events.Event) -> _RunSpans | None:
+        if not event.run_id:
+            return None
+        with self._lock:
+            return self._runs.get(event.run_id)
+
+    def _start(self, name: str, event: events.Event, parent: Any, **kwargs: Any) -> Any:
+        ctx = self._trace.set_span_in_context(parent) if parent is not None else None
+        return self._tracer.start_span(name, context=ctx, start_time=_ns(event.ts), **kwargs)
+
+    def _error(self, span: Any, description: str | None) -> None:
+        from opentelemetry.trace import Status, StatusCode
+
+        span.set_status(Status(StatusCode.ERROR, description))
+
+    def _command_start(self, event: events.Event) -> None:
+        span = self._tracer.start_span(
+            f"command {event.command}",
+            start_time=_ns(event.ts),
+            attributes=_attrs(
+                alloy__command=event.command,
+                alloy__run_id=event.run_id,
+                alloy__parent_run_id=event.data.get("parent_run_id"),
+                gen_ai__request__model=event.data.get("model"),
+            ),
+        )
+        token = self._context.attach(self._trace.set_span_in_context(span))
+        with self._lock:
+            self._runs[event.run_id] = _RunSpans(span, token, event.ts)
+
+    def _config_resolved(self, event: events.Event) -> None:
+        run = self._run(event)
+        if run is None:
+            return
+        data = event.data
+        run.config = _attrs(
+            gen_ai__request__temperature=data.get("temperature"),
+            gen_ai__request__max_tokens=data.get("max_tokens"),
+        )
+        span = self._tracer.start_span(
+            "resolve config",
+            context=self._trace.set_span_in_context(run.span),
+            start_time=_ns(run.start),
+            attributes={
+                **_attrs(
+                    gen_ai__request__model=data.get("model"),
+                    alloy__max_tool_turns=data.get("max_tool_turns"),
+                    alloy__retry=data.get("retry"),
+                ),
+                **run.config,
+            },
+        )
+        span.end(end_time=_ns(event.ts))
+
+    def _request_sent(self, event: events.Event) -> None:
+        from opentelemetry.trace import SpanKind
+
+        run = self._run(event)
+        parent = None if run is None else (run.finalize or run.span)
+        data = event.data
+        attributes = _attrs(
+            gen_ai__operation__name="chat",
+            gen_ai__system=data.get("provider") or None,
+            gen_ai__request__model=data.get("model"),
+            alloy__turn=data.get("turn"),
+        )
+        if run is not None:
+            attributes.update(run.config)
+        span = self._start(
+            f"chat {data.get('model')}",
+            event,
+            parent,
+            kind=SpanKind.CLIENT,
+            attributes=attributes,
+        )
+        with self._lock:
+            self._spans[event.span_id or 0] = (span, None)
+
+    def _response_received(self, event: events.Event) -> None:
+        with self._lock:
+            span, _ = self._spans.pop(event.span_id or 0, (None, None))
+        if span is None:
+            return
+        data = event.data
+        usage = data.get("usage") or {}
+        span.set_attributes(
+            _attrs(
+                alloy__tool_calls=data.get("tool_calls"),
+                gen_ai__usage__input_tokens=usage.get("input_tokens"),
+                gen_ai__usage__output_tokens=usage.get("output_tokens"),
+            )
+        )
+        span.end(end_time=_ns(event.ts))
+
+    def _request_failed(self, event: events.Event) -> None:
+        with self._lock:
+            span, _ = self._spans.pop(event.span_id or 0, (None, None))
+        if span is None:
+            return
+        self._error(span, event.data.get("error"))
+        span.end(end_time=_ns(event.ts))
+
+    def _tool_start(self, event: events.Event) -> None:
+        run = self._run(event)
+        data = event.data
+        call_id = data.get("call_id")
+        span = self._start(
+            f"execute_tool {data.get('tool')}",
+            event,
+            None if run is None else run.span,
+            attributes=_attrs(
+                gen_ai__operation__name="execute_tool",
+                gen_ai__tool__name=data.get("tool"),
+                gen_ai__tool__call__id=None if call_id is None else str(call_id),
+                alloy__tool__queue_wait=data.get("queue_wait"),
+                thread__name=data.get("thread"),
+            ),
+        )
+        token = self._context.attach(self._trace.set_span_in_context(span))
+        with self._lock:
+            self._spans[event.span_id or 0] = (span, token)
+
+    def _tool_end(self, event: events.Event) -> None:
+        with self._lock:
+            span, token = self._spans.pop(event.span_id or 0, (None, None))
+        if span is None:
+            return
+        data = event.data
+        span.set_attribute("alloy.tool.result_size", data.get("result_size") or 0)
+        if not data.get("ok"):
+            self._error(span, data.get("error"))
+        if token is not None:
+            self._context.detach(token)
+        span.end(end_time=_ns(event.ts))
+
+    def _finalize(self, event: events.Event) -> None:
+        run = self._run(event)
+        if run is None:
+            return
+        run.finalize = self._start(
+            "finalize",
+            event,
+            run.span,
+            attributes=_attrs(
+                gen_ai__system=event.data.get("provider") or None,
+                gen_ai__request__model=event.data.get("model"),
+            ),
+        )
+
+    def _end_finalize(self, run: _RunSpans, ts: float) -> None:
+        if run.finalize is not None:
+            run.finalize.end(end_time=_ns(ts))
+            run.finalize = None
+
+    def _parse(self, event: events.Event) -> None:
+        run = self._run(event)
+        if run is None:
+            return
+        start = event.ts - (event.data.get("elapsed") or 0.0)
+        self._end_finalize(run, start)
+        span = self._tracer.start_span(
+            "parse",
+            context=self._trace.set_span_in_context(run.span),
+            start_time=_ns(start),
+            attributes=_attrs(alloy__output_type=event.data.get("type")),
+        )
+        if event.name == events.PARSE_FAILURE:
+            self._error(span, event.data.get("error"))
+        span.end(end_time=_ns(event.ts))
+
+    def _retry(self, event: events.Event) -> None:
+        run = self._run(event)
+        if run is None:
+            return
+        run.span.add_event(
+            "retry",
+            attributes=_attrs(
+                alloy__attempt=event.data.get("attempt"),
+                alloy__delay=event.data.get("delay"),
+                error__type=event.data.get("error"),
+            ),
+            timestamp=_ns(event.ts),
+        )
+
+    def _command_end(self, event: events.Event) -> None:
+        with self._lock:
+            run = self._runs.pop(event.run_id, None)
+        if run is None:
+            return
+        self._end_finalize(run, event.ts)
+        if not event.data.get("ok"):
+            self._error(run.span, event.data.get("error"))
+        self._context.detach(run.token)
+        run.span.end(end_time=_ns(event.ts))
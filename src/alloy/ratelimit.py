@@ -0,0 +1,223 @@
+"""Client-side request/token rate limiting per provider and model.
+
+Every provider request passes through ``acquire``/``aacquire`` before it is
+sent. When ``Config.rpm`` or ``Config.tpm`` is set, a pair of token buckets
+keyed by ``(provider, model)`` paces requests and estimated tokens so bursts
+from many threads or tasks do not trip provider limits. Buckets work by
+reservation (debit now, sleep off the deficit outside the lock), so threads
+and asyncio tasks share them fairly.
+
+By default buckets live in process memory. Setting ``rate_limit_dir`` (env
+``ALLOY_RATE_LIMIT_DIR``) stores them in lock-protected files under that
+directory so processes on one host share the same budget.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from .config import Config
+
+log = logging.getLogger(__name__)
+
+# Output tokens assumed for a request when ``max_tokens`` is unset.
+DEFAULT_OUTPUT_TOKEN_ESTIMATE: int = 256
+_CHARS_PER_TOKEN = 4
+
+
+@dataclass
+class RateLimitStats:
+    """Wait-time counters for one ``(provider, model)`` key."""
+
+    requests: int = 0
+    throttled: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+
+def _reserve(
+    buckets: dict[str, list[float]],
+    now: float,
+    limits: dict[str, float],
+    costs: dict[str, float],
+) -> float:
+    """Debit ``costs`` from per-minute ``limits`` and return the wait in seconds.
+
+    ``buckets`` maps a bucket name to ``[level, last_refill]`` and is updated in
+    place. Levels may go negative; the deficit is the caller's wait time.
+    """
+    wait = 0.0
+    for name, limit in limits.items():
+        rate = limit / 60.0
+        level, last = buckets.get(name, (limit, now))
+        level = min(limit, level + max(0.0, now - last) * rate)
+        level -= min(costs.get(name, 0.0), limit)
+        buckets[name] = [level, now]
+        if level < 0:
+            wait = max(wait, -level / rate)
+    return wait
+
+
+class MemoryRateLimitStore:
+    """In-process bucket storage shared by all threads and event loops."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state: dict[str, dict[str, list[float]]] = {}
+
+    def reserve(self, key: str, limits: dict[str, float], costs: dict[str, float]) -> float:
+        with self._lock:
+            buckets = self._state.setdefault(key, {})
+            return _reserve(buckets, self._clock(), limits, costs)
+
+
+class FileRateLimitStore:
+    """Bucket storage in ``flock``-protected JSON files shared across processes.
+
+    Uses wall-clock time so all processes agree on refill. Requires ``fcntl``
+    (POSIX); on other platforms the limiter falls back to memory.
+    """
+
+    def __init__(self, directory: str, clock: Callable[[], float] = time.time) -> None:
+        self.directory = directory
+        self._clock = clock
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        safe = re.sub(r"[^A-Za-z0-9_.-]+", "_", key)
+        return os.path.join(self.directory, f"{safe}.json")
+
+    def reserve(self, key: str, limits: dict[str, float], costs: dict[str, float]) -> float:
+        import fcntl
+
+        fd = os.open(self._path(key), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            raw = b""
+            while chunk := os.read(fd, 65536):
+                raw += chunk
+            try:
+                buckets = json.loads(raw) if raw else {}
+                if not isinstance(buckets, dict):
+                    buckets = {}
+            except ValueError:
+                buckets = {}
+            wait = _reserve(buckets, self._clock(), limits, costs)
+            data = json.dumps(buckets).encode()
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.ftruncate(fd, 0)
+            os.write(fd, data)
+            return wait
+        finally:
+            os.close(fd)
+
+
+class RateLimiter:
+    """Paces requests per ``(provider, model)`` and records wait-time stats."""
+
+    def __init__(self) -> None:
+        self._memory = MemoryRateLimitStore()
+        self._files: dict[str, FileRateLimitStore] = {}
+        self._stats: dict[tuple[str, str], RateLimitStats] = {}
+        self._lock = threading.Lock()
+
+    def _store(self, directory: str | None) -> MemoryRateLimitStore | FileRateLimitStore:
+        if not directory:
+            return self._memory
+        store = self._files.get(directory)
+        if store is None:
+            try:
+                import fcntl  # noqa: F401
+            except ImportError:
+                log.warning("rate_limit_dir requires fcntl; using in-process limits.")
+                return self._memory
+            with self._lock:
+                store = self._files.setdefault(directory, FileRateLimitStore(directory))
+        return store
+
+    def reserve(self, provider: str, config: Config, prompt: str | None = None) -> float:
+        """Reserve capacity for one request and return how long to wait first."""
+        limits: dict[str, float] = {}
+        if config.rpm:
+            limits["requests"] = float(config.rpm)
+        if config.tpm:
+            limits["tokens"] = float(config.tpm)
+        if not limits:
+            return 0.0
+        model = config.model or ""
+        costs = {"requests": 1.0, "tokens": float(estimate_tokens(prompt, config))}
+        wait = self._store(config.rate_limit_dir).reserve(f"{provider}:{model}", limits, costs)
+        self._record((provider, model), wait)
+        return wait
+
+    def _record(self, key: tuple[str, str], wait: float) -> None:
+        with self._lock:
+            st = self._stats.get(key)
+            if st is None:
+                st = self._stats[key] = RateLimitStats()
+            st.requests += 1
+            if wait > 0:
+                st.throttled += 1
+                st.total_wait += wait
+                st.max_wait = max(st.max_wait, wait)
+        if wait > 0:
+            log.debug("Rate limit: waiting %.3fs for %s:%s", wait, *key)
+
+    def stats(self) -> dict[tuple[str, str], RateLimitStats]:
+        with self._lock:
+            return {k: RateLimitStats(**vars(v)) for k, v in self._stats.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._memory = MemoryRateLimitStore()
+            self._files.clear()
+            self._stats.clear()
+
+
+_limiter = RateLimiter()
+
+
+def estimate_tokens(prompt: str | None, config: Config) -> int:
+    """Rough input+output token estimate: ~4 chars per token plus ``max_tokens``."""
+    chars = len(prompt) if isinstance(prompt, str) else 0
+    out = config.max_tokens if config.max_tokens else DEFAULT_OUTPUT_TOKEN_ESTIMATE
+    return math.ceil(chars / _CHARS_PER_TOKEN) + int(out)
+
+
+def acquire(provider: str, config: Config, prompt: str | None = None) -> None:
+    """Block until a request for ``provider``/``config.model`` may be sent."""
+    if not (config.rpm or config.tpm):
+        return
+    wait = _limiter.reserve(provider, config, prompt)
+    if wait > 0:
+        time.sleep(wait)
+
+
+async def aacquire(provider: str, config: Config, prompt: str | None = None) -> None:
+    """Async variant of ``acquire``; sleeps without blocking the event loop.
+
+    The file store takes a blocking ``flock``, so it runs in a worker thread.
+    """
+    if not (config.rpm or config.tpm):
+        return
+    if config.rate_limit_dir:
+        wait = await asyncio.to_thread(_limiter.reserve, provider, config, prompt)
+    else:
+        wait = _limiter.reserve(provider, config, prompt)
+    if wait > 0:
+        await asyncio.sleep(wait)
+
+
+def rate_limit_stats() -> dict[tuple[str, str], RateLimitStats]:
+    """Return a snapshot of wait-time stats keyed by ``(provider, model)``."""
+    return _limiter.stats()
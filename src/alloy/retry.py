@@ -0,0 +1,236 @@
+"""Retry policy for commands: backoff, Retry-After, classification, budgets.
+
+Delays use exponential backoff with full jitter, capped by
+``retry_max_delay``. A provider ``Retry-After`` hint (HTTP headers or Gemini
+``RetryInfo``) replaces the jittered delay when present, still capped. A
+process-wide token bucket limits retries to a fraction of live traffic so
+provider 429/5xx storms do not multiply load.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable
+
+from .config import Config
+from .errors import BudgetExceeded, ConfigurationError
+
+# Statuses worth retrying: timeouts, conflicts, rate limits and server errors
+# (including Anthropic's 529 "overloaded").
+_RETRYABLE_STATUS = frozenset({408, 409, 429})
+
+
+class RetryBudget:
+    """Thread-safe token bucket capping retries to a fraction of traffic.
+
+    Every first attempt deposits ``ratio`` tokens; every retry withdraws one.
+    ``min_per_second`` tokens are also refilled over time so low-traffic
+    processes can still retry. The bucket starts full.
+    """
+
+    def __init__(
+        self,
+        *,
+        capacity: float = 10.0,
+        min_per_second: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.capacity = float(capacity)
+        self.min_per_second = float(min_per_second)
+        self._clock = clock
+        self._tokens = float(capacity)
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def _refill_locked(self) -> None:
+        now = self._clock()
+        elapsed = max(0.0, now - self._last)
+        self._last = now
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.min_per_second)
+
+    def deposit(self, ratio: float) -> None:
+        with self._lock:
+            self._refill_locked()
+            self._tokens = min(self.capacity, self._tokens + max(0.0, ratio))
+
+    def try_withdraw(self) -> bool:
+        with self._lock:
+            self._refill_locked()
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return True
+            return False
+
+    @property
+    def tokens(self) -> float:
+        with self._lock:
+            self._refill_locked()
+            return self._tokens
+
+
+_budget = RetryBudget()
+
+
+def get_retry_budget() -> RetryBudget:
+    """Return the process-wide retry budget."""
+    return _budget
+
+
+def set_retry_budget(budget: RetryBudget) -> None:
+    """Replace the process-wide retry budget (e.g. to tune capacity or inject a clock)."""
+    global _budget
+    _budget = budget
+
+
+def status_code(exc: BaseException) -> int | None:
+    """Return the HTTP status carried by a provider SDK error, if any."""
+    for attr in ("status_code", "code", "status"):
+        val = getattr(exc, attr, None)
+        if isinstance(val, int) and 100 <= val <= 599:
+            return val
+    resp = getattr(exc, "response", None)
+    val = getattr(resp, "status_code", None)
+    if isinstance(val, int):
+        return val
+    return None
+
+
+_FATAL = (ConfigurationError, BudgetExceeded)
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Classify an error as transient (retry) or fatal (fail fast).
+
+    HTTP 408/409/429/5xx and connection/timeout errors from the OpenAI,
+    Anthropic, Gemini and Ollama SDKs are retryable; other 4xx responses
+    (auth, bad request, not found), ``ConfigurationError`` and
+    ``BudgetExceeded`` are fatal. Errors without a status (e.g. parse
+    failures) stay retryable.
+    """
+    if isinstance(exc, _FATAL):
+        return False
+    code = status_code(exc)
+    if code is not None:
+        return code >= 500 or code in _RETRYABLE_STATUS
+    return True
+
+
+def retry_after(exc: BaseException) -> float | None:
+    """Return the server-requested delay in seconds, if the error carries one."""
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if headers is None:
+        headers = getattr(exc, "headers", None)
+    if headers is not None:
+        try:
+            ms = headers.get("retry-after-ms")
+            if ms is not None:
+                return max(0.0, float(ms) / 1000.0)
+            raw = headers.get("retry-after")
+        except Exception:
+            raw = None
+        if raw is not None:
+            parsed = _parse_retry_after(str(raw))
+            if parsed is not None:
+                return parsed
+    return _gemini_retry_delay(getattr(exc, "details", None))
+
+
+def _parse_retry_after(raw: str) -> float | None:
+    raw = raw.strip()
+    try:
+        return max(0.0, float(raw))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(raw)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def _gemini_retry_delay(details: Any) -> float | None:
+    if isinstance(details, dict):
+        details = (details.get("error") or {}).get("details", details.get("details"))
+    if not isinstance(details, list):
+        return None
+    for d in details:
+        if not isinstance(d, dict) or not str(d.get("@type", "")).endswith("RetryInfo"):
+            continue
+        delay = d.get("retryDelay")
+        if isinstance(delay, str) and delay.endswith("s"):
+            try:
+                return max(0.0, float(delay[:-1]))
+            except ValueError:
+                return None
+    return None
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Retry decisions and delays for one command invocation."""
+
+    attempts: int
+    base_delay: float
+    max_delay: float
+    budget_ratio: float | None
+    retry_on: type[BaseException] | None = None
+
+    @classmethod
+    def from_config(cls, config: Config) -> "RetryPolicy":
+        return cls(
+            attempts=max(int(config.retry or 1), 1),
+            base_delay=max(float(config.retry_base_delay or 0.0), 0.0),
+            max_delay=max(float(config.retry_max_delay or 0.0), 0.0),
+            budget_ratio=config.retry_budget,
+            retry_on=config.retry_on,
+        )
+
+    def should_retry(self, exc: BaseException) -> bool:
+        """Return True if ``exc`` is eligible for another attempt.
+
+        ``ConfigurationError`` and ``BudgetExceeded`` are never retried; for
+        other errors an explicit ``retry_on`` takes precedence over the
+        built-in status classification.
+        """
+        if isinstance(exc, _FATAL):
+            return False
+        if self.retry_on is not None:
+            return isinstance(exc, self.retry_on)
+        return is_retryable(exc)
+
+    def delay(
+        self, retry_index: int, exc: BaseException, rand: Callable[[], float] = random.random
+    ) -> float:
+        """Return the delay before retry number ``retry_index`` (0-based)."""
+        hinted = retry_after(exc)
+        if hinted is not None:
+            return min(hinted, self.max_delay) if self.max_delay else hinted
+        backoff = self.base_delay * (2**retry_index)
+        if self.max_delay:
+            backoff = min(backoff, self.max_delay)
+        return rand() * backoff
+
+    def record_attempt(self) -> None:
+        if self.budget_ratio is not None and self.attempts > 1:
+            _budget.deposit(self.budget_ratio)
+
+    def acquire_retry(self) -> bool:
+        """Withdraw a retry token from the process-wide budget."""
+        if self.budget_ratio is None:
+            return True
+        return _budget.try_withdraw()
+
+
+def _sleep(seconds: float) -> None:
+    if seconds > 0:
+        time.sleep(seconds)
+
+
+async def _asleep(seconds: float) -> None:
+    if seconds > 0:
+        await asyncio.sleep(seconds)
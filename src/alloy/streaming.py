@@ -0,0 +1,1065 @@
+"""Typed streaming: incremental JSON parsing of structured-output streams.
+
+``Command.stream`` on a command with a non-``str`` output type sends the
+output schema to the provider and feeds the streamed text into
+``JSONStreamParser``. Each time a field arrives (or a string field grows) a
+snapshot of the partially filled value is yielded as plain JSON data
+(dicts/lists); the last item is the complete value validated through
+``parse_output`` (e.g. the dataclass instance).
+
+``Command.stream_items`` uses the same parser in item mode for ``list[T]``
+outputs: each array element is yielded, decoded, as soon as it closes and
+is then dropped, so memory stays bounded by one element.
+
+Text streams can be coalesced (``Config.stream_flush_bytes``,
+``stream_flush_interval_ms`` and ``stream_boundary``): provider deltas are
+buffered and re-emitted as fewer, larger chunks, which cuts per-chunk
+overhead when relaying to many clients. The first chunk is always passed
+through immediately so time to first token is unchanged.
+
+Latency instrumentation (``Config.stream_stats`` or a hook registered with
+``add_stream_stats_hook``) records time to first byte and first token,
+an inter-chunk gap histogram, throughput and per-tool-turn stalls into a
+``StreamStats`` exposed as ``stream.latency``. When off, no wrapper or
+timer is installed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import contextlib
+import re
+import time
+from contextvars import ContextVar
+from collections.abc import (
+    AsyncGenerator,
+    AsyncIterable,
+    AsyncIterator,
+    Generator,
+    Iterable,
+    Iterator,
+)
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+
+from .config import Config
+from .errors import CommandError, ConfigurationError
+
+_UNSET: Any = object()
+
+_SKIP, _VALUE, _KEY_OR_END, _KEY, _COLON, _AFTER, _STRING, _SCALAR, _DONE = range(9)
+_WS = " \t\r\n"
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+_LITERALS = {"true": True, "false": False, "null": None}
+
+
+class JSONStreamParser:
+    """Incremental JSON parser that exposes the partially parsed value.
+
+    Text is consumed in one pass as it arrives; no prefix is re-parsed.
+    Anything before the first ``{``/``[`` (such as a code fence) and after
+    the top-level value closes is ignored. Strings are visible while they
+    grow; numbers and literals appear once complete.
+
+    With ``stream_items=True`` the first array found at the top level (or
+    directly under the top-level object, as in ``{"value": [...]}``) is not
+    accumulated: each element is detached as soon as it completes and
+    queued for ``take_items()``.
+
+    Every mutation is mirrored into a shadow copy of each open container;
+    when a container closes, its shadow becomes a frozen copy that later
+    snapshots share. A snapshot therefore only rebuilds the open path from
+    the root (shallow copies), not the whole value.
+    """
+
+    def __init__(self, *, stream_items: bool = False) -> None:
+        self.root: Any = _UNSET
+        self._stream_items = stream_items
+        self._target: list[Any] | None = None
+        self._items: list[Any] = []
+        self._stack: list[Any] = []
+        self._shadows: list[Any] = []
+        self._frozen_root: Any = _UNSET
+        self._keys: list[Any] = []
+        self._state = _SKIP
+        self._buf: list[str] = []
+        self._str_is_key = False
+        self._escape: str | None = None
+        self._changed = False
+        self._grew = False
+
+    @property
+    def done(self) -> bool:
+        return self._state == _DONE
+
+    def feed(self, text: str) -> bool:
+        """Consume ``text``; return True when the partial value changed."""
+        self._changed = self._grew = False
+        i, n = 0, len(text)
+        while i < n and self._state != _DONE:
+            if self._state == _STRING:
+                i = self._scan_string(text, i)
+                continue
+            ch = text[i]
+            i += 1
+            self._step(ch)
+        if self._state == _STRING and not self._str_is_key and self._grew:
+            self._set_current("".join(self._buf))
+            self._changed = True
+        return self._changed
+
+    def take_items(self) -> list[Any]:
+        """Return and forget the array elements completed so far (``stream_items``)."""
+        items, self._items = self._items, []
+        return items
+
+    @property
+    def found_items(self) -> bool:
+        return self._target is not None
+
+    def snapshot(self) -> Any:
+        """Return a copy of the value parsed so far (None before it starts).
+
+        Completed containers are shared between snapshots; treat snapshots
+        as read-only.
+        """
+        if self.root is _UNSET:
+            return None
+        shadows = self._shadows
+        if not shadows:
+            return self._frozen_root
+        node = shadows[-1].copy()
+        for depth in range(len(shadows) - 2, -1, -1):
+            parent = shadows[depth].copy()
+            if isinstance(parent, list):
+                parent[-1] = node
+            else:
+                parent[self._keys[depth]] = node
+            node = parent
+        return node
+
+    def _scan_string(self, text: str, i: int) -> int:
+        if self._escape is not None:
+            return self._scan_escape(text, i)
+        n = len(text)
+        j = i
+        while j < n and text[j] != '"' and text[j] != "\\":
+            j += 1
+        if j > i:
+            self._buf.append(text[i:j])
+            self._grew = True
+        if j >= n:
+            return n
+        if text[j] == "\\":
+            self._escape = ""
+            return j + 1
+        self._end_string()
+        return j + 1
+
+    def _scan_escape(self, text: str, i: int) -> int:
+        esc = self._escape or ""
+        if not esc:
+            ch = text[i]
+            if ch != "u":
+                self._buf.append(_ESCAPES.get(ch, ch))
+                self._grew = True
+                self._escape = None
+                return i + 1
+            esc = "u"
+            i += 1
+        while i < len(text) and len(esc) < 5:
+            esc += text[i]
+            i += 1
+        if len(esc) < 5:
+            self._escape = esc
+            return i
+        try:
+            self._buf.append(chr(int(esc[1:], 16)))
+            self._grew = True
+        except ValueError:
+            pass
+        self._escape = None
+        return i
+
+    def _end_string(self) -> None:
+        s = "".join(self._buf)
+        if any("\ud800" <= c <= "\udfff" for c in s):
+            s = s.encode("utf-16", "surrogatepass").decode("utf-16", "replace")
+        self._buf = []
+        self._state = _AFTER
+        if self._str_is_key:
+            self._keys[-1] = s
+            self._state = _COLON
+        else:
+            self._set_current(s)
+            self._changed = True
+            self._detach_item()
+
+    def _step(self, ch: str) -> None:
+        state = self._state
+        if state == _SKIP:
+            if ch in "{[":
+                self._open(ch)
+            return
+        if state == _SCALAR:
+            if ch not in _WS and ch not in ",]}":
+                self._buf.append(ch)
+                return
+            self._end_scalar()
+            state = self._state
+        if ch in _WS:
+            return
+        if state == _VALUE:
+            if ch in "{[":
+                self._open(ch)
+            elif ch == '"':
+                self._emit("")
+                self._start_string(key=False)
+            elif ch == "]" and self._stack and isinstance(self._stack[-1], list):
+                self._close()
+            else:
+                self._buf = [ch]
+                self._state = _SCALAR
+        elif state in (_KEY_OR_END, _KEY):
+            if ch == '"':
+                self._start_string(key=True)
+            elif ch == "}" and state == _KEY_OR_END:
+                self._close()
+        elif state == _COLON:
+            if ch == ":":
+                self._state = _VALUE
+        elif state == _AFTER:
+            if ch == ",":
+                top = self._stack[-1]
+                self._state = _KEY if isinstance(top, dict) else _VALUE
+            elif ch in "]}":
+                self._close()
+
+    def _start_string(self, *, key: bool) -> None:
+        self._buf = []
+        self._str_is_key = key
+        self._state = _STRING
+
+    def _end_scalar(self) -> None:
+        token = "".join(self._buf)
+        self._buf = []
+        value: Any
+        if token in _LITERALS:
+            value = _LITERALS[token]
+        else:
+            try:
+                value = int(token)
+            except ValueError:
+                try:
+                    value = float(token)
+                except ValueError:
+                    value = token
+        self._emit(value)
+        self._changed = True
+        self._state = _AFTER
+        self._detach_item()
+
+    def _open(self, ch: str) -> None:
+        container: Any = {} if ch == "{" else []
+        if self._stream_items and self._target is None and ch == "[" and len(self._stack) <= 1:
+            self._target = container
+        self._emit(container)
+        self._stack.append(container)
+        self._shadows.append({} if ch == "{" else [])
+        self._keys.append(None)
+        self._state = _KEY_OR_END if ch == "{" else _VALUE
+        self._changed = True
+
+    def _close(self) -> None:
+        self._stack.pop()
+        self._keys.pop()
+        frozen = self._shadows.pop()
+        if self._shadows:
+            self._set_slot(self._shadows[-1], frozen)
+        else:
+            self._frozen_root = frozen
+        self._state = _AFTER if self._stack else _DONE
+        self._detach_item()
+
+    def _detach_item(self) -> None:
+        target = self._target
+        if target is not None and self._stack and self._stack[-1] is target:
+            self._items.append(target.pop())
+            self._shadows[-1].pop()
+
+    def _emit(self, value: Any) -> None:
+        if not self._stack:
+            self.root = value
+            return
+        top = self._stack[-1]
+        # Open containers get a placeholder; their frozen copy lands on close.
+        frozen = None if isinstance(value, (dict, list)) else value
+        if isinstance(top, list):
+            top.append(value)
+            self._shadows[-1].append(frozen)
+        else:
+            top[self._keys[-1]] = value
+            self._shadows[-1][self._keys[-1]] = frozen
+
+    def _set_current(self, value: Any) -> None:
+        self._set_slot(self._stack[-1], value)
+        self._set_slot(self._shadows[-1], value)
+
+    def _set_slot(self, container: Any, value: Any) -> None:
+        if isinstance(container, list):
+            container[-1] = value
+        else:
+            container[self._keys[-1]] = value
+
+
+def _close(chunks: Any) -> None:
+    """Close a chunk iterator (and the provider stream behind it) if it supports it."""
+    close = getattr(chunks, "close", None)
+    if callable(close):
+        close()
+
+
+async def _aclose(chunks: Any) -> None:
+    aclose = getattr(chunks, "aclose", None)
+    if callable(aclose):
+        await aclose()
+
+
+def _partial_view(schema: dict[str, Any] | None) -> Callable[[Any], Any] | None:
+    """Return how to present partial snapshots for ``schema`` (None: no partials).
+
+    Non-object outputs are wrapped as ``{"value": ...}`` on the wire; arrays
+    are unwrapped for partials, scalars are only reported once complete.
+    """
+    top = (schema or {}).get("type")
+    if top == "object":
+        return lambda snap: snap
+    if top == "array":
+        return lambda snap: snap.get("value") if isinstance(snap, dict) else snap
+    return None
+
+
+class TypedStream(Iterator[Any]):
+    """Iterator returned by ``Command.stream`` for typed outputs.
+
+    Yields partial snapshots as fields arrive, then the validated value.
+    After exhaustion the validated value is also available as ``final`` and
+    the raw text as ``text``.
+    """
+
+    latency: StreamStats | None = None
+
+    def __init__(
+        self,
+        chunks: Iterable[str],
+        finalize: Callable[[str], Any],
+        *,
+        schema: dict[str, Any] | None,
+    ) -> None:
+        self.final: Any = None
+        self.text = ""
+        self._chunks = chunks
+        self._finalize = finalize
+        self._view = _partial_view(schema)
+        self._gen = self._run()
+
+    def __iter__(self) -> "TypedStream":
+        return self
+
+    def __next__(self) -> Any:
+        return next(self._gen)
+
+    def close(self) -> None:
+        self._gen.close()
+        _close(self._chunks)
+
+    def _run(self) -> Generator[Any, None, None]:
+        parser = JSONStreamParser()
+        parts: list[str] = []
+        view = self._view
+        try:
+            for chunk in self._chunks:
+                parts.append(chunk)
+                if view is not None and parser.feed(chunk):
+                    partial = view(parser.snapshot())
+                    if partial is not None:
+                        yield partial
+        finally:
+            _close(self._chunks)
+        self.text = "".join(parts)
+        self.final = self._finalize(self.text)
+        yield self.final
+
+
+class AsyncTypedStream(AsyncIterator[Any]):
+    """Async counterpart of ``TypedStream``."""
+
+    latency: StreamStats | None = None
+
+    def __init__(
+        self,
+        chunks: Callable[[], Any],
+        finalize: Callable[[str], Any],
+        *,
+        schema: dict[str, Any] | None,
+    ) -> None:
+        self.final: Any = None
+        self.text = ""
+        self._open_chunks = chunks
+        self._finalize = finalize
+        self._view = _partial_view(schema)
+        self._gen = self._run()
+
+    def __aiter__(self) -> "AsyncTypedStream":
+        return self
+
+    async def __anext__(self) -> Any:
+        return await self._gen.__anext__()
+
+    async def aclose(self) -> None:
+        await self._gen.aclose()
+
+    async def _run(self) -> AsyncGenerator[Any, None]:
+        chunks: AsyncIterable[str] = await self._open_chunks()
+        parser = JSONStreamParser()
+        parts: list[str] = []
+        view = self._view
+        try:
+            async for chunk in chunks:
+                parts.append(chunk)
+                if view is not None and parser.feed(chunk):
+                    partial = view(parser.snapshot())
+                    if partial is not None:
+                        yield partial
+        finally:
+            await _aclose(chunks)
+        self.text = "".join(parts)
+        self.final = self._finalize(self.text)
+        yield self.final
+
+
+def _check_items_complete(parser: JSONStreamParser) -> None:
+    if not parser.found_items:
+        raise CommandError("Model produced no list output to stream")
+    if not parser.done:
+        raise CommandError("Stream ended before the list output was complete")
+
+
+def iter_items(chunks: Iterable[str], decode: Callable[[Any], Any]) -> Iterator[Any]:
+    """Yield ``decode(element)`` for each element of the streamed JSON array."""
+    parser = JSONStreamParser(stream_items=True)
+    try:
+        for chunk in chunks:
+            parser.feed(chunk)
+            for item in parser.take_items():
+                yield decode(item)
+    finally:
+        _close(chunks)
+    _check_items_complete(parser)
+
+
+async def aiter_items(
+    open_chunks: Callable[[], Awaitable[AsyncIterable[str]]], decode: Callable[[Any], Any]
+) -> AsyncIterator[Any]:
+    """Async counterpart of ``iter_items``; ``open_chunks`` starts the stream."""
+    parser = JSONStreamParser(stream_items=True)
+    chunks = await open_chunks()
+    try:
+        async for chunk in chunks:
+            parser.feed(chunk)
+            for item in parser.take_items():
+                yield decode(item)
+    finally:
+        await _aclose(chunks)
+    _check_items_complete(parser)
+
+
+@dataclass
+class ChunkStats:
+    """Chunk and byte counters for a coalesced text stream."""
+
+    chunks_in: int = 0
+    chunks_out: int = 0
+    bytes: int = 0
+
+
+_SENTENCE_END = re.compile(r"[.!?\u2026][\"')\]]*\s")
+
+
+def _last_word(text: str) -> int:
+    for i in range(len(text) - 1, -1, -1):
+        if text[i].isspace():
+            return i + 1
+    return 0
+
+
+def _last_sentence(text: str) -> int:
+    cut = 0
+    for m in _SENTENCE_END.finditer(text):
+        cut = m.end()
+    return cut
+
+
+def _last_line(text: str) -> int:
+    return text.rfind("\n") + 1
+
+
+_BOUNDARIES: dict[str, Callable[[str], int] | None] = {
+    "none": None,
+    "word": _last_word,
+    "sentence": _last_sentence,
+    "line": _last_line,
+}
+
+# A boundary never holds back more than this many multiples of the flush size.
+_HOLD_FACTOR = 4
+_HOLD_MIN = 4096
+
+
+def _nbytes(text: str) -> int:
+    return len(text) if text.isascii() else len(text.encode("utf-8"))
+
+
+class _Coalescer:
+    """Buffers text deltas and decides when (and where) to flush them."""
+
+    def __init__(
+        self, flush_bytes: int | None, flush_interval: float | None, boundary: str | None
+    ) -> None:
+        key = (boundary or "none").lower()
+        if key not in _BOUNDARIES:
+            raise ConfigurationError(
+                f"Unknown stream_boundary {boundary!r}; use 'word', 'sentence' or 'line'"
+            )
+        self.flush_bytes = flush_bytes or 0
+        self.interval = flush_interval
+        self.cut = _BOUNDARIES[key]
+        self.hold_max = max(_HOLD_MIN, self.flush_bytes * _HOLD_FACTOR)
+        self.stats = ChunkStats()
+        self._buf: list[str] = []
+        self._size = 0
+        self._last = 0.0
+        self._held = False
+
+    def push(self, chunk: str) -> str | None:
+        """Add ``chunk``; return text to emit now, if any."""
+        if not chunk:
+            return None
+        n = _nbytes(chunk)
+        self._held = False
+        self.stats.chunks_in += 1
+        self.stats.bytes += n
+        if self.stats.chunks_out == 0 and not self._buf:
+            return self._emit(chunk)
+        self._buf.append(chunk)
+        self._size += n
+        if self.flush_bytes and self._size >= self.flush_bytes:
+            return self.take(force=False)
+        if self.due():
+            return self.take(force=False)
+        return None
+
+    def due(self) -> bool:
+        return (
+            bool(self._buf)
+            and self.interval is not None
+            and time.perf_counter() - self._last >= self.interval
+        )
+
+    def remaining(self) -> float | None:
+        """Seconds until the interval flush is due (None: no timer needed)."""
+        if not self._buf or self.interval is None or self._held:
+            return None
+        return max(0.0, self.interval - (time.perf_counter() - self._last))
+
+    def take(self, *, force: bool) -> str | None:
+        if not self._buf:
+            return None
+        text = "".join(self._buf)
+        cut = len(text)
+        if not force and self.cut is not None:
+            cut = self.cut(text)
+            if cut <= 0:
+                if self._size < self.hold_max:
+                    self._buf = [text]
+                    self._held = True
+                    return None
+                cut = len(text)
+        rest = text[cut:]
+        self._buf = [rest] if rest else []
+        self._size = _nbytes(rest) if rest else 0
+        return self._emit(text[:cut])
+
+    def _emit(self, text: str) -> str:
+        self.stats.chunks_out += 1
+        self._last = time.perf_counter()
+        return text
+
+
+def _coalescer_for(config: Config) -> _Coalescer | None:
+    interval_ms = config.stream_flush_interval_ms
+    if not config.stream_flush_bytes and not interval_ms:
+        return None
+    interval = interval_ms / 1000.0 if interval_ms else None
+    return _Coalescer(config.stream_flush_bytes, interval, config.stream_boundary)
+
+
+class CoalescedStream(Iterator[str]):
+    """Text stream re-chunked by a coalescing policy; see ``coalesce``.
+
+    ``stats`` counts provider chunks in, chunks emitted and bytes.
+    Interval flushes are checked as chunks arrive.
+    """
+
+    latency: StreamStats | None = None
+
+    def __init__(self, chunks: Iterable[str], coalescer: _Coalescer) -> None:
+        self._coalescer = coalescer
+        self.stats = coalescer.stats
+        self._chunks = chunks
+        self._gen = self._run(chunks)
+
+    def __iter__(self) -> "CoalescedStream":
+        return self
+
+    def __next__(self) -> str:
+        return next(self._gen)
+
+    def close(self) -> None:
+        self._gen.close()
+        _close(self._chunks)
+
+    def _run(self, chunks: Iterable[str]) -> Generator[str, None, None]:
+        c = self._coalescer
+        try:
+            for chunk in chunks:
+                out = c.push(chunk)
+                if out:
+                    yield out
+        finally:
+            _close(chunks)
+        out = c.take(force=True)
+        if out:
+            yield out
+
+
+class AsyncCoalescedStream(AsyncIterator[str]):
+    """Async counterpart of ``CoalescedStream``.
+
+    While waiting for the next provider chunk, buffered text is flushed as
+    soon as ``stream_flush_interval_ms`` elapses.
+    """
+
+    latency: StreamStats | None = None
+
+    def __init__(
+        self, open_chunks: Callable[[], Awaitable[AsyncIterable[str]]], coalescer: _Coalescer
+    ) -> None:
+        self._coalescer = coalescer
+        self.stats = coalescer.stats
+        self._gen = self._run(open_chunks)
+
+    def __aiter__(self) -> "AsyncCoalescedStream":
+        return self
+
+    async def __anext__(self) -> str:
+        return await self._gen.__anext__()
+
+    async def aclose(self) -> None:
+        await self._gen.aclose()
+
+    async def _run(
+        self, open_chunks: Callable[[], Awaitable[AsyncIterable[str]]]
+    ) -> AsyncGenerator[str, None]:
+        c = self._coalescer
+        source = await open_chunks()
+        it = source.__aiter__()
+        pending: asyncio.Future[str] | None = None
+        try:
+            while True:
+                if pending is None:
+                    pending = asyncio.ensure_future(it.__anext__())
+                wait = c.remaining()
+                if wait is not None and not pending.done():
+                    await asyncio.wait({pending}, timeout=wait)
+                    if not pending.done():
+                        out = c.take(force=False) if c.due() else None
+                        if out:
+                            yield out
+                        continue
+                try:
+                    chunk = await pending
+                except StopAsyncIteration:
+                    break
+                finally:
+                    pending = None
+                out = c.push(chunk)
+                if out:
+                    yield out
+        finally:
+            if pending is not None and not pending.done():
+                pending.cancel()
+                await asyncio.wait({pending})
+            await _aclose(source)
+        out = c.take(force=True)
+        if out:
+            yield out
+
+
+def coalesce(chunks: Iterable[str], config: Config) -> Iterable[str]:
+    """Apply ``config``'s coalescing policy to a text stream (no-op when unset)."""
+    coalescer = _coalescer_for(config)
+    if coalescer is None:
+        return chunks
+    return CoalescedStream(chunks, coalescer)
+
+
+def acoalesce(
+    open_chunks: Callable[[], Awaitable[AsyncIterable[str]]], config: Config
+) -> AsyncIterator[str] | None:
+    """Async ``coalesce``; returns None when ``config`` sets no policy."""
+    coalescer = _coalescer_for(config)
+    if coalescer is None:
+        return None
+    return AsyncCoalescedStream(open_chunks, coalescer)
+
+
+def _stop_check(config: Config) -> Callable[[str], str] | None:
+    """Return a per-stream checker for ``stream_stop_when``/``stream_max_bytes``.
+
+    The checker takes each chunk and returns it (truncated at the byte
+    limit), raising ``_Stop`` with the last text to pass on once the stream
+    should end.
+    """
+    stop_when = config.stream_stop_when
+    limit = config.stream_max_bytes
+    if stop_when is None and not limit:
+        return None
+    text = ""
+    seen = 0
+
+    def check(chunk: str) -> str:
+        nonlocal text, seen
+        if limit:
+            n = _nbytes(chunk)
+            if seen + n >= limit:
+                if seen + n > limit:
+                    raw = chunk.encode("utf-8")[: limit - seen]
+                    chunk = raw.decode("utf-8", "ignore")
+                raise _Stop(chunk)
+            seen += n
+        if stop_when is not None:
+            text += chunk
+            if stop_when(text):
+                raise _Stop(chunk)
+        return chunk
+
+    return check
+
+
+class _Stop(Exception):
+    def __init__(self, last: str) -> None:
+        self.last = last
+
+
+def guard(chunks: Iterable[str], config: Config) -> Iterable[str]:
+    """End a stream early on ``stream_stop_when`` or ``stream_max_bytes``.
+
+    Stopping closes the underlying provider stream, which aborts generation
+    server-side (and, in tool-streaming mode, schedules no further turns).
+    Returns ``chunks`` unchanged when neither option is set.
+    """
+    check = _stop_check(config)
+    if check is None:
+        return chunks
+    return _guarded(chunks, check)
+
+
+def _guarded(chunks: Iterable[str], check: Callable[[str], str]) -> Iterator[str]:
+    try:
+        for chunk in chunks:
+            try:
+                yield check(chunk)
+            except _Stop as stop:
+                if stop.last:
+                    yield stop.last
+                return
+    finally:
+        _close(chunks)
+
+
+def aguard(chunks: AsyncIterable[str], config: Config) -> AsyncIterable[str]:
+    """Async counterpart of ``guard``."""
+    check = _stop_check(config)
+    if check is None:
+        return chunks
+    return _aguarded(chunks, check)
+
+
+async def _aguarded(chunks: AsyncIterable[str], check: Callable[[str], str]) -> AsyncIterator[str]:
+    try:
+        async for chunk in chunks:
+            try:
+                out = check(chunk)
+            except _Stop as stop:
+                if stop.last:
+                    yield stop.last
+                return
+            yield out
+    finally:
+        await _aclose(chunks)
+
+
+# Upper bounds (seconds) of the inter-chunk gap histogram; the last bucket is open.
+GAP_BUCKETS: tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+@dataclass
+class StreamStats:
+    """Latency profile of one stream (times in seconds from request start).
+
+    ``gap_counts[i]`` counts inter-chunk gaps up to ``GAP_BUCKETS[i]``; the
+    extra last slot counts longer gaps. ``tool_stalls`` holds, per tool turn,
+    the time from the end of a turn's output to the next text chunk (tool
+    execution plus the follow-up request). Provider text deltas are roughly
+    tokens, so ``chunks_per_second`` approximates tokens per second.
+    """
+
+    ttfb: float | None = None
+    ttft: float | None = None
+    duration: float = 0.0
+    chunks: int = 0
+    bytes: int = 0
+    max_gap: float = 0.0
+    gap_counts: list[int] = field(default_factory=lambda: [0] * (len(GAP_BUCKETS) + 1))
+    tool_stalls: list[float] = field(default_factory=list)
+
+    @property
+    def chunks_per_second(self) -> float:
+        span = self.duration - (self.ttft or 0.0)
+        return self.chunks / span if span > 0 else 0.0
+
+    @property
+    def bytes_per_second(self) -> float:
+        span = self.duration - (self.ttft or 0.0)
+        return self.bytes / span if span > 0 else 0.0
+
+
+_stats_hooks: list[Callable[[StreamStats], None]] = []
+
+
+def add_stream_stats_hook(fn: Callable[[StreamStats], None]) -> None:
+    """Call ``fn(stats)`` when any stream finishes (enables instrumentation)."""
+    _stats_hooks.append(fn)
+
+
+def remove_stream_stats_hook(fn: Callable[[StreamStats], None]) -> None:
+    with contextlib.suppress(ValueError):
+        _stats_hooks.remove(fn)
+
+
+class StreamRecorder:
+    """Collects ``StreamStats`` for one stream; see ``recorder_for``."""
+
+    __slots__ = ("stats", "_t0", "_last", "_stall_from", "_done")
+
+    def __init__(self) -> None:
+        self.stats = StreamStats()
+        self._t0 = time.perf_counter()
+        self._last = 0.0
+        self._stall_from: float | None = None
+        self._done = False
+
+    def begin(self) -> None:
+        """Restart the clock as the request is sent."""
+        self._t0 = time.perf_counter()
+
+    def first_byte(self) -> None:
+        if self.stats.ttfb is None:
+            self.stats.ttfb = time.perf_counter() - self._t0
+
+    def chunk(self, text: str) -> None:
+        now = time.perf_counter()
+        st = self.stats
+        if st.ttft is None:
+            st.ttft = now - self._t0
+            if st.ttfb is None:
+                st.ttfb = st.ttft
+        else:
+            gap = now - self._last
+            st.gap_counts[bisect.bisect_left(GAP_BUCKETS, gap)] += 1
+            if gap > st.max_gap:
+                st.max_gap = gap
+        self._last = now
+        st.chunks += 1
+        st.bytes += _nbytes(text)
+        if self._stall_from is not None:
+            st.tool_stalls.append(now - self._stall_from)
+            self._stall_from = None
+
+    def tool_turn(self) -> None:
+        """Mark the end of a turn's output before its tool calls run."""
+        if self._stall_from is None:
+            self._stall_from = time.perf_counter()
+
+    def finish(self) -> None:
+        if self._done:
+            return
+        self._done = True
+        now = time.perf_counter()
+        if self._stall_from is not None:
+            self.stats.tool_stalls.append(now - self._stall_from)
+            self._stall_from = None
+        self.stats.duration = now - self._t0
+        for hook in list(_stats_hooks):
+            try:
+                hook(self.stats)
+            except Exception:
+                pass
+
+
+_current_recorder: ContextVar[StreamRecorder | None] = ContextVar(
+    "alloy_stream_recorder", default=None
+)
+
+
+def recorder_for(config: Config) -> StreamRecorder | None:
+    """Return a recorder when stats are enabled (config flag or a registered hook)."""
+    if not config.stream_stats and not _stats_hooks:
+        return None
+    return StreamRecorder()
+
+
+def current_recorder() -> StreamRecorder | None:
+    """Recorder for the stream being opened (read by backends in ``stream()``)."""
+    return _current_recorder.get()
+
+
+@contextlib.contextmanager
+def recording(rec: StreamRecorder | None) -> Iterator[None]:
+    """Make ``rec`` visible to the backend while it opens its stream."""
+    if rec is None:
+        yield
+        return
+    token = _current_recorder.set(rec)
+    try:
+        yield
+    finally:
+        _current_recorder.reset(token)
+
+
+def first_byte(events: Iterable[Any], rec: StreamRecorder | None) -> Iterable[Any]:
+    """Record time to first byte when the provider's first event arrives."""
+    if rec is None:
+        return events
+    return _first_byte(events, rec)
+
+
+def _first_byte(events: Iterable[Any], rec: StreamRecorder) -> Iterator[Any]:
+    it = iter(events)
+    for event in it:
+        rec.first_byte()
+        yield event
+        break
+    yield from it
+
+
+def afirst_byte(events: AsyncIterable[Any], rec: StreamRecorder | None) -> AsyncIterable[Any]:
+    """Async counterpart of ``first_byte``."""
+    if rec is None:
+        return events
+    return _afirst_byte(events, rec)
+
+
+async def _afirst_byte(events: AsyncIterable[Any], rec: StreamRecorder) -> AsyncIterator[Any]:
+    marked = False
+    async for event in events:
+        if not marked:
+            rec.first_byte()
+            marked = True
+        yield event
+
+
+class InstrumentedStream(Iterator[str]):
+    """Text stream that feeds each chunk to a ``StreamRecorder``.
+
+    ``latency`` holds the ``StreamStats``; they are final once the stream is
+    exhausted or closed.
+    """
+
+    def __init__(self, chunks: Iterable[str], rec: StreamRecorder) -> None:
+        self.latency = rec.stats
+        self._chunks = chunks
+        self._gen = self._run(chunks, rec)
+
+    def __iter__(self) -> "InstrumentedStream":
+        return self
+
+    def __next__(self) -> str:
+        return next(self._gen)
+
+    def close(self) -> None:
+        self._gen.close()
+        _close(self._chunks)
+
+    def _run(self, chunks: Iterable[str], rec: StreamRecorder) -> Generator[str, None, None]:
+        # Sync provider streams send their request on the first pull, so the
+        # clock starts here rather than when the stream object was built.
+        rec.begin()
+        try:
+            for chunk in chunks:
+                rec.chunk(chunk)
+                yield chunk
+        finally:
+            _close(chunks)
+            rec.finish()
+
+
+class AsyncInstrumentedStream(AsyncIterator[str]):
+    """Async counterpart of ``InstrumentedStream``."""
+
+    def __init__(self, chunks: AsyncIterable[str], rec: StreamRecorder) -> None:
+        self.latency = rec.stats
+        self._gen = self._run(chunks, rec)
+
+    def __aiter__(self) -> "AsyncInstrumentedStream":
+        return self
+
+    async def __anext__(self) -> str:
+        return await self._gen.__anext__()
+
+    async def aclose(self) -> None:
+        await self._gen.aclose()
+
+    async def _run(
+        self, chunks: AsyncIterable[str], rec: StreamRecorder
+    ) -> AsyncGenerator[str, None]:
+        try:
+            async for chunk in chunks:
+                rec.chunk(chunk)
+                yield chunk
+        finally:
+            await _aclose(chunks)
+            rec.finish()
+
+
+def instrument(chunks: Iterable[str], rec: StreamRecorder | None) -> Iterable[str]:
+    """Wrap ``chunks`` in an ``InstrumentedStream`` when ``rec`` is set."""
+    if rec is None:
+        return chunks
+    return InstrumentedStream(chunks, rec)
+
+
+def ainstrument(chunks: AsyncIterable[str], rec: StreamRecorder | None) -> AsyncIterable[str]:
+    """Async counterpart of ``instrument``."""
+    if rec is None:
+        return chunks
+    return AsyncInstrumentedStream(chunks, rec)
+
+
+def with_latency(stream: Any, rec: StreamRecorder | None) -> Any:
+    """Expose ``rec``'s stats as ``stream.latency`` on an outer wrapper."""
+    if rec is not None:
+        stream.latency = rec.stats
+    return stream
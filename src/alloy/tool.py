@@ -2,10 +2,10 @@ from __future__ import annotations
 
 import inspect
 from dataclasses import dataclass, field
-from typing import Any, Callable
+from typing import Any, Callable, get_type_hints
 
 from .errors import ToolError
-from .types import to_json_schema
+from .types import _coerce, to_json_schema
 
 Predicate = Callable[[Any], bool]
 
@@ -25,8 +25,28 @@ class ToolSpec:
     signature: str
     requires: list[Contract] = field(default_factory=list)
     ensures: list[Contract] = field(default_factory=list)
+    _schema: dict[str, Any] | None = field(default=None, init=False, repr=False, compare=False)
+    is_async: bool = field(default=False, init=False, repr=False, compare=False)
+    _invoker: "ToolInvoker | None" = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.is_async = inspect.iscoroutinefunction(self.func)
+
+    @property
+    def invoker(self) -> "ToolInvoker":
+        """Return the compiled invoker for this tool (built once)."""
+        inv = self._invoker
+        if inv is None:
+            inv = self._invoker = ToolInvoker(self.func)
+        return inv
 
     def as_schema(self) -> dict[str, Any]:
+        """Return the JSON tool schema (computed once; do not mutate)."""
+        if self._schema is None:
+            self._schema = self._build_schema()
+        return self._schema
+
+    def _build_schema(self) -> dict[str, Any]:
         sig = inspect.signature(self.func)
         properties: dict[str, Any] = {}
         required: list[str] = []
@@ -50,6 +70,96 @@ class ToolSpec:
         }
 
 
+def _primitive_coercer(tp: Any) -> Callable[[Any], Any] | None:
+    if tp is int:
+        return int
+    if tp is float:
+        return float
+    if tp is str:
+        return str
+    if tp is bool:
+
+        def to_bool(value: Any) -> bool:
+            if isinstance(value, bool):
+                return value
+            return str(value).strip().lower() in ("true", "1", "yes", "y", "t", "on")
+
+        return to_bool
+    return None
+
+
+def _make_coercer(tp: Any) -> Callable[[Any], Any] | None:
+    """Return a converter for model-supplied values of type ``tp`` (None: pass through).
+
+    Conversion failures fall back to the raw value so the tool sees what the
+    model sent, as before.
+    """
+    if tp is inspect.Parameter.empty or tp is Any or isinstance(tp, str):
+        return None
+    conv = _primitive_coercer(tp) or (lambda value: _coerce(tp, value))
+
+    def coerce(value: Any) -> Any:
+        try:
+            return conv(value)
+        except Exception:
+            return value
+
+    return coerce
+
+
+class ToolInvoker:
+    """Per-tool call plan compiled once from the signature and type hints.
+
+    Holds the cached signature, a coercer per annotated parameter (primitives,
+    Optional/unions, list, dict, dataclass and TypedDict via
+    ``alloy.types._coerce``) and the parameter defaults used to bind arguments
+    for ``@require`` contracts without re-inspecting the function.
+    """
+
+    __slots__ = ("signature", "coercers", "_defaults", "_names", "_kw_bindable")
+
+    def __init__(self, func: Callable[..., Any]) -> None:
+        self.signature = inspect.signature(func)
+        try:
+            hints = get_type_hints(func)
+        except Exception:
+            hints = {}
+        self.coercers: dict[str, Callable[[Any], Any]] = {}
+        self._defaults: list[tuple[str, Any]] = []
+        kinds = (inspect.Parameter.POSITIONAL_OR_KEYWORD, inspect.Parameter.KEYWORD_ONLY)
+        self._kw_bindable = True
+        for name, p in self.signature.parameters.items():
+            conv = _make_coercer(hints.get(name, p.annotation))
+            if conv is not None:
+                self.coercers[name] = conv
+            if p.kind not in kinds:
+                self._kw_bindable = False
+            self._defaults.append((name, p.default))
+        self._names = frozenset(self.signature.parameters)
+
+    def coerce(self, args: dict[str, Any]) -> dict[str, Any]:
+        """Convert keyword arguments from the model to the annotated types."""
+        coercers = self.coercers
+        if not coercers:
+            return args
+        return {k: (coercers[k](v) if k in coercers else v) for k, v in args.items()}
+
+    def bind(self, args: tuple[Any, ...], kwargs: dict[str, Any]) -> inspect.BoundArguments:
+        """Bind a call's arguments with defaults applied (for ``@require``)."""
+        if args or not self._kw_bindable or not kwargs.keys() <= self._names:
+            bound = self.signature.bind_partial(*args, **kwargs)
+            bound.apply_defaults()
+            return bound
+        empty = inspect.Parameter.empty
+        arguments = {}
+        for name, default in self._defaults:
+            if name in kwargs:
+                arguments[name] = kwargs[name]
+            elif default is not empty:
+                arguments[name] = default
+        return inspect.BoundArguments(self.signature, arguments)  # type: ignore[arg-type]
+
+
 def require(predicate: Predicate, message: str):
     def deco(fn: Callable[..., Any]):
         _contracts = getattr(fn, "_alloy_require", [])
@@ -79,18 +189,36 @@ class ToolCallable:
         return self._spec
 
     def __call__(self, *args, **kwargs):
-        bound = inspect.signature(self._spec.func).bind_partial(*args, **kwargs)
-        bound.apply_defaults()
+        if self._spec.is_async:
+            return self.acall(*args, **kwargs)
+        self._check_requires(args, kwargs)
+        result = self._spec.func(*args, **kwargs)
+        self._check_ensures(result)
+        return result
+
+    async def acall(self, *args, **kwargs):
+        """Call the tool, awaiting coroutine tools; ``@ensure`` sees the awaited result."""
+        self._check_requires(args, kwargs)
+        result = self._spec.func(*args, **kwargs)
+        if inspect.isawaitable(result):
+            result = await result
+        self._check_ensures(result)
+        return result
+
+    def _check_requires(self, args: tuple[Any, ...], kwargs: dict[str, Any]) -> None:
+        if not self._spec.requires:
+            return
+        bound = self._spec.invoker.bind(args, kwargs)
         for c in self._spec.requires:
             ok = _run_predicate(c.predicate, bound)
             if not ok:
                 raise ToolError(c.message)
-        result = self._spec.func(*args, **kwargs)
+
+    def _check_ensures(self, result: Any) -> None:
         for c in self._spec.ensures:
             ok = _run_predicate(c.predicate, result)
             if not ok:
                 raise ToolError(c.message)
-        return result
 
     def __getattr__(self, item):
         return getattr(self._spec.func, item)
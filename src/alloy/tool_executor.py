@@ -0,0 +1,291 @@
+"""Process-wide, bounded executor for sync tool calls.
+
+Tool turns with several calls used to create and tear down a thread pool each
+time. ``ToolExecutor`` keeps one long-lived pool sized by the process-level
+``Config.tool_workers`` (``configure`` or env ``ALLOY_TOOL_WORKERS``; the pool
+is shared, so ``use_config`` scopes do not resize it) and schedules work
+fairly: each tool turn gets its own lane, lanes are served round-robin, and a
+lane never runs more than its cap (the command's ``parallel_tools_max``) at
+once. A burst of calls from one command therefore cannot starve others.
+
+A custom ``concurrent.futures.Executor`` can be plugged in with
+``set_tool_executor``; the fair scheduler still decides what runs when.
+Calls run in a copy of the submitter's ``contextvars`` context, so
+context-scoped state (config scopes, event correlation) follows them.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import contextvars
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from . import config as _config
+from .config import DEFAULT_TOOL_WORKERS
+
+
+@dataclass
+class ToolExecutorStats:
+    """Queue-depth and wait-time counters for the shared tool executor."""
+
+    max_workers: int = 0
+    active: int = 0
+    queue_depth: int = 0
+    submitted: int = 0
+    completed: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+
+class _Task:
+    __slots__ = ("fn", "args", "future", "enqueued", "context")
+
+    def __init__(
+        self, fn: Callable[..., Any], args: tuple[Any, ...], future: concurrent.futures.Future
+    ) -> None:
+        self.fn = fn
+        self.args = args
+        self.future = future
+        self.enqueued = time.perf_counter()
+        self.context = contextvars.copy_context()
+
+
+class Lane:
+    """One tool turn's queue, capped at ``limit`` concurrently running calls."""
+
+    __slots__ = ("limit", "active", "queue", "owner")
+
+    def __init__(self, limit: int, owner: "ToolExecutor | None" = None) -> None:
+        self.limit = max(1, int(limit))
+        self.active = 0
+        self.queue: deque[_Task] = deque()
+        self.owner = owner
+
+
+_worker_state = threading.local()
+
+
+def in_tool_worker() -> bool:
+    """Return True when called from a thread running a shared-executor task."""
+    return bool(getattr(_worker_state, "active", False))
+
+
+def _run_marked(context: contextvars.Context, fn: Callable[..., Any], *args: Any) -> Any:
+    _worker_state.active = True
+    try:
+        return context.run(fn, *args)
+    finally:
+        _worker_state.active = False
+
+
+class ToolExecutor:
+    """Fair, bounded scheduler in front of a long-lived ``Executor``."""
+
+    def __init__(
+        self, max_workers: int, executor: concurrent.futures.Executor | None = None
+    ) -> None:
+        self.max_workers = max(1, int(max_workers))
+        self._owns_executor = executor is None
+        self._executor = executor or concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="alloy-tool"
+        )
+        self._lock = threading.Lock()
+        self._active = 0
+        self._ready: deque[Lane] = deque()
+        self._stats = ToolExecutorStats(max_workers=self.max_workers)
+        self._closing = False
+        self._closed = False
+        self._drained = threading.Condition(self._lock)
+
+    def lane(self, limit: int) -> Lane:
+        return Lane(limit, self)
+
+    def submit(self, lane: Lane, fn: Callable[..., Any], *args: Any) -> concurrent.futures.Future:
+        """Queue ``fn(*args)`` on ``lane`` and return a future for its result.
+
+        Calls always go to the executor that created ``lane``; once that one
+        has been replaced and drained, the lane moves to its replacement.
+        """
+        owner = lane.owner
+        if owner is not None and owner is not self:
+            return owner.submit(lane, fn, *args)
+        task = _Task(fn, args, concurrent.futures.Future())
+        start: list[tuple[Lane, _Task]] = []
+        close = False
+        with self._lock:
+            closed = self._closed
+            if not closed:
+                if not lane.queue:
+                    self._ready.append(lane)
+                lane.queue.append(task)
+                self._stats.submitted += 1
+                self._stats.queue_depth += 1
+                start = self._take_runnable_locked()
+                close = self._drain_done_locked(start)
+        if closed:
+            successor = _executor
+            if successor is not None and successor is not self:
+                lane.owner = successor
+                return successor.submit(lane, fn, *args)
+            task.future.set_exception(RuntimeError("tool executor is shut down"))
+            return task.future
+        self._start(start)
+        if close:
+            self._shutdown_pool()
+        return task.future
+
+    def _take_runnable_locked(self) -> list[tuple[Lane, _Task]]:
+        out: list[tuple[Lane, _Task]] = []
+        skipped = 0
+        while self._active < self.max_workers and self._ready and skipped < len(self._ready):
+            lane = self._ready.popleft()
+            if lane.active >= lane.limit:
+                self._ready.append(lane)
+                skipped += 1
+                continue
+            skipped = 0
+            task = lane.queue.popleft()
+            self._stats.queue_depth -= 1
+            if lane.queue:
+                self._ready.append(lane)
+            if not task.future.set_running_or_notify_cancel():
+                continue
+            lane.active += 1
+            self._active += 1
+            wait = time.perf_counter() - task.enqueued
+            self._stats.total_wait += wait
+            self._stats.max_wait = max(self._stats.max_wait, wait)
+            out.append((lane, task))
+        return out
+
+    def _start(self, tasks: list[tuple[Lane, _Task]]) -> None:
+        for lane, task in tasks:
+            try:
+                inner = self._executor.submit(_run_marked, task.context, task.fn, *task.args)
+            except Exception as e:
+                task.future.set_exception(e)
+                self._finish(lane)
+                continue
+            inner.add_done_callback(self._callback(lane, task))
+
+    def _callback(
+        self, lane: Lane, task: _Task
+    ) -> Callable[[concurrent.futures.Future[Any]], None]:
+        def done(inner: concurrent.futures.Future[Any]) -> None:
+            self._done(lane, task, inner)
+
+        return done
+
+    def _done(self, lane: Lane, task: _Task, inner: concurrent.futures.Future) -> None:
+        err = inner.exception()
+        if err is None:
+            task.future.set_result(inner.result())
+        else:
+            task.future.set_exception(err)
+        self._finish(lane)
+
+    def _finish(self, lane: Lane) -> None:
+        with self._lock:
+            lane.active -= 1
+            self._active -= 1
+            self._stats.completed += 1
+            if lane.queue and lane not in self._ready:
+                self._ready.append(lane)
+            start = self._take_runnable_locked()
+            close = self._drain_done_locked(start)
+        self._start(start)
+        if close:
+            self._shutdown_pool()
+
+    def _idle_locked(self) -> bool:
+        return self._active == 0 and not self._ready
+
+    def _drain_done_locked(self, started: list[tuple[Lane, _Task]]) -> bool:
+        """Mark a closing executor closed once nothing is running or queued."""
+        if not self._closing or self._closed or started or not self._idle_locked():
+            return False
+        self._closed = True
+        self._drained.notify_all()
+        return True
+
+    def _shutdown_pool(self) -> None:
+        if self._owns_executor:
+            self._executor.shutdown(wait=False)
+
+    def stats(self) -> ToolExecutorStats:
+        with self._lock:
+            snap = ToolExecutorStats(**vars(self._stats))
+        snap.active = self._active
+        return snap
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop after queued calls finish; ``wait`` blocks until they have.
+
+        The pool is shut down only once every lane has drained, so calls
+        already queued still run.
+        """
+        with self._lock:
+            self._closing = True
+            if self._idle_locked():
+                self._closed = True
+            elif wait:
+                self._drained.wait_for(lambda: self._closed)
+            closed = self._closed
+        if closed and self._owns_executor:
+            self._executor.shutdown(wait=wait)
+
+
+_executor: ToolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _configured_workers() -> int:
+    """``tool_workers`` from ``configure()`` or the environment (never scoped)."""
+    return (
+        _config._global_config.tool_workers
+        or _config._config_from_env().tool_workers
+        or DEFAULT_TOOL_WORKERS
+    )
+
+
+def get_tool_executor() -> ToolExecutor:
+    """Return the shared executor, (re)creating it when ``tool_workers`` changes."""
+    size = _configured_workers()
+    ex = _executor
+    if ex is not None and not ex._closed and (ex.max_workers == size or not ex._owns_executor):
+        return ex
+    return _replace(size, None)
+
+
+def set_tool_executor(
+    executor: concurrent.futures.Executor | None, *, max_workers: int | None = None
+) -> None:
+    """Run tool calls on ``executor`` (or a fresh default pool when None).
+
+    ``max_workers`` bounds how many calls are handed to it at once; it
+    defaults to ``Config.tool_workers``.
+    """
+    size = max_workers or _configured_workers()
+    _replace(size, executor)
+
+
+def _replace(size: int, executor: concurrent.futures.Executor | None) -> ToolExecutor:
+    global _executor
+    with _executor_lock:
+        old = _executor
+        if executor is None and old is not None and old._owns_executor and not old._closed:
+            if old.max_workers == size:
+                return old
+        new = _executor = ToolExecutor(size, executor)
+    if old is not None:
+        old.shutdown(wait=False)
+    return new
+
+
+def tool_executor_stats() -> ToolExecutorStats:
+    """Return a snapshot of the shared executor's queue and wait-time stats."""
+    return get_tool_executor().stats()
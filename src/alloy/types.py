@@ -1,12 +1,21 @@
 from __future__ import annotations
 
-import json
-from typing import Any
+from typing import Any, Callable
 from typing import get_args, get_origin, get_type_hints, Union as _Union
 import types as _pytypes
 from functools import lru_cache
 from dataclasses import is_dataclass, fields, MISSING, asdict
 
+from . import codec
+
+try:
+    from typing_extensions import is_typeddict as _is_typeddict
+except Exception:  # pragma: no cover - typing_extensions is optional
+    try:
+        from typing import is_typeddict as _is_typeddict
+    except Exception:
+        _is_typeddict = None  # type: ignore[assignment]
+
 
 def to_json_schema(tp: Any, strict: bool = True) -> dict | None:
     """Best-effort JSON Schema generator for output types.
@@ -82,86 +91,230 @@ def to_json_schema(tp: Any, strict: bool = True) -> dict | None:
     return None
 
 
+_UNDECODED: Any = object()
+
+
+class StructuredOutput(str):
+    """Model output text that carries its already decoded JSON value.
+
+    Backends build one with ``StructuredOutput.decode`` when deciding whether
+    a finalize turn is needed and return it unchanged (it is a ``str``), so
+    ``parse_output`` coerces ``data`` instead of decoding the text again.
+    """
+
+    data: Any = _UNDECODED
+    valid: bool = False
+    schema: Any = None
+
+    @property
+    def decoded(self) -> bool:
+        return self.data is not _UNDECODED
+
+    @classmethod
+    def decode(cls, text: str) -> "StructuredOutput":
+        """Decode ``text`` (ignoring optional code fences) exactly once."""
+        out = cls(text)
+        try:
+            out.data = codec.loads(strip_code_fences(text))
+        except Exception:
+            pass
+        return out
+
+
+def strip_code_fences(text: str) -> str:
+    """Return ``text`` without surrounding whitespace and a Markdown code fence."""
+    s = text.strip()
+    if s.startswith("```"):
+        nl = s.find("\n")
+        if nl != -1:
+            s = s[nl + 1 :]
+        if s.endswith("```"):
+            s = s[:-3]
+        s = s.strip()
+    return s
+
+
 def parse_output(tp: Any, raw: str) -> Any:
     """Parse model output into the requested type.
 
-    Attempts JSON decoding first, then recursively coerces to the requested type.
+    Attempts JSON decoding first (reusing the value already decoded by the
+    backend for a ``StructuredOutput``), then coerces with the type's
+    compiled decoder (see ``compile_decoder``).
     """
+    if isinstance(raw, StructuredOutput) and raw.decoded:
+        data = raw.data
+    else:
+        try:
+            data = codec.loads(raw)
+        except Exception:
+            data = raw
     try:
-        data = json.loads(raw)
-    except Exception:
-        data = raw
-    schema = to_json_schema(tp)
-    if isinstance(data, dict) and "value" in data and schema and schema.get("type") != "object":
+        decode, unwrap = _output_decoder_cached(tp)
+    except TypeError:
+        decode, unwrap = _output_decoder(tp)
+    if unwrap and isinstance(data, dict) and "value" in data:
         data = data["value"]
-    return _coerce(tp, data)
+    return decode(data)
+
+
+@lru_cache(maxsize=256)
+def _output_decoder_cached(tp: Any) -> tuple[Callable[[Any], Any], bool]:
+    return _output_decoder(tp)
+
+
+def _output_decoder(tp: Any) -> tuple[Callable[[Any], Any], bool]:
+    schema = to_json_schema(tp)
+    unwrap = schema is not None and bool(schema) and schema.get("type") != "object"
+    return compile_decoder(tp), unwrap
 
 
 def _coerce(tp: Any, value: Any) -> Any:
+    return compile_decoder(tp)(value)
+
+
+def compile_decoder(tp: Any) -> Callable[[Any], Any]:
+    """Return a cached decoder that coerces JSON data to ``tp``.
+
+    The type is inspected once and turned into a tree of specialized
+    closures (one per dataclass, TypedDict, list, dict, union or primitive
+    node), so decoding never re-dispatches on the type at runtime.
+    """
+    try:
+        return _compile_cached(tp)
+    except TypeError:
+        return _build_decoder(tp, {})
+
+
+@lru_cache(maxsize=512)
+def _compile_cached(tp: Any) -> Callable[[Any], Any]:
+    return _build_decoder(tp, {})
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _to_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    s = str(value).strip().lower()
+    return s in ("true", "1", "yes", "y", "t", "on")
+
+
+_PRIMITIVE_DECODERS: dict[Any, Callable[[Any], Any]] = {
+    Any: _identity,
+    str: str,
+    int: int,
+    float: float,
+    bool: _to_bool,
+}
+
+
+def _build_decoder(tp: Any, memo: dict[Any, Callable[[Any], Any]]) -> Callable[[Any], Any]:
+    try:
+        prim = _PRIMITIVE_DECODERS.get(tp)
+    except TypeError:
+        prim = None
+    if prim is not None:
+        return prim
+    try:
+        if tp in memo:
+            return memo[tp]
+    except TypeError:
+        pass
     origin = get_origin(tp)
     args = get_args(tp)
-    if tp is Any:
-        return value
-    if tp is str:
-        return str(value)
-    if tp is int:
-        return int(value)
-    if tp is float:
-        return float(value)
-    if tp is bool:
-        if isinstance(value, bool):
-            return value
-        s = str(value).strip().lower()
-        return s in ("true", "1", "yes", "y", "t", "on")
     if origin in (_Union, getattr(_pytypes, "UnionType", object())):
+        return _union_decoder([_build_decoder(a, memo) for a in args if a is not type(None)])
+    if origin is list:
+        return _list_decoder(_build_decoder(args[0], memo) if args else _identity)
+    if origin is dict:
+        key_dec = _build_decoder(args[0], memo) if len(args) >= 1 else _identity
+        val_dec = _build_decoder(args[1], memo) if len(args) >= 2 else _identity
+        return _dict_decoder(key_dec, val_dec)
+    if is_dataclass_type(tp) or is_typeddict_type(tp):
+        impl: Callable[[Any], Any] = _identity
+
+        def forward(value: Any) -> Any:
+            return impl(value)
+
+        memo[tp] = forward
+        hints = _get_type_hints(tp)
+        if is_dataclass_type(tp):
+            names = [(f.name, hints.get(f.name, f.type)) for f in fields(tp)]
+            plan = [(n, _build_decoder(t, memo)) for n, t in names]
+            impl = _dataclass_decoder(tp, plan)
+        else:
+            plan = [(n, _build_decoder(t, memo)) for n, t in hints.items()]
+            impl = _typeddict_decoder(plan)
+        memo[tp] = impl
+        return impl
+    return _identity
+
+
+def _union_decoder(alts: list[Callable[[Any], Any]]) -> Callable[[Any], Any]:
+    def decode(value: Any) -> Any:
         if value is None:
             return None
         last_exc: Exception | None = None
-        for alt in args:
-            if alt is type(None):
-                continue
+        for alt in alts:
             try:
-                return _coerce(alt, value)
+                return alt(value)
             except Exception as e:
                 last_exc = e
-                continue
         if last_exc is not None:
             raise last_exc
         return value
-    if origin is list:
+
+    return decode
+
+
+def _list_decoder(elem: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    if elem is _identity:
+        return _identity
+
+    def decode(value: Any) -> Any:
         if not isinstance(value, list):
             return value
-        elem_t = args[0] if args else Any
-        return [_coerce(elem_t, v) for v in value]
-    if origin is dict:
+        return [elem(v) for v in value]
+
+    return decode
+
+
+def _dict_decoder(key: Callable[[Any], Any], val: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    def decode(value: Any) -> Any:
         if not isinstance(value, dict):
             return value
-        key_t = args[0] if len(args) >= 1 else Any
-        val_t = args[1] if len(args) >= 2 else Any
         out: dict[Any, Any] = {}
         for k, v in value.items():
             try:
-                ck = _coerce(key_t, k)
+                ck = key(k)
             except Exception:
                 ck = k
-            out[ck] = _coerce(val_t, v)
+            out[ck] = val(v)
         return out
-    if is_dataclass_type(tp) and isinstance(value, dict):
-        kwargs: dict[str, Any] = {}
-        hints = _get_type_hints(tp)
-        for f in fields(tp):
-            if f.name in value:
-                ft = hints.get(f.name, f.type)
-                kwargs[f.name] = _coerce(ft, value[f.name])
-        return tp(**kwargs)
-    if is_typeddict_type(tp) and isinstance(value, dict):
-        out_td: dict[str, Any] = {}
-        hints = _get_type_hints(tp)
-        for k, t in hints.items():
-            if k in value:
-                out_td[k] = _coerce(t, value[k])
-        return out_td
-    return value
+
+    return decode
+
+
+def _dataclass_decoder(
+    tp: Any, plan: list[tuple[str, Callable[[Any], Any]]]
+) -> Callable[[Any], Any]:
+    def decode(value: Any) -> Any:
+        if not isinstance(value, dict):
+            return value
+        return tp(**{name: dec(value[name]) for name, dec in plan if name in value})
+
+    return decode
+
+
+def _typeddict_decoder(plan: list[tuple[str, Callable[[Any], Any]]]) -> Callable[[Any], Any]:
+    def decode(value: Any) -> Any:
+        if not isinstance(value, dict):
+            return value
+        return {name: dec(value[name]) for name, dec in plan if name in value}
+
+    return decode
 
 
 @lru_cache(maxsize=256)
@@ -180,19 +333,19 @@ def is_dataclass_type(tp: Any) -> bool:
 
 
 def is_typeddict_type(tp: Any) -> bool:
-    try:
-        from typing_extensions import is_typeddict as _is_td
-
-        return bool(_is_td(tp))
-    except Exception:
+    if _is_typeddict is not None:
         try:
-            return bool(
-                hasattr(tp, "__annotations__")
-                and hasattr(tp, "__total__")
-                and (hasattr(tp, "__required_keys__") or hasattr(tp, "__optional_keys__"))
-            )
+            return bool(_is_typeddict(tp))
         except Exception:
             return False
+    try:
+        return bool(
+            hasattr(tp, "__annotations__")
+            and hasattr(tp, "__total__")
+            and (hasattr(tp, "__required_keys__") or hasattr(tp, "__optional_keys__"))
+        )
+    except Exception:
+        return False
 
 
 def _primitive_name(tp: Any) -> str:
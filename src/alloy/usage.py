@@ -0,0 +1,369 @@
+"""Token usage and cost accounting.
+
+Every provider turn (tool-loop turns, finalize turns and retries) reports
+the token usage the provider returned, normalized to ``Usage``. To collect
+it:
+
+- ``with usage_scope() as report:`` accumulates every turn made inside the
+  block, including nested commands and commands called from tool threads,
+  broken down by model and by command.
+- ``cmd.with_usage(...)`` runs one command and returns a ``CommandResult``
+  holding the value and its ``UsageReport``.
+
+Costs are estimates from a pluggable price table (USD per million tokens)
+filled with ``set_price``; no prices are built in, and models without a
+price are listed in ``UsageReport.unpriced``.
+
+Run budgets (``Config.max_total_input_tokens``, ``max_total_output_tokens``,
+``max_cost_usd``, ``max_wall_time_s``) are tracked by ``Budget``. A command
+opens one for its effective config; commands nested inside it (tools,
+sub-agents) share it, and a nested command with different limits adds its
+own, so every enclosing budget is charged too.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Generic, TypeVar
+
+from .config import Config
+from .errors import create_budget_exception
+
+T_co = TypeVar("T_co", covariant=True)
+
+
+@dataclass
+class Usage:
+    """Token counts for one or more provider requests."""
+
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached_input_tokens: int = 0
+    requests: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+    def add(self, other: "Usage") -> None:
+        self.input_tokens += other.input_tokens
+        self.output_tokens += other.output_tokens
+        self.cached_input_tokens += other.cached_input_tokens
+        self.requests += other.requests
+
+    def __add__(self, other: "Usage") -> "Usage":
+        out = Usage(**vars(self))
+        out.add(other)
+        return out
+
+
+def _field(obj: Any, name: str) -> Any:
+    if obj is None:
+        return None
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None)
+
+
+def _int(value: Any) -> int:
+    return value if isinstance(value, int) and not isinstance(value, bool) else 0
+
+
+def usage_from_response(response: Any) -> Usage | None:
+    """Normalize a provider response's usage block; None when it has none.
+
+    Understands OpenAI Responses and Chat Completions (``usage``), Anthropic
+    Messages (``usage`` with cache counters), Gemini (``usage_metadata``) and
+    Ollama (``prompt_eval_count``/``eval_count``).
+    """
+    u = _field(response, "usage")
+    if u is not None:
+        if _field(u, "input_tokens") is not None:
+            cached = _int(_field(_field(u, "input_tokens_details"), "cached_tokens"))
+            cache_read = _int(_field(u, "cache_read_input_tokens"))
+            cache_write = _int(_field(u, "cache_creation_input_tokens"))
+            return Usage(
+                input_tokens=_int(_field(u, "input_tokens")) + cache_read + cache_write,
+                output_tokens=_int(_field(u, "output_tokens")),
+                cached_input_tokens=cached + cache_read,
+                requests=1,
+            )
+        if _field(u, "prompt_tokens") is not None:
+            details = _field(u, "prompt_tokens_details")
+            return Usage(
+                input_tokens=_int(_field(u, "prompt_tokens")),
+                output_tokens=_int(_field(u, "completion_tokens")),
+                cached_input_tokens=_int(_field(details, "cached_tokens")),
+                requests=1,
+            )
+    meta = _field(response, "usage_metadata")
+    if meta is not None:
+        return Usage(
+            input_tokens=_int(_field(meta, "prompt_token_count")),
+            output_tokens=_int(_field(meta, "candidates_token_count"))
+            + _int(_field(meta, "thoughts_token_count")),
+            cached_input_tokens=_int(_field(meta, "cached_content_token_count")),
+            requests=1,
+        )
+    prompt_eval = _field(response, "prompt_eval_count")
+    eval_count = _field(response, "eval_count")
+    if prompt_eval is not None or eval_count is not None:
+        return Usage(input_tokens=_int(prompt_eval), output_tokens=_int(eval_count), requests=1)
+    return None
+
+
+@dataclass(frozen=True)
+class Price:
+    """USD per million tokens; ``cached_input`` defaults to ``input``."""
+
+    input: float
+    output: float
+    cached_input: float | None = None
+
+    def cost(self, usage: Usage) -> float:
+        cached_rate = self.input if self.cached_input is None else self.cached_input
+        uncached = max(0, usage.input_tokens - usage.cached_input_tokens)
+        return (
+            uncached * self.input
+            + usage.cached_input_tokens * cached_rate
+            + usage.output_tokens * self.output
+        ) / 1_000_000
+
+
+_prices: dict[str, Price] = {}
+
+
+def set_price(
+    model: str, *, input: float, output: float, cached_input: float | None = None
+) -> None:
+    """Register the price of ``model`` (also used for names it prefixes)."""
+    _prices[model] = Price(input, output, cached_input)
+
+
+def get_price(model: str | None) -> Price | None:
+    """Return the price for ``model``: exact match first, else the longest prefix."""
+    if not model:
+        return None
+    price = _prices.get(model)
+    if price is not None:
+        return price
+    best = ""
+    for name in _prices:
+        if model.startswith(name) and len(name) > len(best):
+            best = name
+    return _prices.get(best) if best else None
+
+
+def estimate_cost(model: str | None, usage: Usage) -> float | None:
+    """Estimated USD cost of ``usage`` on ``model``; None when it has no price."""
+    price = get_price(model)
+    return None if price is None else price.cost(usage)
+
+
+@dataclass
+class UsageReport:
+    """Usage accumulated by a ``usage_scope``; safe to update from any thread."""
+
+    total: Usage = field(default_factory=Usage)
+    by_model: dict[str, Usage] = field(default_factory=dict)
+    by_command: dict[str, Usage] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def add(self, model: str | None, command: str | None, usage: Usage) -> None:
+        with self._lock:
+            self.total.add(usage)
+            self.by_model.setdefault(model or "", Usage()).add(usage)
+            if command:
+                self.by_command.setdefault(command, Usage()).add(usage)
+
+    @property
+    def cost(self) -> float:
+        """Estimated USD cost over the models that have a price."""
+        with self._lock:
+            items = list(self.by_model.items())
+        return sum(estimate_cost(m, u) or 0.0 for m, u in items)
+
+    @property
+    def unpriced(self) -> list[str]:
+        """Models used in this scope that have no registered price."""
+        with self._lock:
+            return [m for m in self.by_model if get_price(m) is None]
+
+
+@dataclass(frozen=True)
+class CommandResult(Generic[T_co]):
+    """A command's value with the usage it incurred (see ``Command.with_usage``)."""
+
+    value: T_co
+    usage: UsageReport
+
+    @property
+    def cost(self) -> float:
+        return self.usage.cost
+
+
+_scopes: ContextVar[tuple[UsageReport, ...]] = ContextVar("alloy_usage_scopes", default=())
+_command: ContextVar[str | None] = ContextVar("alloy_usage_command", default=None)
+
+
+class usage_scope:
+    """Accumulate token usage for every provider turn made inside the block.
+
+    Scopes nest: an inner scope's usage is also counted by the outer ones.
+    """
+
+    def __init__(self) -> None:
+        self.report = UsageReport()
+        self._token: Any = None
+
+    def __enter__(self) -> UsageReport:
+        self._token = _scopes.set((*_scopes.get(), self.report))
+        return self.report
+
+    def __exit__(self, *exc: Any) -> None:
+        _scopes.reset(self._token)
+
+    async def __aenter__(self) -> UsageReport:
+        return self.__enter__()
+
+    async def __aexit__(self, *exc: Any) -> None:
+        self.__exit__(*exc)
+
+
+class _Attribution:
+    __slots__ = ("name", "_token")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._token: Any = None
+
+    def __enter__(self) -> None:
+        self._token = _command.set(self.name)
+
+    def __exit__(self, *exc: Any) -> None:
+        _command.reset(self._token)
+
+
+class _NoAttribution:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+
+_NO_ATTRIBUTION = _NoAttribution()
+
+
+def attribute(command: str) -> _Attribution | _NoAttribution:
+    """Attribute usage recorded inside the block to ``command`` (no-op outside scopes)."""
+    if not _scopes.get():
+        return _NO_ATTRIBUTION
+    return _Attribution(command)
+
+
+def record(model: str | None, usage: Usage) -> None:
+    """Add one turn's usage to every active ``usage_scope``."""
+    scopes = _scopes.get()
+    if not scopes:
+        return
+    command = _command.get()
+    for report in scopes:
+        report.add(model, command, usage)
+
+
+_BUDGETS = ("max_total_input_tokens", "max_total_output_tokens", "max_cost_usd", "max_wall_time_s")
+
+
+def _limits(config: Config) -> tuple[float | None, ...] | None:
+    limits = tuple(getattr(config, name, None) for name in _BUDGETS)
+    return None if all(v is None for v in limits) else limits
+
+
+class Budget:
+    """Token, cost and wall-time limits charged with every turn made under them."""
+
+    __slots__ = ("limits", "report", "started")
+
+    def __init__(self, limits: tuple[float | None, ...]) -> None:
+        self.limits = limits
+        self.report = UsageReport()
+        self.started = time.monotonic()
+
+    def charge(self, model: str | None, usage: Usage) -> None:
+        self.report.add(model, None, usage)
+
+    def exceeded(self) -> tuple[str, float, float] | None:
+        """Return ``(budget, limit, used)`` for the first exceeded limit, else None."""
+        max_in, max_out, max_cost, max_wall = self.limits
+        total = self.report.total
+        if max_in is not None and total.input_tokens > max_in:
+            return _BUDGETS[0], max_in, total.input_tokens
+        if max_out is not None and total.output_tokens > max_out:
+            return _BUDGETS[1], max_out, total.output_tokens
+        if max_cost is not None:
+            cost = self.report.cost
+            if cost > max_cost:
+                return _BUDGETS[2], max_cost, cost
+        if max_wall is not None:
+            elapsed = time.monotonic() - self.started
+            if elapsed > max_wall:
+                return _BUDGETS[3], max_wall, elapsed
+        return None
+
+
+_budgets: ContextVar[tuple[Budget, ...]] = ContextVar("alloy_budgets", default=())
+
+
+class _BudgetScope:
+    __slots__ = ("budget", "_token")
+
+    def __init__(self, budget: Budget) -> None:
+        self.budget = budget
+        self._token: Any = None
+
+    def __enter__(self) -> None:
+        self._token = _budgets.set((*_budgets.get(), self.budget))
+
+    def __exit__(self, *exc: Any) -> None:
+        _budgets.reset(self._token)
+
+
+def budget(config: Config) -> _BudgetScope | _NoAttribution:
+    """Open the run budget for ``config`` (no-op without limits or when already open).
+
+    A budget with the same limits as the innermost open one is shared rather
+    than restarted, so nested commands inheriting the config draw from it.
+    """
+    limits = _limits(config)
+    if limits is None:
+        return _NO_ATTRIBUTION
+    active = _budgets.get()
+    if active and active[-1].limits == limits:
+        return _NO_ATTRIBUTION
+    return _BudgetScope(Budget(limits))
+
+
+def budgets_for(config: Config) -> tuple[Budget, ...]:
+    """Budgets a provider run must charge: the open ones, or a new one for ``config``."""
+    active = _budgets.get()
+    if active:
+        return active
+    limits = _limits(config)
+    return () if limits is None else (Budget(limits),)
+
+
+def check_budgets(budgets: tuple[Budget, ...], partial_text: str | None) -> None:
+    """Raise ``BudgetExceeded`` when any of ``budgets`` is over a limit."""
+    for b in budgets:
+        hit = b.exceeded()
+        if hit is not None:
+            name, limit, used = hit
+            raise create_budget_exception(
+                budget=name, limit=limit, used=used, partial_text=partial_text
+            )
@@ -0,0 +1,164 @@
+"""Benchmark harness for ``pytest -m bench``.
+
+Each benchmark calls the ``bench`` fixture with a zero-argument callable. The
+harness picks an iteration count that runs for at least ``min_time``, takes
+the best of ``repeat`` rounds, and records seconds per operation under the
+test id. ``--bench-json PATH`` saves the results and ``--bench-baseline PATH``
+compares them with a saved run: a benchmark slower than the baseline by more
+than ``--bench-tolerance`` fails the session.
+
+Everything runs offline against in-process stub providers.
+"""
+
+from __future__ import annotations
+
+import importlib
+import json
+import platform
+import statistics
+import sys
+import time
+import timeit
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+import pytest
+
+
+@dataclass
+class BenchResult:
+    best: float
+    median: float
+    number: int
+    repeat: int
+    items: int
+
+    @property
+    def items_per_second(self) -> float:
+        return self.items / self.best if self.best else 0.0
+
+
+_results: dict[str, BenchResult] = {}
+
+
+class Bench:
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __call__(
+        self,
+        fn: Callable[[], Any],
+        *,
+        items: int = 1,
+        repeat: int = 5,
+        min_time: float = 0.05,
+    ) -> BenchResult:
+        """Time ``fn``; ``items`` is how many units (chunks, calls) one call processes."""
+        timer = timeit.Timer(fn)
+        number = 1
+        while True:
+            elapsed = timer.timeit(number)
+            if elapsed >= min_time:
+                break
+            number = max(number * 2, int(number * min_time / max(elapsed, 1e-9)))
+        rounds = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+        result = BenchResult(min(rounds), statistics.median(rounds), number, repeat, items)
+        _results[self.name] = result
+        return result
+
+
+@pytest.fixture
+def bench(request: pytest.FixtureRequest) -> Bench:
+    return Bench(request.node.nodeid.split("tests/bench/", 1)[-1])
+
+
+def _load_baseline(path: str) -> dict[str, Any]:
+    return json.loads(Path(path).read_text())["results"]
+
+
+def _regressions(config: pytest.Config) -> list[tuple[str, float, float, float]]:
+    path = config.getoption("--bench-baseline")
+    if not path or not _results:
+        return []
+    tolerance = config.getoption("--bench-tolerance")
+    baseline = _load_baseline(path)
+    out = []
+    for name, result in sorted(_results.items()):
+        base = baseline.get(name)
+        if base is None:
+            continue
+        ratio = result.best / base["best"] if base["best"] else 1.0
+        if ratio > 1.0 + tolerance:
+            out.append((name, base["best"], result.best, ratio))
+    return out
+
+
+def _fmt(seconds: float) -> str:
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:8.2f} {unit}"
+    return f"{seconds / 1e-9:8.2f} ns"
+
+
+def pytest_terminal_summary(terminalreporter: Any, config: pytest.Config) -> None:
+    if not _results:
+        return
+    path = config.getoption("--bench-baseline")
+    baseline = _load_baseline(path) if path else {}
+    tr = terminalreporter
+    tr.section("alloy benchmarks")
+    for name, result in sorted(_results.items()):
+        line = f"{name:70s} {_fmt(result.best)}/op"
+        if result.items > 1:
+            line += f"  {result.items_per_second:12,.0f} items/s"
+        base = baseline.get(name)
+        if base and base["best"]:
+            line += f"  {result.best / base['best']:6.2f}x baseline"
+        tr.write_line(line)
+    for name, old, new, ratio in _regressions(config):
+        tr.write_line(f"REGRESSION {name}: {_fmt(old)} -> {_fmt(new)} ({ratio:.2f}x)", red=True)
+
+
+def pytest_sessionfinish(session: pytest.Session, exitstatus: int) -> None:
+    config = session.config
+    if not _results:
+        return
+    out = config.getoption("--bench-json")
+    if out:
+        payload = {
+            "meta": {
+                "python": sys.version.split()[0],
+                "implementation": platform.python_implementation(),
+                "platform": platform.platform(),
+                "machine": platform.machine(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            },
+            "results": {name: asdict(r) for name, r in sorted(_results.items())},
+        }
+        Path(out).parent.mkdir(parents=True, exist_ok=True)
+        Path(out).write_text(json.dumps(payload, indent=2) + "\n")
+    if _regressions(config) and session.exitstatus == pytest.ExitCode.OK:
+        session.exitstatus = pytest.ExitCode.TESTS_FAILED
+
+
+class StubBackend:
+    """In-process provider: answers immediately with a fixed text."""
+
+    def __init__(self, text: str = "ok") -> None:
+        self.text = text
+
+    def complete(self, prompt: str, *, tools=None, output_schema=None, config=None) -> str:
+        return self.text
+
+    async def acomplete(self, prompt: str, *, tools=None, output_schema=None, config=None) -> str:
+        return self.text
+
+
+@pytest.fixture
+def stub_backend(monkeypatch: pytest.MonkeyPatch) -> StubBackend:
+    """Route commands and ``ask`` to a ``StubBackend``; set ``.text`` to change the answer."""
+    backend = StubBackend()
+    for mod in ("alloy.command", "alloy.ask"):
+        monkeypatch.setattr(importlib.import_module(mod), "get_backend", lambda m: backend)
+    return backend
@@ -0,0 +1,49 @@
+"""Async fan-out: many concurrent command calls on one event loop."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from alloy import command
+
+pytestmark = pytest.mark.bench
+
+FANOUT = 1000
+
+
+def test_async_command_fanout(bench, stub_backend):
+    @command
+    async def greet(name: str) -> str:
+        return f"Say hello to {name}"
+
+    async def fan_out() -> list[str]:
+        return await asyncio.gather(*(greet(str(i)) for i in range(FANOUT)))
+
+    assert len(asyncio.run(fan_out())) == FANOUT
+    bench(lambda: asyncio.run(fan_out()), items=FANOUT, repeat=3)
+
+
+def test_async_command_amap(bench, stub_backend):
+    @command
+    async def greet(name: str) -> str:
+        return f"Say hello to {name}"
+
+    names = [str(i) for i in range(FANOUT)]
+
+    async def run() -> list[str]:
+        return [r async for r in greet.amap(names, concurrency=FANOUT)]
+
+    assert len(asyncio.run(run())) == FANOUT
+    bench(lambda: asyncio.run(run()), items=FANOUT, repeat=3)
+
+
+def test_command_map_threads(bench, stub_backend):
+    @command
+    def greet(name: str) -> str:
+        return f"Say hello to {name}"
+
+    names = [str(i) for i in range(FANOUT)]
+    assert len(list(greet.map(names, concurrency=64))) == FANOUT
+    bench(lambda: list(greet.map(names, concurrency=64)), items=FANOUT, repeat=3)
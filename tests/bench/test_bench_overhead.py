@@ -0,0 +1,119 @@
+"""Framework overhead per call, with the provider replaced by an in-process stub."""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+
+import pytest
+
+from alloy import command
+from alloy.config import compile_overrides, configure, get_config
+from alloy.types import parse_output, to_json_schema
+
+pytestmark = pytest.mark.bench
+
+
+@dataclass
+class Address:
+    street: str
+    city: str
+    country: str
+
+
+@dataclass
+class LineItem:
+    sku: str
+    quantity: int
+    price: float
+
+
+@dataclass
+class Invoice:
+    number: str
+    total: float
+    paid: bool
+    billing: Address
+    items: list[LineItem] = field(default_factory=list)
+    notes: str | None = None
+
+
+def _invoice(n_items: int) -> dict:
+    return {
+        "number": "INV-1",
+        "total": 99.5,
+        "paid": False,
+        "billing": {"street": "1 Main St", "city": "Athens", "country": "GR"},
+        "items": [{"sku": f"S{i}", "quantity": i, "price": 1.5} for i in range(n_items)],
+        "notes": None,
+    }
+
+
+def test_command_call_text(bench, stub_backend):
+    @command
+    def greet(name: str) -> str:
+        return f"Say hello to {name}"
+
+    bench(lambda: greet("Ada"))
+
+
+def test_command_call_typed(bench, stub_backend):
+    stub_backend.text = json.dumps(_invoice(5))
+
+    @command(output=Invoice)
+    def extract(doc: str) -> str:
+        return f"Extract the invoice from: {doc}"
+
+    assert extract("...").billing.city == "Athens"
+    bench(lambda: extract("..."))
+
+
+def test_command_call_openai_adapter(bench, monkeypatch):
+    """Command → OpenAI backend request building and response handling, no network."""
+    import importlib
+
+    from alloy.models.openai import OpenAIBackend
+
+    class _Responses:
+        def create(self, **kwargs):
+            return {"id": "r1", "output_text": "ok"}
+
+    class _Client:
+        def __init__(self) -> None:
+            self.responses = _Responses()
+
+    backend = OpenAIBackend()
+    backend._OpenAI = _Client
+    monkeypatch.setattr(importlib.import_module("alloy.command"), "get_backend", lambda m: backend)
+
+    @command
+    def greet(name: str) -> str:
+        return f"Say hello to {name}"
+
+    assert greet("Ada") == "ok"
+    bench(lambda: greet("Ada"))
+
+
+@pytest.mark.parametrize("overrides", ["none", "dict", "plan"])
+def test_get_config(bench, overrides):
+    configure(model="gpt-5-mini", temperature=0.2)
+    raw = {"model": "gpt-5-mini", "max_tokens": 256}
+    arg = {"none": None, "dict": raw, "plan": compile_overrides(raw)}[overrides]
+    bench(lambda: get_config(arg))
+
+
+def test_to_json_schema_nested_dataclass(bench):
+    bench(lambda: to_json_schema(Invoice))
+
+
+@pytest.mark.parametrize("n_items", [1, 100])
+def test_parse_output_nested_dataclass(bench, n_items):
+    raw = json.dumps(_invoice(n_items))
+    assert len(parse_output(Invoice, raw).items) == n_items
+    bench(lambda: parse_output(Invoice, raw), items=n_items)
+
+
+def test_parse_output_list_of_dataclasses(bench):
+    raw = json.dumps({"value": [_invoice(3) for _ in range(200)]})
+    assert len(parse_output(list[Invoice], raw)) == 200
+    bench(lambda: parse_output(list[Invoice], raw), items=200)
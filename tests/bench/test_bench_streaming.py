@@ -0,0 +1,113 @@
+"""Streaming chunk throughput through each backend adapter with fake SDK streams."""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+
+from alloy.config import Config
+
+pytestmark = pytest.mark.bench
+
+CHUNKS = 2000
+
+
+class _Ctx:
+    """A context-managed event stream, as returned by the OpenAI/Anthropic SDKs."""
+
+    def __init__(self, events, **attrs) -> None:
+        self._events = events
+        self.__dict__.update(attrs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+    def __iter__(self):
+        return iter(self._events)
+
+
+def _openai():
+    from alloy.models.openai import OpenAIBackend
+
+    events = [{"type": "response.output_text.delta", "delta": "tok "}] * CHUNKS
+
+    class _Client:
+        def __init__(self) -> None:
+            self.responses = SimpleNamespace(stream=lambda **kw: _Ctx(events))
+
+    backend = OpenAIBackend()
+    backend._OpenAI = _Client
+    return backend, Config(model="gpt-5-mini")
+
+
+def _anthropic():
+    from alloy.models.anthropic import AnthropicBackend
+
+    class _Client:
+        def __init__(self) -> None:
+            self.messages = SimpleNamespace(
+                stream=lambda **kw: _Ctx([], text_stream=iter(["tok "] * CHUNKS))
+            )
+
+    backend = AnthropicBackend()
+    backend._Anthropic = _Client
+    return backend, Config(model="claude-sonnet-4-20250514")
+
+
+def _gemini():
+    from alloy.models.gemini import GeminiBackend
+
+    chunks = [SimpleNamespace(text="tok ")] * CHUNKS
+
+    class _Client:
+        def __init__(self) -> None:
+            self.models = SimpleNamespace(generate_content_stream=lambda **kw: iter(chunks))
+
+    backend = GeminiBackend()
+    backend._GenAIClient = _Client
+    return backend, Config(model="gemini-2.5-flash")
+
+
+def _ollama():
+    from alloy.models.ollama import OllamaBackend
+
+    chunks = [SimpleNamespace(message=SimpleNamespace(content="tok "))] * CHUNKS
+    backend = OllamaBackend()
+    backend._ollama_module = SimpleNamespace(chat=lambda **kw: iter(chunks))
+    return backend, Config(model="ollama:llama3")
+
+
+ADAPTERS = {"openai": _openai, "anthropic": _anthropic, "gemini": _gemini, "ollama": _ollama}
+
+
+@pytest.mark.parametrize("provider", list(ADAPTERS))
+def test_stream_throughput(bench, provider):
+    backend, config = ADAPTERS[provider]()
+
+    def consume() -> int:
+        n = 0
+        for _ in backend.stream("prompt", config=config):
+            n += 1
+        return n
+
+    assert consume() == CHUNKS
+    bench(consume, items=CHUNKS)
+
+
+@pytest.mark.parametrize("flush_bytes", [None, 64])
+def test_ask_stream_throughput(bench, monkeypatch, flush_bytes):
+    """``ask.stream`` on top of an adapter, with and without chunk coalescing."""
+    import importlib
+
+    from alloy import ask
+
+    backend, config = _openai()
+    monkeypatch.setattr(importlib.import_module("alloy.ask"), "get_backend", lambda m: backend)
+    overrides = {} if flush_bytes is None else {"stream_flush_bytes": flush_bytes}
+    text = "".join(ask.stream("prompt", **overrides))
+    assert text == "tok " * CHUNKS
+    bench(lambda: "".join(ask.stream("prompt", **overrides)), items=CHUNKS)
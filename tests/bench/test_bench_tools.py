@@ -0,0 +1,89 @@
+"""Tool execution and tool-loop cost with instant tools and a scripted provider."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from alloy import tool
+from alloy.config import Config
+from alloy.models.base import BaseLoopState, ModelBackend, ToolCall
+
+pytestmark = pytest.mark.bench
+
+
+@tool
+def add(a: int, b: int) -> int:
+    return a + b
+
+
+@tool
+async def aadd(a: int, b: int) -> int:
+    return a + b
+
+
+TOOLS = {"add": add, "aadd": aadd}
+
+
+def _calls(n: int, name: str = "add") -> list[ToolCall]:
+    return [ToolCall(id=str(i), name=name, args={"a": i, "b": 1}) for i in range(n)]
+
+
+@pytest.mark.parametrize("n_calls", [1, 8, 64])
+def test_execute_tools(bench, n_calls):
+    backend = ModelBackend()
+    calls = _calls(n_calls)
+    assert backend.execute_tools(calls, parallel_tools_max=8, tool_map=TOOLS)[-1].ok
+    bench(
+        lambda: backend.execute_tools(calls, parallel_tools_max=8, tool_map=TOOLS),
+        items=n_calls,
+    )
+
+
+@pytest.mark.parametrize("n_calls", [1, 8, 64])
+def test_aexecute_tools(bench, n_calls):
+    backend = ModelBackend()
+    calls = _calls(n_calls, "aadd")
+
+    async def run():
+        return await backend.aexecute_tools(calls, parallel_tools_max=8, tool_map=TOOLS)
+
+    assert asyncio.run(run())[-1].ok
+    bench(lambda: asyncio.run(run()), items=n_calls)
+
+
+class _ScriptedState(BaseLoopState):
+    """Requests ``turns`` tool turns of ``width`` calls each, then answers."""
+
+    def __init__(self, config: Config, turns: int, width: int) -> None:
+        super().__init__(config, TOOLS)
+        self.remaining = turns
+        self.width = width
+
+    def make_request(self, client):
+        if self.remaining == 0:
+            return {"text": "done", "calls": None}
+        self.remaining -= 1
+        return {"text": "", "calls": _calls(self.width)}
+
+    async def amake_request(self, client):
+        return self.make_request(client)
+
+    def extract_text(self, response):
+        return response["text"]
+
+    def extract_tool_calls(self, response):
+        return response["calls"]
+
+    def add_tool_results(self, calls, results):
+        self.last_results = results
+
+
+@pytest.mark.parametrize("width", [1, 4])
+def test_tool_loop_turns(bench, width):
+    backend = ModelBackend()
+    config = Config(model="stub", max_tool_turns=20, parallel_tools_max=8)
+    turns = 10
+    assert backend.run_tool_loop(None, _ScriptedState(config, turns, width)) == "done"
+    bench(lambda: backend.run_tool_loop(None, _ScriptedState(config, turns, width)), items=turns)
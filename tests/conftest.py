@@ -9,6 +9,32 @@ if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 
 
+def pytest_addoption(parser: Any) -> None:
+    group = parser.getgroup("alloy-bench", "Alloy benchmarks (tests/bench, run with -m bench)")
+    group.addoption("--bench-json", metavar="PATH", help="Write benchmark results to PATH.")
+    group.addoption(
+        "--bench-baseline",
+        metavar="PATH",
+        help="Compare benchmark results with a saved --bench-json file; regressions fail.",
+    )
+    group.addoption(
+        "--bench-tolerance",
+        type=float,
+        default=0.25,
+        help="Allowed slowdown against the baseline (default 0.25 = 25%%).",
+    )
+
+
+def pytest_collection_modifyitems(config: Any, items: list[Any]) -> None:
+    """Benchmarks only run when selected with ``-m bench``."""
+    if "bench" in (config.getoption("markexpr") or ""):
+        return
+    skip = pytest.mark.skip(reason="benchmark; run with -m bench")
+    for item in items:
+        if "bench" in item.keywords:
+            item.add_marker(skip)
+
+
 @pytest.fixture(autouse=True)
 def _reset_alloy_config_state():
     """Reset Alloy global/context config between tests to avoid leakage."""
@@ -46,13 +46,15 @@ async def test_anthropic_astream_yields_text(monkeypatch):
 
 
 @pytest.mark.asyncio
-async def test_anthropic_astream_disallows_schema(monkeypatch):
+async def test_anthropic_astream_disallows_schema_with_tools(monkeypatch):
     be = AnthropicBackend()
     be._client_async = _FakeAnthropicClient()
     monkeypatch.setattr(be, "_get_async_client", lambda: be._client_async)
     cfg = Config(model="claude-3")
     with pytest.raises(ConfigurationError):
-        await be.astream("prompt", tools=None, output_schema={"type": "string"}, config=cfg)
+        await be.astream(
+            "prompt", tools=[lambda: None], output_schema={"type": "string"}, config=cfg
+        )
 
 
 def test_anthropic_stream_yields_text(monkeypatch):
@@ -89,13 +91,13 @@ def test_anthropic_stream_yields_text(monkeypatch):
     assert "".join(chunks) == "Hello Claude"
 
 
-def test_anthropic_stream_disallows_schema(monkeypatch):
+def test_anthropic_stream_disallows_schema_with_tools(monkeypatch):
     be = AnthropicBackend()
     be._client_sync = object()
     monkeypatch.setattr(be, "_get_sync_client", lambda: be._client_sync)
     cfg = Config(model="claude-3")
     with pytest.raises(ConfigurationError):
-        be.stream("prompt", tools=None, output_schema={"type": "string"}, config=cfg)
+        be.stream("prompt", tools=[lambda: None], output_schema={"type": "string"}, config=cfg)
 
 
 def _make_message(content: list[dict[str, object]], *, stop_reason: str = "end_turn") -> Message:
@@ -288,3 +290,35 @@ async def test_anthropic_astream_with_tools_executes_and_yields(monkeypatch):
     tool_turn = client.messages.kwargs[1]["messages"][-1]
     assert tool_turn["role"] == "user"
     assert tool_turn["content"][0]["type"] == "tool_result"
+
+
+def test_anthropic_stream_prefills_object_schema(monkeypatch):
+    be = AnthropicBackend()
+    captured: dict[str, object] = {}
+
+    class _Stream:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, exc_type, exc, tb):
+            return False
+
+        @property
+        def text_stream(self):
+            return iter(['"name": ', '"Ada"}'])
+
+    class _Client:
+        class messages:
+            @staticmethod
+            def stream(**kwargs):
+                captured.update(kwargs)
+                return _Stream()
+
+    be._client_sync = _Client()
+    monkeypatch.setattr(be, "_get_sync_client", lambda: be._client_sync)
+    schema = {"type": "object", "properties": {"name": {"type": "string"}}, "required": ["name"]}
+    cfg = Config(model="claude-3")
+    chunks = list(be.stream("prompt", tools=None, output_schema=schema, config=cfg))
+    assert "".join(chunks) == '{"name": "Ada"}'
+    assert captured["messages"][-1]["role"] == "assistant"
+    assert "name" in str(captured["system"])
@@ -1,4 +1,4 @@
-import concurrent.futures
+import importlib
 import json
 
 from alloy.config import Config
@@ -7,6 +7,8 @@ from alloy.models.anthropic import AnthropicBackend
 from alloy.models.gemini import GeminiBackend
 from alloy import tool
 
+base_mod = importlib.import_module("alloy.models.base")
+
 
 class _FakeFuture:
     def __init__(self, fn, *args, **kwargs):
@@ -18,17 +20,17 @@ class _FakeFuture:
         return self._fn(*self._args, **self._kwargs)
 
 
-class _RecordingPool:
-    def __init__(self, max_workers):
-        self.max_workers = max_workers
+class _RecordingExecutor:
+    """Stands in for the shared tool executor; records each turn's lane cap."""
 
-    def __enter__(self):
-        return self
+    def __init__(self, recorded):
+        self.recorded = recorded
 
-    def __exit__(self, exc_type, exc, tb):
-        return False
+    def lane(self, limit):
+        self.recorded["max_workers"] = limit
+        return limit
 
-    def submit(self, fn, *args, **kwargs):
+    def submit(self, lane, fn, *args, **kwargs):
         return _FakeFuture(fn, *args, **kwargs)
 
 
@@ -41,11 +43,7 @@ def test_openai_concurrency_cap(monkeypatch):
     be = OpenAIBackend()
     recorded = {}
 
-    def _pool_ctor(max_workers):
-        recorded["max_workers"] = max_workers
-        return _RecordingPool(max_workers)
-
-    monkeypatch.setattr(concurrent.futures, "ThreadPoolExecutor", _pool_ctor)
+    monkeypatch.setattr(base_mod, "get_tool_executor", lambda: _RecordingExecutor(recorded))
 
     class _Resp:
         def __init__(self, calls_left=True):
@@ -85,11 +83,7 @@ def test_anthropic_concurrency_cap(monkeypatch):
     be = AnthropicBackend()
     recorded = {}
 
-    def _pool_ctor(max_workers):
-        recorded["max_workers"] = max_workers
-        return _RecordingPool(max_workers)
-
-    monkeypatch.setattr(concurrent.futures, "ThreadPoolExecutor", _pool_ctor)
+    monkeypatch.setattr(base_mod, "get_tool_executor", lambda: _RecordingExecutor(recorded))
 
     class _Resp:
         def __init__(self, use=True):
@@ -128,11 +122,7 @@ def test_gemini_concurrency_cap(monkeypatch):
     be = GeminiBackend()
     recorded = {}
 
-    def _pool_ctor(max_workers):
-        recorded["max_workers"] = max_workers
-        return _RecordingPool(max_workers)
-
-    monkeypatch.setattr(concurrent.futures, "ThreadPoolExecutor", _pool_ctor)
+    monkeypatch.setattr(base_mod, "get_tool_executor", lambda: _RecordingExecutor(recorded))
 
     class _Resp:
         def __init__(self, with_calls=True):
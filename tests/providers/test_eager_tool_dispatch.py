@@ -0,0 +1,179 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from alloy import tool
+from alloy.config import Config
+from alloy.models.anthropic import AnthropicBackend
+from alloy.models.openai import OpenAIBackend
+
+pytestmark = pytest.mark.unit
+
+
+def _openai_client(started: threading.Event, requests: list[dict]):
+    class _Ctx:
+        def __init__(self, events, final):
+            self._events = events
+            self._final = final
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, exc_type, exc, tb):
+            return False
+
+        def __iter__(self):
+            for ev in self._events:
+                if ev == "wait":
+                    # The tool must already be running before the model finishes.
+                    assert started.wait(2)
+                    continue
+                yield ev
+
+        def get_final_response(self):
+            return self._final
+
+    class _Responses:
+        @staticmethod
+        def stream(**kwargs):
+            requests.append(kwargs)
+            if len(requests) == 1:
+                call = {
+                    "type": "function_call",
+                    "id": "fc_1",
+                    "call_id": "call_1",
+                    "name": "slow",
+                    "arguments": '{"x": 2}',
+                }
+                events = [
+                    {"type": "response.output_item.added", "item": call},
+                    {
+                        "type": "response.function_call_arguments.delta",
+                        "item_id": "fc_1",
+                        "delta": '{"x": ',
+                    },
+                    {
+                        "type": "response.function_call_arguments.delta",
+                        "item_id": "fc_1",
+                        "delta": "2}",
+                    },
+                    {
+                        "type": "response.function_call_arguments.done",
+                        "item_id": "fc_1",
+                        "arguments": '{"x": 2}',
+                    },
+                    "wait",
+                    {"type": "response.output_text.delta", "delta": "thinking "},
+                ]
+                return _Ctx(events, {"id": "r1", "output": [call]})
+            return _Ctx([{"type": "response.output_text.delta", "delta": "done"}], {"output": []})
+
+    return SimpleNamespace(responses=_Responses)
+
+
+def test_openai_stream_starts_tool_before_stream_ends(monkeypatch):
+    started = threading.Event()
+    calls: list[int] = []
+    requests: list[dict] = []
+
+    @tool
+    def slow(x: int) -> int:
+        started.set()
+        calls.append(x)
+        return x * 10
+
+    be = OpenAIBackend()
+    be._client_sync = _openai_client(started, requests)
+    monkeypatch.setattr(be, "_get_sync_client", lambda: be._client_sync)
+    cfg = Config(model="gpt-5-mini", eager_tools=True, max_tool_turns=3)
+    out = "".join(be.stream("prompt", tools=[slow], config=cfg))
+    assert out == "thinking done"
+    assert calls == [2]
+    sent = requests[1]["input"]
+    assert sent[0]["call_id"] == "call_1" and sent[0]["output"] == "20"
+
+
+class _AnthropicStream:
+    def __init__(self, events, final):
+        self._events = events
+        self._final = final
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+    def __aiter__(self):
+        async def gen():
+            for ev in self._events:
+                if ev == "pause":
+                    await asyncio.sleep(0.05)
+                    continue
+                yield ev
+
+        return gen()
+
+    @property
+    def text_stream(self):  # pragma: no cover - must not be used in eager mode
+        raise AssertionError("text_stream used")
+
+    async def get_final_message(self):
+        return self._final
+
+
+def _tool_use_events(index: int, tid: str, x: int) -> list:
+    block = SimpleNamespace(type="tool_use", id=tid, name="slow", input={})
+    return [
+        SimpleNamespace(type="content_block_start", index=index, content_block=block),
+        SimpleNamespace(
+            type="content_block_delta",
+            index=index,
+            delta=SimpleNamespace(type="input_json_delta", partial_json=f'{{"x": {x}}}'),
+        ),
+        SimpleNamespace(type="content_block_stop", index=index),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_anthropic_astream_overlaps_parallel_tools_with_stream(monkeypatch):
+    started_at: dict[int, float] = {}
+    requests: list[dict] = []
+
+    @tool
+    async def slow(x: int) -> int:
+        started_at[x] = time.perf_counter()
+        await asyncio.sleep(0.05)
+        return x
+
+    class _Messages:
+        @staticmethod
+        def stream(**kwargs):
+            requests.append(kwargs)
+            if len(requests) == 1:
+                events = _tool_use_events(0, "t1", 1) + ["pause"] + _tool_use_events(1, "t2", 2)
+                final = SimpleNamespace(
+                    content=[
+                        SimpleNamespace(type="tool_use", id="t1", name="slow", input={"x": 1}),
+                        SimpleNamespace(type="tool_use", id="t2", name="slow", input={"x": 2}),
+                    ]
+                )
+                return _AnthropicStream(events, final)
+            delta = SimpleNamespace(type="text_delta", text="ok")
+            events = [SimpleNamespace(type="content_block_delta", index=0, delta=delta)]
+            return _AnthropicStream(events, SimpleNamespace(content=[]))
+
+    be = AnthropicBackend()
+    be._client_async = SimpleNamespace(messages=_Messages)
+    monkeypatch.setattr(be, "_get_async_client", lambda: be._client_async)
+    cfg = Config(model="claude-3", eager_tools=True, max_tool_turns=3)
+    aiter = await be.astream("prompt", tools=[slow], config=cfg)
+    out = [c async for c in aiter]
+    assert out == ["ok"]
+    # The first tool started before the model finished emitting the second call.
+    assert started_at[2] - started_at[1] >= 0.04
+    results = requests[1]["messages"][-1]["content"]
+    assert [(r["tool_use_id"], r["content"]) for r in results] == [("t1", "1"), ("t2", "2")]
@@ -105,13 +105,15 @@ async def test_gemini_astream_yields_text(monkeypatch):
 
 
 @pytest.mark.asyncio
-async def test_gemini_astream_disallows_tools_and_schema(monkeypatch):
+async def test_gemini_astream_disallows_schema_with_tools(monkeypatch):
     be = GeminiBackend()
     be._client_sync = _FakeGeminiClient()
     monkeypatch.setattr(be, "_get_sync_client", lambda: be._client_sync)
     cfg = Config(model="gemini-2.5-flash")
     with pytest.raises(ConfigurationError):
-        await be.astream("prompt", tools=None, output_schema={"type": "string"}, config=cfg)
+        await be.astream(
+            "prompt", tools=[lambda: None], output_schema={"type": "string"}, config=cfg
+        )
 
 
 def test_gemini_stream_yields_text(monkeypatch):
@@ -134,13 +136,13 @@ def test_gemini_stream_yields_text(monkeypatch):
     assert "".join(chunks) == "Sync Gemini"
 
 
-def test_gemini_stream_disallows_schema(monkeypatch):
+def test_gemini_stream_disallows_schema_with_tools(monkeypatch):
     be = GeminiBackend()
     be._client_sync = object()
     monkeypatch.setattr(be, "_get_sync_client", lambda: be._client_sync)
     cfg = Config(model="gemini-2.5-flash")
     with pytest.raises(ConfigurationError):
-        be.stream("prompt", tools=None, output_schema={"type": "string"}, config=cfg)
+        be.stream("prompt", tools=[lambda: None], output_schema={"type": "string"}, config=cfg)
 
 
 class _FakeStream:
@@ -304,3 +306,23 @@ async def test_gemini_astream_with_tools_executes(monkeypatch):
 
     assert "".join(chunks) == "Summary: tool says hi"
     assert calls == ["run"]
+
+
+def test_gemini_stream_sends_response_schema(monkeypatch):
+    be = GeminiBackend()
+    captured: dict[str, object] = {}
+
+    class _SyncClient:
+        class models:
+            @staticmethod
+            def generate_content_stream(*, model, contents, config=None):
+                captured.update(config or {})
+                return [_Chunk('{"value": '), _Chunk("true}")]
+
+    be._client_sync = _SyncClient()
+    monkeypatch.setattr(be, "_get_sync_client", lambda: be._client_sync)
+    cfg = Config(model="gemini-2.5-flash")
+    chunks = list(be.stream("prompt", tools=None, output_schema={"type": "boolean"}, config=cfg))
+    assert "".join(chunks) == '{"value": true}'
+    assert captured["response_mime_type"] == "application/json"
+    assert captured["response_json_schema"]["required"] == ["value"]
@@ -6,19 +6,36 @@ from alloy import ConfigurationError
 
 
 @pytest.mark.asyncio
-async def test_ollama_astream_disallows_tools_and_typed_outputs():
+async def test_ollama_astream_disallows_tools():
     be = OllamaBackend()
     cfg = Config(model="ollama:gpt-oss")
     with pytest.raises(ConfigurationError):
         await be.astream("prompt", tools=[lambda: None], output_schema=None, config=cfg)
-    with pytest.raises(ConfigurationError):
-        await be.astream("prompt", tools=None, output_schema={"type": "string"}, config=cfg)
 
 
-def test_ollama_stream_disallows_tools_and_typed_outputs():
+def test_ollama_stream_disallows_tools():
     be = OllamaBackend()
     cfg = Config(model="ollama:gpt-oss")
     with pytest.raises(ConfigurationError):
         list(be.stream("prompt", tools=[lambda: None], output_schema=None, config=cfg))
-    with pytest.raises(ConfigurationError):
-        list(be.stream("prompt", tools=None, output_schema={"type": "string"}, config=cfg))
+
+
+def test_ollama_stream_sends_format_for_schema(monkeypatch):
+    from types import SimpleNamespace
+
+    be = OllamaBackend()
+    captured: dict[str, object] = {}
+
+    class _Client:
+        @staticmethod
+        def chat(**kwargs):
+            captured.update(kwargs)
+            return iter(
+                SimpleNamespace(message=SimpleNamespace(content=c)) for c in ['{"value"', ": 3}"]
+            )
+
+    monkeypatch.setattr(be, "_get_sync_client", lambda: _Client())
+    cfg = Config(model="ollama:llama3")
+    chunks = list(be.stream("prompt", tools=None, output_schema={"type": "integer"}, config=cfg))
+    assert "".join(chunks) == '{"value": 3}'
+    assert captured["format"]["properties"]["value"] == {"type": "integer"}
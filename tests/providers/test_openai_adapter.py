@@ -98,9 +98,9 @@ def test_openai_streaming_gating(monkeypatch):
         list(
             be.stream(
                 "prompt",
-                tools=None,
+                tools=[lambda: None],
                 output_schema={"type": "number"},
                 config=Config(model="gpt-5-mini"),
             )
         )
-    assert "Streaming supports text only" in str(ei.value)
+    assert "Streaming structured outputs with tools" in str(ei.value)
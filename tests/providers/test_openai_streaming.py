@@ -51,12 +51,14 @@ async def test_openai_astream_yields_text(monkeypatch):
 
 
 @pytest.mark.asyncio
-async def test_openai_astream_disallows_schema(monkeypatch):
+async def test_openai_astream_disallows_schema_with_tools(monkeypatch):
     be = OpenAIBackend()
     monkeypatch.setattr(be, "_get_async_client", lambda: _FakeClient())
     cfg = Config(model="gpt-5-mini")
     with pytest.raises(ConfigurationError):
-        await be.astream("prompt", tools=None, output_schema={"type": "string"}, config=cfg)
+        await be.astream(
+            "prompt", tools=[lambda: None], output_schema={"type": "string"}, config=cfg
+        )
 
 
 def test_openai_stream_yields_text(monkeypatch):
@@ -89,10 +91,46 @@ def test_openai_stream_yields_text(monkeypatch):
     assert "".join(chunks) == "Sync stream"
 
 
-def test_openai_stream_disallows_schema(monkeypatch):
+def test_openai_stream_disallows_schema_with_tools(monkeypatch):
     be = OpenAIBackend()
     be._client_sync = object()
     monkeypatch.setattr(be, "_get_sync_client", lambda: be._client_sync)
     cfg = Config(model="gpt-5-mini")
     with pytest.raises(ConfigurationError):
-        be.stream("prompt", tools=None, output_schema={"type": "string"}, config=cfg)
+        be.stream("prompt", tools=[lambda: None], output_schema={"type": "string"}, config=cfg)
+
+
+def test_openai_stream_sends_text_format_for_schema(monkeypatch):
+    be = OpenAIBackend()
+    captured: dict[str, object] = {}
+
+    class _SyncFakeResponses:
+        @staticmethod
+        def stream(**kwargs):
+            captured.update(kwargs)
+            events = [
+                {"type": "response.output_text.delta", "delta": '{"value": '},
+                {"type": "response.output_text.delta", "delta": "4}"},
+            ]
+
+            class _Ctx:
+                def __enter__(self_inner):
+                    return iter(events)
+
+                def __exit__(self_inner, exc_type, exc, tb):
+                    return False
+
+            return _Ctx()
+
+    class _SyncFakeClient:
+        responses = _SyncFakeResponses
+
+    be._client_sync = _SyncFakeClient()
+    monkeypatch.setattr(be, "_get_sync_client", lambda: be._client_sync)
+    cfg = Config(model="gpt-5-mini")
+    chunks = list(be.stream("prompt", tools=None, output_schema={"type": "integer"}, config=cfg))
+    assert "".join(chunks) == '{"value": 4}'
+    fmt = captured["text"]["format"]
+    assert fmt["type"] == "json_schema" and fmt["schema"]["properties"]["value"] == {
+        "type": "integer"
+    }
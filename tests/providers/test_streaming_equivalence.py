@@ -129,8 +129,23 @@ async def test_astream_gating_equivalence(monkeypatch, provider):
         be = OpenAIBackend()
 
         class _Resp:
-            @staticmethod
-            def stream(**kwargs):
+            calls = 0
+
+            @classmethod
+            def stream(cls, **kwargs):
+                cls.calls += 1
+                if cls.calls == 1:
+                    item = {"type": "function_call", "id": "fc_1", "call_id": "c1", "name": "noop"}
+                    return _OAIFakeStream(
+                        [
+                            {"type": "response.output_item.added", "item": item},
+                            {
+                                "type": "response.function_call_arguments.delta",
+                                "item_id": "fc_1",
+                                "delta": "{}",
+                            },
+                        ]
+                    )
                 return _OAIFakeStream(
                     [
                         {"type": "response.output_text.delta", "delta": "chunk"},
@@ -159,6 +174,11 @@ async def test_astream_gating_equivalence(monkeypatch, provider):
         be = AnthropicBackend()
 
         class _Stream:
+            def __init__(self, text, content, stop_reason):
+                self._text = text
+                self._content = content
+                self._stop_reason = stop_reason
+
             async def __aenter__(self):
                 return self
 
@@ -168,7 +188,8 @@ async def test_astream_gating_equivalence(monkeypatch, provider):
             @property
             def text_stream(self):
                 async def _gen():
-                    yield "chunk"
+                    for t in self._text:
+                        yield t
 
                 return _gen()
 
@@ -178,18 +199,26 @@ async def test_astream_gating_equivalence(monkeypatch, provider):
                 return Message.model_validate(
                     {
                         "id": "msg",
-                        "content": [{"type": "text", "text": "chunk"}],
+                        "content": self._content,
                         "model": "claude-3-sonnet",
                         "role": "assistant",
-                        "stop_reason": "end_turn",
+                        "stop_reason": self._stop_reason,
                         "type": "message",
                         "usage": {"input_tokens": 1, "output_tokens": 1},
                     }
                 )
 
-        be._client_async = type(
-            "C", (), {"messages": type("M", (), {"stream": staticmethod(lambda **_: _Stream())})()}
-        )()
+        class _Messages:
+            calls = 0
+
+            def stream(self, **_):
+                self.calls += 1
+                if self.calls == 1:
+                    tool_use = {"type": "tool_use", "id": "toolu_1", "name": "noop", "input": {}}
+                    return _Stream([], [tool_use], "tool_use")
+                return _Stream(["chunk"], [{"type": "text", "text": "chunk"}], "end_turn")
+
+        be._client_async = type("C", (), {"messages": _Messages()})()
         monkeypatch.setattr(be, "_get_async_client", lambda: be._client_async)
         cfg = Config(model="claude-3")
         _tool_calls: list[str] = []
@@ -340,4 +369,4 @@ async def test_astream_gating_equivalence(monkeypatch, provider):
         assert "".join(chunks) == "chunk"
         assert _tool_calls
     with pytest.raises(ConfigurationError):
-        await be.astream("prompt", tools=None, output_schema={"type": "string"}, config=cfg)
+        await be.astream("prompt", tools=[noop], output_schema={"type": "string"}, config=cfg)
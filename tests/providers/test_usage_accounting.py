@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from typing import Any
+
+import pytest
+
+from alloy import usage_scope
+from alloy.config import Config
+from alloy.models.anthropic import AnthropicBackend
+from alloy.models.openai import OpenAIBackend
+
+pytestmark = pytest.mark.providers
+
+_SCHEMA = {
+    "type": "object",
+    "properties": {"x": {"type": "string"}},
+    "required": ["x"],
+    "additionalProperties": False,
+}
+
+
+def test_openai_finalize_turn_usage_is_counted():
+    class _Responses:
+        def __init__(self) -> None:
+            self.calls = 0
+
+        def create(self, **kwargs: Any) -> Any:
+            self.calls += 1
+            usage = {"input_tokens": 50 * self.calls, "output_tokens": 5}
+            if self.calls == 1:
+                return {"id": "r1", "output": [], "usage": usage}
+            return {"id": "r2", "output_text": '{"x": "ok"}', "usage": usage}
+
+    class _Client:
+        def __init__(self) -> None:
+            self.responses = _Responses()
+
+    be = OpenAIBackend()
+    be._OpenAI = _Client
+    with usage_scope() as report:
+        out = be.complete(
+            "p",
+            output_schema=_SCHEMA,
+            config=Config(model="gpt-5-mini", auto_finalize_missing_output=True),
+        )
+    assert '"ok"' in out
+    assert report.total.requests == 2
+    assert report.total.input_tokens == 150 and report.total.output_tokens == 10
+
+
+def test_anthropic_usage_includes_cache_reads():
+    class _Messages:
+        def __init__(self) -> None:
+            self.calls = 0
+
+        def create(self, **kwargs: Any) -> Any:
+            self.calls += 1
+            usage = {"input_tokens": 10, "output_tokens": 3, "cache_read_input_tokens": 90}
+            if self.calls == 1:
+                return {"content": [{"type": "text", "text": ""}], "usage": usage}
+            return {"content": [{"type": "text", "text": '{"x":"ok"}'}], "usage": usage}
+
+    class _Client:
+        def __init__(self) -> None:
+            self.messages = _Messages()
+
+    be = AnthropicBackend()
+    be._Anthropic = lambda: _Client()
+    with usage_scope() as report:
+        be.complete(
+            "p",
+            output_schema=_SCHEMA,
+            config=Config(model="claude-sonnet-4-20250514", auto_finalize_missing_output=True),
+        )
+    assert report.total.requests == 2
+    assert report.total.input_tokens == 200
+    assert report.total.cached_input_tokens == 180
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import importlib
+from typing import Any, Callable, Iterable, Iterator
+
+import pytest
+
+from alloy.models.base import BaseLoopState, ModelBackend
+
+Script = Callable[[str], Iterable[Any]]
+
+
+class _ScriptedState(BaseLoopState):
+    """Replays one call's scripted responses; exception entries are raised."""
+
+    def __init__(self, config: Any, tool_map: dict[str, Any], responses: Iterable[Any]) -> None:
+        super().__init__(config, tool_map)
+        self.responses = iter(responses)
+        self.results: list[Any] | None = None
+
+    def make_request(self, client: Any) -> Any:
+        response = next(self.responses)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    async def amake_request(self, client: Any) -> Any:
+        return self.make_request(client)
+
+    def extract_text(self, response: Any) -> str:
+        return response.get("text", "")
+
+    def extract_tool_calls(self, response: Any) -> Any:
+        return response.get("calls")
+
+    def add_tool_results(self, calls: Any, results: list[Any]) -> None:
+        self.results = results
+
+
+class _ScriptedTurn:
+    """One streamed turn: the response text as a single chunk, then its calls."""
+
+    def __init__(self, state: BaseLoopState) -> None:
+        self._state = state
+        self._response: Any = None
+        self._chunks = self._run()
+
+    def _run(self) -> Iterator[str]:
+        self._response = self._state.make_request(None)
+        self._state.record_usage(self._response)
+        yield self._state.extract_text(self._response)
+
+    def __iter__(self) -> "_ScriptedTurn":
+        return self
+
+    def __next__(self) -> str:
+        return next(self._chunks)
+
+    def _alloy_get_tool_calls(self) -> Any:
+        return self._state.extract_tool_calls(self._response)
+
+
+class ScriptedLoopBackend(ModelBackend):
+    """Runs the real tool loop over responses scripted per call.
+
+    ``script(prompt)`` yields one call's responses in order: dicts with
+    optional ``text``, ``calls`` and ``usage`` keys, or exceptions to raise
+    in place of a request.
+    """
+
+    provider_name = "fake"
+    supports_streaming_tools = True
+
+    def __init__(self, script: Script, tools: Iterable[Any] = ()) -> None:
+        self.script = script
+        self.tool_map = {t.spec.name: t for t in tools}
+        self.requests = 0
+
+    def new_state(self, prompt: str, config: Any) -> _ScriptedState:
+        """Start one call: count it and load ``script(prompt)``."""
+        self.requests += 1
+        return _ScriptedState(config, self.tool_map, self.script(prompt))
+
+    def complete(self, prompt, *, tools=None, output_schema=None, config):
+        return self.run_tool_loop(None, self.new_state(prompt, config))
+
+    async def acomplete(self, prompt, *, tools=None, output_schema=None, config):
+        return await self.arun_tool_loop(None, self.new_state(prompt, config))
+
+    def stream(self, prompt, *, tools=None, output_schema=None, config):
+        return self.run_stream_loop(self.new_state(prompt, config), _ScriptedTurn)
+
+
+@pytest.fixture
+def scripted_backend(monkeypatch: pytest.MonkeyPatch) -> Callable[..., ScriptedLoopBackend]:
+    """Install a ``ScriptedLoopBackend`` for ``command`` and ``ask``; returns it."""
+
+    def install(script: Script, tools: Iterable[Any] = ()) -> ScriptedLoopBackend:
+        backend = ScriptedLoopBackend(script, tools)
+        for mod in ("alloy.command", "alloy.ask"):
+            monkeypatch.setattr(importlib.import_module(mod), "get_backend", lambda m: backend)
+        return backend
+
+    return install
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+
+import pytest
+
+from alloy import ensure, require, tool
+from alloy.errors import ToolError
+from alloy.models.base import ModelBackend, ToolCall
+
+pytestmark = pytest.mark.unit
+
+
+@tool
+@require(lambda ba: ba.arguments["x"] >= 0, "x must be non-negative")
+@ensure(lambda r: r < 100, "result too large")
+async def double(x: int) -> int:
+    await asyncio.sleep(0)
+    return x * 2
+
+
+def test_async_tool_is_detected_and_contracts_see_awaited_result():
+    assert double.spec.is_async
+    assert asyncio.run(double(3)) == 6
+    with pytest.raises(ToolError, match="too large"):
+        asyncio.run(double(60))
+    with pytest.raises(ToolError, match="non-negative"):
+        asyncio.run(double(-1))
+
+
+def test_async_tool_loop_awaits_on_running_loop():
+    seen_threads: set[int] = set()
+
+    @tool
+    async def probe(n: int) -> int:
+        seen_threads.add(threading.get_ident())
+        await asyncio.sleep(0.01)
+        return n
+
+    be = ModelBackend()
+    calls = [ToolCall(id=str(i), name="probe", args={"n": i}) for i in range(4)]
+
+    async def run():
+        return threading.get_ident(), await be.aexecute_tools(
+            calls, parallel_tools_max=4, tool_map={"probe": probe}
+        )
+
+    loop_thread, results = asyncio.run(run())
+    assert [r.value for r in results] == [0, 1, 2, 3]
+    assert seen_threads == {loop_thread}
+
+
+def test_sync_tool_loop_runs_async_tools_on_managed_loop():
+    be = ModelBackend()
+    calls = [
+        ToolCall(id="a", name="double", args={"x": 4}),
+        ToolCall(id="b", name="double", args={"x": 70}),
+    ]
+    results = be.execute_tools(calls, parallel_tools_max=2, tool_map={"double": double})
+    assert results[0].ok and results[0].value == 8
+    assert not results[1].ok and "too large" in (results[1].error or "")
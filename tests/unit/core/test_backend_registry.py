@@ -0,0 +1,131 @@
+import asyncio
+import threading
+
+import pytest
+
+import alloy
+from alloy.models import registry
+from alloy.models.base import ModelBackend, get_backend
+
+pytestmark = pytest.mark.unit
+
+
+class _Closable:
+    def __init__(self) -> None:
+        self.closed = False
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class _AsyncClosable:
+    def __init__(self) -> None:
+        self.closed = False
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+class _Backend(ModelBackend):
+    _sync_client_attrs = ("_client_sync",)
+    _async_client_attrs = ("_client_async",)
+
+    def __init__(self) -> None:
+        self._client_sync = _Closable()
+        self._client_async = _AsyncClosable()
+
+
+@pytest.fixture(autouse=True)
+def _clean_registry():
+    registry._clear_for_tests()
+    yield
+    registry._clear_for_tests()
+
+
+def test_get_backend_reuses_instance_per_provider():
+    a = get_backend("gpt-5-mini")
+    b = get_backend("gpt-4o")
+    c = get_backend("claude-sonnet-4-20250514")
+    assert a is b
+    assert a is not c
+
+
+def test_get_backend_keys_on_credentials(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "key-one")
+    a = get_backend("gpt-5-mini")
+    monkeypatch.setenv("OPENAI_API_KEY", "key-two")
+    b = get_backend("gpt-5-mini")
+    monkeypatch.setenv("OPENAI_BASE_URL", "http://localhost:9999/v1")
+    c = get_backend("gpt-5-mini")
+    assert a is not b
+    assert b is not c
+
+
+def test_get_backend_is_thread_safe():
+    seen: list[ModelBackend] = []
+    barrier = threading.Barrier(16)
+
+    def worker():
+        barrier.wait()
+        seen.append(get_backend("gpt-5-mini"))
+
+    threads = [threading.Thread(target=worker) for _ in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len({id(b) for b in seen}) == 1
+
+
+def test_get_backend_keys_on_event_loop():
+    sync_backend = get_backend("gpt-5-mini")
+
+    async def inside():
+        return get_backend("gpt-5-mini"), get_backend("gpt-5-mini")
+
+    first, again = asyncio.run(inside())
+    second, _ = asyncio.run(inside())
+    assert first is again
+    assert first is not sync_backend
+    assert second is not first
+    # Entries for the closed first loop are pruned once a new entry is created.
+    assert first not in registry._cached_backends()
+
+
+def test_shutdown_closes_clients_and_resets():
+    be = registry.backend_for("stub", _Backend)
+    sync_client, async_client = be._client_sync, be._client_async
+    alloy.shutdown()
+    assert sync_client.closed
+    assert not async_client.closed
+    assert registry.backend_for("stub", _Backend) is not be
+
+
+def test_aclose_awaits_async_clients_on_current_loop():
+    async def run():
+        be = registry.backend_for("stub", _Backend)
+        clients = (be._client_sync, be._client_async)
+        await alloy.aclose()
+        return clients
+
+    sync_client, async_client = asyncio.run(run())
+    assert sync_client.closed
+    assert async_client.closed
+    assert registry._cached_backends() == []
+
+
+def test_ensure_client_creates_once():
+    created: list[int] = []
+
+    class _Lazy(ModelBackend):
+        _client_sync = None
+
+    be = _Lazy()
+
+    def factory():
+        created.append(1)
+        return object()
+
+    first = be._ensure_client("_client_sync", factory)
+    assert be._ensure_client("_client_sync", factory) is first
+    assert created == [1]
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import asyncio
+import importlib
+import itertools
+import time
+
+import pytest
+
+from alloy import BudgetExceeded, ask, command, configure, tool
+from alloy.config import Config, use_config
+from alloy.models.base import ToolCall
+from alloy.usage import set_price
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture(autouse=True)
+def _prices(monkeypatch):
+    monkeypatch.setattr(importlib.import_module("alloy.usage"), "_prices", {})
+
+
+calls: list[str] = []
+
+
+@tool
+def fetch(key: str) -> str:
+    calls.append(key)
+    return "x" * 100
+
+
+@tool
+def slow(key: str) -> str:
+    time.sleep(0.03)
+    return key
+
+
+def _every_turn(tool_name):
+    """Asks for ``tool_name`` on every turn and reports 1000 input / 10 output tokens."""
+    for turn in itertools.count():
+        call = ToolCall(id=str(turn), name=tool_name, args={"key": str(turn)})
+        yield {
+            "text": f"thinking {turn}",
+            "calls": [call],
+            "usage": {"input_tokens": 1000, "output_tokens": 10},
+        }
+
+
+@command
+def sub() -> str:
+    return "fetch"
+
+
+@tool
+def run_sub(key: str) -> str:
+    return sub()
+
+
+@tool
+def big_sub(key: str) -> str:
+    with use_config(Config(max_total_input_tokens=100_000)):
+        return sub()
+
+
+@pytest.fixture
+def backend(scripted_backend):
+    """Runs a loop calling the tool named by the prompt on every turn."""
+    return scripted_backend(_every_turn, [fetch, slow, run_sub, big_sub])
+
+
+@pytest.fixture(autouse=True)
+def _reset_calls():
+    calls.clear()
+
+
+def test_input_token_budget_stops_runaway_loop(backend):
+    configure(max_tool_turns=100, max_total_input_tokens=2500, retry=3)
+
+    @command
+    def agent() -> str:
+        return "fetch"
+
+    with pytest.raises(BudgetExceeded) as ei:
+        agent()
+    err = ei.value
+    assert err.budget == "max_total_input_tokens"
+    assert err.limit == 2500 and err.used == 3000
+    assert err.partial_text == "thinking 2"
+    assert calls == ["0", "1"]  # the third turn's tools never ran
+    assert backend.requests == 1  # budget errors are not retried
+
+
+def test_cost_budget_async(backend):
+    configure(model="gpt-test", max_tool_turns=100, max_cost_usd=0.004)
+    set_price("gpt-test", input=1.0, output=10.0)
+
+    @command
+    async def agent() -> str:
+        return "fetch"
+
+    with pytest.raises(BudgetExceeded) as ei:
+        asyncio.run(agent())
+    assert ei.value.budget == "max_cost_usd"
+    assert ei.value.used == pytest.approx(4 * 0.0011)
+
+
+def test_wall_time_budget(backend):
+    with pytest.raises(BudgetExceeded) as ei:
+        ask("slow", max_tool_turns=100, max_wall_time_s=0.05, tools=[slow])
+    assert ei.value.budget == "max_wall_time_s"
+    assert ei.value.used > 0.05
+
+
+def test_budget_is_shared_with_nested_commands(backend):
+    configure(max_tool_turns=100, max_total_output_tokens=45)
+
+    @command
+    def outer() -> str:
+        return "run_sub"
+
+    with pytest.raises(BudgetExceeded) as ei:
+        outer()
+    # One outer turn, then the nested command draws on the same budget until
+    # it trips; its error goes back to the model as a tool error and the outer
+    # loop stops before its next request.
+    assert ei.value.used == 50
+    assert calls == ["0", "1", "2"]
+
+
+def test_nested_command_with_own_limit_also_charges_outer(backend):
+    configure(max_total_input_tokens=2500, max_tool_turns=100)
+
+    @command
+    def outer() -> str:
+        return "big_sub"
+
+    with pytest.raises(BudgetExceeded) as ei:
+        outer()
+    assert ei.value.limit == 2500 and ei.value.used == 3000
+    assert calls == ["0"]
+
+
+def test_stream_loop_enforces_budget(backend):
+    stream = ask.stream("fetch", tools=[fetch], max_tool_turns=100, max_total_input_tokens=1500)
+    with pytest.raises(BudgetExceeded):
+        list(stream)
+    assert calls == ["0"]
+
+
+def test_no_budget_by_default(backend):
+    configure(max_tool_turns=3, retry=1)
+
+    @command
+    def agent() -> str:
+        return "fetch"
+
+    with pytest.raises(Exception) as ei:
+        agent()
+    assert not isinstance(ei.value, BudgetExceeded)
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import asyncio
+import importlib
+import itertools
+import threading
+import time
+
+import pytest
+
+from alloy import command
+from alloy.config import Config, use_config
+from alloy.errors import CommandError
+from alloy.models.base import ModelBackend
+from alloy.usage import Usage, record, usage_scope
+
+pytestmark = pytest.mark.unit
+
+
+class _EchoBackend(ModelBackend):
+    """Echoes the prompt, sleeping longer for lower numbers; fails on 'boom'."""
+
+    def __init__(self) -> None:
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def _reply(self, prompt: str) -> str:
+        if prompt == "boom":
+            raise CommandError("boom")
+        return prompt
+
+    def complete(self, prompt: str, *, tools=None, output_schema=None, config: Config) -> str:
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(0.001 * (10 - int(prompt)) if prompt.isdigit() else 0.001)
+            return self._reply(prompt)
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    async def acomplete(
+        self, prompt: str, *, tools=None, output_schema=None, config: Config
+    ) -> str:
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(0.001 * (10 - int(prompt)) if prompt.isdigit() else 0.001)
+            return self._reply(prompt)
+        finally:
+            self.active -= 1
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    be = _EchoBackend()
+    monkeypatch.setattr(importlib.import_module("alloy.command"), "get_backend", lambda m: be)
+    return be
+
+
+@command
+def echo(x: object) -> str:
+    return str(x)
+
+
+@command
+def join(a: str, b: str) -> str:
+    return a + b
+
+
+@command
+async def aecho(x: object) -> str:
+    return str(x)
+
+
+def test_map_preserves_order_and_bounds_concurrency(backend):
+    results = echo.map(range(10), concurrency=3)
+    assert list(results) == [str(i) for i in range(10)]
+    assert backend.peak <= 3
+    assert results.stats.completed == 10
+    assert results.stats.in_flight == 0
+    assert results.stats.throughput > 0
+
+
+def test_map_unordered_yields_index_pairs(backend):
+    out = dict(echo.map(range(6), concurrency=6, ordered=False))
+    assert out == {i: str(i) for i in range(6)}
+
+
+def test_map_returns_per_item_errors(backend):
+    results = echo.map(["1", "boom", "2"], concurrency=2)
+    values = list(results)
+    assert values[0] == "1" and values[2] == "2"
+    assert isinstance(values[1], CommandError)
+    assert results.stats.failed == 1
+    with pytest.raises(CommandError):
+        list(echo.map(["boom"], return_exceptions=False))
+
+
+def test_map_pulls_inputs_lazily(backend):
+    results = echo.map(itertools.count(), concurrency=2)
+    assert [next(results) for _ in range(3)] == ["0", "1", "2"]
+    assert results.stats.submitted <= 3 + 4
+    results.close()
+
+
+def test_map_unpacks_tuples_and_mappings(backend):
+    assert list(join.map([("a", "b"), {"a": "c", "b": "d"}], unpack=True)) == ["ab", "cd"]
+
+
+def test_map_of_async_command_reuses_one_registry_backend(monkeypatch):
+    registry = importlib.import_module("alloy.models.registry")
+    built: list[_EchoBackend] = []
+
+    def factory() -> _EchoBackend:
+        built.append(_EchoBackend())
+        return built[-1]
+
+    monkeypatch.setattr(
+        importlib.import_module("alloy.command"),
+        "get_backend",
+        lambda m: registry.backend_for("echo-test", factory),
+    )
+    try:
+        assert list(aecho.map(range(12), concurrency=4)) == [str(i) for i in range(12)]
+    finally:
+        registry._clear_for_tests()
+    assert len(built) == 1
+
+
+class _ScopedBackend(ModelBackend):
+    """Records the model each call sees and reports one request of usage."""
+
+    def __init__(self) -> None:
+        self.models: list[str | None] = []
+
+    def complete(self, prompt: str, *, tools=None, output_schema=None, config: Config) -> str:
+        self.models.append(config.model)
+        record(config.model, Usage(input_tokens=1, requests=1))
+        return prompt
+
+    async def acomplete(
+        self, prompt: str, *, tools=None, output_schema=None, config: Config
+    ) -> str:
+        return self.complete(prompt, config=config)
+
+
+@pytest.mark.parametrize("cmd", [echo, aecho])
+def test_map_items_see_the_callers_config_and_usage_scope(monkeypatch, cmd):
+    be = _ScopedBackend()
+    monkeypatch.setattr(importlib.import_module("alloy.command"), "get_backend", lambda m: be)
+    with use_config(Config(model="scoped-model")), usage_scope() as report:
+        assert list(cmd.map(range(6), concurrency=3)) == [str(i) for i in range(6)]
+    assert be.models == ["scoped-model"] * 6
+    assert report.total.requests == 6
+    assert report.by_model["scoped-model"].input_tokens == 6
+
+
+def test_amap_accepts_async_iterables(backend):
+    async def source():
+        for i in range(8):
+            yield i
+
+    async def run():
+        results = echo.amap(source(), concurrency=2)
+        values = [v async for v in results]
+        return values, results.stats
+
+    values, stats = asyncio.run(run())
+    assert values == [str(i) for i in range(8)]
+    assert backend.peak <= 2
+    assert stats.completed == 8
+
+
+def test_amap_unordered_with_errors(backend):
+    async def run():
+        return [p async for p in echo.amap(["3", "boom", "1"], ordered=False)]
+
+    pairs = dict(asyncio.run(run()))
+    assert pairs[0] == "3" and pairs[2] == "1"
+    assert isinstance(pairs[1], CommandError)
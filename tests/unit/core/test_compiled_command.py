@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import importlib
+from dataclasses import dataclass
+
+import pytest
+
+from alloy import command, tool
+from alloy.config import Config
+from alloy.models.base import CompiledTools, ModelBackend, build_tools_common, memoize_on_schema
+
+pytestmark = pytest.mark.unit
+
+
+@dataclass
+class Item:
+    name: str
+    qty: int
+
+
+class _CaptureBackend(ModelBackend):
+    def __init__(self) -> None:
+        self.calls: list[tuple[object, object]] = []
+
+    def complete(self, prompt: str, *, tools=None, output_schema=None, config: Config) -> str:
+        self.calls.append((tools, output_schema))
+        return '{"name": "a", "qty": 1}'
+
+
+def test_command_compiles_schema_and_tools_once(monkeypatch):
+    backend = _CaptureBackend()
+    cmd_mod = importlib.import_module("alloy.command")
+    monkeypatch.setattr(cmd_mod, "get_backend", lambda model: backend)
+    schema_calls: list[object] = []
+    real = cmd_mod.to_json_schema
+
+    def counting(tp, strict=True):
+        schema_calls.append(tp)
+        return real(tp, strict=strict)
+
+    monkeypatch.setattr(cmd_mod, "to_json_schema", counting)
+
+    @tool
+    def lookup(name: str) -> int:
+        return 1
+
+    @command(output=Item, tools=[lookup])
+    def make(n: int) -> str:
+        return f"make {n}"
+
+    assert make(1) == Item(name="a", qty=1)
+    assert make(2) == Item(name="a", qty=1)
+    assert schema_calls == [Item]
+    (tools1, schema1), (tools2, schema2) = backend.calls
+    assert isinstance(tools1, CompiledTools) and tools1 is tools2
+    assert schema1 is schema2
+
+
+def test_compiled_tools_cache_definitions_per_provider():
+    built: list[str] = []
+
+    @tool
+    def add(a: int, b: int) -> int:
+        return a + b
+
+    def fmt(name: str, description: str, params: dict) -> dict:
+        built.append(name)
+        return {"name": name, "params": params}
+
+    tools = CompiledTools([add])
+    first = build_tools_common(tools, fmt, cache_key="p1")
+    again = build_tools_common(tools, fmt, cache_key="p1")
+    other = build_tools_common(tools, fmt, cache_key="p2")
+    assert first is again
+    assert other is not first
+    assert built == ["add", "add"]
+    # Plain lists are never cached.
+    build_tools_common([add], fmt, cache_key="p1")
+    assert built == ["add", "add", "add"]
+
+
+def test_tool_spec_schema_is_computed_once(monkeypatch):
+    @tool
+    def greet(name: str) -> str:
+        return name
+
+    spec = greet.spec
+    calls: list[int] = []
+    real = spec._build_schema
+
+    def counting():
+        calls.append(1)
+        return real()
+
+    monkeypatch.setattr(spec, "_build_schema", counting)
+    s1 = spec.as_schema()
+    s2 = spec.as_schema()
+    assert s1 is s2
+    assert len(calls) == 1
+
+
+def test_memoize_on_schema_uses_identity():
+    seen: list[dict] = []
+
+    @memoize_on_schema
+    def derive(schema: dict) -> str:
+        seen.append(schema)
+        return ",".join(sorted(schema))
+
+    a = {"x": 1}
+    b = {"x": 1}
+    assert derive(a) == derive(a) == "x"
+    assert derive(b) == "x"
+    assert seen == [a, b]
@@ -26,8 +26,8 @@ def test_env_overrides_and_ollama_bridge(monkeypatch):
     assert cfg.extra.get("ollama_api") == "openai_chat"
 
 
-def test_command_stream_rejects_non_string_outputs():
-    @command(output=int)
+def test_command_stream_rejects_outputs_without_schema():
+    @command(output=None)
     def foo() -> str:
         return "Say 1"
 
@@ -0,0 +1,67 @@
+import pytest
+
+from alloy.config import (
+    Config,
+    compile_overrides,
+    configure,
+    get_config,
+    reload_env,
+    use_config,
+)
+
+pytestmark = pytest.mark.unit
+
+
+def test_get_config_is_memoized_until_configure():
+    a = get_config()
+    assert get_config() is a
+    configure(temperature=0.3)
+    b = get_config()
+    assert b is not a
+    assert b.temperature == 0.3
+    assert get_config() is b
+
+
+def test_reload_env_picks_up_new_environment(monkeypatch):
+    monkeypatch.setenv("ALLOY_MODEL", "env-one")
+    assert get_config().model == "env-one"
+    monkeypatch.setenv("ALLOY_MODEL", "env-two")
+    assert get_config().model == "env-one"
+    reload_env()
+    assert get_config().model == "env-two"
+
+
+def test_use_config_scope_has_its_own_cache():
+    configure(model="global-model")
+    base = get_config()
+    with use_config(Config(model="scoped-model")):
+        scoped = get_config()
+        assert scoped.model == "scoped-model"
+        assert get_config() is scoped
+        configure(temperature=0.9)
+        assert get_config().model == "scoped-model"
+    assert get_config() is not base
+    assert get_config().model == "global-model"
+    assert get_config().temperature == 0.9
+
+
+def test_override_plan_matches_dict_overrides_and_is_reused():
+    configure(model="global", extra={"a": 1})
+    overrides = {"system": "be brief", "temperature": 0.0, "extra": {"b": 2}, "bogus": 1}
+    plan = compile_overrides(overrides)
+    via_plan = get_config(plan)
+    via_dict = get_config(overrides)
+    assert via_plan == via_dict
+    assert via_plan.default_system == "be brief"
+    assert via_plan.extra == {"a": 1, "b": 2}
+    assert get_config(plan) is via_plan
+    configure(model="other")
+    assert get_config(plan).model == "other"
+
+
+def test_override_plan_reapplies_fixups():
+    plan = compile_overrides({"model": "ollama:gpt-oss:20b", "parallel_tools_max": 0})
+    cfg = get_config(plan)
+    assert cfg.parallel_tools_max and cfg.parallel_tools_max > 0
+    assert cfg.extra.get("ollama_api") == "openai_chat"
+    assert "ollama_api" not in (get_config().extra or {})
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from alloy import command, configure, tool
+from alloy.config import Config, use_config
+from alloy.events import Event, add_hook, enabled, remove_hook
+from alloy.models.base import ToolCall
+
+pytestmark = pytest.mark.unit
+
+
+@tool
+def add(a: int, b: int) -> int:
+    return a + b
+
+
+def _answers(*answers):
+    """Each call: one turn adding twice in parallel, then the next answer."""
+    queue = list(answers)
+    calls = [
+        ToolCall(id="c1", name="add", args={"a": 1, "b": 2}),
+        ToolCall(id="c2", name="add", args={"a": 3, "b": 4}),
+    ]
+    return lambda prompt: [{"calls": calls}, {"text": queue.pop(0)}]
+
+
+@pytest.fixture
+def seen():
+    events: list[Event] = []
+    add_hook(events.append)
+    yield events
+    remove_hook(events.append)
+
+
+def test_command_emits_correlated_lifecycle_events(scripted_backend, seen):
+    scripted_backend(_answers("42"), [add])
+
+    @command(output=int)
+    def answer() -> str:
+        return "go"
+
+    assert answer() == 42
+    names = [e.name for e in seen]
+    assert names[:2] == ["command.start", "config.resolved"]
+    assert names[-2:] == ["parse.success", "command.end"]
+    assert names.count("request.sent") == names.count("response.received") == 2
+    assert names.count("tool.start") == names.count("tool.end") == 2
+    assert {e.run_id for e in seen} == {seen[0].run_id} and seen[0].run_id
+    assert all(e.command == "answer" for e in seen)
+    assert [e.ts for e in seen] == sorted(e.ts for e in seen)
+
+    ends = {e.data["call_id"]: e for e in seen if e.name == "tool.end"}
+    starts = {e.data["call_id"]: e for e in seen if e.name == "tool.start"}
+    assert starts["c1"].data["args"] == {"a": 1, "b": 2}
+    assert ends["c1"].span_id == starts["c1"].span_id
+    assert ends["c2"].data["ok"] and ends["c2"].data["result_size"] == 1
+    first = next(e for e in seen if e.name == "response.received")
+    assert first.data["tool_calls"] == 2 and first.data["provider"] == "fake"
+    assert seen[-1].data["ok"] is True and seen[-1].data["elapsed"] >= 0
+
+
+def test_retry_and_parse_failure_events(scripted_backend, seen):
+    configure(retry=2, retry_base_delay=0.0, retry_max_delay=0.0, retry_budget=1.0)
+    scripted_backend(_answers("not a number", "7"), [add])
+
+    @command(output=int)
+    def answer() -> str:
+        return "go"
+
+    assert answer() == 7
+    names = [e.name for e in seen]
+    assert names.index("parse.failure") < names.index("retry") < names.index("parse.success")
+    failure = next(e for e in seen if e.name == "parse.failure")
+    assert failure.data["type"] == "int" and "not a number" in failure.data["error"]
+    assert next(e for e in seen if e.name == "retry").data["attempt"] == 1
+
+
+def test_config_hooks_are_scoped(scripted_backend):
+    scripted_backend(_answers("1", "2"), [add])
+    scoped: list[Event] = []
+
+    @command(output=int)
+    def answer() -> str:
+        return "go"
+
+    assert not enabled()
+    with use_config(Config(hooks=[scoped.append])):
+        assert answer() == 1
+    count = len(scoped)
+    assert count > 0 and all(e.run_id == scoped[0].run_id for e in scoped)
+    assert answer() == 2
+    assert len(scoped) == count
+
+
+def test_async_command_events(scripted_backend, seen):
+    scripted_backend(_answers("5"), [add])
+
+    @command(output=int)
+    async def answer() -> str:
+        return "go"
+
+    assert asyncio.run(answer()) == 5
+    names = [e.name for e in seen]
+    assert names[0] == "command.start" and names[-1] == "command.end"
+    assert names.count("tool.end") == 2
+    assert {e.run_id for e in seen} == {seen[0].run_id}
+
+
+def test_failing_hook_does_not_break_command(scripted_backend, seen):
+    scripted_backend(_answers("3"), [add])
+
+    def boom(event):
+        raise RuntimeError("hook failed")
+
+    add_hook(boom)
+    try:
+
+        @command(output=int)
+        def answer() -> str:
+            return "go"
+
+        assert answer() == 3
+    finally:
+        remove_hook(boom)
+    assert seen[-1].name == "command.end"
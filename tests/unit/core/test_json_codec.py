@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from decimal import Decimal
+
+import pytest
+
+from alloy import codec
+from alloy.models.base import serialize_tool_payload
+
+pytestmark = pytest.mark.unit
+
+BACKENDS = ["json"] + [n for n in ("orjson", "msgspec") if codec._load_backend(n)]
+
+
+@dataclass
+class Money:
+    amount: Decimal
+    currency: str
+
+
+@dataclass
+class Order:
+    id: int
+    total: Money
+    lines: tuple[str, ...]
+    meta: dict[int, str]
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request):
+    previous = codec.codec_name()
+    assert codec.set_codec(request.param) == request.param
+    codec.register_encoder(Decimal, str)
+    yield request.param
+    codec.unregister_encoder(Decimal)
+    codec.unregister_encoder(Money)
+    codec.set_codec(previous)
+
+
+def test_dataclass_graphs_encode_without_asdict(backend, monkeypatch):
+    import dataclasses
+
+    monkeypatch.setattr(dataclasses, "asdict", lambda *a, **k: pytest.fail("asdict used"))
+    order = Order(7, Money(Decimal("9.50"), "EUR"), ("a", "b"), {1: "x"})
+    out = json.loads(serialize_tool_payload(order))
+    assert out == {
+        "id": 7,
+        "total": {"amount": "9.50", "currency": "EUR"},
+        "lines": ["a", "b"],
+        "meta": {"1": "x"},
+    }
+
+
+def test_registered_encoder_overrides_dataclass_and_loads_roundtrip(backend):
+    codec.register_encoder(Money, lambda m: f"{m.amount} {m.currency}")
+    assert json.loads(codec.dumps([Money(Decimal("1"), "USD")])) == ["1 USD"]
+    assert codec.loads('{"a": [1, 2.5, null]}') == {"a": [1, 2.5, None]}
+    with pytest.raises(ValueError):
+        codec.loads("{not json")
+
+
+def test_unencodable_payload_falls_back_to_str(backend):
+    class Opaque:
+        def __str__(self) -> str:
+            return "opaque!"
+
+    assert serialize_tool_payload(Opaque()) == "opaque!"
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from alloy import ask, command, configure, metrics, tool
+from alloy.cache import clear_cache
+from alloy.models.base import ToolCall
+
+pytestmark = pytest.mark.unit
+
+
+@tool
+def lookup(key: str) -> str:
+    return key.upper()
+
+
+def _answers(*answers):
+    """Each call: a lookup turn then the next answer; an exception fails the call."""
+    queue = list(answers)
+    call = ToolCall(id="1", name="lookup", args={"key": "x"})
+    usage = {"input_tokens": 10, "output_tokens": 2}
+
+    def script(prompt):
+        answer = queue.pop(0)
+        if isinstance(answer, Exception):
+            return [answer]
+        return [{"calls": [call], "usage": usage}, {"text": answer, "usage": usage}]
+
+    return script
+
+
+@pytest.fixture
+def registry():
+    reg = metrics.enable(metrics.Registry())
+    yield reg
+    metrics.disable()
+
+
+def test_command_metrics_and_rates(scripted_backend, registry):
+    configure(model="m1", retry=2, retry_base_delay=0.0, retry_budget=1.0)
+    scripted_backend(_answers("nope", "42"), [lookup])
+
+    @command(output=int)
+    def answer() -> str:
+        return "go"
+
+    assert answer() == 42
+    get = registry.get
+    assert get("alloy_commands_total").value("answer", "m1", "ok") == 1
+    assert get("alloy_command_duration_seconds").value("answer", "m1") == 1
+    assert get("alloy_command_turns").value("answer", "m1") == 1
+    assert get("alloy_commands_in_flight").value("answer") == 0
+    assert get("alloy_requests_total").value("fake", "m1", "ok") == 4
+    assert get("alloy_requests_in_flight").value("fake", "m1") == 0
+    assert get("alloy_tokens_total").value("fake", "m1", "input") == 40
+    assert get("alloy_tool_calls_total").value("lookup", "ok") == 2
+    assert get("alloy_tool_duration_seconds").value("lookup") == 2
+    assert get("alloy_retries_total").value("answer") == 1
+    assert get("alloy_parse_total").value("answer", "failure") == 1
+    turns = registry.snapshot()["alloy_command_turns"]["samples"][0]
+    assert turns["sum"] == 4 and turns["buckets"]["3"] == 0 and turns["buckets"]["5"] == 1
+
+    rates = metrics.rates(registry)
+    assert rates["parse_failure"] == 0.5
+    assert rates["finalize"] == 0.0 and rates["cache_hit"] is None
+
+
+def test_failed_request_and_cache_hits(scripted_backend, registry):
+    clear_cache()
+    scripted_backend(_answers(RuntimeError("boom"), "hello"), [lookup])
+
+    with pytest.raises(Exception):
+        ask("hi", model="m2")
+    assert registry.get("alloy_requests_total").value("fake", "m2", "error") == 1
+    assert registry.get("alloy_requests_in_flight").value("fake", "m2") == 0
+    assert registry.get("alloy_commands_total").value("ask", "m2", "error") == 1
+
+    assert ask("hi", model="m2", cache=True) == "hello"
+    assert ask("hi", model="m2", cache=True) == "hello"
+    lookups = registry.get("alloy_cache_lookups_total")
+    assert lookups.value("ask", "miss") == 1 and lookups.value("ask", "hit") == 1
+    assert metrics.rates(registry)["cache_hit"] == 0.5
+    clear_cache()
+
+
+def test_sharded_counters_and_histograms_under_threads():
+    reg = metrics.Registry()
+    counter = reg.counter("c_total", "c", ("k",))
+    hist = reg.histogram("h_seconds", "h", (), buckets=(0.1, 1.0))
+
+    def work():
+        for i in range(5000):
+            counter.inc("a")
+            hist.observe(value=0.5 if i % 2 else 2.0)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert counter.value("a") == 40000
+    sample = reg.snapshot()["h_seconds"]["samples"][0]
+    assert sample["count"] == 40000
+    assert sample["buckets"] == {"0.1": 0, "1": 20000, "+Inf": 40000}
+    assert sample["sum"] == pytest.approx(20000 * 0.5 + 20000 * 2.0)
+
+
+def test_exited_threads_fold_their_shards():
+    reg = metrics.Registry()
+    counter = reg.counter("c_total", "c", ())
+
+    for _ in range(50):
+        t = threading.Thread(target=lambda: counter.inc(amount=2.0))
+        t.start()
+        t.join()
+    assert counter.value() == 100
+    assert len(counter._children[()]._slots) <= 1
+
+
+def test_prometheus_text_format():
+    reg = metrics.Registry()
+    reg.counter("x_total", "Things.", ("name",)).inc('a"b\\c', amount=2)
+    reg.gauge("y", "Level.").add(amount=1.5)
+    reg.histogram("z_seconds", "Latency.", ("op",), buckets=(0.5,)).observe("read", value=0.25)
+    assert reg.render() == (
+        "# HELP x_total Things.\n"
+        "# TYPE x_total counter\n"
+        'x_total{name="a\\"b\\\\c"} 2\n'
+        "# HELP y Level.\n"
+        "# TYPE y gauge\n"
+        "y 1.5\n"
+        "# HELP z_seconds Latency.\n"
+        "# TYPE z_seconds histogram\n"
+        'z_seconds_bucket{op="read",le="0.5"} 1\n'
+        'z_seconds_bucket{op="read",le="+Inf"} 1\n'
+        'z_seconds_sum{op="read"} 0.25\n'
+        'z_seconds_count{op="read"} 1\n'
+    )
+    reg.reset()
+    assert reg.snapshot()["x_total"]["samples"] == []
+    with pytest.raises(ValueError):
+        reg.gauge("x_total", "clash")
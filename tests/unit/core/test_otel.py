@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import asyncio
+import subprocess
+import sys
+from dataclasses import dataclass
+
+import pytest
+
+from alloy import command, tool
+from alloy.models.base import ToolCall
+
+pytest.importorskip("opentelemetry.sdk")
+
+from opentelemetry.sdk.trace import TracerProvider  # noqa: E402
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor  # noqa: E402
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (  # noqa: E402
+    InMemorySpanExporter,
+)
+from opentelemetry.trace import StatusCode, get_tracer  # noqa: E402
+
+from alloy import otel  # noqa: E402
+
+pytestmark = pytest.mark.unit
+
+
+@dataclass
+class Summary:
+    value: str
+
+
+@pytest.fixture
+def exporter():
+    exp = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exp))
+    otel.instrument(provider)
+    yield exp, provider
+    otel.uninstrument()
+
+
+def _make_tool(provider):
+    tracer = get_tracer("test", tracer_provider=provider)
+
+    @tool
+    def lookup(key: str) -> str:
+        with tracer.start_as_current_span(f"inner {key}"):
+            return key.upper()
+
+    return lookup
+
+
+def _lookups(answer='{"value": "ok"}'):
+    """Each call: one turn looking up two keys in parallel, then ``answer``."""
+    calls = [
+        ToolCall(id="a", name="lookup", args={"key": "x"}),
+        ToolCall(id="b", name="lookup", args={"key": "y"}),
+    ]
+    return lambda prompt: [{"calls": calls}, {"text": answer}]
+
+
+def _by_name(spans):
+    return {s.name: s for s in spans}
+
+
+def _check_tree(spans):
+    names = _by_name(spans)
+    root = names["command summarize"]
+    assert root.parent is None
+    for name in ("resolve config", "chat gpt-5-mini", "execute_tool lookup", "parse"):
+        assert names[name].parent.span_id == root.context.span_id
+    chats = [s for s in spans if s.name.startswith("chat ")]
+    assert len(chats) == 2
+    assert chats[0].attributes["gen_ai.operation.name"] == "chat"
+    assert chats[0].attributes["gen_ai.system"] == "fake"
+    assert chats[0].attributes["gen_ai.request.model"] == "gpt-5-mini"
+    tools = [s for s in spans if s.name == "execute_tool lookup"]
+    assert {s.attributes["gen_ai.tool.call.id"] for s in tools} == {"a", "b"}
+    for t in tools:
+        assert t.attributes["gen_ai.operation.name"] == "execute_tool"
+        assert t.attributes["alloy.tool.queue_wait"] >= 0
+    inner = {s.name: s for s in spans if s.name.startswith("inner ")}
+    tool_ids = {t.context.span_id for t in tools}
+    assert {s.parent.span_id for s in inner.values()} == tool_ids
+    assert all(s.context.trace_id == root.context.trace_id for s in spans)
+
+
+def test_span_tree_for_sync_command(scripted_backend, exporter):
+    exp, provider = exporter
+    scripted_backend(_lookups(), [_make_tool(provider)])
+
+    @command(output=Summary)
+    def summarize() -> str:
+        return "go"
+
+    assert summarize() == Summary(value="ok")
+    _check_tree(exp.get_finished_spans())
+
+
+def test_span_tree_for_async_command(scripted_backend, exporter):
+    exp, provider = exporter
+    scripted_backend(_lookups(), [_make_tool(provider)])
+
+    @command(output=Summary)
+    async def summarize() -> str:
+        return "go"
+
+    assert asyncio.run(summarize()) == Summary(value="ok")
+    _check_tree(exp.get_finished_spans())
+
+
+def test_failures_set_error_status(scripted_backend, exporter):
+    exp, provider = exporter
+    scripted_backend(_lookups(answer="not json"), [_make_tool(provider)])
+
+    @command(output=Summary)
+    def summarize() -> str:
+        return "go"
+
+    with pytest.raises(Exception):
+        summarize()
+    names = _by_name(exp.get_finished_spans())
+    assert names["parse"].status.status_code == StatusCode.ERROR
+    assert names["command summarize"].status.status_code == StatusCode.ERROR
+
+
+def test_failed_request_ends_chat_span_with_error(scripted_backend, exporter):
+    exp, provider = exporter
+    scripted_backend(lambda prompt: [RuntimeError("provider down")])
+
+    @command(output=Summary)
+    def summarize() -> str:
+        return "go"
+
+    with pytest.raises(Exception):
+        summarize()
+    chats = [s for s in exp.get_finished_spans() if s.name.startswith("chat ")]
+    assert len(chats) >= 1
+    assert all(s.status.status_code == StatusCode.ERROR for s in chats)
+    assert "provider down" in chats[0].status.description
+
+
+def test_no_spans_after_uninstrument(scripted_backend, exporter):
+    exp, provider = exporter
+    otel.uninstrument()
+    scripted_backend(_lookups(), [_make_tool(provider)])
+
+    @command(output=Summary)
+    def summarize() -> str:
+        return "go"
+
+    summarize()
+    assert [s.name for s in exp.get_finished_spans()] == ["inner x", "inner y"]
+
+
+def test_alloy_import_does_not_load_opentelemetry():
+    code = (
+        "import sys, alloy, alloy.command, alloy.events; "
+        "assert not any(m.startswith('opentelemetry') for m in sys.modules)"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
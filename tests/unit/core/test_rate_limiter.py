@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import asyncio
+import importlib
+import threading
+
+import pytest
+
+from alloy.config import Config
+from alloy.models.base import BaseLoopState, ModelBackend
+from alloy.ratelimit import (
+    FileRateLimitStore,
+    MemoryRateLimitStore,
+    RateLimiter,
+    estimate_tokens,
+)
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    rl = importlib.import_module("alloy.ratelimit")
+    fresh = RateLimiter()
+    monkeypatch.setattr(rl, "_limiter", fresh)
+    return fresh
+
+
+def test_request_bucket_paces_after_burst():
+    now = [0.0]
+    store = MemoryRateLimitStore(clock=lambda: now[0])
+    limits = {"requests": 60.0}
+    waits = [store.reserve("openai:m", limits, {"requests": 1.0}) for _ in range(62)]
+    assert waits[:60] == [0.0] * 60
+    assert waits[60] == pytest.approx(1.0)
+    assert waits[61] == pytest.approx(2.0)
+    now[0] += 10.0
+    assert store.reserve("openai:m", limits, {"requests": 1.0}) == 0.0
+
+
+def test_token_bucket_uses_estimate_and_keys_by_model():
+    store = MemoryRateLimitStore(clock=lambda: 0.0)
+    limits = {"tokens": 1000.0}
+    assert store.reserve("p:a", limits, {"tokens": 800.0}) == 0.0
+    assert store.reserve("p:a", limits, {"tokens": 400.0}) == pytest.approx(12.0)
+    assert store.reserve("p:b", limits, {"tokens": 400.0}) == 0.0
+    assert estimate_tokens("x" * 40, Config(max_tokens=100)) == 110
+
+
+def test_file_store_shares_state_between_instances(tmp_path):
+    now = [1000.0]
+    a = FileRateLimitStore(str(tmp_path), clock=lambda: now[0])
+    b = FileRateLimitStore(str(tmp_path), clock=lambda: now[0])
+    limits = {"requests": 2.0}
+    assert a.reserve("openai:gpt", limits, {"requests": 1.0}) == 0.0
+    assert b.reserve("openai:gpt", limits, {"requests": 1.0}) == 0.0
+    assert a.reserve("openai:gpt", limits, {"requests": 1.0}) == pytest.approx(30.0)
+
+
+def test_limiter_is_noop_without_limits(limiter):
+    assert limiter.reserve("openai", Config(model="m")) == 0.0
+    assert limiter.stats() == {}
+
+
+def test_tool_loop_requests_pass_through_limiter(monkeypatch, limiter):
+    rl = importlib.import_module("alloy.ratelimit")
+    sleeps: list[float] = []
+    monkeypatch.setattr(rl.time, "sleep", sleeps.append)
+
+    class _State(BaseLoopState[str]):
+        def make_request(self, client):
+            return "done"
+
+        async def amake_request(self, client):
+            return "done"
+
+        def extract_text(self, response):
+            return response
+
+        def extract_tool_calls(self, response):
+            return None
+
+        def add_tool_results(self, calls, results):
+            pass
+
+    class _Backend(ModelBackend):
+        provider_name = "stub"
+
+    cfg = Config(model="m", rpm=1)
+    be = _Backend()
+    assert be.run_tool_loop(None, _State(cfg, {})) == "done"
+    assert be.run_tool_loop(None, _State(cfg, {})) == "done"
+    assert sleeps and sleeps[0] == pytest.approx(60.0, rel=0.01)
+
+    async_sleeps: list[float] = []
+
+    async def fake_sleep(s: float) -> None:
+        async_sleeps.append(s)
+
+    monkeypatch.setattr(rl.asyncio, "sleep", fake_sleep)
+    assert asyncio.run(be.arun_tool_loop(None, _State(cfg, {}))) == "done"
+    assert async_sleeps
+    stats = rl.rate_limit_stats()[("stub", "m")]
+    assert stats.requests == 3
+    assert stats.throttled == 2
+    assert stats.max_wait >= stats.total_wait / 2
+
+
+def test_async_acquire_reserves_file_store_off_the_event_loop(monkeypatch, limiter, tmp_path):
+    rl = importlib.import_module("alloy.ratelimit")
+    threads: list[int] = []
+
+    def reserve(provider, config, prompt=None):
+        threads.append(threading.get_ident())
+        return 0.0
+
+    monkeypatch.setattr(limiter, "reserve", reserve)
+
+    async def main() -> int:
+        await rl.aacquire("p", Config(model="m", rpm=10))
+        await rl.aacquire("p", Config(model="m", rpm=10, rate_limit_dir=str(tmp_path)))
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(main())
+    assert threads[0] == loop_thread
+    assert threads[1] != loop_thread
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import asyncio
+import importlib
+from dataclasses import dataclass
+
+import pytest
+
+from alloy import ask, command, configure
+from alloy.cache import (
+    MemoryTier,
+    SQLiteTier,
+    cache_key,
+    cache_stats,
+    clear_cache,
+)
+from alloy.config import Config
+from alloy.models.base import ModelBackend
+
+pytestmark = pytest.mark.unit
+
+
+@dataclass
+class Item:
+    name: str
+
+
+class _CountingBackend(ModelBackend):
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.calls = 0
+
+    def complete(self, prompt: str, *, tools=None, output_schema=None, config: Config) -> str:
+        self.calls += 1
+        return self.text
+
+    async def acomplete(
+        self, prompt: str, *, tools=None, output_schema=None, config: Config
+    ) -> str:
+        self.calls += 1
+        return self.text
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    clear_cache()
+    yield
+    clear_cache()
+
+
+def _patch(monkeypatch, backend):
+    for mod in ("alloy.command", "alloy.ask"):
+        monkeypatch.setattr(importlib.import_module(mod), "get_backend", lambda m: backend)
+
+
+def test_cache_key_covers_request_inputs():
+    base = cache_key("hi", config=Config(model="m", temperature=0.0))
+    assert base == cache_key("hi", config=Config(model="m", temperature=0.0))
+    assert base != cache_key("hi", config=Config(model="m", temperature=0.5))
+    assert base != cache_key("hi", config=Config(model="other", temperature=0.0))
+    assert base != cache_key("hi", config=Config(model="m", temperature=0.0, max_tokens=5))
+    assert base != cache_key("hi", config=Config(model="m", temperature=0.0, default_system="s"))
+    assert base != cache_key(
+        "hi", config=Config(model="m", temperature=0.0), output_schema={"type": "string"}
+    )
+    extra = cache_key("hi", config=Config(model="m", temperature=0.0, extra={"a": 1, "b": 2}))
+    assert base != extra
+    assert extra == cache_key(
+        "hi", config=Config(model="m", temperature=0.0, extra={"b": 2, "a": 1})
+    )
+    assert extra != cache_key(
+        "hi", config=Config(model="m", temperature=0.0, extra={"a": 1, "b": 3})
+    )
+
+
+def test_typed_command_hits_cache_and_still_parses(monkeypatch):
+    backend = _CountingBackend('{"name": "a"}')
+    _patch(monkeypatch, backend)
+
+    @command(output=Item, cache=True)
+    def make(n: int) -> str:
+        return f"make {n}"
+
+    assert make(1) == Item(name="a")
+    assert make(1) == Item(name="a")
+    assert make(2) == Item(name="a")
+    assert backend.calls == 2
+    stats = cache_stats()
+    assert (stats.hits, stats.misses, stats.memory_hits) == (1, 2, 1)
+    assert asyncio.run(make.async_(1)) == Item(name="a")
+    assert backend.calls == 2
+
+
+def test_config_default_and_per_command_opt_out(monkeypatch):
+    backend = _CountingBackend("hello")
+    _patch(monkeypatch, backend)
+    configure(cache=True)
+
+    @command
+    def cached() -> str:
+        return "same"
+
+    @command(cache=False)
+    def live() -> str:
+        return "same"
+
+    cached(), cached(), live(), live()
+    assert backend.calls == 3
+    assert ask("q") == ask("q") == "hello"
+    assert backend.calls == 4
+
+
+def test_failed_parse_is_not_cached(monkeypatch):
+    backend = _CountingBackend("not json")
+    _patch(monkeypatch, backend)
+
+    @command(output=Item, cache=True)
+    def make() -> str:
+        return "make"
+
+    for _ in range(2):
+        with pytest.raises(Exception):
+            make()
+    assert backend.calls == 2
+
+
+def test_memory_tier_evicts_lru_and_expires():
+    now = [0.0]
+    tier = MemoryTier(max_entries=2, ttl=10, clock=lambda: now[0])
+    tier.set("a", "1")
+    tier.set("b", "2")
+    assert tier.get("a") == "1"
+    tier.set("c", "3")
+    assert tier.get("b") is None
+    assert tier.evictions == 1
+    now[0] = 11.0
+    assert tier.get("a") is None
+
+
+def test_sqlite_tier_persists_across_instances(tmp_path, monkeypatch):
+    path = str(tmp_path / "cache.db")
+    SQLiteTier(path).set("k", "v")
+    assert SQLiteTier(path).get("k") == "v"
+
+    backend = _CountingBackend("persisted")
+    _patch(monkeypatch, backend)
+    configure(cache=True, cache_path=path)
+
+    @command
+    def run() -> str:
+        return "p"
+
+    assert run() == "persisted"
+    for c in importlib.import_module("alloy.cache")._caches.values():
+        c.memory.clear()
+    assert run() == "persisted"
+    assert backend.calls == 1
+    assert cache_stats().disk_hits == 1
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import importlib
+
+import pytest
+
+from alloy import command, configure
+from alloy.config import Config
+from alloy.errors import CommandError, ConfigurationError, create_budget_exception
+from alloy.models.base import ModelBackend
+from alloy.retry import RetryBudget, RetryPolicy, is_retryable, retry_after
+
+pytestmark = pytest.mark.unit
+
+
+class _StatusError(Exception):
+    def __init__(self, status: int, headers: dict[str, str] | None = None) -> None:
+        super().__init__(f"status {status}")
+        self.status_code = status
+        self.response = type("_Resp", (), {"status_code": status, "headers": headers or {}})()
+
+
+class _FlakyBackend(ModelBackend):
+    def __init__(self, errors: list[Exception]) -> None:
+        self.errors = list(errors)
+        self.calls = 0
+
+    def complete(self, prompt: str, *, tools=None, output_schema=None, config: Config) -> str:
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    retry_mod = importlib.import_module("alloy.retry")
+    recorded: list[float] = []
+    monkeypatch.setattr(retry_mod, "_sleep", recorded.append)
+    monkeypatch.setattr(retry_mod, "_budget", RetryBudget())
+    return recorded
+
+
+def _policy(
+    attempts: int = 5,
+    base_delay: float = 1.0,
+    max_delay: float = 8.0,
+    budget_ratio: float | None = 0.2,
+) -> RetryPolicy:
+    return RetryPolicy(
+        attempts=attempts, base_delay=base_delay, max_delay=max_delay, budget_ratio=budget_ratio
+    )
+
+
+def test_classification_by_status():
+    assert is_retryable(_StatusError(429))
+    assert is_retryable(_StatusError(503))
+    assert is_retryable(_StatusError(529))
+    assert not is_retryable(_StatusError(401))
+    assert not is_retryable(_StatusError(400))
+    assert not is_retryable(ConfigurationError("bad"))
+    assert is_retryable(CommandError("parse failed"))
+
+
+def test_retry_on_never_overrides_fatal_errors():
+    policy = RetryPolicy(
+        attempts=3, base_delay=0.0, max_delay=0.0, budget_ratio=None, retry_on=Exception
+    )
+    assert policy.should_retry(_StatusError(401))
+    assert not policy.should_retry(ConfigurationError("bad"))
+    assert not policy.should_retry(
+        create_budget_exception(
+            budget="max_total_input_tokens", limit=10, used=20, partial_text=None
+        )
+    )
+
+
+def test_retry_after_header_and_gemini_retry_info():
+    assert retry_after(_StatusError(429, {"retry-after": "3"})) == 3.0
+    assert retry_after(_StatusError(429, {"retry-after-ms": "250"})) == 0.25
+    gemini = Exception("quota")
+    gemini.details = {
+        "error": {
+            "details": [{"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": "7s"}]
+        }
+    }
+    assert retry_after(gemini) == 7.0
+    assert retry_after(Exception("plain")) is None
+
+
+def test_full_jitter_backoff_is_capped():
+    policy = _policy()
+    assert [policy.delay(i, Exception(), rand=lambda: 1.0) for i in range(5)] == [
+        1.0,
+        2.0,
+        4.0,
+        8.0,
+        8.0,
+    ]
+    assert policy.delay(3, Exception(), rand=lambda: 0.5) == 4.0
+    # Retry-After wins over backoff but is still capped.
+    assert policy.delay(0, _StatusError(429, {"retry-after": "5"})) == 5.0
+    assert policy.delay(0, _StatusError(429, {"retry-after": "60"})) == 8.0
+
+
+def test_budget_limits_retries_and_refills_with_clock():
+    now = [0.0]
+    budget = RetryBudget(capacity=2, min_per_second=0.5, clock=lambda: now[0])
+    assert budget.try_withdraw() and budget.try_withdraw()
+    assert not budget.try_withdraw()
+    for _ in range(5):
+        budget.deposit(0.2)
+    assert budget.try_withdraw()
+    assert not budget.try_withdraw()
+    now[0] += 2.0
+    assert budget.try_withdraw()
+
+
+def test_command_backs_off_and_honors_retry_after(monkeypatch, sleeps):
+    backend = _FlakyBackend([_StatusError(503), _StatusError(429, {"retry-after": "2"})])
+    monkeypatch.setattr(importlib.import_module("alloy.command"), "get_backend", lambda m: backend)
+    configure(retry=3, retry_base_delay=0.01)
+
+    @command
+    def ask() -> str:
+        return "hi"
+
+    assert ask() == "ok"
+    assert backend.calls == 3
+    assert len(sleeps) == 2
+    assert 0.0 <= sleeps[0] <= 0.01
+    assert sleeps[1] == 2.0
+
+
+def test_command_fails_fast_on_fatal_status(monkeypatch, sleeps):
+    backend = _FlakyBackend([_StatusError(401), _StatusError(401)])
+    monkeypatch.setattr(importlib.import_module("alloy.command"), "get_backend", lambda m: backend)
+    configure(retry=3)
+
+    @command
+    def ask() -> str:
+        return "hi"
+
+    with pytest.raises(CommandError):
+        ask()
+    assert backend.calls == 1
+    assert sleeps == []
+
+
+def test_command_stops_when_budget_is_spent(monkeypatch, sleeps):
+    retry_mod = importlib.import_module("alloy.retry")
+    monkeypatch.setattr(
+        retry_mod, "_budget", RetryBudget(capacity=1, min_per_second=0, clock=lambda: 0.0)
+    )
+    backend = _FlakyBackend([_StatusError(503)] * 5)
+    monkeypatch.setattr(importlib.import_module("alloy.command"), "get_backend", lambda m: backend)
+    configure(retry=5, retry_base_delay=0.0)
+
+    @command
+    def ask() -> str:
+        return "hi"
+
+    with pytest.raises(CommandError, match="after 2 attempts"):
+        ask()
+    assert backend.calls == 2
+
+
+def test_command_does_not_retry_budget_overrun_with_retry_on(monkeypatch, sleeps):
+    overrun = create_budget_exception(
+        budget="max_cost_usd", limit=0.01, used=0.02, partial_text="p"
+    )
+    backend = _FlakyBackend([overrun, overrun])
+    monkeypatch.setattr(importlib.import_module("alloy.command"), "get_backend", lambda m: backend)
+    configure(retry=3, retry_on=Exception)
+
+    @command
+    def ask() -> str:
+        return "hi"
+
+    with pytest.raises(CommandError, match="max_cost_usd"):
+        ask()
+    assert backend.calls == 1
+    assert sleeps == []
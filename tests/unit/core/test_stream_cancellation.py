@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import asyncio
+import importlib
+from types import SimpleNamespace
+
+import pytest
+
+from alloy import ask, command, configure
+from alloy.models.base import ClosingStream, ModelBackend, ToolCall
+
+pytestmark = pytest.mark.unit
+
+
+class _ToolStreamBackend(ModelBackend):
+    """Streams two turns; the first ends with a tool call."""
+
+    def __init__(self):
+        self.closed: list[int] = []
+        self.tool_turns = 0
+
+    def _handle_tool_turn(self, state, calls):
+        self.tool_turns += 1
+
+    def _step(self, turn: int):
+        def gen():
+            try:
+                yield f"turn{turn}-a"
+                yield f"turn{turn}-b"
+            finally:
+                self.closed.append(turn)
+
+        class _Wrapper:
+            def __init__(self, g):
+                self._g = g
+
+            def __iter__(self):
+                return self
+
+            def __next__(self):
+                return next(self._g)
+
+            def close(self):
+                self._g.close()
+
+            def _alloy_get_tool_calls(self):
+                return [ToolCall(id="1", name="work", args={})] if turn == 0 else []
+
+        return _Wrapper(gen())
+
+    def stream(self, prompt, *, tools=None, output_schema=None, config=None):
+        turns = iter(range(2))
+        return self.run_stream_loop(
+            SimpleNamespace(config=None), lambda state: self._step(next(turns))
+        )
+
+    async def astream(self, prompt, *, tools=None, output_schema=None, config=None):
+        async def agen():
+            try:
+                for i in range(100):
+                    await asyncio.sleep(0.001)
+                    yield f"c{i} "
+            finally:
+                self.closed.append(-1)
+
+        return agen()
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    be = _ToolStreamBackend()
+    for mod in ("alloy.command", "alloy.ask"):
+        monkeypatch.setattr(importlib.import_module(mod), "get_backend", lambda m: be)
+    monkeypatch.setattr(importlib.import_module("alloy.models.base"), "acquire", lambda *a: None)
+    configure(model="test-model")
+    return be
+
+
+def test_closing_tool_stream_closes_turn_and_skips_tool_turns(backend):
+    stream = ask.stream("hi")
+    assert next(stream) == "turn0-a"
+    stream.close()
+    assert backend.closed == [0]
+    assert backend.tool_turns == 0
+
+
+def test_stop_when_ends_stream_and_closes_provider(backend):
+    @command
+    def chat() -> str:
+        return "hi"
+
+    configure(stream_stop_when=lambda text: "turn1" in text)
+    assert list(chat.stream()) == ["turn0-a", "turn0-b", "turn1-a"]
+    assert backend.tool_turns == 1
+    assert backend.closed == [0, 1]
+
+
+def test_max_bytes_truncates_and_stops(backend):
+    assert list(ask.stream("hi", stream_max_bytes=10)) == ["turn0-a", "tur"]
+    assert backend.closed == [0]
+
+
+def test_turn_close_errors_are_not_swallowed(backend):
+    class _FailingTurn:
+        def __iter__(self):
+            return self
+
+        def __next__(self):
+            return "x"
+
+        def close(self):
+            raise RuntimeError("close failed")
+
+    stream = backend.run_stream_loop(SimpleNamespace(config=None), lambda state: _FailingTurn())
+    assert next(stream) == "x"
+    with pytest.raises(RuntimeError, match="close failed"):
+        stream.close()
+
+
+def test_cancelled_async_consumer_closes_provider_stream(backend):
+    async def run():
+        seen: list[str] = []
+
+        async def consume():
+            async for chunk in ask.stream_async("hi"):
+                seen.append(chunk)
+
+        task = asyncio.create_task(consume())
+        while len(seen) < 3:
+            await asyncio.sleep(0.001)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return seen
+
+    seen = asyncio.run(run())
+    assert 3 <= len(seen) < 100
+    assert backend.closed == [-1]
+
+
+def test_closing_stream_releases_unstarted_sdk_stream():
+    class _Sdk:
+        closed = False
+
+        def __iter__(self):
+            return iter(["x"])
+
+        def close(self):
+            self.closed = True
+
+    sdk = _Sdk()
+    stream = ClosingStream((c for c in sdk), sdk)
+    stream.close()
+    assert sdk.closed
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import asyncio
+import importlib
+
+import pytest
+
+from alloy import ask, command, configure
+from alloy.config import Config
+from alloy.errors import ConfigurationError
+from alloy.models.base import ModelBackend
+from alloy.streaming import AsyncCoalescedStream, CoalescedStream, coalesce
+
+pytestmark = pytest.mark.unit
+
+DELTAS = ["He", "llo", " wor", "ld.", " How", " are", " you?", "\nFine", " thanks"]
+
+
+class _Backend(ModelBackend):
+    def __init__(self, deltas, delay: float = 0.0):
+        self.deltas = deltas
+        self.delay = delay
+
+    def stream(self, prompt, *, tools=None, output_schema=None, config=None):
+        return iter(self.deltas)
+
+    async def astream(self, prompt, *, tools=None, output_schema=None, config=None):
+        async def agen():
+            for d in self.deltas:
+                await asyncio.sleep(self.delay)
+                yield d
+
+        return agen()
+
+
+def _use(monkeypatch, backend):
+    for mod in ("alloy.command", "alloy.ask"):
+        monkeypatch.setattr(importlib.import_module(mod), "get_backend", lambda m: backend)
+
+
+def test_unset_policy_passes_stream_through():
+    chunks = iter(DELTAS)
+    assert coalesce(chunks, Config()) is chunks
+
+
+def test_flush_bytes_keeps_first_chunk_and_content():
+    stream = coalesce(iter(DELTAS), Config(stream_flush_bytes=10))
+    assert isinstance(stream, CoalescedStream)
+    out = list(stream)
+    assert out[0] == "He"
+    assert "".join(out) == "".join(DELTAS)
+    assert all(len(c) >= 10 for c in out[1:-1])
+    assert stream.stats.chunks_in == len(DELTAS)
+    assert stream.stats.chunks_out == len(out) < len(DELTAS)
+    assert stream.stats.bytes == len("".join(DELTAS))
+
+
+@pytest.mark.parametrize(
+    "boundary,ends",
+    [("word", (" ", "\n")), ("sentence", (". ", "? ", "?\n")), ("line", ("\n",))],
+)
+def test_boundaries_split_only_at_policy_points(boundary, ends):
+    config = Config(stream_flush_bytes=4, stream_boundary=boundary)
+    out = list(coalesce(iter(DELTAS), config))
+    assert "".join(out) == "".join(DELTAS)
+    for chunk in out[1:-1]:
+        assert chunk.endswith(ends)
+
+
+def test_unknown_boundary_is_rejected():
+    with pytest.raises(ConfigurationError, match="stream_boundary"):
+        coalesce(iter(DELTAS), Config(stream_flush_bytes=4, stream_boundary="para"))
+
+
+def test_command_and_ask_streams_are_coalesced(monkeypatch):
+    _use(monkeypatch, _Backend(DELTAS))
+    configure(model="test-model", stream_flush_bytes=1000)
+
+    @command
+    def chat() -> str:
+        return "hi"
+
+    assert list(chat.stream()) == ["He", "".join(DELTAS[1:])]
+    assert list(ask.stream("hi")) == ["He", "".join(DELTAS[1:])]
+
+
+def test_async_interval_flush_fires_between_chunks(monkeypatch):
+    _use(monkeypatch, _Backend(DELTAS, delay=0.02))
+    configure(model="test-model", stream_flush_bytes=1000, stream_flush_interval_ms=50)
+
+    async def run():
+        stream = ask.stream_async("hi")
+        assert isinstance(stream, AsyncCoalescedStream)
+        return [c async for c in stream], stream.stats
+
+    out, stats = asyncio.run(run())
+    assert out[0] == "He" and "".join(out) == "".join(DELTAS)
+    assert 2 < len(out) < len(DELTAS)
+    assert stats.chunks_out == len(out)
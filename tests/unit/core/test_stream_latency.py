@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import asyncio
+import importlib
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from alloy import ask, command, configure
+from alloy.models.base import ModelBackend, ToolCall
+from alloy.streaming import (
+    GAP_BUCKETS,
+    StreamStats,
+    add_stream_stats_hook,
+    current_recorder,
+    first_byte,
+    remove_stream_stats_hook,
+)
+
+pytestmark = pytest.mark.unit
+
+
+class _SlowBackend(ModelBackend):
+    """Streams text with a fixed delay; optionally runs one tool turn first."""
+
+    def __init__(self, chunks=("a", "b", "c", "d"), delay=0.01, tool_turn=False):
+        self.chunks = chunks
+        self.delay = delay
+        self.tool_turn = tool_turn
+
+    def _handle_tool_turn(self, state, calls):
+        time.sleep(0.03)
+
+    def _step(self, turn: int):
+        rec = self._rec
+        chunks = self.chunks if turn == 1 or not self.tool_turn else ("pre",)
+        delay = self.delay
+
+        def events():
+            for c in chunks:
+                time.sleep(delay)
+                yield c
+
+        class _Turn:
+            def __init__(self):
+                self._g = iter(first_byte(events(), rec))
+
+            def __iter__(self):
+                return self
+
+            def __next__(self):
+                return next(self._g)
+
+            def _alloy_get_tool_calls(self):
+                return [ToolCall(id="1", name="t", args={})] if turn == 0 else []
+
+        return _Turn()
+
+    def stream(self, prompt, *, tools=None, output_schema=None, config=None):
+        self._rec = current_recorder()
+        turns = iter([0, 1] if self.tool_turn else [1])
+        return self.run_stream_loop(
+            SimpleNamespace(config=config), lambda state: self._step(next(turns))
+        )
+
+    async def astream(self, prompt, *, tools=None, output_schema=None, config=None):
+        chunks, delay = self.chunks, self.delay
+
+        async def agen():
+            for c in chunks:
+                await asyncio.sleep(delay)
+                yield c
+
+        return agen()
+
+
+def _use(monkeypatch, backend):
+    monkeypatch.setattr(importlib.import_module("alloy.command"), "get_backend", lambda m: backend)
+    monkeypatch.setattr(importlib.import_module("alloy.ask"), "get_backend", lambda m: backend)
+
+
+def test_stats_disabled_by_default_returns_raw_stream(monkeypatch):
+    _use(monkeypatch, _SlowBackend(delay=0))
+
+    @command
+    def gen() -> str:
+        return "go"
+
+    stream = gen.stream()
+    assert not hasattr(stream, "latency")
+    assert "".join(stream) == "abcd"
+
+
+def test_command_stream_records_ttft_gaps_and_throughput(monkeypatch):
+    configure(stream_stats=True)
+    _use(monkeypatch, _SlowBackend())
+    seen: list[StreamStats] = []
+    add_stream_stats_hook(seen.append)
+    try:
+
+        @command
+        def gen() -> str:
+            return "go"
+
+        stream = gen.stream()
+        assert "".join(stream) == "abcd"
+    finally:
+        remove_stream_stats_hook(seen.append)
+    stats = stream.latency
+    assert seen == [stats]
+    assert stats.ttfb is not None and stats.ttft is not None
+    assert 0 < stats.ttfb <= stats.ttft <= stats.duration
+    assert stats.chunks == 4 and stats.bytes == 4
+    assert sum(stats.gap_counts) == 3
+    assert len(stats.gap_counts) == len(GAP_BUCKETS) + 1
+    assert stats.max_gap >= 0.005
+    assert stats.chunks_per_second > 0 and stats.tool_stalls == []
+
+
+def test_sync_clock_starts_when_the_stream_is_first_pulled(monkeypatch):
+    configure(stream_stats=True)
+    _use(monkeypatch, _SlowBackend(delay=0.005))
+
+    @command
+    def gen() -> str:
+        time.sleep(0.05)
+        return "go"
+
+    stream = gen.stream()
+    time.sleep(0.05)
+    assert "".join(stream) == "abcd"
+    assert stream.latency.ttft < 0.05
+
+
+def test_tool_turn_stall_is_recorded(monkeypatch):
+    configure(stream_stats=True)
+    _use(monkeypatch, _SlowBackend(delay=0, tool_turn=True))
+
+    @command
+    def gen() -> str:
+        return "go"
+
+    stream = gen.stream()
+    assert "".join(stream) == "preabcd"
+    assert len(stream.latency.tool_stalls) == 1
+    assert stream.latency.tool_stalls[0] >= 0.03
+
+
+def test_hook_enables_stats_for_coalesced_async_ask(monkeypatch):
+    configure(stream_flush_bytes=2)
+    _use(monkeypatch, _SlowBackend(delay=0.005))
+    seen: list[StreamStats] = []
+    add_stream_stats_hook(seen.append)
+
+    async def run():
+        stream = ask.stream_async("hi")
+        text = "".join([c async for c in stream])
+        return stream, text
+
+    try:
+        stream, text = asyncio.run(run())
+    finally:
+        remove_stream_stats_hook(seen.append)
+    assert text == "abcd"
+    assert seen == [stream.latency]
+    assert stream.latency.chunks == 4 and sum(stream.latency.gap_counts) == 3
+
+
+def test_stats_finish_when_stream_closed_early(monkeypatch):
+    configure(stream_stats=True)
+    _use(monkeypatch, _SlowBackend(delay=0))
+    seen: list[StreamStats] = []
+    add_stream_stats_hook(seen.append)
+    try:
+        stream = ask.stream("hi")
+        assert next(stream) == "a"
+        stream.close()
+    finally:
+        remove_stream_stats_hook(seen.append)
+    assert len(seen) == 1 and seen[0].chunks == 1
@@ -4,14 +4,20 @@ from alloy import ask, command, ConfigurationError, CommandError, tool
 pytestmark = pytest.mark.unit
 
 
-def test_command_stream_disallowed_with_typed_output():
-    @command(output=int)
+def test_command_typed_stream_disallowed_with_tools(monkeypatch):
+    monkeypatch.setenv("ALLOY_BACKEND", "fake")
+
+    @tool
+    def t1() -> str:
+        return "ok"
+
+    @command(output=int, tools=[t1])
     def compute() -> str:
         return "Compute 2+2"
 
     with pytest.raises(ConfigurationError) as ei:
         _ = list(compute.stream())
-    assert "non-string typed outputs" in str(ei.value)
+    assert "Typed streaming does not support tools" in str(ei.value)
 
 
 def test_command_stream_disallowed_with_tools(monkeypatch):
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import concurrent.futures
+import importlib
+import threading
+import time
+
+import pytest
+
+from alloy import configure
+from alloy.config import Config, use_config
+from alloy.models.base import ModelBackend, ToolCall
+from alloy.tool_executor import (
+    ToolExecutor,
+    get_tool_executor,
+    set_tool_executor,
+    tool_executor_stats,
+)
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture(autouse=True)
+def _fresh_executor(monkeypatch):
+    mod = importlib.import_module("alloy.tool_executor")
+    monkeypatch.setattr(mod, "_executor", None)
+    yield
+    if mod._executor is not None:
+        mod._executor.shutdown(wait=False)
+
+
+def test_lanes_are_served_round_robin_and_capped():
+    ex = ToolExecutor(max_workers=1)
+    gate = threading.Event()
+    order: list[str] = []
+
+    def job(tag: str) -> str:
+        gate.wait(1)
+        order.append(tag)
+        return tag
+
+    a = ex.lane(limit=4)
+    b = ex.lane(limit=4)
+    futs = [ex.submit(a, job, f"a{i}") for i in range(3)]
+    futs.append(ex.submit(b, job, "b0"))
+    gate.set()
+    assert [f.result(timeout=2) for f in futs] == ["a0", "a1", "a2", "b0"]
+    assert order == ["a0", "a1", "b0", "a2"]
+    stats = ex.stats()
+    assert stats.submitted == stats.completed == 4
+    assert stats.queue_depth == 0 and stats.max_wait > 0
+    ex.shutdown()
+
+
+def test_lane_limit_bounds_concurrency():
+    ex = ToolExecutor(max_workers=8)
+    lane = ex.lane(limit=2)
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def job() -> None:
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.01)
+        with lock:
+            running -= 1
+
+    for f in [ex.submit(lane, job) for _ in range(6)]:
+        f.result(timeout=2)
+    assert peak == 2
+    ex.shutdown()
+
+
+def test_execute_tools_reuses_shared_pool_and_config_size():
+    configure(tool_workers=3)
+    names: set[str] = set()
+
+    def who(i: int) -> int:
+        names.add(threading.current_thread().name)
+        time.sleep(0.005)
+        return i
+
+    be = ModelBackend()
+    calls = [ToolCall(id=str(i), name="who", args={"i": i}) for i in range(6)]
+    for _ in range(3):
+        results = be.execute_tools(calls, parallel_tools_max=8, tool_map={"who": who})
+        assert [r.value for r in results] == list(range(6))
+    assert get_tool_executor().max_workers == 3
+    assert len(names) <= 3 and all(n.startswith("alloy-tool") for n in names)
+    assert tool_executor_stats().completed == 18
+
+
+def test_custom_executor_is_used():
+    submitted: list[object] = []
+
+    class _Recording(concurrent.futures.ThreadPoolExecutor):
+        def submit(self, fn, /, *args, **kwargs):
+            submitted.append(fn)
+            return super().submit(fn, *args, **kwargs)
+
+    pool = _Recording(max_workers=2)
+    set_tool_executor(pool, max_workers=2)
+    be = ModelBackend()
+    calls = [ToolCall(id=str(i), name="inc", args={"x": i}) for i in range(4)]
+    results = be.execute_tools(calls, parallel_tools_max=4, tool_map={"inc": lambda x: x + 1})
+    assert [r.value for r in results] == [1, 2, 3, 4]
+    assert len(submitted) == 4
+    pool.shutdown()
+
+
+def test_resize_drains_queued_calls_on_the_old_executor():
+    configure(tool_workers=1)
+    old = get_tool_executor()
+    gate = threading.Event()
+    lane = old.lane(1)
+    futures = [old.submit(lane, lambda i=i: gate.wait(2) and i) for i in range(4)]
+
+    configure(tool_workers=2)
+    new = get_tool_executor()
+    assert new is not old and new.max_workers == 2
+    gate.set()
+    assert [f.result(timeout=2) for f in futures] == [0, 1, 2, 3]
+    # The drained executor hands later calls on its lanes to its replacement.
+    assert old.submit(lane, lambda: "late").result(timeout=2) == "late"
+
+
+def test_scoped_tool_workers_do_not_replace_the_shared_executor():
+    configure(tool_workers=3)
+    ex = get_tool_executor()
+    with use_config(Config(tool_workers=7)):
+        assert get_tool_executor() is ex
+    assert get_tool_executor() is ex
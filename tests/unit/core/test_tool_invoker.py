@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import inspect
+from dataclasses import dataclass
+from typing import Optional, TypedDict
+
+import pytest
+
+from alloy import require, tool
+from alloy.errors import ToolError
+from alloy.models.base import ModelBackend, ToolCall
+
+pytestmark = pytest.mark.unit
+
+
+@dataclass
+class Point:
+    x: int
+    y: int = 0
+
+
+class Opts(TypedDict):
+    name: str
+    level: int
+
+
+@tool
+def shape(
+    n: int,
+    ratio: float,
+    flag: bool,
+    tags: list[int],
+    where: Point,
+    opts: Opts,
+    note: Optional[int] = None,
+) -> dict:
+    return {
+        "n": n,
+        "ratio": ratio,
+        "flag": flag,
+        "tags": tags,
+        "where": where,
+        "opts": opts,
+        "note": note,
+    }
+
+
+def test_invoker_is_compiled_once_and_coerces_string_annotations():
+    inv = shape.spec.invoker
+    assert inv is shape.spec.invoker
+    out = inv.coerce(
+        {
+            "n": "3",
+            "ratio": "0.5",
+            "flag": "yes",
+            "tags": ["1", 2],
+            "where": {"x": "4"},
+            "opts": {"name": "a", "level": "2"},
+            "note": "7",
+        }
+    )
+    assert out["n"] == 3 and out["ratio"] == 0.5 and out["flag"] is True
+    assert out["tags"] == [1, 2]
+    assert out["where"] == Point(x=4, y=0)
+    assert out["opts"] == {"name": "a", "level": 2}
+    assert out["note"] == 7
+
+
+def test_invoker_keeps_raw_value_when_coercion_fails():
+    assert shape.spec.invoker.coerce({"n": "abc", "extra": 1}) == {"n": "abc", "extra": 1}
+
+
+def test_tool_loop_uses_invoker_without_inspecting_signature(monkeypatch):
+    shape.spec.invoker  # compile before patching
+
+    def _boom(*a, **k):
+        raise AssertionError("signature inspected per call")
+
+    monkeypatch.setattr(inspect, "signature", _boom)
+    args = {
+        "n": "1",
+        "ratio": 1,
+        "flag": False,
+        "tags": [],
+        "where": {"x": 1, "y": 2},
+        "opts": {"name": "b", "level": 1},
+    }
+    res = ModelBackend().execute_tools(
+        [ToolCall(id="1", name="shape", args=args)], parallel_tools_max=1, tool_map={"shape": shape}
+    )
+    assert res[0].ok, res[0].error
+    assert res[0].value["n"] == 1 and res[0].value["where"] == Point(1, 2)
+
+
+def test_require_binds_defaults_via_invoker():
+    @tool
+    @require(lambda ba: ba.arguments["limit"] <= 10, "limit too high")
+    def fetch(q: str, limit: int = 5) -> str:
+        return f"{q}:{limit}"
+
+    assert fetch(q="a") == "a:5"
+    assert fetch("a", 3) == "a:3"
+    with pytest.raises(ToolError, match="limit too high"):
+        fetch(q="a", limit=50)
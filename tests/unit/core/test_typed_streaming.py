@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import asyncio
+import copy
+import importlib
+import json
+from dataclasses import dataclass
+
+import pytest
+
+from alloy import command
+from alloy.config import Config
+from alloy.errors import CommandError, ConfigurationError
+from alloy.models.base import ModelBackend
+from alloy.streaming import JSONStreamParser
+
+pytestmark = pytest.mark.unit
+
+DOC = (
+    '{"title": "Caf\\u00e9 \\"ok\\"", "n": -12.5e1, "flags": [true, false, null],'
+    ' "nested": {"xs": [{"a": 1}, []], "s": "line\\nbreak \\ud83d\\ude00"}, "e": {}}'
+)
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, len(DOC)])
+def test_parser_matches_json_loads_at_any_chunking(size):
+    p = JSONStreamParser()
+    for i in range(0, len(DOC), size):
+        p.feed(DOC[i : i + size])
+    assert p.done
+    assert p.snapshot() == json.loads(DOC)
+
+
+def test_parser_exposes_growing_strings_and_complete_scalars_only():
+    p = JSONStreamParser()
+    assert p.feed('```json\n{"name": "Ad')
+    assert p.snapshot() == {"name": "Ad"}
+    p.feed('a", "age": 3')
+    assert p.snapshot() == {"name": "Ada"}
+    p.feed("6}\n```")
+    assert p.snapshot() == {"name": "Ada", "age": 36}
+
+
+def test_snapshots_match_the_partial_value_and_share_closed_subtrees():
+    p = JSONStreamParser()
+    snaps = []
+    for ch in DOC:
+        if p.feed(ch):
+            snaps.append((p.snapshot(), copy.deepcopy(p.root)))
+    # Earlier snapshots are unaffected by later parsing.
+    assert all(snap == expected for snap, expected in snaps)
+    p = JSONStreamParser()
+    p.feed('{"done": {"a": [1, 2]}, "open": ["x", ')
+    first = p.snapshot()
+    p.feed('"y"')
+    second = p.snapshot()
+    assert second["done"] is first["done"]
+    assert first["open"] == ["x"] and second["open"] == ["x", "y"]
+
+
+@dataclass
+class Card:
+    title: str
+    tags: list[str]
+
+
+class _ChunkBackend(ModelBackend):
+    def __init__(self, chunks: list[str]) -> None:
+        self.chunks = chunks
+        self.schemas: list[object] = []
+
+    def stream(self, prompt: str, *, tools=None, output_schema=None, config: Config):
+        self.schemas.append(output_schema)
+        return iter(self.chunks)
+
+    async def astream(self, prompt: str, *, tools=None, output_schema=None, config: Config):
+        self.schemas.append(output_schema)
+
+        async def agen():
+            for c in self.chunks:
+                yield c
+
+        return agen()
+
+
+def _use(monkeypatch, chunks: list[str]) -> _ChunkBackend:
+    be = _ChunkBackend(chunks)
+    monkeypatch.setattr(importlib.import_module("alloy.command"), "get_backend", lambda m: be)
+    return be
+
+
+def test_command_stream_yields_partials_then_validated_value(monkeypatch):
+    be = _use(monkeypatch, ['{"title": "He', 'llo", "tags": ["a"', ', "b"]}'])
+
+    @command(output=Card)
+    def card() -> str:
+        return "Make a card"
+
+    stream = card.stream()
+    items = list(stream)
+    assert items[0] == {"title": "He"}
+    assert {"title": "Hello", "tags": ["a"]} in items
+    assert items[-1] == Card(title="Hello", tags=["a", "b"])
+    assert stream.final == items[-1]
+    assert be.schemas[0]["properties"]["title"] == {"type": "string"}
+
+
+def test_command_stream_unwraps_list_outputs_and_validates_final(monkeypatch):
+    _use(monkeypatch, ['{"value": [1, ', "2]}"])
+
+    @command(output=list[int])
+    def nums() -> str:
+        return "Numbers"
+
+    assert list(nums.stream()) == [[1], [1, 2], [1, 2]]
+
+    _use(monkeypatch, ["not json"])
+    with pytest.raises(CommandError):
+        list(nums.stream())
+
+
+def test_async_command_stream_is_typed(monkeypatch):
+    _use(monkeypatch, ['{"title": "T", ', '"tags": []}'])
+
+    @command(output=Card)
+    async def card() -> str:
+        return "Make a card"
+
+    async def run():
+        return [item async for item in card.stream()]
+
+    items = asyncio.run(run())
+    assert items[0] == {"title": "T"}
+    assert items[-1] == Card(title="T", tags=[])
+
+
+def test_item_parser_detaches_elements_as_they_close():
+    p = JSONStreamParser(stream_items=True)
+    p.feed('{"value": [{"title": "a", "tags": ["x"]}, {"ti')
+    assert p.take_items() == [{"title": "a", "tags": ["x"]}]
+    assert len(p.snapshot()["value"]) == 1
+    p.feed('tle": "b", "tags": []}, "plain", 3]}')
+    assert p.take_items() == [{"title": "b", "tags": []}, "plain", 3]
+    assert p.done and p.snapshot() == {"value": []}
+
+
+def test_stream_items_yields_coerced_elements_incrementally(monkeypatch):
+    chunks = ['{"value": [{"title": "one", "tags": []}', ', {"title": "two", "tags": ["t"]}]}']
+    seen: list[str] = []
+
+    class _Recording(_ChunkBackend):
+        def stream(self, prompt, *, tools=None, output_schema=None, config):
+            for c in self.chunks:
+                seen.append(c)
+                yield c
+
+    be = _Recording(chunks)
+    monkeypatch.setattr(importlib.import_module("alloy.command"), "get_backend", lambda m: be)
+
+    @command(output=list[Card])
+    def cards() -> str:
+        return "Cards"
+
+    it = cards.stream_items()
+    assert next(it) == Card(title="one", tags=[])
+    assert len(seen) == 1
+    assert list(it) == [Card(title="two", tags=["t"])]
+
+
+def test_astream_items_and_error_cases(monkeypatch):
+    _use(monkeypatch, ['{"value": [1, "2"', ", 3"])
+
+    @command(output=list[int])
+    def nums() -> str:
+        return "Numbers"
+
+    async def run():
+        out = []
+        with pytest.raises(CommandError, match="before the list"):
+            async for n in nums.astream_items():
+                out.append(n)
+        return out
+
+    assert asyncio.run(run()) == [1, 2]
+
+    @command(output=Card)
+    def card() -> str:
+        return "Card"
+
+    with pytest.raises(ConfigurationError, match="list"):
+        card.stream_items()
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import importlib
+from types import SimpleNamespace
+
+import pytest
+
+from alloy import CommandResult, command, configure, tool, usage_scope
+from alloy.models.base import ToolCall
+from alloy.usage import Usage, estimate_cost, set_price, usage_from_response
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture(autouse=True)
+def _prices(monkeypatch):
+    monkeypatch.setattr(importlib.import_module("alloy.usage"), "_prices", {})
+
+
+def test_usage_is_normalized_across_providers():
+    openai_resp = SimpleNamespace(
+        usage=SimpleNamespace(
+            input_tokens=100,
+            output_tokens=20,
+            input_tokens_details=SimpleNamespace(cached_tokens=40),
+        )
+    )
+    anthropic_resp = {
+        "usage": {
+            "input_tokens": 10,
+            "output_tokens": 5,
+            "cache_read_input_tokens": 30,
+            "cache_creation_input_tokens": 2,
+        }
+    }
+    chat_resp = {"usage": {"prompt_tokens": 7, "completion_tokens": 3}}
+    gemini_resp = SimpleNamespace(
+        usage_metadata=SimpleNamespace(
+            prompt_token_count=11, candidates_token_count=4, thoughts_token_count=6
+        )
+    )
+    ollama_resp = {"message": {"content": "hi"}, "prompt_eval_count": 9, "eval_count": 2}
+
+    assert usage_from_response(openai_resp) == Usage(100, 20, 40, 1)
+    assert usage_from_response(anthropic_resp) == Usage(42, 5, 30, 1)
+    assert usage_from_response(chat_resp) == Usage(7, 3, 0, 1)
+    assert usage_from_response(gemini_resp) == Usage(11, 10, 0, 1)
+    assert usage_from_response(ollama_resp) == Usage(9, 2, 0, 1)
+    assert usage_from_response({"output": []}) is None
+
+
+def test_price_table_uses_longest_prefix_and_cached_rate():
+    set_price("gpt-5", input=1.0, output=10.0)
+    set_price("gpt-5-mini", input=0.25, output=2.0, cached_input=0.025)
+    u = Usage(input_tokens=1_000_000, output_tokens=100_000, cached_input_tokens=200_000)
+    assert estimate_cost("gpt-5-mini-2025-08-07", u) == pytest.approx(
+        0.8 * 0.25 + 0.2 * 0.025 + 0.1 * 2.0
+    )
+    assert estimate_cost("gpt-5", u) == pytest.approx(1.0 + 1.0)
+    assert estimate_cost("claude-x", u) is None
+
+
+@tool
+def lookup(key: str) -> str:
+    return key.upper()
+
+
+def _turn(inp, out, **extra):
+    return {"usage": {"input_tokens": inp, "output_tokens": out}, **extra}
+
+
+def _answers(*answers):
+    """Two turns per call (tool turn + answer); the answers are consumed in order."""
+    queue = list(answers)
+    call = ToolCall(id="1", name="lookup", args={"key": "x"})
+    return lambda prompt: [_turn(100, 10, calls=[call]), _turn(150, 5, text=queue.pop(0))]
+
+
+def test_with_usage_counts_tool_turns_and_retries(scripted_backend):
+    configure(model="gpt-5-mini", retry=2, retry_base_delay=0.0, retry_budget=1.0)
+    set_price("gpt-5-mini", input=1.0, output=2.0)
+    scripted_backend(_answers("not a number", "42"), [lookup])
+
+    @command(output=int)
+    def answer() -> str:
+        return "go"
+
+    result = answer.with_usage()
+    assert isinstance(result, CommandResult) and result.value == 42
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        result.value = 0
+    total = result.usage.total
+    assert total == Usage(input_tokens=500, output_tokens=30, requests=4)
+    assert result.usage.by_command == {"answer": total}
+    assert result.usage.by_model == {"gpt-5-mini": total}
+    assert result.cost == pytest.approx((500 * 1.0 + 30 * 2.0) / 1_000_000)
+    assert result.usage.unpriced == []
+
+
+def test_scopes_nest_and_attribute_nested_commands(scripted_backend):
+    configure(model="local")
+    scripted_backend(_answers("1", "2", "3"), [lookup])
+
+    @command(output=int)
+    def inner() -> str:
+        return "go"
+
+    @command(output=int)
+    def outer() -> str:
+        inner()
+        return "go"
+
+    with usage_scope() as report:
+        assert outer() == 2
+        with usage_scope() as nested:
+            assert inner() == 3
+    assert nested.total.requests == 2
+    assert report.total.requests == 6
+    assert report.by_command["inner"].requests == 4
+    assert report.by_command["outer"].requests == 2
+    assert report.unpriced == ["local"] and report.cost == 0.0
+
+
+def test_async_with_usage(scripted_backend):
+    scripted_backend(_answers("5"), [lookup])
+
+    @command(output=int)
+    async def answer() -> str:
+        return "go"
+
+    result = asyncio.run(answer.with_usage())
+    assert result.value == 5
+    assert result.usage.total == Usage(input_tokens=250, output_tokens=15, requests=2)
+
+
+def test_no_scope_records_nothing_but_state_keeps_totals(scripted_backend):
+    state = scripted_backend(lambda prompt: []).new_state("", SimpleNamespace(model="m"))
+    assert state.record_usage(_turn(3, 4)) == Usage(3, 4, 0, 1)
+    assert state.record_usage({"output": []}) is None
+    assert state.usage == Usage(3, 4, 0, 1)
@@ -70,13 +70,12 @@ def test_provider_matrix_matches_backend_streaming_tools():
     # Fake backend is intentionally streaming-text only.
     assert _to_bool(table["Fake (offline)"]["streaming_tools"]) is False
 
-    # Structured output streaming is still not implemented on text stream path.
-    assert all(_to_bool(r["streaming_structured"]) is False for r in table.values())
+    # Every backend streams structured outputs (without tools).
+    assert all(_to_bool(r["streaming_structured"]) is True for r in table.values())
 
 
-def test_provider_matrix_docs_assert_streaming_structured_not_supported():
+def test_streaming_docs_describe_typed_streaming():
     path = Path(__file__).resolve().parents[3] / "docs" / "guide" / "streaming.md"
     text = path.read_text(encoding="utf-8")
-    lowered = text.lower()
-    assert "typed/structured streaming is not implemented yet" in lowered
+    assert "Typed streaming" in text
     assert "Text streaming." in text
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Annotated, Optional, TypedDict
+
+import pytest
+
+from alloy import types as types_mod
+from alloy.types import compile_decoder, parse_output
+
+pytestmark = pytest.mark.unit
+
+
+@dataclass
+class Node:
+    label: str
+    children: list[Node] = field(default_factory=list)
+
+
+class Meta(TypedDict):
+    rank: int
+    note: Optional[str]
+
+
+def test_decoder_is_compiled_once_per_type():
+    assert compile_decoder(list[Node]) is compile_decoder(list[Node])
+    assert compile_decoder(int) is int
+
+
+def test_recursive_dataclass_decodes():
+    dec = compile_decoder(Node)
+    out = dec({"label": "root", "children": [{"label": "a", "children": [{"label": "b"}]}]})
+    assert out == Node("root", [Node("a", [Node("b")])])
+
+
+def test_nested_containers_and_typeddicts():
+    dec = compile_decoder(dict[str, list[Meta]])
+    data = {"x": [{"rank": "2", "note": None, "junk": 1}], "y": "not-a-list"}
+    assert dec(data) == {"x": [{"rank": 2, "note": None}], "y": "not-a-list"}
+
+
+def test_parse_output_does_not_rebuild_schema_per_call(monkeypatch):
+    parse_output(list[int], '{"value": [1]}')
+
+    def _boom(*a, **k):
+        raise AssertionError("schema rebuilt")
+
+    monkeypatch.setattr(types_mod, "to_json_schema", _boom)
+    assert parse_output(list[int], '{"value": ["1", 2]}') == [1, 2]
+
+
+def test_unhashable_types_decode_without_the_cache():
+    tp = Annotated[int, {"unit": "s"}]
+    assert parse_output(tp, "5") == 5
+    assert parse_output(tp, "7") == 7
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import importlib
+from dataclasses import dataclass
+
+import pytest
+
+from alloy import codec, command, configure
+from alloy.models.base import (
+    ModelBackend,
+    decode_structured_output,
+    should_finalize_structured_output,
+)
+from alloy.types import StructuredOutput, to_json_schema
+
+pytestmark = pytest.mark.unit
+
+
+@dataclass
+class Item:
+    name: str
+    qty: int
+
+
+@dataclass
+class Order:
+    id: int
+    items: list[Item]
+
+
+def test_validator_checks_nested_objects_arrays_and_primitives():
+    schema = to_json_schema(Order)
+    assert not should_finalize_structured_output(
+        '{"id": 1, "items": [{"name": "a", "qty": 2}]}', schema
+    )
+    assert should_finalize_structured_output('{"id": 1, "items": [{"name": "a"}]}', schema)
+    assert should_finalize_structured_output('{"id": "1", "items": []}', schema)
+    assert should_finalize_structured_output('{"id": 1, "items": {}}', schema)
+    assert should_finalize_structured_output("not json", schema)
+
+
+def test_decoded_once_and_reused_by_parse(monkeypatch):
+    calls = 0
+    real = codec.loads
+
+    def counting(data):
+        nonlocal calls
+        calls += 1
+        return real(data)
+
+    monkeypatch.setattr(codec, "loads", counting)
+
+    class _Backend(ModelBackend):
+        def complete(self, prompt, *, tools=None, output_schema=None, config=None):
+            out = decode_structured_output(
+                '```json\n{"id": 7, "items": [{"name": "x", "qty": 3}]}\n```', output_schema
+            )
+            assert not should_finalize_structured_output(out, output_schema)
+            return out
+
+    backend = _Backend()
+    monkeypatch.setattr(importlib.import_module("alloy.command"), "get_backend", lambda m: backend)
+    configure(model="test-model", cache=False)
+
+    @command(output=Order)
+    def make() -> str:
+        return "order"
+
+    assert make() == Order(id=7, items=[Item("x", 3)])
+    assert calls == 1
+
+
+def test_string_outputs_and_rechecks_skip_decoding():
+    schema = to_json_schema(Order)
+    out = decode_structured_output('{"id": 1, "items": []}', schema)
+    assert isinstance(out, StructuredOutput) and out.valid
+    assert decode_structured_output(out, schema) is out
+    assert type(decode_structured_output("hello", to_json_schema(str))) is str